@@ -2,12 +2,23 @@
 """
 A2A Observability System
 Comprehensive tracking and monitoring of A2A agent conversations and handovers
+
+Storage is bounded so overhead per event stays constant and memory does not
+grow with uptime: events and handoffs live in ring buffers, completed traces in
+a completion-ordered index with count/age retention, and active traces are
+spread over sharded locks so concurrent sessions don't contend.
+
+Latencies are recorded per event into mergeable streaming histograms, giving
+p50/p95/p99 per agent, stage, model, tool and orchestration strategy over
+1m/15m/1h sliding windows.
 """
 
 import json
+import os
 import uuid
 import time
 import logging
+from collections import OrderedDict, deque
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Union
 from dataclasses import dataclass, asdict
@@ -15,8 +26,18 @@ from enum import Enum
 import threading
 from contextlib import contextmanager
 
+from latency_histogram import LatencyTracker
+
 logger = logging.getLogger(__name__)
 
+# Retention (overridable per engine)
+MAX_EVENT_HISTORY = int(os.getenv('A2A_OBS_MAX_EVENTS', '10000'))
+MAX_HANDOFF_HISTORY = int(os.getenv('A2A_OBS_MAX_HANDOFFS', '5000'))
+MAX_COMPLETED_TRACES = int(os.getenv('A2A_OBS_MAX_TRACES', '1000'))
+MAX_EVENTS_PER_TRACE = int(os.getenv('A2A_OBS_MAX_EVENTS_PER_TRACE', '1000'))
+TRACE_RETENTION_SECONDS = float(os.getenv('A2A_OBS_TRACE_RETENTION_SECONDS', '0'))  # 0 = count-bounded only
+LOCK_SHARDS = 16
+
 class EventType(Enum):
     """Types of A2A events to track"""
     ORCHESTRATION_START = "orchestration_start"
@@ -115,12 +136,29 @@ class A2AConversationTrace:
 class A2AObservabilityEngine:
     """Comprehensive A2A observability and monitoring system"""
     
-    def __init__(self):
-        self.active_traces: Dict[str, A2AConversationTrace] = {}
-        self.completed_traces: Dict[str, A2AConversationTrace] = {}
-        self.event_history: List[A2AEvent] = []
-        self.handoff_history: List[AgentHandoff] = []
-        self._lock = threading.Lock()
+    def __init__(self, max_events: int = MAX_EVENT_HISTORY, max_handoffs: int = MAX_HANDOFF_HISTORY,
+                 max_completed_traces: int = MAX_COMPLETED_TRACES, max_events_per_trace: int = MAX_EVENTS_PER_TRACE,
+                 trace_retention_seconds: float = TRACE_RETENTION_SECONDS, lock_shards: int = LOCK_SHARDS):
+        self.retention = {
+            "max_events": max_events,
+            "max_handoffs": max_handoffs,
+            "max_completed_traces": max_completed_traces,
+            "max_events_per_trace": max_events_per_trace,
+            "trace_retention_seconds": trace_retention_seconds
+        }
+        
+        # Active traces are sharded by session id; each shard has its own lock
+        self._shards = [({}, threading.Lock()) for _ in range(lock_shards)]
+        
+        # Ring buffers (deque appends are atomic, oldest entries fall off)
+        self.event_history = deque(maxlen=max_events)
+        
+        # Bounded, insertion-ordered indexes: handoff id -> handoff, session id -> trace (completion order)
+        self._handoffs: "OrderedDict[str, AgentHandoff]" = OrderedDict()
+        self.completed_traces: "OrderedDict[str, Union[A2AConversationTrace, Dict]]" = OrderedDict()
+        self._completed_at: Dict[str, float] = {}
+        self._history_lock = threading.Lock()
+        self._metrics_lock = threading.Lock()
         
         # Performance metrics
         self.metrics = {
@@ -133,7 +171,52 @@ class A2AObservabilityEngine:
             "most_common_errors": {}
         }
         
-        logger.info("A2A Observability Engine initialized")
+        # Streaming latency percentiles: (dimension, key) -> windowed histogram
+        self.latency = LatencyTracker()
+        
+        logger.info(f"A2A Observability Engine initialized (retention: {self.retention})")
+
+    def _shard(self, session_id: str):
+        return self._shards[hash(session_id) % len(self._shards)]
+
+    @property
+    def active_traces(self) -> Dict[str, A2AConversationTrace]:
+        """Snapshot of all active traces across shards"""
+        snapshot = {}
+        for traces, lock in self._shards:
+            with lock:
+                snapshot.update(traces)
+        return snapshot
+
+    @property
+    def handoff_history(self) -> List[AgentHandoff]:
+        """Retained handoffs, oldest first"""
+        with self._history_lock:
+            return list(self._handoffs.values())
+
+    def store_completed_trace(self, session_id: str, trace: Union[A2AConversationTrace, Dict]):
+        """Add a completed trace (engine object or posted dict) to the bounded recent-traces index"""
+        if isinstance(trace, dict):
+            # Posted by another process: its events were never logged here
+            self._record_trace_latencies(trace)
+        now = time.time()
+        with self._history_lock:
+            self.completed_traces.pop(session_id, None)
+            self.completed_traces[session_id] = trace
+            self._completed_at[session_id] = now
+            self._apply_trace_retention(now)
+
+    def _apply_trace_retention(self, now: float):
+        """Evict oldest completed traces beyond the count/age limits (caller holds _history_lock)"""
+        max_age = self.retention["trace_retention_seconds"]
+        while self.completed_traces:
+            oldest = next(iter(self.completed_traces))
+            over_count = len(self.completed_traces) > self.retention["max_completed_traces"]
+            expired = max_age and now - self._completed_at[oldest] > max_age
+            if not (over_count or expired):
+                break
+            self.completed_traces.popitem(last=False)
+            del self._completed_at[oldest]
 
     @contextmanager
     def trace_orchestration(self, session_id: str, query: str, orchestration_strategy: str = "sequential"):
@@ -145,8 +228,9 @@ class A2AObservabilityEngine:
             orchestration_strategy=orchestration_strategy
         )
         
-        with self._lock:
-            self.active_traces[session_id] = trace
+        traces, lock = self._shard(session_id)
+        with lock:
+            traces[session_id] = trace
         
         # Log orchestration start
         self._log_event(
@@ -174,10 +258,10 @@ class A2AObservabilityEngine:
             trace.total_execution_time = (trace.end_time - trace.start_time).total_seconds()
             trace.success = trace.error is None
             
-            with self._lock:
-                self.completed_traces[session_id] = trace
-                if session_id in self.active_traces:
-                    del self.active_traces[session_id]
+            self.store_completed_trace(session_id, trace)
+            traces, lock = self._shard(session_id)
+            with lock:
+                traces.pop(session_id, None)
             
             # Update metrics
             self._update_metrics(trace)
@@ -214,14 +298,19 @@ class A2AObservabilityEngine:
             context_transferred=context_transferred or {}
         )
         
-        with self._lock:
-            if session_id in self.active_traces:
-                self.active_traces[session_id].handoffs.append(handoff)
-                self.active_traces[session_id].agents_involved.extend([from_agent_name, to_agent_name])
-                # Remove duplicates while preserving order
-                self.active_traces[session_id].agents_involved = list(dict.fromkeys(self.active_traces[session_id].agents_involved))
-            
-            self.handoff_history.append(handoff)
+        traces, lock = self._shard(session_id)
+        with lock:
+            trace = traces.get(session_id)
+            if trace:
+                trace.handoffs.append(handoff)
+                for agent_name in (from_agent_name, to_agent_name):
+                    if agent_name not in trace.agents_involved:
+                        trace.agents_involved.append(agent_name)
+        
+        with self._history_lock:
+            self._handoffs[handoff_id] = handoff
+            if len(self._handoffs) > self.retention["max_handoffs"]:
+                self._handoffs.popitem(last=False)
         
         # Log handoff start
         self._log_event(
@@ -243,23 +332,8 @@ class A2AObservabilityEngine:
     def complete_agent_handoff(self, handoff_id: str, output_received: str, 
                               tools_used: List[str] = None, error: str = None):
         """Complete tracking of an agent handoff"""
-        with self._lock:
-            # Find the handoff in active traces
-            handoff = None
-            for trace in self.active_traces.values():
-                for h in trace.handoffs:
-                    if h.id == handoff_id:
-                        handoff = h
-                        break
-                if handoff:
-                    break
-            
-            # Also check in handoff history
-            if not handoff:
-                for h in self.handoff_history:
-                    if h.id == handoff_id:
-                        handoff = h
-                        break
+        with self._history_lock:
+            handoff = self._handoffs.get(handoff_id)
         
         if handoff:
             handoff.end_time = datetime.now()
@@ -290,9 +364,10 @@ class A2AObservabilityEngine:
     def log_context_transfer(self, session_id: str, from_agent_id: str, to_agent_id: str,
                            context_data: Dict, transfer_type: str = "handoff"):
         """Log context transfer between agents"""
-        with self._lock:
-            if session_id in self.active_traces:
-                self.active_traces[session_id].context_evolution.append({
+        traces, lock = self._shard(session_id)
+        with lock:
+            if session_id in traces:
+                traces[session_id].context_evolution.append({
                     "timestamp": datetime.now().isoformat(),
                     "from_agent": from_agent_id,
                     "to_agent": to_agent_id,
@@ -317,7 +392,7 @@ class A2AObservabilityEngine:
     def log_agent_execution(self, session_id: str, agent_id: str, agent_name: str,
                           execution_start: bool, input_data: str = None, 
                           output_data: str = None, execution_time: float = None,
-                          tools_used: List[str] = None, error: str = None):
+                          tools_used: List[str] = None, error: str = None, model: str = None):
         """Log agent execution events"""
         event_type = EventType.AGENT_EXECUTION_START if execution_start else EventType.AGENT_EXECUTION_COMPLETE
         
@@ -333,7 +408,8 @@ class A2AObservabilityEngine:
             metadata={
                 "input_length": len(input_data) if input_data else 0,
                 "output_length": len(output_data) if output_data else 0,
-                "tools_used": tools_used or []
+                "tools_used": tools_used or [],
+                "model": model
             }
         )
 
@@ -386,13 +462,50 @@ class A2AObservabilityEngine:
             error=error
         )
         
-        with self._lock:
-            self.event_history.append(event)
-            if session_id in self.active_traces:
-                self.active_traces[session_id].events.append(event)
+        self.event_history.append(event)
+        if execution_time is not None:
+            self._record_event_latency(event_type.value, execution_time, agent_name, metadata)
+        traces, lock = self._shard(session_id)
+        with lock:
+            trace = traces.get(session_id)
+            if trace:
+                trace.events.append(event)
+                # Trim in chunks so the per-event cost stays amortized O(1)
+                if len(trace.events) > self.retention["max_events_per_trace"] * 1.25:
+                    del trace.events[:len(trace.events) - self.retention["max_events_per_trace"]]
+
+    def _record_event_latency(self, event_type: str, execution_time: float, agent_name: str = None,
+                              metadata: Dict = None):
+        """Feed one timed event into the per-stage/agent/model/tool latency histograms"""
+        metadata = metadata or {}
+        self.latency.record("stage", event_type, execution_time)
+        if event_type == EventType.AGENT_EXECUTION_COMPLETE.value:
+            self.latency.record("agent", agent_name, execution_time)
+            self.latency.record("model", metadata.get("model"), execution_time)
+        elif event_type == EventType.TOOL_USAGE.value:
+            self.latency.record("tool", metadata.get("tool_name"), execution_time)
+
+    def _record_trace_latencies(self, trace: Dict):
+        """Feed a posted trace dict (export_trace_data format) into the latency histograms"""
+        if trace.get("total_execution_time"):
+            self.latency.record("orchestration", trace.get("orchestration_strategy") or "unknown",
+                                trace["total_execution_time"])
+        for event in trace.get("events") or []:
+            if event.get("execution_time") is None:
+                continue
+            # asdict() + json default=str turns EventType.X into "EventType.X"
+            event_type = str(event.get("event_type", ""))
+            event_type = event_type.split(".", 1)[1].lower() if event_type.startswith("EventType.") else event_type
+            self._record_event_latency(event_type, event["execution_time"], event.get("agent_name"),
+                                       event.get("metadata"))
 
     def _update_metrics(self, trace: A2AConversationTrace):
         """Update performance metrics"""
+        self.latency.record("orchestration", trace.orchestration_strategy, trace.total_execution_time)
+        with self._metrics_lock:
+            self._update_metrics_locked(trace)
+
+    def _update_metrics_locked(self, trace: A2AConversationTrace):
         self.metrics["total_orchestrations"] += 1
         
         if trace.success:
@@ -414,19 +527,37 @@ class A2AObservabilityEngine:
 
     def get_trace(self, session_id: str) -> Optional[A2AConversationTrace]:
         """Get complete trace for a session"""
-        with self._lock:
-            if session_id in self.active_traces:
-                return self.active_traces[session_id]
-            elif session_id in self.completed_traces:
-                return self.completed_traces[session_id]
-        return None
-
-    def get_recent_traces(self, limit: int = 10) -> List[A2AConversationTrace]:
-        """Get recent completed traces"""
-        with self._lock:
-            recent_traces = list(self.completed_traces.values())
-            recent_traces.sort(key=lambda x: x.start_time, reverse=True)
-            return recent_traces[:limit]
+        traces, lock = self._shard(session_id)
+        with lock:
+            if session_id in traces:
+                return traces[session_id]
+        with self._history_lock:
+            trace = self.completed_traces.get(session_id)
+        # Posted dict traces are served by the API layer, not as engine objects
+        return trace if isinstance(trace, A2AConversationTrace) else None
+
+    def get_recent_traces(self, limit: int = 10) -> List[Union[A2AConversationTrace, Dict]]:
+        """Get recent completed traces, most recently completed first (walks the index, no sort)"""
+        recent_traces = []
+        with self._history_lock:
+            for session_id in reversed(self.completed_traces):
+                if len(recent_traces) >= limit:
+                    break
+                recent_traces.append(self.completed_traces[session_id])
+        return recent_traces
+
+    def get_recent_events(self, limit: int = 50, session_id: str = None, event_type: str = None) -> List[A2AEvent]:
+        """Most recent events first, walking the ring buffer backwards until limit matches"""
+        events = []
+        for event in reversed(list(self.event_history)):
+            if session_id and event.session_id != session_id:
+                continue
+            if event_type and event.event_type.value != event_type:
+                continue
+            events.append(event)
+            if len(events) >= limit:
+                break
+        return events
 
     def get_handoff_details(self, session_id: str) -> List[AgentHandoff]:
         """Get detailed handoff information for a session"""
@@ -440,7 +571,31 @@ class A2AObservabilityEngine:
 
     def get_performance_metrics(self) -> Dict:
         """Get current performance metrics"""
-        return self.metrics.copy()
+        with self._metrics_lock:
+            return {
+                **self.metrics,
+                "most_used_agents": dict(self.metrics["most_used_agents"]),
+                "most_common_errors": dict(self.metrics["most_common_errors"])
+            }
+
+    def get_latency_metrics(self, dimension: str = None, include_buckets: bool = False) -> Dict:
+        """p50/p95/p99 (count, mean, max) per dimension and key over each sliding window"""
+        return {
+            "windows": list(self.latency.windows) + ["all"],
+            "dimensions": self.latency.snapshot(dimension, include_buckets)
+        }
+
+    def get_storage_stats(self) -> Dict:
+        """Current buffer occupancy against the retention limits"""
+        with self._history_lock:
+            handoffs, completed = len(self._handoffs), len(self.completed_traces)
+        return {
+            "active_traces": sum(len(traces) for traces, _ in self._shards),
+            "completed_traces": completed,
+            "events": len(self.event_history),
+            "handoffs": handoffs,
+            "retention": dict(self.retention)
+        }
 
     def export_trace_data(self, session_id: str) -> Dict:
         """Export complete trace data for analysis"""
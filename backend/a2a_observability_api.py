@@ -10,8 +10,10 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 from flask import Flask, request, jsonify
 from flask_cors import CORS
+from service_metrics import instrument_flask
 
 from a2a_observability import observability_engine, EventType, HandoffStatus
+from a2a_trace_store import get_trace_store, to_epoch
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -20,20 +22,82 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'a2a_observability_secret'
 CORS(app)
+instrument_flask(app, "a2a-observability")
+
+# Completed traces are persisted here; the engine only keeps a bounded in-memory window
+trace_store = get_trace_store()
+
+def _query_filters() -> Dict[str, Any]:
+    """Time range (ISO timestamp or epoch seconds), agent and page cursor from the query string"""
+    start = request.args.get('start')
+    end = request.args.get('end')
+    return {
+        "start": to_epoch(float(start) if start and start.replace('.', '', 1).isdigit() else start),
+        "end": to_epoch(float(end) if end and end.replace('.', '', 1).isdigit() else end),
+        "agent": request.args.get('agent'),
+        "cursor": request.args.get('cursor')
+    }
+
+def _serialize_handoff(handoff) -> Dict[str, Any]:
+    """Serialize an in-memory engine handoff"""
+    return {
+        "id": handoff.id,
+        "session_id": handoff.session_id,
+        "handoff_number": handoff.handoff_number,
+        "from_agent": {
+            "id": handoff.from_agent_id,
+            "name": handoff.from_agent_name
+        },
+        "to_agent": {
+            "id": handoff.to_agent_id,
+            "name": handoff.to_agent_name
+        },
+        "status": handoff.status.value if hasattr(handoff.status, 'value') else str(handoff.status),
+        "start_time": handoff.start_time.isoformat(),
+        "end_time": handoff.end_time.isoformat() if handoff.end_time else None,
+        "execution_time": handoff.execution_time,
+        "context_transferred": handoff.context_transferred,
+        "input_prepared": handoff.input_prepared,
+        "output_received": handoff.output_received,
+        "tools_used": handoff.tools_used,
+        "error": handoff.error
+    }
+
+def _serialize_event(event) -> Dict[str, Any]:
+    """Serialize an in-memory engine event"""
+    return {
+        "id": event.id,
+        "session_id": event.session_id,
+        "event_type": event.event_type.value,
+        "timestamp": event.timestamp.isoformat(),
+        "agent_id": event.agent_id,
+        "agent_name": event.agent_name,
+        "from_agent_id": event.from_agent_id,
+        "to_agent_id": event.to_agent_id,
+        "content": event.content,
+        "context": event.context,
+        "metadata": event.metadata,
+        "execution_time": event.execution_time,
+        "status": event.status,
+        "error": event.error
+    }
 
 @app.route('/api/a2a-observability/health', methods=['GET'])
 def health_check():
     """Health check endpoint for observability service"""
     try:
         metrics = observability_engine.get_performance_metrics()
+        storage = observability_engine.get_storage_stats()
         return jsonify({
             "status": "healthy",
             "service": "a2a-observability",
             "version": "1.0.0",
-            "active_traces": len(observability_engine.active_traces),
-            "completed_traces": len(observability_engine.completed_traces),
-            "total_events": len(observability_engine.event_history),
-            "total_handoffs": len(observability_engine.handoff_history),
+            "active_traces": storage["active_traces"],
+            "completed_traces": storage["completed_traces"],
+            "total_events": storage["events"],
+            "total_handoffs": storage["handoffs"],
+            "retention": storage["retention"],
+            "persisted_traces": trace_store.count_traces(),
             "metrics": metrics,
             "timestamp": datetime.now().isoformat()
         })
@@ -56,8 +120,9 @@ def store_trace():
         # Store the trace data in the observability engine
         session_id = trace_data.get('session_id')
         if session_id:
-            # Convert the trace data to the observability engine format
-            observability_engine.completed_traces[session_id] = trace_data
+            # Persist durably, and keep it in the engine's bounded recent window
+            trace_store.store_trace(trace_data)
+            observability_engine.store_completed_trace(session_id, trace_data)
             logger.info(f"Stored trace data for session: {session_id}")
             return jsonify({"success": True, "message": "Trace data stored successfully"})
         else:
@@ -69,55 +134,32 @@ def store_trace():
 
 @app.route('/api/a2a-observability/traces', methods=['GET'])
 def get_traces():
-    """Get recent orchestration traces"""
+    """Get orchestration traces, newest first
+    
+    Completed traces are paged from the trace store: filter with start/end
+    (ISO or epoch seconds), agent and success, and pass next_cursor back as
+    cursor for the following page.
+    """
     try:
         limit = request.args.get('limit', 10, type=int)
         status = request.args.get('status', 'all')  # all, active, completed
+        filters = _query_filters()
+        success = request.args.get('success')
         
-        if status == 'active':
-            traces = list(observability_engine.active_traces.values())
-        elif status == 'completed':
-            traces = observability_engine.get_recent_traces(limit)
-        else:
-            # Combine active and recent completed traces
-            active_traces = list(observability_engine.active_traces.values())
-            completed_traces = list(observability_engine.completed_traces.values())
-            traces = active_traces + completed_traces
-        
-        # Sort by start time (most recent first)
-        def get_start_time(trace):
-            if isinstance(trace, dict):
-                return trace.get('start_time', '1970-01-01T00:00:00')
-            else:
-                return trace.start_time.isoformat() if hasattr(trace, 'start_time') else '1970-01-01T00:00:00'
-        
-        traces.sort(key=get_start_time, reverse=True)
-        
-        # Convert to serializable format
         trace_data = []
-        for trace in traces[:limit]:
-            if isinstance(trace, dict):
-                # Handle dictionary format (from orchestration engine)
-                trace_data.append({
-                    "session_id": trace.get('session_id', 'unknown'),
-                    "query": trace.get('query', 'unknown'),
-                    "start_time": trace.get('start_time', '1970-01-01T00:00:00'),
-                    "end_time": trace.get('end_time'),
-                    "total_execution_time": trace.get('total_execution_time', 0),
-                    "success": trace.get('success', False),
-                    "error": trace.get('error'),
-                    "orchestration_strategy": trace.get('orchestration_strategy', 'unknown'),
-                    "agents_involved": trace.get('agents_involved', []),
-                    "handoff_count": len(trace.get('handoffs', [])),
-                    "event_count": len(trace.get('events', [])),
-                })
-            else:
-                # Handle object format (from observability engine)
+        next_cursor = None
+        
+        # Active traces only live in memory; they head the first page
+        if status in ('all', 'active') and not filters['cursor']:
+            active_traces = sorted(observability_engine.active_traces.values(), key=lambda trace: trace.start_time, reverse=True)
+            for trace in active_traces:
+                if filters['agent'] and filters['agent'] not in trace.agents_involved:
+                    continue
                 trace_data.append({
                     "session_id": trace.session_id,
                     "query": trace.query,
                     "start_time": trace.start_time.isoformat(),
-                    "end_time": trace.end_time.isoformat() if trace.end_time else None,
+                    "end_time": None,
                     "total_execution_time": trace.total_execution_time,
                     "success": trace.success,
                     "error": trace.error,
@@ -125,16 +167,35 @@ def get_traces():
                     "agents_involved": trace.agents_involved,
                     "handoff_count": len(trace.handoffs),
                     "event_count": len(trace.events),
-                    "status": "active" if trace.end_time is None else "completed"
+                    "status": "active"
                 })
+            trace_data = trace_data[:limit]
+        
+        if status in ('all', 'completed') and len(trace_data) < limit:
+            page = trace_store.query_traces(
+                start=filters['start'],
+                end=filters['end'],
+                agent=filters['agent'],
+                success=None if success is None else success.lower() == 'true',
+                limit=limit - len(trace_data),
+                cursor=filters['cursor']
+            )
+            trace_data.extend(page['traces'])
+            next_cursor = page['next_cursor']
         
         return jsonify({
             "success": True,
             "traces": trace_data,
             "count": len(trace_data),
+            "next_cursor": next_cursor,
             "timestamp": datetime.now().isoformat()
         })
         
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 400
     except Exception as e:
         logger.error(f"Error getting traces: {e}")
         return jsonify({
@@ -148,10 +209,35 @@ def get_trace_details(session_id: str):
     try:
         trace = observability_engine.get_trace(session_id)
         if not trace:
+            stored = trace_store.get_trace(session_id)
+            if not stored:
+                return jsonify({
+                    "success": False,
+                    "error": "Trace not found"
+                }), 404
+            
+            # Persisted trace: handoffs and events come back normalized from their tables
+            handoffs = trace_store.query_handoffs(session_id=session_id, limit=stored.get('handoff_count') or 500)['handoffs']
+            events = trace_store.query_events(session_id=session_id, limit=500)['events']
             return jsonify({
-                "success": False,
-                "error": "Trace not found"
-            }), 404
+                "success": True,
+                "trace": {
+                    "session_id": session_id,
+                    "query": stored.get('query'),
+                    "start_time": stored.get('start_time'),
+                    "end_time": stored.get('end_time'),
+                    "total_execution_time": stored.get('total_execution_time', 0),
+                    "success": stored.get('success', False),
+                    "error": stored.get('error'),
+                    "orchestration_strategy": stored.get('orchestration_strategy'),
+                    "agents_involved": stored.get('agents_involved', []),
+                    "final_response": stored.get('final_response'),
+                    "handoffs": sorted(handoffs, key=lambda handoff: handoff['handoff_number'] or 0),
+                    "events": list(reversed(events)),
+                    "context_evolution": stored.get('context_evolution', [])
+                },
+                "timestamp": datetime.now().isoformat()
+            })
         
         # Get detailed handoff information
         handoffs = observability_engine.get_handoff_details(session_id)
@@ -231,79 +317,40 @@ def get_trace_details(session_id: str):
 
 @app.route('/api/a2a-observability/handoffs', methods=['GET'])
 def get_handoffs():
-    """Get recent agent handoffs"""
+    """Get agent handoffs, newest first (filters: session_id, agent, start/end; paged by cursor)"""
     try:
         limit = request.args.get('limit', 20, type=int)
         session_id = request.args.get('session_id')
+        filters = _query_filters()
         
-        if session_id:
-            # Get handoffs from specific session
-            trace = observability_engine.completed_traces.get(session_id)
-            if trace and isinstance(trace, dict):
-                handoffs = trace.get('handoffs', [])
-            else:
-                handoffs = observability_engine.get_handoff_details(session_id)
+        if session_id and session_id in observability_engine.active_traces:
+            # Still running: only the engine has it
+            handoff_data = [_serialize_handoff(handoff) for handoff in observability_engine.get_handoff_details(session_id)][-limit:]
+            next_cursor = None
         else:
-            # Get recent handoffs from all stored traces
-            all_handoffs = []
-            for trace in observability_engine.completed_traces.values():
-                if isinstance(trace, dict) and 'handoffs' in trace:
-                    all_handoffs.extend(trace['handoffs'])
-            handoffs = all_handoffs[-limit:] if all_handoffs else []
-        
-        # Convert to serializable format
-        handoff_data = []
-        for handoff in handoffs:
-            if isinstance(handoff, dict):
-                # Handle dictionary format (from stored traces)
-                handoff_data.append({
-                    "id": handoff.get('id', 'unknown'),
-                    "session_id": handoff.get('session_id', 'unknown'),
-                    "handoff_number": handoff.get('handoff_number', 0),
-                    "from_agent": handoff.get('from_agent', {}),
-                    "to_agent": handoff.get('to_agent', {}),
-                    "status": handoff.get('status', 'unknown'),
-                    "start_time": handoff.get('start_time', '1970-01-01T00:00:00'),
-                    "end_time": handoff.get('end_time'),
-                    "execution_time": handoff.get('execution_time', 0),
-                    "context_transferred": handoff.get('context_transferred', {}),
-                    "input_prepared": handoff.get('input_prepared'),
-                    "output_received": handoff.get('output_received'),
-                    "tools_used": handoff.get('tools_used', []),
-                    "error": handoff.get('error')
-                })
-            else:
-                # Handle object format (from observability engine)
-                handoff_data.append({
-                    "id": handoff.id,
-                    "session_id": handoff.session_id,
-                    "handoff_number": handoff.handoff_number,
-                    "from_agent": {
-                        "id": handoff.from_agent_id,
-                        "name": handoff.from_agent_name
-                    },
-                    "to_agent": {
-                        "id": handoff.to_agent_id,
-                        "name": handoff.to_agent_name
-                    },
-                    "status": handoff.status.value if hasattr(handoff.status, 'value') else str(handoff.status),
-                    "start_time": handoff.start_time.isoformat(),
-                    "end_time": handoff.end_time.isoformat() if handoff.end_time else None,
-                    "execution_time": handoff.execution_time,
-                    "context_transferred": handoff.context_transferred,
-                    "input_prepared": handoff.input_prepared,
-                    "output_received": handoff.output_received,
-                    "tools_used": handoff.tools_used,
-                    "error": handoff.error
-                })
+            page = trace_store.query_handoffs(
+                session_id=session_id,
+                agent=filters['agent'],
+                start=filters['start'],
+                end=filters['end'],
+                limit=limit,
+                cursor=filters['cursor']
+            )
+            handoff_data, next_cursor = page['handoffs'], page['next_cursor']
         
         return jsonify({
             "success": True,
             "handoffs": handoff_data,
             "count": len(handoff_data),
+            "next_cursor": next_cursor,
             "timestamp": datetime.now().isoformat()
         })
         
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 400
     except Exception as e:
         logger.error(f"Error getting handoffs: {e}")
         return jsonify({
@@ -313,52 +360,43 @@ def get_handoffs():
 
 @app.route('/api/a2a-observability/events', methods=['GET'])
 def get_events():
-    """Get recent A2A events"""
+    """Get A2A events, newest first (filters: session_id, event_type, agent, start/end; paged by cursor)"""
     try:
         limit = request.args.get('limit', 50, type=int)
         event_type = request.args.get('event_type')
         session_id = request.args.get('session_id')
+        filters = _query_filters()
         
-        # Filter events
-        events = observability_engine.event_history
-        
-        if session_id:
-            events = [e for e in events if e.session_id == session_id]
-        
-        if event_type:
-            events = [e for e in events if e.event_type.value == event_type]
-        
-        # Sort by timestamp (most recent first) and limit
-        events.sort(key=lambda x: x.timestamp, reverse=True)
-        events = events[:limit]
-        
-        # Convert to serializable format
-        event_data = []
-        for event in events:
-            event_data.append({
-                "id": event.id,
-                "session_id": event.session_id,
-                "event_type": event.event_type.value,
-                "timestamp": event.timestamp.isoformat(),
-                "agent_id": event.agent_id,
-                "agent_name": event.agent_name,
-                "from_agent_id": event.from_agent_id,
-                "to_agent_id": event.to_agent_id,
-                "content": event.content,
-                "context": event.context,
-                "metadata": event.metadata,
-                "execution_time": event.execution_time,
-                "status": event.status,
-                "error": event.error
-            })
+        if session_id and session_id in observability_engine.active_traces:
+            # Still running: served from the engine's event ring buffer
+            events = observability_engine.get_recent_events(limit, session_id=session_id, event_type=event_type)
+            event_data = [_serialize_event(event) for event in events]
+            next_cursor = None
+        else:
+            page = trace_store.query_events(
+                session_id=session_id,
+                event_type=event_type,
+                agent=filters['agent'],
+                start=filters['start'],
+                end=filters['end'],
+                limit=limit,
+                cursor=filters['cursor']
+            )
+            event_data, next_cursor = page['events'], page['next_cursor']
         
         return jsonify({
             "success": True,
             "events": event_data,
             "count": len(event_data),
+            "next_cursor": next_cursor,
             "timestamp": datetime.now().isoformat()
         })
         
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 400
     except Exception as e:
         logger.error(f"Error getting events: {e}")
         return jsonify({
@@ -368,101 +406,26 @@ def get_events():
 
 @app.route('/api/a2a-observability/metrics', methods=['GET'])
 def get_metrics():
-    """Get performance metrics and statistics"""
+    """Get performance metrics and statistics (optionally for a start/end range or one agent)
+    
+    latency holds streaming p50/p95/p99 per agent, stage, model, tool and
+    orchestration strategy over 1m/15m/1h windows; pass dimension= to select
+    one and buckets=true for histogram bucket counts.
+    """
     try:
-        # Get metrics from stored traces (use same source as traces endpoint)
-        # Use the same logic as the traces endpoint
-        active_traces = list(observability_engine.active_traces.values())
-        completed_traces = list(observability_engine.completed_traces.values())
-        stored_traces = active_traces + completed_traces
-        
-        # Convert all traces to dict format for consistent processing
-        processed_traces = []
-        for trace in stored_traces:
-            if isinstance(trace, dict):
-                processed_traces.append(trace)
-            else:
-                # Convert A2ATrace object to dict format
-                processed_traces.append({
-                    'session_id': trace.session_id,
-                    'query': trace.query,
-                    'start_time': trace.start_time.isoformat(),
-                    'end_time': trace.end_time.isoformat() if trace.end_time else None,
-                    'total_execution_time': trace.total_execution_time,
-                    'success': trace.success,
-                    'error': trace.error,
-                    'orchestration_strategy': trace.orchestration_strategy,
-                    'agents_involved': trace.agents_involved,
-                    'handoff_count': len(trace.handoffs),
-                    'event_count': len(trace.events)
-                })
-        stored_traces = processed_traces
-        
-        # Calculate basic metrics (all traces are now in dict format)
-        total_orchestrations = len(stored_traces)
-        successful_orchestrations = len([t for t in stored_traces if t.get('success', False)])
-        failed_orchestrations = total_orchestrations - successful_orchestrations
-        
-        # Calculate execution times
-        execution_times = []
-        for trace in stored_traces:
-            exec_time = trace.get('total_execution_time', 0)
-            if exec_time:
-                execution_times.append(exec_time)
+        filters = _query_filters()
         
-        avg_execution_time = sum(execution_times) / len(execution_times) if execution_times else 0
-        
-        # Calculate handoff metrics
-        logger.info(f"Debug: stored_traces count: {len(stored_traces)}")
-        total_handoffs = 0
-        for i, trace in enumerate(stored_traces):
-            handoff_count = trace.get('handoff_count', 0)
-            logger.info(f"Debug: trace {i}: handoff_count = {handoff_count}")
-            total_handoffs += handoff_count
-        
-        avg_handoffs = total_handoffs / total_orchestrations if total_orchestrations > 0 else 0
-        logger.info(f"Debug: total_handoffs = {total_handoffs}, avg_handoffs = {avg_handoffs}")
-        
-        # Agent usage statistics
-        agent_usage = {}
-        for trace in stored_traces:
-            agents = trace.get('agents_involved', [])
-            for agent in agents:
-                agent_usage[agent] = agent_usage.get(agent, 0) + 1
-        
-        # Error analysis
-        error_types = {}
-        for trace in stored_traces:
-            error = trace.get('error')
-            if error:
-                error_type = error.split(':')[0] if ':' in error else error
-                error_types[error_type] = error_types.get(error_type, 0) + 1
-        
-        # Recent performance (last 10 orchestrations)
-        recent_traces = stored_traces[-10:] if len(stored_traces) > 10 else stored_traces
-        recent_success_rate = len([t for t in recent_traces if t.get('success', False)]) / len(recent_traces) if recent_traces else 0
-        
-        # Calculate recent average execution time
-        recent_execution_times = [t.get('total_execution_time', 0) for t in recent_traces if t.get('total_execution_time', 0)]
-        recent_avg_execution_time = sum(recent_execution_times) / len(recent_execution_times) if recent_execution_times else 0
+        # Aggregated in SQL over the persisted traces; nothing is loaded into memory
+        metrics = trace_store.get_metrics(start=filters['start'], end=filters['end'], agent=filters['agent'])
+        metrics["active_orchestrations"] = len(observability_engine.active_traces)
+        metrics["latency"] = observability_engine.get_latency_metrics(
+            dimension=request.args.get('dimension'),
+            include_buckets=request.args.get('buckets', 'false').lower() == 'true'
+        )
         
         return jsonify({
             "success": True,
-            "metrics": {
-                "total_orchestrations": total_orchestrations,
-                "successful_orchestrations": successful_orchestrations,
-                "failed_orchestrations": failed_orchestrations,
-                "success_rate": successful_orchestrations / total_orchestrations if total_orchestrations > 0 else 0,
-                "average_execution_time": avg_execution_time,
-                "average_handoffs_per_orchestration": avg_handoffs,
-                "most_used_agents": agent_usage,
-                "error_types": error_types,
-                "recent_performance": {
-                    "success_rate": recent_success_rate,
-                    "average_execution_time": recent_avg_execution_time,
-                    "sample_size": len(recent_traces)
-                }
-            },
+            "metrics": metrics,
             "timestamp": datetime.now().isoformat()
         })
         
@@ -477,7 +440,7 @@ def get_metrics():
 def export_trace_data(session_id: str):
     """Export complete trace data for analysis"""
     try:
-        trace_data = observability_engine.export_trace_data(session_id)
+        trace_data = observability_engine.export_trace_data(session_id) or trace_store.get_trace(session_id)
         if not trace_data:
             return jsonify({
                 "success": False,
@@ -20,6 +20,7 @@ from contextlib import contextmanager
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 import requests
+from service_metrics import instrument_flask, ollama_post
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -34,6 +35,7 @@ DATABASE_PATH = 'a2a_communication.db'
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'a2a_service_secret'
 CORS(app)
+instrument_flask(app, "a2a-service")
 
 @dataclass
 class A2AAgent:
@@ -97,29 +99,169 @@ class A2AConnection:
         if self.last_used is None:
             self.last_used = datetime.now()
 
+# Pooled Ollama backends: one shared server per model, scaled out by queue depth
+BACKEND_PORT_RANGE = (5023, 5035)
+SCALE_UP_QUEUE_DEPTH = 4       # in-flight requests per instance before another instance is started
+MAX_INSTANCES_PER_MODEL = 3
+IDLE_BACKEND_TTL = 600         # seconds a backend with no agents is kept warm for reuse
+IDLE_REAP_INTERVAL = 60        # seconds between background sweeps for backends idle past the TTL
+BACKEND_READY_TIMEOUT = 30
+DEFAULT_OLLAMA_HOST = "http://localhost:11434"
+
+@dataclass
+class OllamaBackendInstance:
+    """One `ollama serve` process shared by every agent routed to it"""
+    port: int
+    model: str
+    process: Any = None
+    pid: Optional[int] = None
+    status: str = "starting"  # starting | running | stopped
+    pinned: bool = False      # scale-out capacity for model: serves its traffic without agents of its own
+    agents: set = None
+    in_flight: int = 0
+    requests_total: int = 0
+    queue_peak: int = 0
+    busy_seconds: float = 0.0
+    busy_since: Optional[float] = None
+    started_at: float = None
+    last_used: float = None
+    idle_since: Optional[float] = None
+    ready: threading.Event = None
+    
+    def __post_init__(self):
+        self.agents = self.agents if self.agents is not None else set()
+        self.started_at = self.started_at or time.time()
+        self.last_used = self.last_used or self.started_at
+        self.ready = self.ready or threading.Event()
+    
+    @property
+    def host(self) -> str:
+        return f"http://localhost:{self.port}"
+    
+    def is_alive(self) -> bool:
+        if self.process is not None:
+            return self.process.poll() is None
+        if self.pid:
+            try:
+                import psutil
+                return psutil.Process(self.pid).is_running()
+            except Exception:
+                return False
+        return self.status == "running"  # registered externally, no handle to check
+    
+    def idle_for(self, now: float = None) -> Optional[float]:
+        """Seconds since the backend last had agents or requests (None while in use)"""
+        if self.agents or self.in_flight:
+            return None
+        return (now or time.time()) - max(self.idle_since or self.started_at, self.last_used)
+    
+    def occupancy(self, now: float = None) -> float:
+        """Fraction of the backend's lifetime spent with at least one request in flight"""
+        now = now or time.time()
+        busy = self.busy_seconds + (now - self.busy_since if self.busy_since else 0.0)
+        return busy / max(now - self.started_at, 1e-9)
+
 class DedicatedOllamaManager:
-    """Manages dedicated Ollama backends for A2A agents"""
+    """Pools Ollama backends for A2A agents
     
-    def __init__(self):
+    Agents are routed by model affinity to a shared server per model instead of a
+    process each. A model gets another instance when its backends' queue depth
+    exceeds SCALE_UP_QUEUE_DEPTH; scale-out instances stay pinned to that model.
+    Backends whose agents are all released stay warm for IDLE_BACKEND_TTL so the
+    next registration reuses them, and a background thread reaps them after that.
+    """
+    
+    def __init__(self, reap_interval: float = IDLE_REAP_INTERVAL):
         self.allocated_ports = set()
-        self.start_port = 5023
-        self.end_port = 5035  # Extended range to avoid conflicts
+        self.start_port, self.end_port = BACKEND_PORT_RANGE
         self.active_backends = {}  # agent_id -> backend_config
-        self.active_processes = {}  # agent_id -> process
+        self.instances: Dict[int, OllamaBackendInstance] = {}  # port -> instance
+        self.agent_ports: Dict[str, int] = {}  # agent_id -> port of its home instance
+        self._lock = threading.RLock()
+        self._stopped = threading.Event()
+        self._reaper = threading.Thread(target=self._reap_periodically, args=(reap_interval,),
+                                        name="ollama-backend-reaper", daemon=True)
+        self._reaper.start()
+    
+    def _reap_periodically(self, interval: float):
+        while not self._stopped.wait(interval):
+            try:
+                reaped = self.reap_idle_backends()
+                if reaped:
+                    logger.info(f"🧹 Reaped {reaped} backends idle for more than {IDLE_BACKEND_TTL}s")
+            except Exception as e:
+                logger.warning(f"Idle backend reaper failed: {e}")
+    
+    def stop(self):
+        """Stop the background reaper"""
+        self._stopped.set()
+    
+    def _warm_instances(self) -> List[OllamaBackendInstance]:
+        """Running backends with no agents or requests that may be repurposed for another model"""
+        return [
+            i for i in self.instances.values()
+            if not i.pinned and not i.agents and not i.in_flight and i.status == "running"
+        ]
     
     def get_next_available_port(self):
-        """Get next available port in range 5040-5060"""
+        """Get next available port in the backend port range"""
         for port in range(self.start_port, self.end_port + 1):
             if port not in self.allocated_ports:
                 return port
         raise Exception("No available ports for dedicated Ollama backends")
     
+    def _backend_config(self, agent_id: str, instance: OllamaBackendInstance) -> dict:
+        return {
+            "port": instance.port,
+            "model": instance.model,
+            "agent_id": agent_id,
+            "dedicated": True,
+            "shared": True,
+            "host": instance.host,
+            "status": instance.status,
+            "process_id": instance.pid,
+            "data_dir": f"/tmp/ollama_{instance.port}"
+        }
+    
+    def _assign(self, agent_id: str, instance: OllamaBackendInstance) -> dict:
+        previous = self.agent_ports.get(agent_id)
+        if previous is not None and previous != instance.port and previous in self.instances:
+            self._detach(agent_id, self.instances[previous])
+        instance.agents.add(agent_id)
+        instance.idle_since = None
+        self.agent_ports[agent_id] = instance.port
+        config = self.active_backends[agent_id] = self._backend_config(agent_id, instance)
+        return config
+    
+    def _detach(self, agent_id: str, instance: OllamaBackendInstance):
+        instance.agents.discard(agent_id)
+        if not instance.agents:
+            instance.idle_since = time.time()
+    
+    def _model_instances(self, model: str) -> List[OllamaBackendInstance]:
+        return [i for i in self.instances.values() if i.model == model and i.status != "stopped"]
+    
+    @staticmethod
+    def _load(instance: OllamaBackendInstance):
+        return (instance.in_flight, len(instance.agents))
+    
     def register_existing_backend(self, agent_id: str, backend_config: dict):
         """Register an existing backend that's already running"""
         port = backend_config.get('port')
         if port:
-            self.allocated_ports.add(port)
-            self.active_backends[agent_id] = backend_config
+            with self._lock:
+                instance = self.instances.get(port)
+                if instance is None:
+                    instance = OllamaBackendInstance(
+                        port=port,
+                        model=backend_config.get('model', ''),
+                        pid=backend_config.get('process_id'),
+                        status="running"
+                    )
+                    instance.ready.set()
+                    self.instances[port] = instance
+                    self.allocated_ports.add(port)
+                self._assign(agent_id, instance)
             logger.info(f"📝 Registered existing backend for agent {agent_id} on port {port}")
     
     def fix_existing_backends(self):
@@ -127,92 +269,114 @@ class DedicatedOllamaManager:
         import os
         main_models_dir = os.path.expanduser('~/.ollama/models')
         
-        for agent_id, backend_config in self.active_backends.items():
-            port = backend_config.get('port')
-            if port:
-                data_dir = f"/tmp/ollama_{port}"
-                models_dir = f'{data_dir}/models'
-                
-                # Remove empty models directory and create symlink
-                if os.path.exists(models_dir) and os.path.exists(main_models_dir):
-                    # Check if it's empty (no models)
-                    try:
-                        if not os.listdir(models_dir) or (os.path.exists(f'{models_dir}/blobs') and not os.listdir(f'{models_dir}/blobs')):
-                            logger.info(f"🔧 Fixing models for agent {agent_id} on port {port}")
-                            os.rmdir(models_dir) if os.path.isdir(models_dir) else os.remove(models_dir)
-                            os.symlink(main_models_dir, models_dir)
-                            logger.info(f"✅ Created symlink for agent {agent_id}")
-                    except Exception as e:
-                        logger.warning(f"Could not fix models for agent {agent_id}: {e}")
-    
-    def cleanup_orphaned_backends(self):
-        """Clean up orphaned backends that are no longer running"""
-        import os
-        import psutil
-        
-        orphaned_agents = []
-        
-        for agent_id, backend_config in list(self.active_backends.items()):
-            port = backend_config.get('port')
-            process_id = backend_config.get('process_id')
+        with self._lock:
+            ports = list(self.instances)
+        for port in ports:
+            data_dir = f"/tmp/ollama_{port}"
+            models_dir = f'{data_dir}/models'
             
-            if port and process_id:
-                # Check if process is still running
+            # Remove empty models directory and create symlink
+            if os.path.exists(models_dir) and os.path.exists(main_models_dir):
+                # Check if it's empty (no models)
                 try:
-                    process = psutil.Process(process_id)
-                    if not process.is_running():
-                        orphaned_agents.append(agent_id)
-                        logger.info(f"🧹 Found orphaned backend for agent {agent_id} on port {port}")
-                except psutil.NoSuchProcess:
-                    orphaned_agents.append(agent_id)
-                    logger.info(f"🧹 Found orphaned backend for agent {agent_id} on port {port}")
-        
-        # Remove orphaned backends
-        for agent_id in orphaned_agents:
-            backend_config = self.active_backends.get(agent_id)
-            if backend_config:
-                port = backend_config.get('port')
-                if port:
-                    self.allocated_ports.discard(port)
-                    logger.info(f"🗑️ Freed port {port} from orphaned agent {agent_id}")
-            
-            # Remove from active backends and processes
+                    if not os.listdir(models_dir) or (os.path.exists(f'{models_dir}/blobs') and not os.listdir(f'{models_dir}/blobs')):
+                        logger.info(f"🔧 Fixing models for backend on port {port}")
+                        os.rmdir(models_dir) if os.path.isdir(models_dir) else os.remove(models_dir)
+                        os.symlink(main_models_dir, models_dir)
+                        logger.info(f"✅ Created symlink for backend on port {port}")
+                except Exception as e:
+                    logger.warning(f"Could not fix models for backend on port {port}: {e}")
+    
+    def cleanup_orphaned_backends(self):
+        """Clean up backends whose process died, and stop warm backends idle past IDLE_BACKEND_TTL"""
+        with self._lock:
+            dead = [i for i in self.instances.values() if i.status != "starting" and not i.is_alive()]
+            for instance in dead:
+                logger.info(f"🧹 Found orphaned backend on port {instance.port} ({len(instance.agents)} agents)")
+                self._remove_instance(instance)
+        reaped = self.reap_idle_backends()
+        logger.info(f"✅ Cleaned up {len(dead)} orphaned and {reaped} idle backends")
+    
+    def reap_idle_backends(self, ttl: float = IDLE_BACKEND_TTL) -> int:
+        now = time.time()
+        with self._lock:
+            idle = [
+                i for i in self.instances.values()
+                if i.status == "running" and (i.idle_for(now) or 0) > ttl
+            ]
+            for instance in idle:
+                self._remove_instance(instance)
+        for instance in idle:
+            self._terminate(instance)
+        return len(idle)
+    
+    def _remove_instance(self, instance: OllamaBackendInstance):
+        instance.status = "stopped"
+        self.instances.pop(instance.port, None)
+        self.allocated_ports.discard(instance.port)
+        for agent_id in list(instance.agents):
+            self.agent_ports.pop(agent_id, None)
             self.active_backends.pop(agent_id, None)
-            self.active_processes.pop(agent_id, None)
-        
-        logger.info(f"✅ Cleaned up {len(orphaned_agents)} orphaned backends")
+        logger.info(f"🗑️ Freed port {instance.port}")
+    
+    @staticmethod
+    def _terminate(instance: OllamaBackendInstance):
+        if instance.process is not None and instance.process.poll() is None:
+            instance.process.terminate()
+            try:
+                instance.process.wait(timeout=10)
+            except Exception:
+                instance.process.kill()
     
     def create_dedicated_backend(self, agent_id: str, model: str):
-        """Create dedicated Ollama backend for A2A agent"""
+        """Route an A2A agent to a pooled Ollama backend for its model (starting one if needed)"""
+        self.reap_idle_backends()
+        with self._lock:
+            current = self.instances.get(self.agent_ports.get(agent_id))
+            if current is not None and current.model == model and current.status != "stopped":
+                instance = current
+            else:
+                instance = self._select_instance(model)
+                if instance is None:
+                    instance = self._spawn_instance(model)
+                self._assign(agent_id, instance)
+        
+        self._await_ready(instance)
+        logger.info(f"✅ Agent {agent_id} routed to Ollama backend on port {instance.port} "
+                    f"(model {model}, shared by {len(instance.agents)} agents, PID: {instance.pid})")
+        return self._backend_config(agent_id, instance)
+    
+    def _select_instance(self, model: str) -> Optional[OllamaBackendInstance]:
+        """Least-loaded backend already serving model, else a warm idle backend to repurpose"""
+        candidates = self._model_instances(model)
+        if candidates:
+            return min(candidates, key=self._load)
+        warm = self._warm_instances()
+        if warm:
+            instance = max(warm, key=lambda i: i.idle_since or 0)
+            logger.info(f"♻️ Reusing warm backend on port {instance.port} ({instance.model} -> {model})")
+            instance.model = model
+            return instance
+        return None
+    
+    def _spawn_instance(self, model: str) -> OllamaBackendInstance:
+        """Start a backend process for model (caller holds the lock; readiness is awaited separately)"""
         port = self.get_next_available_port()
-        
-        logger.info(f"🚀 Creating dedicated Ollama backend for agent {agent_id} on port {port}")
-        
-        # Start actual Ollama process
+        logger.info(f"🚀 Starting pooled Ollama backend for model {model} on port {port}")
         process = self._start_ollama_process(port, model)
-        
-        # Wait for Ollama to be ready
-        self._wait_for_ollama_ready(port)
-        
-        # Create dedicated Ollama configuration
-        ollama_config = {
-            "port": port,
-            "model": model,
-            "agent_id": agent_id,
-            "dedicated": True,
-            "host": f"http://localhost:{port}",
-            "status": "running",
-            "process_id": process.pid,
-            "data_dir": f"/tmp/ollama_{port}"
-        }
-        
-        # Register with port manager
+        instance = OllamaBackendInstance(port=port, model=model, process=process, pid=process.pid)
         self.allocated_ports.add(port)
-        self.active_backends[agent_id] = ollama_config
-        self.active_processes[agent_id] = process
-        
-        logger.info(f"✅ Dedicated Ollama backend created for agent {agent_id} on port {port} (PID: {process.pid})")
-        return ollama_config
+        self.instances[port] = instance
+        threading.Thread(target=self._wait_for_ollama_ready, args=(instance,), daemon=True).start()
+        return instance
+    
+    def _await_ready(self, instance: OllamaBackendInstance, timeout: int = BACKEND_READY_TIMEOUT):
+        if not instance.ready.wait(timeout) or instance.status != "running":
+            with self._lock:
+                if instance.status != "running":
+                    self._remove_instance(instance)
+            self._terminate(instance)
+            raise Exception(f"Ollama failed to start on port {instance.port} within {timeout} seconds")
     
     def _start_ollama_process(self, port: int, model: str):
         """Start actual Ollama process on dedicated port"""
@@ -244,70 +408,150 @@ class DedicatedOllamaManager:
         process = subprocess.Popen(
             ['ollama', 'serve'],
             env=env,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
             cwd=data_dir,
             preexec_fn=os.setsid  # Create new process group to avoid signal issues
         )
         
         return process
     
-    def _wait_for_ollama_ready(self, port: int, timeout: int = 30):
-        """Wait for Ollama to be ready on the specified port"""
-        import time
-        import requests
-        
-        start_time = time.time()
-        while time.time() - start_time < timeout:
+    def _wait_for_ollama_ready(self, instance: OllamaBackendInstance, timeout: int = BACKEND_READY_TIMEOUT):
+        """Poll the backend until it answers, backing off from 100ms to 1s"""
+        deadline = time.time() + timeout
+        delay = 0.1
+        while time.time() < deadline and instance.is_alive():
             try:
-                response = requests.get(f"http://localhost:{port}/api/tags", timeout=2)
+                response = requests.get(f"{instance.host}/api/tags", timeout=2)
                 if response.status_code == 200:
-                    logger.info(f"✅ Ollama ready on port {port}")
-                    return True
-            except:
+                    instance.status = "running"
+                    logger.info(f"✅ Ollama ready on port {instance.port}")
+                    break
+            except requests.RequestException:
                 pass
-            time.sleep(1)
-        
-        raise Exception(f"Ollama failed to start on port {port} within {timeout} seconds")
+            time.sleep(delay)
+            delay = min(delay * 2, 1.0)
+        instance.ready.set()
+    
+    def route(self, agent_id: str) -> Optional[OllamaBackendInstance]:
+        """Least-loaded running backend for the agent's model (None when the agent has no backend)"""
+        with self._lock:
+            home = self.instances.get(self.agent_ports.get(agent_id))
+            if home is None:
+                return None
+            running = [i for i in self._model_instances(home.model) if i.status == "running"]
+            return min(running, key=self._load) if running else None
+    
+    @contextmanager
+    def track_request(self, agent_id: str):
+        """Route one request for agent_id, yielding its backend host (default Ollama when unpooled)"""
+        instance = self.route(agent_id)
+        if instance is None:
+            yield DEFAULT_OLLAMA_HOST
+            return
+        with self._lock:
+            now = time.time()
+            if instance.in_flight == 0:
+                instance.busy_since = now
+            instance.in_flight += 1
+            instance.requests_total += 1
+            instance.queue_peak = max(instance.queue_peak, instance.in_flight)
+            instance.last_used = now
+            scale_up = self._needs_scale_up(instance.model)
+        if scale_up:
+            threading.Thread(target=self._scale_up, args=(instance.model,), daemon=True).start()
+        try:
+            yield instance.host
+        finally:
+            with self._lock:
+                instance.in_flight -= 1
+                if instance.in_flight == 0 and instance.busy_since:
+                    instance.busy_seconds += time.time() - instance.busy_since
+                    instance.busy_since = None
+    
+    def _needs_scale_up(self, model: str) -> bool:
+        instances = self._model_instances(model)
+        if any(i.status == "starting" for i in instances) or len(instances) >= MAX_INSTANCES_PER_MODEL:
+            return False
+        return min(i.in_flight for i in instances) >= SCALE_UP_QUEUE_DEPTH
+    
+    def _scale_up(self, model: str):
+        try:
+            with self._lock:
+                if not self._needs_scale_up(model):
+                    return
+                instance = self._select_instance_for_scale_up(model)
+            self._await_ready(instance)
+            logger.info(f"📈 Scaled model {model} to {len(self._model_instances(model))} backends")
+        except Exception as e:
+            logger.warning(f"Could not scale up backends for {model}: {e}")
+    
+    def _select_instance_for_scale_up(self, model: str) -> OllamaBackendInstance:
+        warm = self._warm_instances()
+        instance = warm[0] if warm else self._spawn_instance(model)
+        if warm:
+            instance.model = model
+            instance.idle_since = None
+        instance.pinned = True
+        return instance
     
     def release_backend(self, agent_id: str):
-        """Release dedicated Ollama backend"""
-        if agent_id in self.active_backends:
-            backend_config = self.active_backends[agent_id]
-            port = backend_config["port"]
-            
-            # Terminate the Ollama process
-            if agent_id in self.active_processes:
-                process = self.active_processes[agent_id]
-                process.terminate()
-                process.wait(timeout=10)
-                del self.active_processes[agent_id]
-            
-            # Clean up
-            self.allocated_ports.discard(port)
-            del self.active_backends[agent_id]
-            
-            logger.info(f"Released dedicated Ollama backend for agent {agent_id} on port {port}")
-            return True
-        return False
+        """Release an agent's backend; the process stays warm for reuse until reaped"""
+        with self._lock:
+            port = self.agent_ports.pop(agent_id, None)
+            self.active_backends.pop(agent_id, None)
+            instance = self.instances.get(port)
+            if instance is None:
+                return False
+            self._detach(agent_id, instance)
+        logger.info(f"Released Ollama backend on port {port} for agent {agent_id} "
+                    f"({len(instance.agents)} agents remain)")
+        return True
     
     def get_backend_status(self, agent_id: str):
-        """Get status of dedicated backend"""
-        if agent_id in self.active_backends:
-            backend_config = self.active_backends[agent_id]
-            port = backend_config["port"]
-            
-            # Check if process is still running
-            if agent_id in self.active_processes:
-                process = self.active_processes[agent_id]
-                if process.poll() is None:  # Process is still running
-                    return {"status": "running", "port": port, "pid": process.pid}
-                else:
-                    return {"status": "stopped", "port": port}
-            else:
-                return {"status": "not_started", "port": port}
-        
-        return {"status": "not_found"}
+        """Get status of an agent's backend"""
+        with self._lock:
+            instance = self.instances.get(self.agent_ports.get(agent_id))
+            if instance is None:
+                return {"status": "not_found"}
+            if not instance.is_alive():
+                return {"status": "stopped", "port": instance.port}
+            return {
+                "status": instance.status,
+                "port": instance.port,
+                "pid": instance.pid,
+                "model": instance.model,
+                "shared_with": len(instance.agents),
+                "in_flight": instance.in_flight
+            }
+    
+    def get_pool_metrics(self) -> Dict[str, Any]:
+        """Per-backend occupancy and queue metrics"""
+        now = time.time()
+        with self._lock:
+            backends = [{
+                "port": i.port,
+                "model": i.model,
+                "status": i.status,
+                "pinned": i.pinned,
+                "pid": i.pid,
+                "agents": sorted(i.agents),
+                "in_flight": i.in_flight,
+                "queue_peak": i.queue_peak,
+                "requests_total": i.requests_total,
+                "occupancy": round(i.occupancy(now), 4),
+                "uptime_seconds": round(now - i.started_at, 1),
+                "idle_seconds": round(i.idle_for(now), 1) if i.idle_for(now) is not None else None
+            } for i in sorted(self.instances.values(), key=lambda i: i.port)]
+        models = {}
+        for backend in backends:
+            models.setdefault(backend["model"], []).append(backend["port"])
+        return {
+            "backends": backends,
+            "models": models,
+            "total_backends": len(backends),
+            "ports_available": self.end_port - self.start_port + 1 - len(self.allocated_ports)
+        }
 
 class A2AService:
     """A2A Service implementing Strands A2A framework"""
@@ -1014,12 +1258,16 @@ Please provide a comprehensive, specialized response based on your expertise and
                 }
             }
             
-            # Call Ollama directly
-            response = requests.post(
-                "http://localhost:11434/api/generate",
-                json=ollama_request,
-                timeout=120
-            )
+            # Call the agent's pooled backend (least-loaded instance for its model), or the shared
+            # daemon through the admission gateway; pooled backends are admitted by the pool's own scaling
+            backend_agent_id = (agent.dedicated_ollama_backend or {}).get('agent_id', agent.id)
+            with self.ollama_manager.track_request(backend_agent_id) as ollama_host:
+                response = ollama_post(
+                    f"{ollama_host}/api/generate",
+                    json=ollama_request,
+                    timeout=120,
+                    priority="orchestration"
+                )
             
             if response.status_code == 200:
                 result = response.json()
@@ -1428,6 +1676,15 @@ def get_dedicated_backends_status():
         logger.error(f"Error getting dedicated backends status: {e}")
         return jsonify({"status": "error", "error": str(e)}), 500
 
+@app.route('/api/a2a/dedicated-backends/pool', methods=['GET'])
+def get_backend_pool_metrics():
+    """Occupancy, queue depth and agent routing for each pooled Ollama backend"""
+    try:
+        return jsonify({"status": "success", **a2a_service.ollama_manager.get_pool_metrics()})
+    except Exception as e:
+        logger.error(f"Error getting backend pool metrics: {e}")
+        return jsonify({"status": "error", "error": str(e)}), 500
+
 @app.route('/api/a2a/agents', methods=['GET'])
 def get_agents():
     """Get all registered A2A agents"""
@@ -1482,6 +1739,11 @@ def delete_agent(agent_id):
             for key in connections_to_remove:
                 a2a_service.connections.pop(key)
             
+            # Release its pooled Ollama backend (kept warm for reuse)
+            if agent.dedicated_ollama_backend:
+                a2a_service.ollama_manager.release_backend(
+                    agent.dedicated_ollama_backend.get('agent_id', agent_id))
+            
             # Remove from database
             a2a_service._delete_agent_from_database(agent_id)
             
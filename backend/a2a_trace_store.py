@@ -0,0 +1,483 @@
+#!/usr/bin/env python3
+"""
+A2A Trace Store
+Durable SQLite (WAL) storage for A2A orchestration traces
+
+Traces posted to the observability API are appended once and split into
+narrow, indexed tables (traces, trace agents, handoffs, events) with the full
+payload kept alongside. Listing endpoints filter by time range, agent, status,
+session or event type and page with keyset cursors, so the UI can browse weeks
+of traces without loading them into memory.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from service_metrics import sqlite_timer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TRACE_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'a2a_traces.db')
+TRACE_RETENTION_DAYS = float(os.getenv('A2A_TRACE_RETENTION_DAYS', '30'))
+MAX_PAGE_SIZE = 500
+
+def to_epoch(value: Any) -> Optional[float]:
+    """ISO string, datetime or epoch number -> epoch seconds"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.timestamp()
+    try:
+        return datetime.fromisoformat(str(value).replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
+
+def to_iso(epoch: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(epoch).isoformat() if epoch is not None else None
+
+def _enum_value(value: Any) -> Optional[str]:
+    """'HandoffStatus.COMPLETED' / Enum / 'completed' -> 'completed'"""
+    if value is None:
+        return None
+    value = getattr(value, 'value', value)
+    text = str(value)
+    return text.split('.', 1)[1].lower() if '.' in text and text.split('.', 1)[0][:1].isupper() else text
+
+def _encode_cursor(epoch: float, key: str) -> str:
+    return f"{epoch!r}|{key}"
+
+def _decode_cursor(cursor: Optional[str]) -> Optional[Tuple[float, str]]:
+    if not cursor:
+        return None
+    epoch, _, key = cursor.partition('|')
+    try:
+        return float(epoch), key
+    except ValueError:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+class A2ATraceStore:
+    """Append-only trace store with time-range, agent and keyset-paginated queries"""
+
+    PURGE_EVERY_WRITES = 200
+
+    def __init__(self, db_path: str = DEFAULT_TRACE_DB, retention_days: float = TRACE_RETENTION_DAYS):
+        self.db_path = db_path
+        self.retention_days = retention_days
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._writes = 0
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._init_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30.0)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self):
+        with self._connect() as conn:
+            conn.executescript('''
+                CREATE TABLE IF NOT EXISTS a2a_traces (
+                    session_id TEXT PRIMARY KEY,
+                    query TEXT,
+                    start_time REAL NOT NULL,
+                    end_time REAL,
+                    total_execution_time REAL,
+                    success INTEGER NOT NULL DEFAULT 0,
+                    error TEXT,
+                    orchestration_strategy TEXT,
+                    agents_involved TEXT,
+                    handoff_count INTEGER NOT NULL DEFAULT 0,
+                    event_count INTEGER NOT NULL DEFAULT 0,
+                    stored_at REAL NOT NULL,
+                    payload TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_a2a_traces_start ON a2a_traces(start_time, session_id);
+                CREATE INDEX IF NOT EXISTS idx_a2a_traces_success_start ON a2a_traces(success, start_time);
+
+                CREATE TABLE IF NOT EXISTS a2a_trace_agents (
+                    session_id TEXT NOT NULL,
+                    agent TEXT NOT NULL,
+                    start_time REAL NOT NULL,
+                    PRIMARY KEY (agent, start_time, session_id)
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS idx_a2a_trace_agents_session ON a2a_trace_agents(session_id);
+
+                CREATE TABLE IF NOT EXISTS a2a_handoffs (
+                    id TEXT PRIMARY KEY,
+                    session_id TEXT NOT NULL,
+                    handoff_number INTEGER,
+                    from_agent_id TEXT,
+                    from_agent_name TEXT,
+                    to_agent_id TEXT,
+                    to_agent_name TEXT,
+                    status TEXT,
+                    start_time REAL NOT NULL,
+                    end_time REAL,
+                    execution_time REAL,
+                    payload TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_a2a_handoffs_session ON a2a_handoffs(session_id, handoff_number);
+                CREATE INDEX IF NOT EXISTS idx_a2a_handoffs_start ON a2a_handoffs(start_time, id);
+                CREATE INDEX IF NOT EXISTS idx_a2a_handoffs_from ON a2a_handoffs(from_agent_name, start_time);
+                CREATE INDEX IF NOT EXISTS idx_a2a_handoffs_to ON a2a_handoffs(to_agent_name, start_time);
+
+                CREATE TABLE IF NOT EXISTS a2a_events (
+                    id TEXT PRIMARY KEY,
+                    session_id TEXT NOT NULL,
+                    event_type TEXT NOT NULL,
+                    timestamp REAL NOT NULL,
+                    agent_id TEXT,
+                    agent_name TEXT,
+                    status TEXT,
+                    execution_time REAL,
+                    payload TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_a2a_events_session ON a2a_events(session_id, timestamp);
+                CREATE INDEX IF NOT EXISTS idx_a2a_events_time ON a2a_events(timestamp, id);
+                CREATE INDEX IF NOT EXISTS idx_a2a_events_type ON a2a_events(event_type, timestamp);
+                CREATE INDEX IF NOT EXISTS idx_a2a_events_agent ON a2a_events(agent_name, timestamp);
+            ''')
+
+    # ------------------------------------------------------------------ writes
+
+    def store_trace(self, trace: Dict[str, Any]) -> str:
+        """Persist one trace (export_trace_data format) with its handoffs and events in a single transaction"""
+        session_id = trace.get('session_id')
+        if not session_id:
+            raise ValueError("Trace has no session_id")
+
+        now = time.time()
+        start_time = to_epoch(trace.get('start_time')) or now
+        handoffs = trace.get('handoffs') or []
+        events = trace.get('events') or []
+        agents = [agent for agent in dict.fromkeys(trace.get('agents_involved') or []) if agent]
+
+        handoff_rows = []
+        for number, handoff in enumerate(handoffs, 1):
+            from_agent = handoff.get('from_agent') or {}
+            to_agent = handoff.get('to_agent') or {}
+            handoff_rows.append((
+                handoff.get('id') or f"{session_id}:handoff:{number}",
+                session_id,
+                handoff.get('handoff_number', number),
+                handoff.get('from_agent_id', from_agent.get('id')),
+                handoff.get('from_agent_name', from_agent.get('name')),
+                handoff.get('to_agent_id', to_agent.get('id')),
+                handoff.get('to_agent_name', to_agent.get('name')),
+                _enum_value(handoff.get('status')),
+                to_epoch(handoff.get('start_time')) or start_time,
+                to_epoch(handoff.get('end_time')),
+                handoff.get('execution_time'),
+                json.dumps(handoff, default=str)
+            ))
+
+        event_rows = []
+        for number, event in enumerate(events, 1):
+            event_rows.append((
+                event.get('id') or f"{session_id}:event:{number}",
+                session_id,
+                _enum_value(event.get('event_type')) or 'unknown',
+                to_epoch(event.get('timestamp')) or start_time,
+                event.get('agent_id'),
+                event.get('agent_name'),
+                event.get('status'),
+                event.get('execution_time'),
+                json.dumps(event, default=str)
+            ))
+
+        with self._write_lock, sqlite_timer('a2a_traces', 'store_trace'):
+            conn = self._connect()
+            with conn:
+                # A re-posted session replaces its previous rows
+                for table in ('a2a_trace_agents', 'a2a_handoffs', 'a2a_events'):
+                    conn.execute(f'DELETE FROM {table} WHERE session_id = ?', (session_id,))
+                conn.execute('''
+                    INSERT OR REPLACE INTO a2a_traces
+                    (session_id, query, start_time, end_time, total_execution_time, success, error,
+                     orchestration_strategy, agents_involved, handoff_count, event_count, stored_at, payload)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (session_id, trace.get('query'), start_time, to_epoch(trace.get('end_time')),
+                      trace.get('total_execution_time'), 1 if trace.get('success') else 0, trace.get('error'),
+                      trace.get('orchestration_strategy'), json.dumps(agents), len(handoffs), len(events),
+                      now, json.dumps(trace, default=str)))
+                conn.executemany('INSERT OR REPLACE INTO a2a_trace_agents (session_id, agent, start_time) VALUES (?, ?, ?)',
+                                 [(session_id, agent, start_time) for agent in agents])
+                conn.executemany('INSERT OR REPLACE INTO a2a_handoffs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', handoff_rows)
+                conn.executemany('INSERT OR REPLACE INTO a2a_events VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', event_rows)
+            self._writes += 1
+            should_purge = self.retention_days > 0 and self._writes % self.PURGE_EVERY_WRITES == 0
+        if should_purge:
+            self.purge_older_than(self.retention_days)
+        return session_id
+
+    def purge_older_than(self, days: float) -> int:
+        """Drop traces (and their rows) that started more than `days` ago"""
+        cutoff = time.time() - days * 86400
+        with self._write_lock:
+            conn = self._connect()
+            with conn:
+                for table, column in (('a2a_trace_agents', 'start_time'), ('a2a_handoffs', 'start_time'), ('a2a_events', 'timestamp')):
+                    conn.execute(f'DELETE FROM {table} WHERE {column} < ?', (cutoff,))
+                removed = conn.execute('DELETE FROM a2a_traces WHERE start_time < ?', (cutoff,)).rowcount
+        if removed:
+            logger.info(f"Purged {removed} A2A traces older than {days} days")
+        return removed
+
+    # ------------------------------------------------------------------ reads
+
+    def _fetch(self, operation: str, sql: str, params: tuple) -> List[sqlite3.Row]:
+        with sqlite_timer('a2a_traces', operation):
+            return self._connect().execute(sql, params).fetchall()
+
+    @staticmethod
+    def _time_filters(column: str, start: Optional[float], end: Optional[float], clauses: List[str], params: List[Any]):
+        if start is not None:
+            clauses.append(f'{column} >= ?')
+            params.append(start)
+        if end is not None:
+            clauses.append(f'{column} < ?')
+            params.append(end)
+
+    @staticmethod
+    def _page(rows: List[sqlite3.Row], limit: int, time_column: str, key_column: str):
+        """Split the limit+1 fetch into a page and the cursor for the next one"""
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            return rows, _encode_cursor(last[time_column], last[key_column])
+        return rows, None
+
+    def query_traces(self, start: float = None, end: float = None, agent: str = None, success: bool = None,
+                     limit: int = 50, cursor: str = None) -> Dict[str, Any]:
+        """Trace summaries newest first, filtered by start-time range, agent and outcome"""
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        clauses, params = [], []
+        if agent:
+            source = 'a2a_trace_agents ta JOIN a2a_traces t ON t.session_id = ta.session_id'
+            clauses.append('ta.agent = ?')
+            params.append(agent)
+            time_column = 'ta.start_time'
+        else:
+            source = 'a2a_traces t'
+            time_column = 't.start_time'
+        self._time_filters(time_column, start, end, clauses, params)
+        if success is not None:
+            clauses.append('t.success = ?')
+            params.append(1 if success else 0)
+        position = _decode_cursor(cursor)
+        if position:
+            clauses.append(f'({time_column} < ? OR ({time_column} = ? AND t.session_id < ?))')
+            params += [position[0], position[0], position[1]]
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        rows = self._fetch('query_traces', f'''
+            SELECT t.session_id, t.query, t.start_time, t.end_time, t.total_execution_time, t.success, t.error,
+                   t.orchestration_strategy, t.agents_involved, t.handoff_count, t.event_count
+            FROM {source} {where}
+            ORDER BY {time_column} DESC, t.session_id DESC
+            LIMIT ?
+        ''', (*params, limit + 1))
+        rows, next_cursor = self._page(rows, limit, 'start_time', 'session_id')
+
+        return {
+            "traces": [{
+                "session_id": row['session_id'],
+                "query": row['query'],
+                "start_time": to_iso(row['start_time']),
+                "end_time": to_iso(row['end_time']),
+                "total_execution_time": row['total_execution_time'],
+                "success": bool(row['success']),
+                "error": row['error'],
+                "orchestration_strategy": row['orchestration_strategy'],
+                "agents_involved": json.loads(row['agents_involved'] or '[]'),
+                "handoff_count": row['handoff_count'],
+                "event_count": row['event_count'],
+                "status": "completed"
+            } for row in rows],
+            "next_cursor": next_cursor
+        }
+
+    def get_trace(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Full stored payload of one trace"""
+        row = self._connect().execute('SELECT payload FROM a2a_traces WHERE session_id = ?', (session_id,)).fetchone()
+        return json.loads(row['payload']) if row else None
+
+    def query_handoffs(self, session_id: str = None, agent: str = None, start: float = None, end: float = None,
+                       limit: int = 20, cursor: str = None) -> Dict[str, Any]:
+        """Handoffs newest first; agent matches either side of the handoff"""
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        clauses, params = [], []
+        if session_id:
+            clauses.append('session_id = ?')
+            params.append(session_id)
+        if agent:
+            clauses.append('(from_agent_name = ? OR to_agent_name = ?)')
+            params += [agent, agent]
+        self._time_filters('start_time', start, end, clauses, params)
+        position = _decode_cursor(cursor)
+        if position:
+            clauses.append('(start_time < ? OR (start_time = ? AND id < ?))')
+            params += [position[0], position[0], position[1]]
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        rows = self._fetch('query_handoffs', f'''
+            SELECT * FROM a2a_handoffs {where}
+            ORDER BY start_time DESC, id DESC
+            LIMIT ?
+        ''', (*params, limit + 1))
+        rows, next_cursor = self._page(rows, limit, 'start_time', 'id')
+
+        handoffs = []
+        for row in rows:
+            payload = json.loads(row['payload'])
+            handoffs.append({
+                "id": row['id'],
+                "session_id": row['session_id'],
+                "handoff_number": row['handoff_number'],
+                "from_agent": {"id": row['from_agent_id'], "name": row['from_agent_name']},
+                "to_agent": {"id": row['to_agent_id'], "name": row['to_agent_name']},
+                "status": row['status'],
+                "start_time": to_iso(row['start_time']),
+                "end_time": to_iso(row['end_time']),
+                "execution_time": row['execution_time'],
+                "context_transferred": payload.get('context_transferred', {}),
+                "input_prepared": payload.get('input_prepared'),
+                "output_received": payload.get('output_received'),
+                "tools_used": payload.get('tools_used', []),
+                "error": payload.get('error')
+            })
+        return {"handoffs": handoffs, "next_cursor": next_cursor}
+
+    def query_events(self, session_id: str = None, event_type: str = None, agent: str = None,
+                     start: float = None, end: float = None, limit: int = 50, cursor: str = None) -> Dict[str, Any]:
+        """Events newest first, filtered by session, type, agent and time range"""
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        clauses, params = [], []
+        if session_id:
+            clauses.append('session_id = ?')
+            params.append(session_id)
+        if event_type:
+            clauses.append('event_type = ?')
+            params.append(event_type)
+        if agent:
+            clauses.append('agent_name = ?')
+            params.append(agent)
+        self._time_filters('timestamp', start, end, clauses, params)
+        position = _decode_cursor(cursor)
+        if position:
+            clauses.append('(timestamp < ? OR (timestamp = ? AND id < ?))')
+            params += [position[0], position[0], position[1]]
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        rows = self._fetch('query_events', f'''
+            SELECT * FROM a2a_events {where}
+            ORDER BY timestamp DESC, id DESC
+            LIMIT ?
+        ''', (*params, limit + 1))
+        rows, next_cursor = self._page(rows, limit, 'timestamp', 'id')
+
+        events = []
+        for row in rows:
+            payload = json.loads(row['payload'])
+            events.append({
+                "id": row['id'],
+                "session_id": row['session_id'],
+                "event_type": row['event_type'],
+                "timestamp": to_iso(row['timestamp']),
+                "agent_id": row['agent_id'],
+                "agent_name": row['agent_name'],
+                "from_agent_id": payload.get('from_agent_id'),
+                "to_agent_id": payload.get('to_agent_id'),
+                "content": payload.get('content'),
+                "context": payload.get('context'),
+                "metadata": payload.get('metadata'),
+                "execution_time": row['execution_time'],
+                "status": row['status'],
+                "error": payload.get('error')
+            })
+        return {"events": events, "next_cursor": next_cursor}
+
+    def get_metrics(self, start: float = None, end: float = None, agent: str = None, recent_sample: int = 10) -> Dict[str, Any]:
+        """Aggregate orchestration metrics computed in SQL over the selected time range"""
+        clauses, params = [], []
+        if agent:
+            clauses.append('session_id IN (SELECT session_id FROM a2a_trace_agents WHERE agent = ?)')
+            params.append(agent)
+        self._time_filters('start_time', start, end, clauses, params)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        conn = self._connect()
+
+        totals = conn.execute(f'''
+            SELECT COUNT(*) AS total, COALESCE(SUM(success), 0) AS successful,
+                   AVG(NULLIF(total_execution_time, 0)) AS avg_time, COALESCE(SUM(handoff_count), 0) AS handoffs
+            FROM a2a_traces {where}
+        ''', params).fetchone()
+
+        usage_clauses, usage_params = [], []
+        self._time_filters('start_time', start, end, usage_clauses, usage_params)
+        usage_where = f"WHERE {' AND '.join(usage_clauses)}" if usage_clauses else ''
+        agent_usage = {row['agent']: row['uses'] for row in conn.execute(f'''
+            SELECT agent, COUNT(*) AS uses FROM a2a_trace_agents {usage_where}
+            GROUP BY agent ORDER BY uses DESC
+        ''', usage_params)}
+
+        error_types = {}
+        error_where = f"{where} {'AND' if where else 'WHERE'} error IS NOT NULL AND error != ''"
+        for row in conn.execute(f'SELECT error, COUNT(*) AS n FROM a2a_traces {error_where} GROUP BY error', params):
+            error_type = row['error'].split(':')[0]
+            error_types[error_type] = error_types.get(error_type, 0) + row['n']
+
+        recent = conn.execute(f'''
+            SELECT success, total_execution_time FROM a2a_traces {where}
+            ORDER BY start_time DESC LIMIT ?
+        ''', (*params, recent_sample)).fetchall()
+        recent_times = [row['total_execution_time'] for row in recent if row['total_execution_time']]
+
+        total = totals['total']
+        return {
+            "total_orchestrations": total,
+            "successful_orchestrations": totals['successful'],
+            "failed_orchestrations": total - totals['successful'],
+            "success_rate": totals['successful'] / total if total else 0,
+            "average_execution_time": totals['avg_time'] or 0,
+            "average_handoffs_per_orchestration": totals['handoffs'] / total if total else 0,
+            "most_used_agents": agent_usage,
+            "error_types": error_types,
+            "recent_performance": {
+                "success_rate": sum(row['success'] for row in recent) / len(recent) if recent else 0,
+                "average_execution_time": sum(recent_times) / len(recent_times) if recent_times else 0,
+                "sample_size": len(recent)
+            }
+        }
+
+    def count_traces(self) -> int:
+        return self._connect().execute('SELECT COUNT(*) FROM a2a_traces').fetchone()[0]
+
+_trace_store = None
+_trace_store_lock = threading.Lock()
+
+def get_trace_store() -> A2ATraceStore:
+    """Get the process-wide trace store (database path from A2A_TRACE_DB)"""
+    global _trace_store
+    if _trace_store is None:
+        with _trace_store_lock:
+            if _trace_store is None:
+                _trace_store = A2ATraceStore(os.environ.get('A2A_TRACE_DB', DEFAULT_TRACE_DB))
+    return _trace_store
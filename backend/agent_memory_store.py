@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Agent Memory Store
+SQLite (WAL) key-value backend for the memory_store / memory_retrieve tools
+
+Each agent gets its own namespace, entries can expire via a TTL, and lookups
+go through indexes (exact key, key prefix, FTS5 full-text relevance) so a
+store or retrieve costs the same regardless of how much memory is kept.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Optional, Dict, Any, List
+
+DEFAULT_MEMORY_DB = './data/agent_memory.db'
+LEGACY_MEMORY_FILE = './data/agent_memory.json'
+DEFAULT_NAMESPACE = 'default'
+
+class AgentMemoryStore:
+    """Thread-safe, namespaced key-value memory with TTL and prefix/full-text lookup"""
+
+    PURGE_EVERY_WRITES = 500
+
+    def __init__(self, db_path: str = DEFAULT_MEMORY_DB, default_ttl: Optional[float] = None):
+        self.db_path = db_path
+        self.default_ttl = default_ttl
+        self._local = threading.local()
+        self._write_count = 0
+        self._write_count_lock = threading.Lock()
+        self.fts_available = False
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._init_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        """One long-lived connection per thread; WAL lets readers run alongside a writer"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30.0)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA busy_timeout=30000')
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self):
+        conn = self._connect()
+        with conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS agent_memory (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    expires_at REAL,
+                    UNIQUE (namespace, key)
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_agent_memory_expires ON agent_memory(expires_at)')
+
+        # Full-text index kept in sync by triggers (external content table)
+        try:
+            with conn:
+                conn.execute('''
+                    CREATE VIRTUAL TABLE IF NOT EXISTS agent_memory_fts
+                    USING fts5(key, value, content='agent_memory', content_rowid='rowid')
+                ''')
+                conn.execute('''
+                    CREATE TRIGGER IF NOT EXISTS agent_memory_ai AFTER INSERT ON agent_memory BEGIN
+                        INSERT INTO agent_memory_fts(rowid, key, value) VALUES (new.rowid, new.key, new.value);
+                    END
+                ''')
+                conn.execute('''
+                    CREATE TRIGGER IF NOT EXISTS agent_memory_ad AFTER DELETE ON agent_memory BEGIN
+                        INSERT INTO agent_memory_fts(agent_memory_fts, rowid, key, value)
+                        VALUES ('delete', old.rowid, old.key, old.value);
+                    END
+                ''')
+                conn.execute('''
+                    CREATE TRIGGER IF NOT EXISTS agent_memory_au AFTER UPDATE ON agent_memory BEGIN
+                        INSERT INTO agent_memory_fts(agent_memory_fts, rowid, key, value)
+                        VALUES ('delete', old.rowid, old.key, old.value);
+                        INSERT INTO agent_memory_fts(rowid, key, value) VALUES (new.rowid, new.key, new.value);
+                    END
+                ''')
+            self.fts_available = True
+        except sqlite3.OperationalError as e:
+            print(f"[Agent Memory] ⚠️  FTS5 not available, full-text lookup falls back to LIKE: {e}")
+
+    @staticmethod
+    def _row_to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        return {
+            'namespace': row['namespace'],
+            'key': row['key'],
+            'value': row['value'],
+            'timestamp': datetime.fromtimestamp(row['updated_at']).isoformat(),
+            'expires_at': datetime.fromtimestamp(row['expires_at']).isoformat() if row['expires_at'] else None
+        }
+
+    def store(self, key: str, value: str, namespace: str = DEFAULT_NAMESPACE,
+              ttl_seconds: Optional[float] = None) -> Dict[str, Any]:
+        """Insert or overwrite a memory entry"""
+        now = time.time()
+        ttl = ttl_seconds if ttl_seconds is not None else self.default_ttl
+        expires_at = now + ttl if ttl else None
+
+        conn = self._connect()
+        with conn:
+            conn.execute('''
+                INSERT INTO agent_memory (namespace, key, value, created_at, updated_at, expires_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(namespace, key) DO UPDATE SET
+                    value = excluded.value,
+                    updated_at = excluded.updated_at,
+                    expires_at = excluded.expires_at
+            ''', (namespace, key, value, now, now, expires_at))
+
+        with self._write_count_lock:
+            self._write_count += 1
+            should_purge = self._write_count % self.PURGE_EVERY_WRITES == 0
+        if should_purge:
+            self.purge_expired()
+
+        return {'namespace': namespace, 'key': key, 'value': value,
+                'timestamp': datetime.fromtimestamp(now).isoformat()}
+
+    def retrieve(self, key: str, namespace: str = DEFAULT_NAMESPACE) -> Optional[Dict[str, Any]]:
+        """Exact key lookup; expired entries are treated as missing"""
+        row = self._connect().execute('''
+            SELECT * FROM agent_memory
+            WHERE namespace = ? AND key = ? AND (expires_at IS NULL OR expires_at > ?)
+        ''', (namespace, key, time.time())).fetchone()
+        return self._row_to_dict(row) if row else None
+
+    def search_prefix(self, prefix: str, namespace: str = DEFAULT_NAMESPACE, limit: int = 10) -> List[Dict[str, Any]]:
+        """Keys starting with prefix, served as a range scan on the (namespace, key) index"""
+        rows = self._connect().execute('''
+            SELECT * FROM agent_memory
+            WHERE namespace = ? AND key >= ? AND key < ? AND (expires_at IS NULL OR expires_at > ?)
+            ORDER BY key
+            LIMIT ?
+        ''', (namespace, prefix, prefix + '\uffff', time.time(), limit)).fetchall()
+        return [self._row_to_dict(row) for row in rows]
+
+    def search(self, query: str, namespace: str = DEFAULT_NAMESPACE, limit: int = 10) -> List[Dict[str, Any]]:
+        """Relevance-ranked lookup over keys and values"""
+        terms = re.findall(r'\w+', query.lower())
+        if not terms:
+            return []
+
+        conn = self._connect()
+        now = time.time()
+        if self.fts_available:
+            match = ' OR '.join(f'"{term}"' for term in terms)
+            rows = conn.execute('''
+                SELECT m.* FROM agent_memory_fts f
+                JOIN agent_memory m ON m.rowid = f.rowid
+                WHERE agent_memory_fts MATCH ? AND m.namespace = ?
+                  AND (m.expires_at IS NULL OR m.expires_at > ?)
+                ORDER BY f.rank
+                LIMIT ?
+            ''', (match, namespace, now, limit)).fetchall()
+        else:
+            clauses = ' OR '.join(['key LIKE ? OR value LIKE ?'] * len(terms))
+            params = [p for term in terms for p in (f'%{term}%', f'%{term}%')]
+            rows = conn.execute(f'''
+                SELECT * FROM agent_memory
+                WHERE namespace = ? AND (expires_at IS NULL OR expires_at > ?) AND ({clauses})
+                ORDER BY updated_at DESC
+                LIMIT ?
+            ''', (namespace, now, *params, limit)).fetchall()
+        return [self._row_to_dict(row) for row in rows]
+
+    def delete(self, key: str, namespace: str = DEFAULT_NAMESPACE) -> bool:
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute('DELETE FROM agent_memory WHERE namespace = ? AND key = ?', (namespace, key))
+        return cursor.rowcount > 0
+
+    def purge_expired(self) -> int:
+        """Remove expired entries; runs periodically from store()"""
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute('DELETE FROM agent_memory WHERE expires_at IS NOT NULL AND expires_at <= ?',
+                                  (time.time(),))
+        return cursor.rowcount
+
+    def import_legacy_json(self, memory_file: str = LEGACY_MEMORY_FILE) -> int:
+        """One-off import of the old whole-file JSON memory into the default namespace"""
+        if not os.path.exists(memory_file):
+            return 0
+        conn = self._connect()
+        if conn.execute('SELECT 1 FROM agent_memory LIMIT 1').fetchone():
+            return 0
+
+        try:
+            with open(memory_file, 'r') as f:
+                memory = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"[Agent Memory] ⚠️  Could not read legacy memory file {memory_file}: {e}")
+            return 0
+
+        now = time.time()
+        rows = []
+        for key, entry in memory.items():
+            try:
+                stored_at = datetime.fromisoformat(entry.get('timestamp')).timestamp()
+            except (TypeError, ValueError):
+                stored_at = now
+            rows.append((DEFAULT_NAMESPACE, key, str(entry.get('value', '')), stored_at, stored_at))
+
+        with conn:
+            conn.executemany('''
+                INSERT OR IGNORE INTO agent_memory (namespace, key, value, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+            ''', rows)
+        print(f"[Agent Memory] Imported {len(rows)} entries from {memory_file}")
+        return len(rows)
+
+_memory_store = None
+_memory_store_lock = threading.Lock()
+
+def get_memory_store() -> AgentMemoryStore:
+    """Get the process-wide memory store, importing legacy JSON memory on first use"""
+    global _memory_store
+    if _memory_store is None:
+        with _memory_store_lock:
+            if _memory_store is None:
+                store = AgentMemoryStore(os.environ.get('AGENT_MEMORY_DB', DEFAULT_MEMORY_DB))
+                store.import_legacy_json()
+                _memory_store = store
+    return _memory_store
@@ -14,6 +14,7 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 from flask import Flask, request, jsonify
 from flask_cors import CORS
+from service_metrics import instrument_flask
 
 # Load configuration
 def load_config():
@@ -34,6 +35,7 @@ def load_config():
 
 app = Flask(__name__)
 CORS(app)
+instrument_flask(app, "agent-registry")
 
 # Registry Database
 REGISTRY_DB = "agent_registry.db"
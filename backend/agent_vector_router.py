@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Agent Vector Router
+Embedding-based agent routing shared by the chat and main system orchestrators
+
+- each agent's name/description/capabilities is embedded once and re-embedded
+  only when that text changes (agents are refreshed on discovery)
+- a query is embedded once, then all agents are scored with a single
+  matrix-vector cosine-similarity pass
+- callers skip the LLM routing call when the top match is confident, and fall
+  back to their keyword scoring when NumPy or the embedding model is unavailable
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from service_metrics import ollama_post, register_cache
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+OLLAMA_BASE_URL = os.getenv('OLLAMA_BASE_URL', 'http://localhost:11434')
+ROUTER_EMBED_MODEL = os.getenv('ROUTER_EMBED_MODEL', 'nomic-embed-text')
+ROUTER_EMBED_TIMEOUT = float(os.getenv('ROUTER_EMBED_TIMEOUT', '5'))
+ROUTER_KEEP_ALIVE = "30m"
+
+# A route is confident when the best agent is similar enough AND clearly ahead of the runner-up
+ROUTER_MIN_SIMILARITY = float(os.getenv('ROUTER_MIN_SIMILARITY', '0.55'))
+ROUTER_MIN_MARGIN = float(os.getenv('ROUTER_MIN_MARGIN', '0.05'))
+
+# After a failed embedding call, don't retry (and add latency to every route) for this long
+ROUTER_RETRY_AFTER = 60
+QUERY_CACHE_SIZE = 512
+
+def agent_key(agent: Any) -> str:
+    """Stable id for an agent dict (chat orchestrator) or AgentCapability (main orchestrator)"""
+    if isinstance(agent, dict):
+        return str(agent.get('id') or agent.get('agent_id') or agent.get('name', ''))
+    return str(getattr(agent, 'agent_id', '') or getattr(agent, 'name', ''))
+
+def agent_text(agent: Any) -> str:
+    """Text embedded for an agent: name, role, description, capabilities and domain hints"""
+    get = agent.get if isinstance(agent, dict) else (lambda field, default=None: getattr(agent, field, default))
+    parts = [get('name', '') or '', get('role', '') or '', get('description', '') or '']
+    for field in ('capabilities', 'keywords', 'tools'):
+        values = get(field, None) or []
+        if isinstance(values, (list, tuple)):
+            parts.append(', '.join(str(value) for value in values))
+    parts += [get('domain', '') or '', get('specialization', '') or '']
+    return '. '.join(part for part in parts if part)
+
+class AgentVectorRouter:
+    """Cosine-similarity router over precomputed agent embeddings"""
+
+    def __init__(self, embed_model: str = ROUTER_EMBED_MODEL, ollama_url: str = OLLAMA_BASE_URL):
+        self.embed_model = embed_model
+        self.ollama_url = ollama_url
+        self._lock = threading.Lock()
+        self._agent_vectors: Dict[str, Any] = {}   # sha1(agent text) -> unit vector
+        self._query_vectors = OrderedDict()        # query -> unit vector (LRU)
+        self._matrix = None                        # (n_agents, dim) unit rows for the current agent set
+        self._matrix_keys: List[str] = []
+        self._signature = None
+        self._unavailable_until = 0.0
+        self.stats = {'routes': 0, 'agent_embeddings': 0, 'query_embeddings': 0, 'query_cache_hits': 0, 'errors': 0}
+
+    @property
+    def available(self) -> bool:
+        return NUMPY_AVAILABLE and time.time() >= self._unavailable_until
+
+    def _embed(self, texts: List[str]):
+        """Embed texts in one batch request; returns L2-normalised rows"""
+        response = ollama_post(f"{self.ollama_url}/api/embed", json={
+            "model": self.embed_model,
+            "input": texts,
+            "keep_alive": ROUTER_KEEP_ALIVE
+        }, timeout=ROUTER_EMBED_TIMEOUT)
+        if response.status_code == 404:
+            # Older Ollama: single-prompt /api/embeddings endpoint
+            vectors = []
+            for text in texts:
+                single = ollama_post(f"{self.ollama_url}/api/embeddings", json={
+                    "model": self.embed_model,
+                    "prompt": text,
+                    "keep_alive": ROUTER_KEEP_ALIVE
+                }, timeout=ROUTER_EMBED_TIMEOUT)
+                single.raise_for_status()
+                vectors.append(single.json()["embedding"])
+        else:
+            response.raise_for_status()
+            vectors = response.json()["embeddings"]
+
+        matrix = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def _disable(self, error: Exception):
+        self.stats['errors'] += 1
+        self._unavailable_until = time.time() + ROUTER_RETRY_AFTER
+        logger.warning(f"Vector routing unavailable for {ROUTER_RETRY_AFTER}s ({self.embed_model}): {error}")
+
+    def refresh(self, agents: List[Any]) -> bool:
+        """Precompute embeddings for the current agent set; only new or changed agents are embedded"""
+        return self._index(agents) is not None
+
+    def _index(self, agents: List[Any]) -> Optional[Tuple[Any, List[str]]]:
+        """(matrix, keys) for exactly this agent set, or None if unavailable.
+
+        The pair is built and read under one lock, so a concurrent refresh for a
+        different agent set can't swap the matrix out from under the caller.
+        """
+        if not self.available or not agents:
+            return None
+
+        keyed = [(agent_key(agent), agent_text(agent)) for agent in agents]
+        hashes = [hashlib.sha1(text.encode('utf-8')).hexdigest() for _, text in keyed]
+        signature = tuple(zip((key for key, _ in keyed), hashes))
+        with self._lock:
+            if signature == self._signature:
+                return self._matrix, self._matrix_keys
+            missing = {text_hash: text for (_, text), text_hash in zip(keyed, hashes)
+                       if text_hash not in self._agent_vectors}
+
+        if missing:
+            try:
+                vectors = self._embed(list(missing.values()))
+            except Exception as e:
+                self._disable(e)
+                return None
+            with self._lock:
+                self._agent_vectors.update(zip(missing.keys(), vectors))
+            self.stats['agent_embeddings'] += len(missing)
+            logger.info(f"🧭 Embedded {len(missing)} agent profile(s) with {self.embed_model}")
+
+        with self._lock:
+            matrix = np.vstack([self._agent_vectors[text_hash] for text_hash in hashes])
+            keys = [key for key, _ in keyed]
+            self._matrix, self._matrix_keys, self._signature = matrix, keys, signature
+        return matrix, keys
+
+    def _query_vector(self, query: str):
+        with self._lock:
+            vector = self._query_vectors.get(query)
+            if vector is not None:
+                self._query_vectors.move_to_end(query)
+                self.stats['query_cache_hits'] += 1
+                return vector
+
+        vector = self._embed([query])[0]
+        self.stats['query_embeddings'] += 1
+        with self._lock:
+            self._query_vectors[query] = vector
+            while len(self._query_vectors) > QUERY_CACHE_SIZE:
+                self._query_vectors.popitem(last=False)
+        return vector
+
+    def similarities(self, query: str, agents: List[Any]) -> Optional[Dict[str, float]]:
+        """Cosine similarity of the query to every agent (keyed by agent_key), or None if unavailable"""
+        index = self._index(agents)
+        if index is None:
+            return None
+        matrix, keys = index
+        try:
+            query_vector = self._query_vector(query)
+        except Exception as e:
+            self._disable(e)
+            return None
+
+        scores = matrix @ query_vector
+        self.stats['routes'] += 1
+        return {key: float(max(score, 0.0)) for key, score in zip(keys, scores)}
+
+    def rank(self, query: str, agents: List[Any]) -> Optional[List[Tuple[Any, float]]]:
+        """Agents sorted by similarity to the query, best first, or None if unavailable"""
+        scores = self.similarities(query, agents)
+        if scores is None:
+            return None
+        return sorted(((agent, scores[agent_key(agent)]) for agent in agents), key=lambda item: item[1], reverse=True)
+
+    @staticmethod
+    def is_confident(ranked: List[Tuple[Any, float]]) -> bool:
+        """Top match clears the similarity floor and leads the runner-up by the margin"""
+        if not ranked or ranked[0][1] < ROUTER_MIN_SIMILARITY:
+            return False
+        return len(ranked) == 1 or ranked[0][1] - ranked[1][1] >= ROUTER_MIN_MARGIN
+
+    def get_query_cache_stats(self) -> Dict[str, Any]:
+        return {
+            'hits': self.stats['query_cache_hits'],
+            'misses': self.stats['query_embeddings'],
+            'entries': len(self._query_vectors)
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'available': self.available,
+            'embed_model': self.embed_model,
+            'indexed_agents': len(self._matrix_keys)
+        }
+
+# Global instance
+agent_vector_router = AgentVectorRouter()
+register_cache('router_query_embeddings', agent_vector_router.get_query_cache_stats)
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark ContextualQueryAnalyzer wall-clock latency per analysis mode
+(sequential vs parallel step graph vs single combined prompt)
+
+By default runs against a local Ollama stub with a fixed per-call latency, so the
+numbers isolate orchestration overhead. Pass --live to use a real Ollama server.
+
+    python benchmark_contextual_query_analyzer.py
+    python benchmark_contextual_query_analyzer.py --live --model qwen3:1.7b --runs 3
+"""
+
+import argparse
+import json
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from contextual_query_analyzer import ContextualQueryAnalyzer
+
+SAMPLE_QUERY = "I need to analyze customer data, create a predictive model, and generate a business report with recommendations"
+SAMPLE_AGENTS = [
+    {"id": "data-analyst", "name": "Data Analyst", "description": "Analyzes tabular data", "capabilities": ["data_analysis"]},
+    {"id": "ml-engineer", "name": "ML Engineer", "description": "Builds predictive models", "capabilities": ["machine_learning"]},
+    {"id": "report-writer", "name": "Report Writer", "description": "Writes business reports", "capabilities": ["writing"]},
+]
+
+# One canned section per step; the combined prompt gets all of them at once
+STUB_SECTIONS = {
+    "contextual_reasoning": {"user_intent": "predictive customer analysis", "complexity_level": "complex"},
+    "domain_analysis": {"primary_domain": "Data Science & Analytics", "cross_domain": True},
+    "task_classification": {"task_type": "sequential", "requires_multiple_agents": True},
+    "sequence_definition": {"execution_steps": [{"step_number": 1}, {"step_number": 2}, {"step_number": 3}]},
+    "agent_requirements": {"recommended_agents": [], "coordination_strategy": "sequential"},
+}
+
+class StubOllamaHandler(BaseHTTPRequestHandler):
+    """Answers /api/generate after a fixed delay (longer for the combined prompt, which generates more tokens)"""
+    latency = 0.3
+    combined_latency = 0.6
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+        prompt = payload.get("prompt", "")
+        if '"contextual_reasoning": {' in prompt:
+            time.sleep(self.combined_latency)
+            body = STUB_SECTIONS
+        else:
+            time.sleep(self.latency)
+            body = {"stub": True}
+        data = json.dumps({"response": json.dumps(body)}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+def run_benchmark(analyzer: ContextualQueryAnalyzer, runs: int):
+    print(f"📊 {runs} run(s) per mode, {len(SAMPLE_AGENTS)} agents")
+    baseline = None
+    for mode in ("sequential", "parallel", "combined"):
+        durations = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            result = analyzer.analyze_query_contextually(SAMPLE_QUERY, SAMPLE_AGENTS, mode=mode)
+            durations.append(time.perf_counter() - started)
+            assert result["success"], result
+        median = statistics.median(durations)
+        baseline = baseline or median
+        print(f"  {mode:<11} median {median * 1000:8.1f} ms   min {min(durations) * 1000:8.1f} ms   "
+              f"speedup x{baseline / median:.2f}   (ran as {result['analysis_mode']})")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--live", action="store_true", help="use a real Ollama server instead of the stub")
+    parser.add_argument("--ollama-url", default="http://localhost:11434")
+    parser.add_argument("--model", default="qwen3:1.7b")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.live:
+        run_benchmark(ContextualQueryAnalyzer(args.ollama_url, args.model), args.runs)
+        return
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubOllamaHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        print(f"🧪 Stub Ollama: {StubOllamaHandler.latency * 1000:.0f} ms per step call, "
+              f"{StubOllamaHandler.combined_latency * 1000:.0f} ms per combined call")
+        run_benchmark(ContextualQueryAnalyzer(f"http://127.0.0.1:{server.server_address[1]}", args.model), args.runs)
+    finally:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
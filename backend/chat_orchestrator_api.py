@@ -9,29 +9,57 @@ Supports Direct LLM, Independent Agents, and Agent Palette integration.
 
 from flask import Flask, request, jsonify
 from flask_cors import CORS
+from service_metrics import instrument_flask, ollama_post, sqlite_timer
 import requests
 import json
+import os
 import uuid
 import time
 from datetime import datetime
 from typing import Dict, List, Optional, Any
 import sqlite3
 import threading
+import atexit
+from collections import OrderedDict
 from dataclasses import dataclass, asdict
 import logging
 
+from agent_vector_router import agent_vector_router, agent_key
+from query_analysis_service import get_query_analysis_service
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 CORS(app)
+instrument_flask(app, "chat-orchestrator")
 
 # Configuration
 OLLAMA_BASE_URL = "http://localhost:11434"
 STRANDS_API_URL = "http://localhost:5004"
 DATABASE_PATH = "chat_orchestrator.db"
 
+# Chat-mode generation (/api/chat) settings
+OLLAMA_KEEP_ALIVE = "30m"          # keep models (and their KV cache) resident between turns
+# Without a session contextWindow, num_ctx is left to the server (OLLAMA_CONTEXT_LENGTH), so chat
+# calls share the loaded runner with every other caller instead of forcing a reload
+DEFAULT_CONTEXT_WINDOW = int(os.environ.get('OLLAMA_CONTEXT_LENGTH', 4096))
+CHARS_PER_TOKEN = 4                # rough token estimate used for context trimming
+MESSAGE_TOKEN_OVERHEAD = 4         # role/template tokens per message
+PINNED_HEAD_MESSAGES = 2           # opening exchange kept ahead of trimmed history
+TRIM_CHUNK_MESSAGES = 6            # history is dropped in chunks so the prompt prefix changes only every few turns
+
+# Conversation context kept in memory per session
+HISTORY_CACHE_MAX_SESSIONS = 256   # LRU bound across sessions
+HISTORY_WINDOW_MESSAGES = 20       # 'window' mode: last N messages
+HISTORY_TOKEN_BUDGET = 1500        # 'summarize' mode: older turns are folded into a summary past this
+DEFAULT_HISTORY_MODE = "window"    # per session via config["historyMode"]: 'window' or 'summarize'
+
+# Agent selection by embedding similarity (see agent_vector_router)
+ROUTER_MIN_RELEVANCE = 0.35        # agents below this cosine similarity are not selected
+AGENT_ROUTE_CONFIDENCE = 0.7       # direct LLM chat hands the query to an agent only above this confidence
+
 # ============================================================================
 # Data Models
 # ============================================================================
@@ -111,10 +139,171 @@ def init_database():
         )
     ''')
     
+    # History reads filter on session and order by time
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_chat_messages_session_timestamp
+        ON chat_messages (session_id, timestamp)
+    ''')
+    
     conn.commit()
     conn.close()
     logger.info("✅ Database initialized successfully")
 
+class ChatPersistence:
+    """Write-behind persistence for chat messages and routing decisions.
+    
+    Messages, routing records and last_activity updates are buffered in memory
+    and written by a background thread in one transaction every FLUSH_INTERVAL
+    seconds (sooner once MAX_BATCH rows are waiting, and at shutdown), over a
+    single long-lived WAL connection. Buffered messages stay visible to history
+    reads until they are committed. A batch that keeps failing is retried
+    MAX_FLUSH_RETRIES times, then written row by row so only the rows that
+    still fail are dropped (and logged).
+    """
+    
+    FLUSH_INTERVAL = 0.5
+    MAX_BATCH = 200
+    MAX_FLUSH_RETRIES = 3
+    
+    def __init__(self, db_path: str = None):
+        self.conn = sqlite3.connect(db_path or DATABASE_PATH, check_same_thread=False, timeout=30.0)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self._db_lock = threading.Lock()
+        
+        self._buffer_lock = threading.Lock()
+        self._pending_messages = []   # (id, session_id, role, content, timestamp, metadata)
+        self._pending_routes = []     # agent_routes rows
+        self._pending_activity = {}   # session_id -> last activity timestamp
+        self._in_flush_messages = []  # taken by the writer but not yet committed
+        self._failed_flushes = 0      # consecutive failed flushes of the current backlog
+        
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._writer = threading.Thread(target=self._run, name="chat-persistence", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+    
+    @staticmethod
+    def _now() -> str:
+        # Same UTC "YYYY-MM-DD HH:MM:SS" layout as CURRENT_TIMESTAMP, plus microseconds for ordering
+        return datetime.utcnow().isoformat(sep=' ')
+    
+    def enqueue_message(self, message_id: str, session_id: str, role: str, content: str, metadata: Dict = None):
+        timestamp = self._now()
+        with self._buffer_lock:
+            self._pending_messages.append(
+                (message_id, session_id, role, content, timestamp, json.dumps(metadata) if metadata else None)
+            )
+            self._pending_activity[session_id] = timestamp
+            backlog = len(self._pending_messages) + len(self._pending_routes)
+        if backlog >= self.MAX_BATCH:
+            self._wakeup.set()
+    
+    def enqueue_routing(self, row: tuple):
+        with self._buffer_lock:
+            self._pending_routes.append(row)
+    
+    def pending_messages(self, session_id: str) -> List[tuple]:
+        """Buffered (id, role, content, timestamp) rows of a session not yet visible in the database"""
+        with self._buffer_lock:
+            return [
+                (msg[0], msg[2], msg[3], msg[4])
+                for msg in self._in_flush_messages + self._pending_messages
+                if msg[1] == session_id
+            ]
+    
+    def read(self, query: str, params: tuple = ()) -> List[tuple]:
+        with self._db_lock, sqlite_timer('chat', 'read'):
+            return self.conn.execute(query, params).fetchall()
+    
+    def write(self, query: str, params: tuple = ()):
+        """Synchronous write, for rows other requests need to see immediately (e.g. sessions)"""
+        with self._db_lock, sqlite_timer('chat', 'write'):
+            with self.conn:
+                self.conn.execute(query, params)
+    
+    _INSERT_MESSAGE = '''
+        INSERT INTO chat_messages (id, session_id, role, content, timestamp, metadata)
+        VALUES (?, ?, ?, ?, ?, ?)
+    '''
+    _INSERT_ROUTE = '''
+        INSERT INTO agent_routes (id, session_id, message_id, agent_id, confidence, reasoning, tools_used)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    '''
+    _UPDATE_ACTIVITY = '''
+        UPDATE chat_sessions SET last_activity = ? WHERE id = ?
+    '''
+    
+    def _write_rows_individually(self, messages: List[tuple], routes: List[tuple], activity: Dict[str, str]):
+        """Salvage a batch that keeps failing: one transaction per row, dropping only the rows that fail"""
+        statements = ([(self._INSERT_MESSAGE, row, f"message {row[0]} of session {row[1]}") for row in messages] +
+                      [(self._INSERT_ROUTE, row, f"route {row[0]} of session {row[1]}") for row in routes] +
+                      [(self._UPDATE_ACTIVITY, (timestamp, session_id), f"last activity of session {session_id}")
+                       for session_id, timestamp in activity.items()])
+        dropped = 0
+        with self._db_lock, sqlite_timer('chat', 'flush'):
+            for statement, row, label in statements:
+                try:
+                    with self.conn:
+                        self.conn.execute(statement, row)
+                except Exception as e:
+                    dropped += 1
+                    logger.error(f"Dropping {label} after {self.MAX_FLUSH_RETRIES} failed flushes: {e}")
+        if dropped:
+            logger.error(f"Dropped {dropped} of {len(statements)} buffered chat persistence rows")
+    
+    def flush(self):
+        """Commit everything buffered so far in a single transaction"""
+        with self._buffer_lock:
+            messages, self._pending_messages = self._pending_messages, []
+            routes, self._pending_routes = self._pending_routes, []
+            activity, self._pending_activity = self._pending_activity, {}
+            self._in_flush_messages = messages
+        
+        if not (messages or routes or activity):
+            return
+        
+        try:
+            if self._failed_flushes >= self.MAX_FLUSH_RETRIES:
+                self._write_rows_individually(messages, routes, activity)
+            else:
+                with self._db_lock, sqlite_timer('chat', 'flush'):
+                    with self.conn:
+                        self.conn.executemany(self._INSERT_MESSAGE, messages)
+                        self.conn.executemany(self._INSERT_ROUTE, routes)
+                        self.conn.executemany(self._UPDATE_ACTIVITY, [
+                            (timestamp, session_id) for session_id, timestamp in activity.items()
+                        ])
+            self._failed_flushes = 0
+        except Exception as e:
+            self._failed_flushes += 1
+            logger.error(f"Failed to flush chat persistence buffer "
+                         f"(attempt {self._failed_flushes}/{self.MAX_FLUSH_RETRIES}), will retry: {e}")
+            with self._buffer_lock:
+                self._pending_messages = messages + self._pending_messages
+                self._pending_routes = routes + self._pending_routes
+                for session_id, timestamp in activity.items():
+                    self._pending_activity.setdefault(session_id, timestamp)
+        finally:
+            with self._buffer_lock:
+                self._in_flush_messages = []
+    
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.FLUSH_INTERVAL)
+            self._wakeup.clear()
+            self.flush()
+    
+    def close(self):
+        """Stop the writer and flush whatever is still buffered"""
+        if self._stopped.is_set():
+            return
+        self._stopped.set()
+        self._wakeup.set()
+        self._writer.join(timeout=5)
+        self.flush()
+
 # ============================================================================
 # Ollama Integration
 # ============================================================================
@@ -136,9 +325,83 @@ class OllamaClient:
             return []
     
     @staticmethod
-    def generate_response(model: str, messages: List[Dict], temperature: float = 0.7, max_tokens: int = 1000):
-        """Generate response using Ollama"""
+    def estimate_tokens(messages: List[Dict]) -> int:
+        """Rough token count of a message array"""
+        return sum(len(msg.get("content", "")) // CHARS_PER_TOKEN + MESSAGE_TOKEN_OVERHEAD for msg in messages)
+    
+    @staticmethod
+    def trim_messages(messages: List[Dict], max_prompt_tokens: int) -> List[Dict]:
+        """Drop older non-system messages until the prompt fits the context window.
+        
+        System messages and the first PINNED_HEAD_MESSAGES stay first, and the
+        messages after them are dropped TRIM_CHUNK_MESSAGES at a time from fixed
+        positions. Turns between two drops therefore send the same prefix, and the
+        model server can reuse its KV cache for it. The latest message is always kept.
+        """
+        if OllamaClient.estimate_tokens(messages) <= max_prompt_tokens:
+            return messages
+        
+        system_messages = [msg for msg in messages if msg["role"] == "system"]
+        conversation = [msg for msg in messages if msg["role"] != "system"]
+        head_size = PINNED_HEAD_MESSAGES if len(conversation) > PINNED_HEAD_MESSAGES else 0
+        head, rest = conversation[:head_size], conversation[head_size:]
+        
+        dropped = 0
+        while dropped < len(rest) - 1 and \
+                OllamaClient.estimate_tokens(system_messages + head + rest[dropped:]) > max_prompt_tokens:
+            dropped += TRIM_CHUNK_MESSAGES
+        kept = rest[min(dropped, len(rest) - 1):]
+        if OllamaClient.estimate_tokens(system_messages + head + kept) > max_prompt_tokens:
+            head = []  # the pinned head no longer fits next to the latest message
+        
+        trimmed = system_messages + head + kept
+        logger.info(f"✂️ Trimmed conversation from {len(messages)} to {len(trimmed)} messages to fit {max_prompt_tokens} tokens")
+        return trimmed
+    
+    @staticmethod
+    def generate_response(model: str, messages: List[Dict], temperature: float = 0.7, max_tokens: int = 1000,
+                          num_ctx: Optional[int] = None, use_chat: bool = True):
+        """Generate response using Ollama.
+        
+        Chat mode sends the message array to /api/chat with keep_alive, so a
+        growing conversation only costs prompt evaluation for its new messages.
+        Completion mode flattens the conversation into one /api/generate prompt
+        and is used as a fallback for servers without /api/chat.
+        """
+        context_window = num_ctx or DEFAULT_CONTEXT_WINDOW
+        messages = OllamaClient.trim_messages(messages, max(context_window - max_tokens, context_window // 2))
+        options = {
+            "temperature": temperature,
+            "num_predict": max_tokens
+        }
+        if num_ctx:
+            options["num_ctx"] = num_ctx
+        
         try:
+            if use_chat:
+                payload = {
+                    "model": model,
+                    "messages": [{"role": msg["role"], "content": msg["content"]} for msg in messages],
+                    "stream": False,
+                    "keep_alive": OLLAMA_KEEP_ALIVE,
+                    "options": options
+                }
+                
+                response = ollama_post(f"{OLLAMA_BASE_URL}/api/chat", json=payload, timeout=30, priority="interactive")
+                if response.status_code == 200:
+                    data = response.json()
+                    return {
+                        "content": data.get("message", {}).get("content", ""),
+                        "model": model,
+                        "tokens_used": data.get("eval_count", 0),
+                        "prompt_tokens": data.get("prompt_eval_count", 0),
+                        "generation_time": data.get("total_duration", 0) / 1000000000  # Convert to seconds
+                    }
+                elif response.status_code != 404:
+                    logger.error(f"Ollama chat API error: {response.status_code}")
+                    return None
+                logger.warning("Ollama /api/chat not available, falling back to /api/generate")
+            
             # Convert messages to Ollama format
             prompt = ""
             for msg in messages:
@@ -155,19 +418,18 @@ class OllamaClient:
                 "model": model,
                 "prompt": prompt,
                 "stream": False,
-                "options": {
-                    "temperature": temperature,
-                    "num_predict": max_tokens
-                }
+                "keep_alive": OLLAMA_KEEP_ALIVE,
+                "options": options
             }
             
-            response = requests.post(f"{OLLAMA_BASE_URL}/api/generate", json=payload, timeout=30)
+            response = ollama_post(f"{OLLAMA_BASE_URL}/api/generate", json=payload, timeout=30, priority="interactive")
             if response.status_code == 200:
                 data = response.json()
                 return {
                     "content": data.get("response", ""),
                     "model": model,
                     "tokens_used": data.get("eval_count", 0),
+                    "prompt_tokens": data.get("prompt_eval_count", 0),
                     "generation_time": data.get("total_duration", 0) / 1000000000  # Convert to seconds
                 }
             else:
@@ -177,6 +439,58 @@ class OllamaClient:
             logger.error(f"Failed to generate Ollama response: {e}")
             return None
 
+# ============================================================================
+# Session History Cache
+# ============================================================================
+
+class SessionHistoryCache:
+    """Per-session in-memory conversation windows, LRU-bounded across sessions.
+    
+    Each entry holds the recent messages of a session plus a rolling summary of
+    older turns, so building a prompt does not re-read the database every turn.
+    """
+    
+    def __init__(self, max_sessions: int = HISTORY_CACHE_MAX_SESSIONS):
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is not None:
+                self._sessions.move_to_end(session_id)
+            return entry
+    
+    def put(self, session_id: str, messages: List[Dict]) -> Dict[str, Any]:
+        """Insert a freshly loaded session, keeping an entry another thread loaded first"""
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                entry = {"messages": messages, "summary": "", "lock": threading.Lock()}
+                self._sessions[session_id] = entry
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+            self._sessions.move_to_end(session_id)
+            return entry
+    
+    def append(self, session_id: str, message: Dict):
+        """Add a message to a cached session; uncached sessions load it from the database later"""
+        entry = self.get(session_id)
+        if entry is None:
+            return
+        with entry["lock"]:
+            if not any(existing["id"] == message["id"] for existing in entry["messages"][-4:]):
+                entry["messages"].append(message)
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "cached_sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "summarized_sessions": sum(1 for entry in self._sessions.values() if entry["summary"])
+            }
+
 # ============================================================================
 # Agent Routing Intelligence
 # ============================================================================
@@ -190,6 +504,19 @@ class AgentRouter:
     def analyze_query(self, query: str, available_agents: List[Dict]) -> AgentRoute:
         """Analyze user query and determine best agent to handle it"""
         
+        # Embedding match first; the LLM routing call is skipped only when the match is confident
+        # and strong enough to be acted on (a weaker match would never be routed, so ask the LLM)
+        ranked = agent_vector_router.rank(query, available_agents)
+        if ranked and agent_vector_router.is_confident(ranked) and ranked[0][1] > AGENT_ROUTE_CONFIDENCE:
+            best_agent, similarity = ranked[0]
+            logger.info(f"🧭 Vector route: {best_agent.get('name', 'unknown')} (similarity {similarity:.2f})")
+            return AgentRoute(
+                agent_id=agent_key(best_agent),
+                confidence=similarity,
+                reasoning=f"Embedding similarity {similarity:.2f} to {best_agent.get('name', 'agent')} profile",
+                tools_needed=[]
+            )
+        
         # Create routing prompt
         agent_descriptions = []
         for agent in available_agents:
@@ -257,33 +584,35 @@ class ChatOrchestrator:
     def __init__(self):
         self.agent_router = AgentRouter()
         self.ollama_client = OllamaClient()
+        self.history_cache = SessionHistoryCache()
+        self._persistence = None
+        self._persistence_lock = threading.Lock()
     
+    @property
+    def persistence(self) -> ChatPersistence:
+        """Opened on first use, so importing the module leaves the database (and its journal mode) alone"""
+        if self._persistence is None:
+            with self._persistence_lock:
+                if self._persistence is None:
+                    self._persistence = ChatPersistence(DATABASE_PATH)
+        return self._persistence
+
     def create_session(self, chat_config: Dict) -> str:
         """Create a new chat session"""
         session_id = str(uuid.uuid4())
         
-        conn = sqlite3.connect(DATABASE_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
+        self.persistence.write('''
             INSERT INTO chat_sessions (id, chat_type, config)
             VALUES (?, ?, ?)
         ''', (session_id, chat_config["type"], json.dumps(chat_config)))
         
-        conn.commit()
-        conn.close()
-        
         logger.info(f"✅ Created chat session: {session_id} (type: {chat_config['type']})")
         return session_id
     
     def get_session(self, session_id: str) -> Optional[ChatSession]:
         """Get chat session by ID"""
-        conn = sqlite3.connect(DATABASE_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT * FROM chat_sessions WHERE id = ?', (session_id,))
-        row = cursor.fetchone()
-        conn.close()
+        rows = self.persistence.read('SELECT * FROM chat_sessions WHERE id = ?', (session_id,))
+        row = rows[0] if rows else None
         
         if row:
             return ChatSession(
@@ -321,7 +650,7 @@ class ChatOrchestrator:
         config = session.config
         
         # Get conversation history
-        messages = self._get_conversation_history(session.id)
+        messages = self._get_context_messages(session, exclude_message_id=message_id)
         
         # Add system prompt if configured
         if config.get("systemPrompt"):
@@ -336,7 +665,7 @@ class ChatOrchestrator:
             routing = self.agent_router.analyze_query(user_message, available_agents)
             
             # If high confidence routing to specific agent
-            if routing.agent_id and routing.confidence > 0.7:
+            if routing.agent_id and routing.confidence > AGENT_ROUTE_CONFIDENCE:
                 logger.info(f"🎯 Routing to agent {routing.agent_id} (confidence: {routing.confidence})")
                 return self._execute_agent_routing(session, routing, user_message, message_id)
         
@@ -345,7 +674,8 @@ class ChatOrchestrator:
             model=config.get("model", "qwen3:1.7b"),
             messages=messages,
             temperature=config.get("temperature", 0.7),
-            max_tokens=config.get("maxTokens", 1000)
+            max_tokens=config.get("maxTokens", 1000),
+            num_ctx=config.get("contextWindow")
         )
         
         if response:
@@ -378,7 +708,7 @@ Capabilities: {', '.join(config.get('capabilities', []))}
 """
         
         # Get conversation history
-        messages = self._get_conversation_history(session.id)
+        messages = self._get_context_messages(session, exclude_message_id=message_id)
         messages.insert(0, {"role": "system", "content": agent_prompt})
         messages.append({"role": "user", "content": user_message})
         
@@ -387,7 +717,8 @@ Capabilities: {', '.join(config.get('capabilities', []))}
             model=config.get("model", "qwen3:1.7b"),
             messages=messages,
             temperature=config.get("temperature", 0.7),
-            max_tokens=config.get("maxTokens", 1000)
+            max_tokens=config.get("maxTokens", 1000),
+            num_ctx=config.get("contextWindow")
         )
         
         if response:
@@ -482,14 +813,15 @@ Capabilities: {', '.join(config.get('capabilities', []))}
     
     def _fallback_to_llm(self, session: ChatSession, user_message: str, message_id: str) -> Dict[str, Any]:
         """Fallback to direct LLM when agent routing fails"""
-        messages = self._get_conversation_history(session.id)
+        messages = self._get_context_messages(session, exclude_message_id=message_id)
         messages.append({"role": "user", "content": user_message})
         
         response = self.ollama_client.generate_response(
             model=session.config.get("model", "qwen3:1.7b"),
             messages=messages,
             temperature=0.7,
-            max_tokens=1000
+            max_tokens=1000,
+            num_ctx=session.config.get("contextWindow")
         )
         
         if response:
@@ -507,33 +839,111 @@ Capabilities: {', '.join(config.get('capabilities', []))}
         else:
             return {"error": "All response methods failed"}
     
-    def _get_conversation_history(self, session_id: str, limit: int = 10) -> List[Dict]:
-        """Get recent conversation history"""
-        conn = sqlite3.connect(DATABASE_PATH)
-        cursor = conn.cursor()
+    def _get_context_messages(self, session: ChatSession, exclude_message_id: str = None) -> List[Dict]:
+        """Conversation context for the next prompt, served from the in-memory session cache.
+        
+        In 'window' mode this is at most the last HISTORY_WINDOW_MESSAGES messages,
+        dropped TRIM_CHUNK_MESSAGES at a time so the prompt prefix is stable between drops. In
+        'summarize' mode recent messages are kept up to HISTORY_TOKEN_BUDGET and
+        older turns are folded into a cached summary, sent as a system message,
+        so prompt size stays constant as the conversation grows.
+        """
+        entry = self.history_cache.get(session.id)
+        if entry is None:
+            rows = self._fetch_history_rows(session.id, HISTORY_WINDOW_MESSAGES // 2)
+            entry = self.history_cache.put(session.id, [
+                {"id": message_id, "role": role, "content": content} for message_id, role, content, _ in rows
+            ])
         
-        cursor.execute('''
-            SELECT role, content FROM chat_messages 
+        with entry["lock"]:
+            if session.config.get("historyMode", DEFAULT_HISTORY_MODE) == "summarize":
+                self._compress_history(session, entry)
+            else:
+                overflow = len(entry["messages"]) - HISTORY_WINDOW_MESSAGES
+                if overflow > 0:
+                    del entry["messages"][:overflow + TRIM_CHUNK_MESSAGES - 1]
+            messages = [
+                {"role": msg["role"], "content": msg["content"]}
+                for msg in entry["messages"] if msg["id"] != exclude_message_id
+            ]
+            summary = entry["summary"]
+        
+        if summary:
+            messages.insert(0, {"role": "system", "content": f"Summary of the earlier conversation: {summary}"})
+        return messages
+    
+    def _compress_history(self, session: ChatSession, entry: Dict[str, Any]):
+        """Fold older turns into the rolling summary once over budget (caller holds entry lock).
+        
+        Compresses down to half the budget in one summarization call, so the
+        next few turns reuse the same summary and prompt prefix.
+        """
+        if len(entry["messages"]) > 2 and OllamaClient.estimate_tokens(entry["messages"]) > HISTORY_TOKEN_BUDGET:
+            kept_tokens = 0
+            split = len(entry["messages"])
+            while split > 0:
+                cost = OllamaClient.estimate_tokens([entry["messages"][split - 1]])
+                if len(entry["messages"]) - split >= 2 and kept_tokens + cost > HISTORY_TOKEN_BUDGET // 2:
+                    break
+                kept_tokens += cost
+                split -= 1
+            older = entry["messages"][:split]
+            if not older:
+                return
+            
+            transcript = "\n".join(
+                f"{'User' if msg['role'] == 'user' else 'Assistant'}: {msg['content']}" for msg in older
+            )
+            summary_prompt = f"""Summarize this conversation in at most 150 words. Keep facts, names, numbers, decisions and open questions.
+
+Previous summary: {entry["summary"] or "None"}
+
+Conversation:
+{transcript}
+
+Summary:"""
+            response = self.ollama_client.generate_response(
+                model=session.config.get("summaryModel", session.config.get("model", "qwen3:1.7b")),
+                messages=[{"role": "user", "content": summary_prompt}],
+                temperature=0.2,
+                max_tokens=300,
+                num_ctx=session.config.get("contextWindow")
+            )
+            if response and response["content"].strip():
+                entry["summary"] = response["content"].strip()
+                logger.info(f"📝 Summarized {len(older)} messages for session {session.id}")
+            else:
+                # Without a summary the oldest turns are simply dropped, as in window mode
+                logger.warning(f"History summarization failed for session {session.id}, dropping {len(older)} messages")
+            del entry["messages"][:split]
+    
+    def _fetch_history_rows(self, session_id: str, limit: int = 10) -> List[tuple]:
+        """Get recent (id, role, content, timestamp) rows, including buffered messages, oldest first"""
+        # Buffer first: a message flushed after this snapshot is committed, so the query below sees it
+        pending = self.persistence.pending_messages(session_id)
+        rows = self.persistence.read('''
+            SELECT id, role, content, timestamp FROM chat_messages
             WHERE session_id = ? AND role != 'system'
             ORDER BY timestamp DESC LIMIT ?
         ''', (session_id, limit * 2))  # *2 to account for user/assistant pairs
         
-        rows = cursor.fetchall()
-        conn.close()
-        
-        # Reverse to get chronological order
-        messages = []
-        for role, content in reversed(rows):
-            messages.append({"role": role, "content": content})
-        
-        return messages
+        # Include buffered messages not yet written by the persistence thread
+        stored_ids = {row[0] for row in rows}
+        rows += [row for row in pending if row[0] not in stored_ids and row[1] != 'system']
+        return sorted(rows, key=lambda row: row[3])[-(limit * 2):]
     
+    def _get_conversation_history(self, session_id: str, limit: int = 10) -> List[Dict]:
+        """Get recent conversation history from the database (chronological order)"""
+        return [{"role": role, "content": content} for _, role, content, _ in self._fetch_history_rows(session_id, limit)]
+
     def _get_available_agents(self) -> List[Dict]:
         """Get available agents from Strands API"""
         try:
             response = requests.get(f"{STRANDS_API_URL}/api/strands/agents")
             if response.status_code == 200:
-                return response.json().get("agents", [])
+                agents = response.json().get("agents", [])
+                agent_vector_router.refresh(agents)
+                return agents
         except Exception as e:
             logger.error(f"Failed to get available agents: {e}")
         return []
@@ -549,36 +959,15 @@ Capabilities: {', '.join(config.get('capabilities', []))}
         return None
     
     def _store_message(self, session_id: str, message_id: str, role: str, content: str, metadata: Dict = None):
-        """Store message in database"""
-        conn = sqlite3.connect(DATABASE_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO chat_messages (id, session_id, role, content, metadata)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (message_id, session_id, role, content, json.dumps(metadata) if metadata else None))
-        
-        # Update session last activity
-        cursor.execute('''
-            UPDATE chat_sessions SET last_activity = CURRENT_TIMESTAMP WHERE id = ?
-        ''', (session_id,))
-        
-        conn.commit()
-        conn.close()
-    
+        """Queue message (and session last activity) for the write-behind persistence thread"""
+        self.persistence.enqueue_message(message_id, session_id, role, content, metadata)
+        if role != "system":
+            self.history_cache.append(session_id, {"id": message_id, "role": role, "content": content})
+
     def _store_routing(self, session_id: str, message_id: str, routing: AgentRoute):
-        """Store agent routing decision"""
-        conn = sqlite3.connect(DATABASE_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO agent_routes (id, session_id, message_id, agent_id, confidence, reasoning, tools_used)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (str(uuid.uuid4()), session_id, message_id, routing.agent_id, 
-              routing.confidence, routing.reasoning, json.dumps(routing.tools_needed)))
-        
-        conn.commit()
-        conn.close()
+        """Queue agent routing decision for the write-behind persistence thread"""
+        self.persistence.enqueue_routing((str(uuid.uuid4()), session_id, message_id, routing.agent_id,
+                                          routing.confidence, routing.reasoning, json.dumps(routing.tools_needed)))
 
 # ============================================================================
 # API Endpoints
@@ -594,7 +983,9 @@ def health_check():
         "status": "healthy",
         "service": "Chat Orchestrator API",
         "timestamp": datetime.now().isoformat(),
-        "ollama_connected": len(OllamaClient.get_models()) > 0
+        "ollama_connected": len(OllamaClient.get_models()) > 0,
+        "history_cache": orchestrator.history_cache.stats(),
+        "vector_router": agent_vector_router.get_stats()
     })
 
 @app.route('/api/chat/models', methods=['GET'])
@@ -684,17 +1075,14 @@ def get_session_info(session_id):
 def list_sessions():
     """List all chat sessions"""
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT id, chat_type, created_at, last_activity, status 
-            FROM chat_sessions 
+        rows = orchestrator.persistence.read('''
+            SELECT id, chat_type, created_at, last_activity, status
+            FROM chat_sessions
             ORDER BY last_activity DESC
         ''')
         
         sessions = []
-        for row in cursor.fetchall():
+        for row in rows:
             sessions.append({
                 "session_id": row[0],
                 "chat_type": row[1],
@@ -703,7 +1091,6 @@ def list_sessions():
                 "status": row[4]
             })
         
-        conn.close()
         return jsonify({"sessions": sessions})
     except Exception as e:
         logger.error(f"Failed to list sessions: {e}")
@@ -800,66 +1187,37 @@ def orchestrate():
             "timestamp": datetime.now().isoformat()
         }), 500
 
+CHAT_QUERY_TYPES = ("technical", "creative", "analytical", "general")
+
+def _adapt_canonical_analysis(analysis: Dict[str, Any]) -> Dict[str, Any]:
+    """The chat orchestrator's view of the shared canonical query analysis"""
+    query_type = analysis.get("query_type", "general")
+    strategy = analysis.get("orchestration_strategy", "sequential")
+    return {
+        "query_type": query_type if query_type in CHAT_QUERY_TYPES else "general",
+        "complexity_level": analysis.get("complexity_level", "simple"),
+        "agentic_workflow_pattern": analysis.get("agentic_workflow_pattern", "single_agent"),
+        "orchestration_strategy": "sequential" if strategy == "single" else strategy,
+        "confidence": analysis.get("confidence", 0.8),
+        "reasoning": str(analysis.get("reasoning", ""))
+    }
+
 def analyze_query_with_llm(query: str, session_id: str) -> Dict[str, Any]:
-    """Analyze query using LLM to determine orchestration strategy"""
+    """Analyze query using LLM to determine orchestration strategy (shared canonical analysis)"""
     try:
-        analysis_prompt = f"""
-        Analyze this user query and determine the best orchestration approach:
-        
-        Query: "{query}"
-        
-        IMPORTANT: For multi-agent workflows, use "multi_agent" pattern when the query requires:
-        - Multiple distinct domains (e.g., technical data gathering + analytical insights)
-        - Sequential tasks (e.g., "get data" then "analyze data" then "create policy")
-        - Different specialized agents (e.g., RAN agent for network data + Churn agent for customer analysis)
-        - Keywords like "and then", "also", "plus", or multiple action verbs
-        
-        Examples of MULTI_AGENT queries:
-        - "Get weather data and write a story about it" → multi_agent (weather + creative)
-        - "Analyze PRB utilization and create churn policy" → multi_agent (technical + analytical)
-        - "Tell me about 5G networks and how it affects customers" → multi_agent (technical + business)
-        
-        Examples of SINGLE_AGENT queries:
-        - "What is 5G?" → single_agent (general knowledge)
-        - "Write a poem" → single_agent (creative only)
-        - "Explain network protocols" → single_agent (technical only)
-        
-        Respond with JSON containing:
-        {{
-            "query_type": "technical|creative|analytical|general",
-            "complexity_level": "simple|moderate|complex",
-            "agentic_workflow_pattern": "single_agent|multi_agent|varying_domain",
-            "orchestration_strategy": "sequential|parallel|hybrid",
-            "confidence": 0.85,
-            "reasoning": "Brief explanation of the analysis"
-        }}
-        """
-        
-        response = requests.post(f"{OLLAMA_BASE_URL}/api/generate", json={
-            "model": "qwen3:1.7b",
-            "prompt": analysis_prompt,
-            "stream": False,
-            "options": {"temperature": 0.3}
-        }, timeout=30)
+        analysis = get_query_analysis_service().analyze_canonical(
+            query,
+            model="qwen3:1.7b",
+            timeout=30,
+            ollama_url=OLLAMA_BASE_URL
+        )
         
-        if response.status_code == 200:
-            result = response.json()
-            analysis_text = result.get("response", "")
+        if analysis is not None:
+            # Override pattern detection if LLM analysis is clearly wrong
+            corrected_analysis = _correct_pattern_detection(query, _adapt_canonical_analysis(analysis))
             
-            # Extract JSON from response
-            try:
-                start = analysis_text.find("{")
-                end = analysis_text.rfind("}") + 1
-                if start != -1 and end > start:
-                    analysis = json.loads(analysis_text[start:end])
-                    
-                    # Override pattern detection if LLM analysis is clearly wrong
-                    corrected_analysis = _correct_pattern_detection(query, analysis)
-                    
-                    logger.info(f"📊 Query analysis completed: {corrected_analysis.get('query_type')} - {corrected_analysis.get('complexity_level')} - {corrected_analysis.get('agentic_workflow_pattern')}")
-                    return corrected_analysis
-            except json.JSONDecodeError:
-                pass
+            logger.info(f"📊 Query analysis completed: {corrected_analysis.get('query_type')} - {corrected_analysis.get('complexity_level')} - {corrected_analysis.get('agentic_workflow_pattern')}")
+            return corrected_analysis
         
         # Fallback analysis
         return {
@@ -939,6 +1297,7 @@ def discover_available_agents() -> List[Dict]:
             a2a_data = a2a_response.json()
             agents = a2a_data.get("agents", [])
             logger.info(f"🔍 Discovered {len(agents)} A2A agents")
+            agent_vector_router.refresh(agents)
             return agents
         
         # Fallback to default agents
@@ -999,13 +1358,18 @@ def select_agents_for_query(query: str, available_agents: List[Dict], analysis:
         else:
             logger.info(f"🎯 Single-agent workflow detected - using domain-specific matching")
             
-            # Calculate relevance scores for each agent
+            # Calculate relevance scores for each agent (one vectorized pass when embeddings are available)
             agent_scores = []
-            for agent in available_agents:
-                relevance = _calculate_agent_relevance(query, agent)
-                if relevance > 0.3:  # Only consider agents with reasonable relevance
-                    agent_scores.append((agent, relevance))
-                    logger.info(f"🎯 Agent {agent.get('name', 'unknown')} relevance: {relevance:.2f}")
+            ranked = agent_vector_router.rank(query, available_agents)
+            if ranked is not None:
+                agent_scores = [(agent, similarity) for agent, similarity in ranked if similarity >= ROUTER_MIN_RELEVANCE]
+            else:
+                for agent in available_agents:
+                    relevance = _calculate_agent_relevance(query, agent)
+                    if relevance > 0.3:  # Only consider agents with reasonable relevance
+                        agent_scores.append((agent, relevance))
+            for agent, relevance in agent_scores:
+                logger.info(f"🎯 Agent {agent.get('name', 'unknown')} relevance: {relevance:.2f}")
             
             # Sort by relevance and select the best one
             if agent_scores:
@@ -1069,6 +1433,18 @@ def _find_best_agent_for_task(task: str, available_agents: List[Dict], used_agen
     best_agent = None
     best_score = 0
     
+    # Embedding match: best unused agent above the relevance floor
+    ranked = agent_vector_router.rank(task, available_agents)
+    if ranked is not None:
+        for agent, similarity in ranked:
+            if agent_key(agent) in used_agents or agent.get("name", "") in used_agents:
+                continue
+            if similarity >= ROUTER_MIN_RELEVANCE:
+                best_agent, best_score = agent, similarity
+            break
+        logger.info(f"🎯 Best agent for task '{task}': {best_agent.get('name', 'none') if best_agent else 'none'} (similarity: {best_score:.2f})")
+        return best_agent
+    
     task_lower = task.lower()
     
     for agent in available_agents:
@@ -1117,7 +1493,7 @@ def _find_best_agent_for_task(task: str, available_agents: List[Dict], used_agen
     return best_agent
 
 def _calculate_agent_relevance(query: str, agent: Dict) -> float:
-    """Calculate relevance score for single-agent selection"""
+    """Keyword relevance score for single-agent selection (used when vector routing is unavailable)"""
     query_lower = query.lower()
     agent_name = agent.get("name", "").lower()
     capabilities = agent.get("capabilities", [])
@@ -1342,8 +1718,9 @@ User Query: {query}
 
 Please provide a helpful, accurate response based on your specialized capabilities."""
                 
-                response = requests.post(
+                response = ollama_post(
                     f"{ollama_url}/api/generate",
+                    priority="interactive",
                     json={
                         "model": model,
                         "prompt": prompt,
@@ -1375,8 +1752,9 @@ User Query: {query}
 
 Please provide a helpful, accurate response based on your specialized capabilities."""
         
-        response = requests.post(
+        response = ollama_post(
             f"{OLLAMA_BASE_URL}/api/generate",
+            priority="interactive",
             json={
                 "model": model,
                 "prompt": prompt,
@@ -6,59 +6,79 @@ Step-by-step LLM orchestrator that performs:
 2. Domain identification (single or multiple)
 3. Task type classification (sequential, direct, parallel)
 4. Step-by-step sequence definition
+
+Steps run as a dependency graph: contextual reasoning and domain analysis run
+concurrently, task classification waits for both, then sequence definition and
+agent requirements run concurrently. The "combined" mode asks for all sections
+in a single LLM call instead.
 """
 
 import json
-import requests
 import logging
-from typing import Dict, List, Any, Optional
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, List, Any, Optional, Callable, Tuple
 from datetime import datetime
 
+from service_metrics import ollama_post
+
 logger = logging.getLogger(__name__)
 
+# Analysis modes: step graph run concurrently (default), one combined prompt, or the original one-by-one order
+ANALYSIS_MODES = ("parallel", "combined", "sequential")
+DEFAULT_ANALYSIS_MODE = "parallel"
+
 class ContextualQueryAnalyzer:
     """Step-by-step contextual query analyzer for intelligent orchestration"""
     
-    def __init__(self, ollama_base_url: str = "http://localhost:11434", model: str = "qwen3:1.7b"):
+    def __init__(self, ollama_base_url: str = "http://localhost:11434", model: str = "qwen3:1.7b",
+                 mode: str = DEFAULT_ANALYSIS_MODE, max_workers: int = 3):
         self.ollama_base_url = ollama_base_url
         self.model = model
+        self.mode = mode
+        self.max_workers = max_workers
     
-    def analyze_query_contextually(self, query: str, available_agents: List[Dict] = None) -> Dict:
+    def analyze_query_contextually(self, query: str, available_agents: List[Dict] = None, mode: str = None) -> Dict:
         """
         Perform comprehensive contextual analysis of the query
         
         Args:
             query: User's input query
             available_agents: List of available agents (optional for context)
+            mode: "parallel", "combined" or "sequential" (defaults to the analyzer's mode)
             
         Returns:
             Dict containing detailed analysis results
         """
         try:
-            logger.info(f"Starting contextual analysis for query: {query[:50]}...")
-            
-            # Step 1: Contextual Reasoning
-            contextual_reasoning = self._analyze_contextual_reasoning(query)
+            mode = mode or self.mode
+            if mode not in ANALYSIS_MODES:
+                raise ValueError(f"Unknown analysis mode '{mode}', expected one of {ANALYSIS_MODES}")
+            logger.info(f"Starting contextual analysis ({mode}) for query: {query[:50]}...")
+            started = datetime.now()
             
-            # Step 2: Domain Identification
-            domain_analysis = self._analyze_domains(query)
+            sections = None
+            if mode == "combined":
+                sections = self._analyze_combined(query, available_agents)
+                if sections is None:
+                    logger.warning("Combined analysis returned incomplete sections, falling back to parallel steps")
+                    mode = "parallel"
+            if sections is None:
+                sections = self._run_step_graph(self._build_step_graph(query, available_agents),
+                                                 concurrent=(mode == "parallel"))
             
-            # Step 3: Task Type Classification
-            task_classification = self._classify_task_type(query, contextual_reasoning, domain_analysis)
-            
-            # Step 4: Sequence Definition
-            sequence_definition = self._define_execution_sequence(query, task_classification, domain_analysis)
-            
-            # Step 5: Agent Requirements (if agents provided)
-            agent_requirements = None
-            if available_agents:
-                agent_requirements = self._analyze_agent_requirements(query, available_agents, task_classification)
+            contextual_reasoning = sections["contextual_reasoning"]
+            domain_analysis = sections["domain_analysis"]
+            task_classification = sections["task_classification"]
+            sequence_definition = sections["sequence_definition"]
+            agent_requirements = sections.get("agent_requirements")
             
             # Compile comprehensive analysis
             analysis_result = {
                 "success": True,
                 "timestamp": datetime.now().isoformat(),
                 "query": query,
+                "analysis_mode": mode,
+                "analysis_duration_ms": round((datetime.now() - started).total_seconds() * 1000, 1),
                 "step_1_contextual_reasoning": contextual_reasoning,
                 "step_2_domain_analysis": domain_analysis,
                 "step_3_task_classification": task_classification,
@@ -84,6 +104,138 @@ class ContextualQueryAnalyzer:
                 "timestamp": datetime.now().isoformat()
             }
     
+    def _build_step_graph(self, query: str, available_agents: Optional[List[Dict]]) -> Dict[str, Tuple[List[str], Callable]]:
+        """Analysis steps as name -> (dependencies, fn(results)); step 5 only runs when agents are provided"""
+        steps = {
+            "contextual_reasoning": ([], lambda r: self._analyze_contextual_reasoning(query)),
+            "domain_analysis": ([], lambda r: self._analyze_domains(query)),
+            "task_classification": (["contextual_reasoning", "domain_analysis"],
+                                    lambda r: self._classify_task_type(query, r["contextual_reasoning"], r["domain_analysis"])),
+            "sequence_definition": (["task_classification", "domain_analysis"],
+                                    lambda r: self._define_execution_sequence(query, r["task_classification"], r["domain_analysis"])),
+        }
+        if available_agents:
+            steps["agent_requirements"] = (["task_classification"],
+                                           lambda r: self._analyze_agent_requirements(query, available_agents, r["task_classification"]))
+        return steps
+    
+    def _run_step_graph(self, steps: Dict[str, Tuple[List[str], Callable]], concurrent: bool = True) -> Dict[str, Any]:
+        """Run each step as soon as its dependencies are done; concurrent=False keeps the declared order"""
+        results = {}
+        if not concurrent:
+            for name, (_, fn) in steps.items():
+                results[name] = fn(results)
+            return results
+        
+        pending = dict(steps)
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="query-analysis") as executor:
+            while pending or running:
+                ready = [name for name, (deps, _) in pending.items() if all(dep in results for dep in deps)]
+                for name in ready:
+                    _, fn = pending.pop(name)
+                    # Each step gets a snapshot so concurrent steps never see a dict being mutated
+                    running[executor.submit(fn, dict(results))] = name
+                if not running:
+                    raise ValueError(f"Unsatisfiable step dependencies: {sorted(pending)}")
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[running.pop(future)] = future.result()
+        return results
+    
+    def _analyze_combined(self, query: str, available_agents: Optional[List[Dict]]) -> Optional[Dict[str, Any]]:
+        """Fast mode: all sections from one LLM call; None if the response is missing a section"""
+        agent_section = ""
+        if available_agents:
+            agent_summary = [{
+                'id': agent.get('id', 'unknown'),
+                'name': agent.get('name', 'Unknown'),
+                'description': agent.get('description', ''),
+                'capabilities': agent.get('capabilities', [])
+            } for agent in available_agents]
+            agent_section = f"""
+AVAILABLE AGENTS:
+{json.dumps(agent_summary, indent=2)}
+"""
+        
+        prompt = f"""Analyze this query for multi-agent orchestration in one pass:
+
+QUERY: "{query}"
+{agent_section}
+Work through the sections in order; later sections should be consistent with earlier ones.
+
+1. contextual_reasoning: user intent, context clues, complexity, urgency, dependencies, success criteria, challenges
+2. domain_analysis: primary/secondary domains, whether it is cross-domain, technical level, key terms, required expertise
+3. task_classification: direct|sequential|parallel|hybrid execution, complexity, coordination, whether multiple agents are needed
+4. sequence_definition: concrete execution steps with inputs, outputs, dependencies and parallelization
+5. agent_requirements: {"which available agents to use, in what order and role" if available_agents else "null (no agents provided)"}
+
+Respond in JSON format:
+{{
+    "contextual_reasoning": {{
+        "user_intent": "clear description of what user wants",
+        "context_clues": ["clue1", "clue2"],
+        "complexity_level": "simple|moderate|complex",
+        "urgency": "low|medium|high",
+        "dependencies": ["dependency1"],
+        "success_criteria": "how to measure completion",
+        "potential_challenges": ["challenge1"],
+        "reasoning_confidence": 0.85
+    }},
+    "domain_analysis": {{
+        "primary_domain": "main domain",
+        "secondary_domains": ["domain1"],
+        "cross_domain": true/false,
+        "technical_level": "beginner|intermediate|advanced|expert",
+        "domain_specific_terms": ["term1"],
+        "required_expertise": ["expertise1"],
+        "domain_confidence": 0.9
+    }},
+    "task_classification": {{
+        "task_type": "direct|sequential|parallel|hybrid",
+        "execution_complexity": "simple|moderate|complex",
+        "coordination_requirements": "none|light|heavy",
+        "timing_constraints": "immediate|batch|streaming",
+        "requires_multiple_agents": true/false,
+        "estimated_agent_count": 1-5,
+        "reasoning": "explanation of classification",
+        "confidence": 0.85
+    }},
+    "sequence_definition": {{
+        "execution_steps": [
+            {{
+                "step_number": 1,
+                "step_name": "descriptive name",
+                "description": "what needs to be done",
+                "required_inputs": ["input1"],
+                "expected_outputs": ["output1"],
+                "dependencies": [],
+                "can_parallelize": true/false,
+                "complexity": "low|medium|high"
+            }}
+        ],
+        "overall_sequence_type": "linear|branching|converging|diverging",
+        "critical_path": ["step1"],
+        "parallel_opportunities": []
+    }},
+    "agent_requirements": {{
+        "recommended_agents": [
+            {{"agent_id": "agent_id", "agent_name": "agent_name", "suitability_score": 0.9, "role": "primary|secondary|support", "execution_order": 1}}
+        ],
+        "coordination_strategy": "sequential|parallel|hybrid",
+        "capability_gaps": [],
+        "confidence": 0.85
+    }}
+}}"""
+        
+        result = self._call_llm(prompt, "combined_analysis", max_tokens=4000)
+        required = ["contextual_reasoning", "domain_analysis", "task_classification", "sequence_definition"]
+        if "error" in result or not all(isinstance(result.get(section), dict) for section in required):
+            return None
+        if not available_agents:
+            result["agent_requirements"] = None
+        return result
+    
     def _analyze_contextual_reasoning(self, query: str) -> Dict:
         """Step 1: Deep contextual reasoning of the query"""
         prompt = f"""Analyze this query with deep contextual reasoning:
@@ -299,10 +451,10 @@ Respond in JSON format:
 
         return self._call_llm(prompt, "agent_requirements")
     
-    def _call_llm(self, prompt: str, analysis_type: str) -> Dict:
+    def _call_llm(self, prompt: str, analysis_type: str, max_tokens: int = 2000) -> Dict:
         """Call the LLM for analysis"""
         try:
-            response = requests.post(
+            response = ollama_post(
                 f"{self.ollama_base_url}/api/generate",
                 json={
                     "model": self.model,
@@ -311,7 +463,7 @@ Respond in JSON format:
                     "options": {
                         "temperature": 0.3,  # Lower temperature for more consistent analysis
                         "top_p": 0.9,
-                        "max_tokens": 2000
+                        "max_tokens": max_tokens
                     }
                 },
                 timeout=30
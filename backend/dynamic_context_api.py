@@ -7,12 +7,14 @@ Provides API endpoints for the dynamic context refinement engine
 from flask import Flask, request, jsonify
 import logging
 from dynamic_context_refinement_engine import dynamic_context_engine
+from service_metrics import instrument_flask
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
+instrument_flask(app, "dynamic-context")
 
 @app.route('/api/dynamic-context/statistics', methods=['GET'])
 def get_refinement_statistics():
@@ -23,6 +23,7 @@ from contextlib import contextmanager
 
 from flask import Flask, request, jsonify
 from flask_cors import CORS
+from service_metrics import instrument_flask, ollama_post
 import requests
 import psutil
 import gc
@@ -57,6 +58,7 @@ CLEANUP_DELAY = 2  # 2 seconds delay before cleanup
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'enhanced_orchestration_secret'
 CORS(app)
+instrument_flask(app, "enhanced-orchestration")
 
 @dataclass
 class OrchestrationSession:
@@ -176,7 +178,7 @@ Return your analysis in this JSON format:
 """
             
             # Call LLM for analysis
-            response = requests.post(
+            response = ollama_post(
                 f"{OLLAMA_BASE_URL}/api/generate",
                 json={
                     "model": "qwen3:1.7b",
@@ -430,7 +432,7 @@ Your task is to:
 Provide a polished, final response that the user will receive. Do not include any meta-commentary about the orchestration process."""
 
             # Call LLM for response synthesis
-            response = requests.post(
+            response = ollama_post(
                 f"{OLLAMA_BASE_URL}/api/generate",
                 json={
                     "model": ORCHESTRATOR_MODEL,
@@ -16,10 +16,17 @@ import uuid
 from datetime import datetime
 from typing import Dict, List, Any
 
+from query_analysis_service import get_query_analysis_service, QueryAnalysisError
+from service_metrics import ollama_post
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Cache identity of the Stage 1 prompt (bump the version when the prompt changes)
+STAGE_1_TEMPLATE = "enhanced_5stage.stage_1_analysis"
+STAGE_1_TEMPLATE_VERSION = "1"
+
 class Enhanced5StageOrchestrator:
     """5-Stage Intelligent Orchestrator with Streamlined Workflow"""
     
@@ -164,7 +171,7 @@ Provide detailed analysis in JSON format:
     "confidence": 0.95
 }}"""
 
-            response = self._call_llm(prompt, session_id, "Stage 1 Analysis")
+            response = self._call_analysis_llm(query, prompt, session_id, agent_names)
             if response.get('success'):
                 logger.info(f"[{session_id}] ✅ Intelligent task decomposition completed: {len(response.get('task_decomposition', []))} tasks identified")
                 return {
@@ -695,10 +702,32 @@ Please complete this specific task as part of a multi-agent workflow. Focus on y
         
         return combined_response.strip()
     
+    def _call_analysis_llm(self, query: str, prompt: str, session_id: str, agent_names: List[str]) -> Dict:
+        """Stage 1 LLM call through the shared, memoized query analysis service"""
+        try:
+            analysis = get_query_analysis_service().analyze(
+                query, prompt,
+                model=self.orchestrator_model,
+                template=STAGE_1_TEMPLATE,
+                template_version=STAGE_1_TEMPLATE_VERSION,
+                context=sorted(agent_names),
+                options={
+                    "temperature": 0.1,
+                    "top_p": 0.9
+                },
+                timeout=60,
+                validate=lambda result: bool(result.get('success')),
+                ollama_url=self.ollama_base_url
+            )
+        except QueryAnalysisError as e:
+            logger.error(f"[{session_id}] LLM call error: {e}")
+            return {"success": False, "error": str(e)}
+        return analysis if analysis is not None else {"success": False, "error": "No valid analysis in LLM response"}
+    
     def _call_llm(self, prompt: str, session_id: str, stage_name: str = "LLM Call") -> Dict:
         """Call Ollama LLM with error handling"""
         try:
-            response = requests.post(
+            response = ollama_post(
                 f"{self.ollama_base_url}/api/generate",
                 json={
                     "model": self.orchestrator_model,
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Latency Histograms
+Mergeable streaming quantile sketches with sliding time windows
+
+LogHistogram buckets values on a logarithmic scale (HDR/DDSketch style): every
+quantile it reports is within RELATIVE_ACCURACY of the true value, recording is
+O(1), memory grows with the dynamic range rather than the sample count, and two
+histograms merge by adding bucket counts - so windows, agents or processes can
+be combined without losing accuracy.
+
+WindowedHistogram keeps per-slot sketches (10s slots for the last 15 minutes,
+1 minute slots for the last hour) and merges the slots covering a window on read.
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+RELATIVE_ACCURACY = 0.01
+MIN_TRACKED_VALUE = 1e-6  # seconds; smaller values count as zero
+
+# Sliding windows reported by default (name -> seconds)
+DEFAULT_WINDOWS = {"1m": 60, "15m": 900, "1h": 3600}
+DEFAULT_QUANTILES = (0.5, 0.95, 0.99)
+
+# Fixed bucket bounds (seconds) for histogram views and exposition
+DEFAULT_BUCKET_BOUNDS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+class LogHistogram:
+    """Log-bucketed streaming histogram with relative-error quantiles"""
+
+    __slots__ = ('gamma', '_log_gamma', 'buckets', 'zero_count', 'count', 'sum', 'min', 'max')
+
+    def __init__(self, relative_accuracy: float = RELATIVE_ACCURACY):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def record(self, value: float, count: int = 1):
+        if value is None or value < 0 or math.isnan(value):
+            return
+        if value < MIN_TRACKED_VALUE:
+            self.zero_count += count
+        else:
+            index = math.ceil(math.log(value) / self._log_gamma)
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += count
+        self.sum += value * count
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other: 'LogHistogram') -> 'LogHistogram':
+        """Add other's samples into this histogram (both must share relative accuracy)"""
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge histograms with different relative accuracy")
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def quantile(self, q: float) -> Optional[float]:
+        if self.count == 0:
+            return None
+        rank = max(math.ceil(q * self.count) - 1, 0)  # nearest-rank
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                # Bucket (gamma^(i-1), gamma^i]: its midpoint is within the relative accuracy
+                value = 2 * self.gamma ** index / (self.gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def bucket_counts(self, bounds: Iterable[float] = DEFAULT_BUCKET_BOUNDS) -> List[Tuple[float, int]]:
+        """Cumulative counts at fixed upper bounds (le), ending with +Inf"""
+        bounds = list(bounds)
+        counts = [0] * len(bounds)
+        for index, count in self.buckets.items():
+            upper = self.gamma ** index
+            for position, bound in enumerate(bounds):
+                if upper <= bound:
+                    counts[position] += count
+                    break
+        cumulative, result = self.zero_count, []
+        for bound, count in zip(bounds, counts):
+            cumulative += count
+            result.append((bound, cumulative))
+        result.append((math.inf, self.count))
+        return result
+
+    def summary(self, quantiles: Iterable[float] = DEFAULT_QUANTILES) -> Dict[str, Optional[float]]:
+        result = {"count": self.count}
+        for q in quantiles:
+            result[f"p{q * 100:g}"] = self.quantile(q)
+        result["mean"] = self.sum / self.count if self.count else None
+        result["max"] = self.max if self.count else None
+        return result
+
+class WindowedHistogram:
+    """Sliding-window view over LogHistograms kept in fine and coarse time slots"""
+
+    # (slot seconds, horizon seconds): a window is served from the finest tier that covers it
+    TIERS = ((10, 900), (60, 3600))
+
+    def __init__(self, relative_accuracy: float = RELATIVE_ACCURACY):
+        self.relative_accuracy = relative_accuracy
+        self.total = LogHistogram(relative_accuracy)
+        self._tiers = [deque() for _ in self.TIERS]  # each: (slot start, LogHistogram), oldest first
+
+    def record(self, value: float, now: float = None):
+        now = time.time() if now is None else now
+        self.total.record(value)
+        for (slot_seconds, horizon), slots in zip(self.TIERS, self._tiers):
+            slot_start = now - now % slot_seconds
+            if not slots or slots[-1][0] != slot_start:
+                slots.append((slot_start, LogHistogram(self.relative_accuracy)))
+                while slots and slots[0][0] <= now - horizon - slot_seconds:
+                    slots.popleft()
+            slots[-1][1].record(value)
+
+    def window(self, seconds: float, now: float = None) -> LogHistogram:
+        """Merged histogram of the last `seconds` (to slot granularity)"""
+        now = time.time() if now is None else now
+        for (slot_seconds, horizon), slots in zip(self.TIERS, self._tiers):
+            if seconds <= horizon:
+                break
+        else:
+            return self.total
+        merged = LogHistogram(self.relative_accuracy)
+        cutoff = now - seconds
+        for slot_start, histogram in reversed(slots):
+            if slot_start + slot_seconds <= cutoff:
+                break
+            merged.merge(histogram)
+        return merged
+
+class LatencyTracker:
+    """Thread-safe windowed latency histograms keyed by (dimension, key), e.g. ("agent", "Data Analyst")"""
+
+    def __init__(self, windows: Dict[str, float] = None, relative_accuracy: float = RELATIVE_ACCURACY):
+        self.windows = windows or DEFAULT_WINDOWS
+        self.relative_accuracy = relative_accuracy
+        self._series: Dict[Tuple[str, str], WindowedHistogram] = {}
+        self._lock = threading.Lock()
+
+    def record(self, dimension: str, key: str, seconds: float, now: float = None):
+        if seconds is None or not key:
+            return
+        with self._lock:
+            series = self._series.get((dimension, key))
+            if series is None:
+                series = self._series[(dimension, key)] = WindowedHistogram(self.relative_accuracy)
+            series.record(seconds, now)
+
+    def histogram(self, dimension: str, key: str = None, window: str = None, now: float = None) -> LogHistogram:
+        """Merged histogram for one key, or all keys of a dimension, over a named window (None = lifetime)"""
+        merged = LogHistogram(self.relative_accuracy)
+        with self._lock:
+            for (series_dimension, series_key), series in self._series.items():
+                if series_dimension != dimension or (key is not None and series_key != key):
+                    continue
+                merged.merge(series.window(self.windows[window], now) if window else series.total)
+        return merged
+
+    def snapshot(self, dimension: str = None, include_buckets: bool = False, now: float = None) -> Dict[str, Dict]:
+        """{dimension: {key: {window: {count, p50, p95, p99, mean, max}}}} over every sliding window"""
+        now = time.time() if now is None else now
+        result: Dict[str, Dict] = {}
+        with self._lock:
+            for (series_dimension, key), series in self._series.items():
+                if dimension and series_dimension != dimension:
+                    continue
+                windows = {name: series.window(seconds, now).summary() for name, seconds in self.windows.items()}
+                windows["all"] = series.total.summary()
+                if include_buckets:
+                    windows["buckets"] = [
+                        {"le": "+Inf" if bound == math.inf else bound, "count": count}
+                        for bound, count in series.window(max(self.windows.values()), now).bucket_counts()
+                    ]
+                result.setdefault(series_dimension, {})[key] = windows
+        return result
+
+    def series_count(self) -> int:
+        with self._lock:
+            return len(self._series)
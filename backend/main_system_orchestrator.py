@@ -20,6 +20,10 @@ from contextlib import contextmanager
 
 from flask import Flask, request, jsonify
 from flask_cors import CORS
+from service_metrics import instrument_flask, ollama_post
+
+from agent_vector_router import agent_vector_router
+from query_analysis_service import get_query_analysis_service
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -95,6 +99,7 @@ AGENT_CAPABILITIES = load_agent_capabilities()
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'main_orchestrator_secret'
 CORS(app)
+instrument_flask(app, "main-system-orchestrator")
 
 @dataclass
 class OrchestrationSession:
@@ -248,6 +253,7 @@ class MainSystemOrchestrator:
                 self.registered_agents[a2a_id] = capability
             
             logger.info(f"🎯 Found {len(orchestration_agents)} orchestration-enabled agents (A2A registered)")
+            agent_vector_router.refresh(orchestration_agents)
             return orchestration_agents
                 
         except Exception as e:
@@ -315,129 +321,51 @@ class MainSystemOrchestrator:
         return agent_map
     
     def analyze_query_with_llm(self, query: str) -> Dict[str, Any]:
-        """Analyze query using configured orchestrator model (default: granite4:micro)"""
+        """Analyze query using configured orchestrator model (default: granite4:micro), shared canonical analysis"""
         try:
-            # Prepare analysis prompt
-            analysis_prompt = f"""
-You are the Main System Orchestrator. Analyze this query intelligently to determine the optimal execution strategy.
-
-Query: "{query}"
-
-Available agents: {[agent.name for agent in self.registered_agents.values()]}
-
-ANALYSIS APPROACH:
-1. **Intent Recognition**: Identify the primary intent (creative, technical, analytical)
-2. **Domain Classification**: Determine if query requires single or multiple domains
-3. **Task Complexity**: Assess if query needs one agent or multiple agents
-4. **Execution Strategy**: Determine optimal coordination approach
-
-IMPORTANT GUIDELINES:
-- **Single-agent**: Query has ONE clear intent that ONE agent can handle (e.g., "write a poem", "get weather data")
-- **Multi-agent**: Query has MULTIPLE distinct tasks requiring DIFFERENT specialized agents (e.g., "analyze churn data AND design campaigns AND create slogans")
-- **Multi-domain** when query explicitly requires different expertise areas (e.g., "write a poem AND create code")
-- **Multi-agent** when query has multiple independent tasks or requires coordination
-- **Combined queries** (analysis + creative) should be treated as MULTI-AGENT workflow pattern
-- **Telco queries** requiring churn analysis + campaign design + creative content = MULTI-AGENT
-- **CRITICAL**: If query contains "AND" or "then" connecting different task types (e.g., "analyze X AND create Y", "explain X then write Y"), use MULTI-AGENT workflow pattern
-- **CRITICAL**: Technical analysis + creative generation = MULTI-AGENT (not single-agent)
-
-Provide analysis in JSON format:
-{{
-    "query_type": "technical|creative|analytical|multi_domain",
-    "task_nature": "direct|sequential|parallel",
-    "agentic_workflow_pattern": "single_agent|multi_agent|varying_domain",
-    "orchestration_strategy": "sequential|parallel|hybrid",
-    "complexity_level": "simple|moderate|complex",
-    "domain_analysis": {{
-        "primary_domain": "technical|creative|analytical",
-        "secondary_domains": [],
-        "is_multi_domain": false
-    }},
-    "workflow_steps": ["step1", "step2", "step3"],
-    "reasoning": "Clear explanation of why this classification was chosen"
-}}
-
-DECISION CRITERIA:
-- **single_agent**: Query has ONE clear intent that ONE agent can handle (e.g., "write a poem", "get weather data")
-- **multi_agent**: Query has MULTIPLE distinct tasks requiring DIFFERENT specialized agents (e.g., "analyze churn data AND design campaigns AND create slogans")
-- **varying_domain**: Query explicitly spans different expertise areas
-- **is_multi_domain**: Only true if query explicitly requires multiple domains
-
-CRITICAL RULES:
-- If query contains "AND" or "then" connecting different task types → **multi_agent**
-- Technical analysis + creative generation → **multi_agent** (not single-agent)
-- "Explain X then create Y" → **multi_agent** workflow pattern
-- "Analyze X AND write Y" → **multi_agent** workflow pattern
-- "Explain X and then use that to create Y" → **multi_agent** workflow pattern
-- "Identify X and then write Y" → **multi_agent** workflow pattern
-
-SPECIFIC EXAMPLES:
-- "Explain 4G performance indicators and then create a poem" = **multi_agent** (technical + creative)
-- "Analyze data and then write a story" = **multi_agent** (analytical + creative)
-- "Get weather data and then create code" = **multi_agent** (data + technical)
-
-IMPORTANT: If the query requires BOTH data analysis AND creative generation, use **multi_agent** workflow pattern.
-IMPORTANT: Any query with "and then" connecting different domains = **multi_agent** workflow pattern.
-IMPORTANT: Telco queries with churn analysis + campaign design + creative content = **multi_agent** workflow pattern.
-"""
-
-            # Call orchestrator model via Ollama (default: granite4:micro)
-            ollama_payload = {
-                "model": self.orchestrator_model,
-                "prompt": analysis_prompt,
-                "stream": False,
-                "options": {
-                    "temperature": 0.3,
-                    "top_p": 0.9,
-                    "max_tokens": 1000
-                }
-            }
-            
-            response = requests.post(
-                f"{OLLAMA_BASE_URL}/api/generate",
-                json=ollama_payload,
-                timeout=int(ORCHESTRATOR_CONFIG['OLLAMA_TIMEOUT'])
+            analysis = get_query_analysis_service().analyze_canonical(
+                query,
+                model=self.orchestrator_model,
+                timeout=int(ORCHESTRATOR_CONFIG['OLLAMA_TIMEOUT']),
+                ollama_url=OLLAMA_BASE_URL
             )
-            
-            if response.status_code == 200:
-                result = response.json()
-                analysis_text = result.get('response', '')
-                
-                # Try to extract JSON from response
-                try:
-                    # Look for JSON in the response
-                    start_idx = analysis_text.find('{')
-                    end_idx = analysis_text.rfind('}') + 1
-                    if start_idx != -1 and end_idx > start_idx:
-                        json_str = analysis_text[start_idx:end_idx]
-                        analysis = json.loads(json_str)
-                    else:
-                        # Fallback analysis
-                        analysis = {
-                            "query_type": "multi_domain",
-                            "agentic_workflow_pattern": "multi_agent",
-                            "orchestration_strategy": "sequential",
-                            "workflow_steps": ["analyze", "execute", "synthesize"],
-                            "reasoning": "Default analysis due to parsing error"
-                        }
-                except json.JSONDecodeError as e:
-                    logger.warning(f"JSON parsing failed: {e}, using fallback analysis")
-                    analysis = self._fallback_task_analysis(query)
-                
-                # POST-PROCESSING VALIDATION: Check if LLM misclassified multi-agent query
-                analysis = self._validate_analysis_classification(query, analysis)
-                
-                logger.info(f"🧠 Query analysis completed: {analysis['agentic_workflow_pattern']} workflow pattern")
-                return analysis
-                
+            if analysis is None:
+                logger.warning("No valid JSON in LLM analysis, using fallback analysis")
+                analysis = self._fallback_task_analysis(query)
             else:
-                logger.error(f"Ollama API error: {response.status_code}")
-                return self._fallback_analysis(query)
+                analysis = self._adapt_canonical_analysis(analysis)
+            
+            # POST-PROCESSING VALIDATION: Check if LLM misclassified multi-agent query
+            analysis = self._validate_analysis_classification(query, analysis)
+            
+            logger.info(f"🧠 Query analysis completed: {analysis['agentic_workflow_pattern']} workflow pattern")
+            return analysis
                 
         except Exception as e:
             logger.error(f"Error in query analysis: {e}")
             return self._fallback_analysis(query)
     
+    @staticmethod
+    def _adapt_canonical_analysis(analysis: Dict[str, Any]) -> Dict[str, Any]:
+        """The main orchestrator's view of the shared canonical query analysis"""
+        strategy = analysis.get('orchestration_strategy', 'sequential')
+        domain_analysis = analysis.get('domain_analysis')
+        return {
+            "query_type": analysis.get('query_type', 'analytical'),
+            "task_nature": analysis.get('task_nature', 'direct'),
+            "agentic_workflow_pattern": analysis.get('agentic_workflow_pattern', 'single_agent'),
+            "orchestration_strategy": 'sequential' if strategy == 'single' else strategy,
+            "complexity_level": analysis.get('complexity_level', 'simple'),
+            "domain_analysis": dict(domain_analysis) if isinstance(domain_analysis, dict) else {
+                "primary_domain": analysis.get('domain', 'analytical'),
+                "secondary_domains": [],
+                "is_multi_domain": False
+            },
+            "workflow_steps": [step.get('task', '') if isinstance(step, dict) else str(step)
+                               for step in analysis.get('workflow_steps') or []],
+            "reasoning": str(analysis.get('reasoning', ''))
+        }
+    
     def _validate_analysis_classification(self, query: str, analysis: Dict[str, Any]) -> Dict[str, Any]:
         """Validate and correct LLM analysis if it misclassified multi-agent queries"""
         query_lower = query.lower()
@@ -525,7 +453,7 @@ Respond with JSON only:
         
         try:
             # Use Granite4:micro for analysis
-            response = requests.post(f"{OLLAMA_BASE_URL}/api/generate", 
+            response = ollama_post(f"{OLLAMA_BASE_URL}/api/generate", 
                 json={
                     "model": ORCHESTRATOR_MODEL,
                     "prompt": analysis_prompt,
@@ -689,6 +617,15 @@ Respond with JSON only:
     def _analyze_agent_relevance(self, query: str, analysis: Dict[str, Any], available_agents: List[AgentCapability]) -> Dict[str, Any]:
         """Analyze each agent's relevance to the query and score them using orchestrator model"""
         try:
+            # Single-agent queries with a confident embedding match don't need the LLM call
+            if analysis.get('agentic_workflow_pattern', 'single_agent') == 'single_agent':
+                ranked = agent_vector_router.rank(query, available_agents)
+                if ranked and agent_vector_router.is_confident(ranked):
+                    logger.info(f"🧭 Confident vector match ({ranked[0][0].name}, {ranked[0][1]:.2f}) - skipping LLM agent analysis")
+                    agent_analysis = self._fallback_agent_scoring(query, analysis, available_agents)
+                    agent_analysis['multi_agent_analysis']['requires_multiple_agents'] = False
+                    return agent_analysis
+            
             # Create detailed agent analysis prompt
             agent_details = []
             for agent in available_agents:
@@ -784,7 +721,7 @@ Return JSON format:
                 }
             }
             
-            response = requests.post(
+            response = ollama_post(
                 f"{OLLAMA_BASE_URL}/api/generate",
                 json=ollama_payload,
                 timeout=45
@@ -819,12 +756,14 @@ Return JSON format:
             return self._fallback_agent_scoring(query, analysis, available_agents)
     
     def _fallback_agent_scoring(self, query: str, analysis: Dict[str, Any], available_agents: List[AgentCapability]) -> Dict[str, Any]:
-        """Fallback scoring system when orchestrator model analysis fails"""
+        """Fallback scoring system when orchestrator model analysis fails or is skipped"""
         logger.info(f"🔄 Using fallback agent scoring for {len(available_agents)} agents")
         agent_scores = []
         
         query_lower = query.lower()
-        query_type = analysis.get('query_type', 'technical')
+        
+        # One vectorized cosine pass over all agents; keyword scoring if embeddings are unavailable
+        similarities = agent_vector_router.similarities(query, available_agents)
         
         for agent in available_agents:
             # Skip orchestrator if configured to exclude it
@@ -834,91 +773,11 @@ Return JSON format:
             if exclude_orchestrator and agent.agent_id == orchestrator_id:
                 continue
                 
-            score = 0.0
-            reasoning_parts = []
-            
-            # Enhanced capability matching using dynamic capabilities
-            capabilities = agent.capabilities
-            agent_keywords = getattr(agent, 'keywords', [])
-            agent_domain = getattr(agent, 'domain', '')
-            agent_specialization = getattr(agent, 'specialization', '')
-            
-            # Score based on capabilities
-            if 'technical' in capabilities and any(keyword in query_lower for keyword in ['code', 'function', 'program', 'script', 'python', 'javascript', 'technical', 'development']):
-                score += 0.4
-                reasoning_parts.append("Technical capability match")
-            
-            if 'creative' in capabilities and any(keyword in query_lower for keyword in ['poem', 'story', 'creative', 'write', 'art', 'poetry', 'slogan']):
-                score += 0.4
-                reasoning_parts.append("Creative capability match")
-            
-            if 'churn_analysis' in capabilities and any(keyword in query_lower for keyword in ['churn', 'analysis', 'customer', 'retention']):
-                score += 0.5
-                reasoning_parts.append("Churn analysis capability match")
-            
-            if 'campaign_design' in capabilities and any(keyword in query_lower for keyword in ['campaign', 'prepaid', 'promotion', 'strategy']):
-                score += 0.5
-                reasoning_parts.append("Campaign design capability match")
-            
-            if 'data_analysis' in capabilities and any(keyword in query_lower for keyword in ['data', 'analysis', 'metrics', 'report']):
-                score += 0.4
-                reasoning_parts.append("Data analysis capability match")
-            
-            # Score based on keywords
-            keyword_matches = sum(1 for keyword in agent_keywords if keyword.lower() in query_lower)
-            if keyword_matches > 0:
-                score += keyword_matches * 0.2
-                reasoning_parts.append(f"Keyword match: {keyword_matches} keywords")
-            
-            # Score based on domain
-            if agent_domain and agent_domain.lower() in query_lower:
-                score += 0.3
-                reasoning_parts.append(f"Domain expertise: {agent_domain}")
-            
-            # Score based on specialization
-            if agent_specialization and agent_specialization.lower() in query_lower:
-                score += 0.4
-                reasoning_parts.append(f"Specialization match: {agent_specialization}")
-            
-            # Domain-based scoring with query type alignment
-            query_type = analysis.get('query_type', 'general')
-            if query_type == 'analytical' and 'creative' in capabilities:
-                score *= 0.7  # Reduce creative agent score for analytical queries
-                reasoning_parts.append("Domain alignment penalty: creative agent for analytical query")
-            elif query_type == 'creative' and 'churn_analysis' in capabilities:
-                score *= 0.8  # Slight reduction for analytical agent on creative query
-                reasoning_parts.append("Domain alignment penalty: analytical agent for creative query")
-            elif query_type == 'analytical' and 'churn_analysis' in capabilities:
-                score *= 1.2  # Boost analytical agents for analytical queries
-                reasoning_parts.append("Domain alignment boost: analytical agent for analytical query")
-            elif query_type == 'creative' and 'creative_writing' in capabilities:
-                score *= 1.2  # Boost creative agents for creative queries
-                reasoning_parts.append("Domain alignment boost: creative agent for creative query")
-            
-            if 'general' in capabilities:
-                score += 0.2
-                reasoning_parts.append("General capability")
-            
-            # Legacy capability matching (for backward compatibility)
-            if 'code_execution' in capabilities and any(keyword in query_lower for keyword in ['code', 'function', 'program', 'script', 'python', 'javascript']):
-                score += 0.4
-                reasoning_parts.append("Strong code execution capability")
-            
-            if 'file_read' in capabilities and any(keyword in query_lower for keyword in ['read', 'file', 'document', 'data']):
-                score += 0.3
-                reasoning_parts.append("File reading capability")
-            
-            if 'calculator' in capabilities and any(keyword in query_lower for keyword in ['calculate', 'math', 'number', 'compute']):
-                score += 0.3
-                reasoning_parts.append("Mathematical calculation capability")
-            
-            # Domain matching
-            if query_type == 'technical' and 'technical' in agent.name.lower():
-                score += 0.3
-                reasoning_parts.append("Technical domain expertise")
-            elif query_type == 'creative' and 'creative' in agent.name.lower():
-                score += 0.3
-                reasoning_parts.append("Creative domain expertise")
+            if similarities is not None:
+                score = similarities.get(agent.agent_id, 0.0)
+                reasoning_parts = [f"Embedding similarity {score:.2f} to agent profile"]
+            else:
+                score, reasoning_parts = self._keyword_agent_score(query_lower, analysis, agent)
             
             # Normalize score
             score = min(score, 1.0)
@@ -948,6 +807,96 @@ Return JSON format:
         logger.info(f"🔄 Fallback scoring result: {result}")
         return result
     
+    def _keyword_agent_score(self, query_lower: str, analysis: Dict[str, Any], agent: AgentCapability) -> tuple:
+        """Keyword/capability score for an agent, used when vector routing is unavailable"""
+        score = 0.0
+        reasoning_parts = []
+        
+        # Enhanced capability matching using dynamic capabilities
+        capabilities = agent.capabilities
+        agent_keywords = getattr(agent, 'keywords', [])
+        agent_domain = getattr(agent, 'domain', '')
+        agent_specialization = getattr(agent, 'specialization', '')
+        
+        # Score based on capabilities
+        if 'technical' in capabilities and any(keyword in query_lower for keyword in ['code', 'function', 'program', 'script', 'python', 'javascript', 'technical', 'development']):
+            score += 0.4
+            reasoning_parts.append("Technical capability match")
+        
+        if 'creative' in capabilities and any(keyword in query_lower for keyword in ['poem', 'story', 'creative', 'write', 'art', 'poetry', 'slogan']):
+            score += 0.4
+            reasoning_parts.append("Creative capability match")
+        
+        if 'churn_analysis' in capabilities and any(keyword in query_lower for keyword in ['churn', 'analysis', 'customer', 'retention']):
+            score += 0.5
+            reasoning_parts.append("Churn analysis capability match")
+        
+        if 'campaign_design' in capabilities and any(keyword in query_lower for keyword in ['campaign', 'prepaid', 'promotion', 'strategy']):
+            score += 0.5
+            reasoning_parts.append("Campaign design capability match")
+        
+        if 'data_analysis' in capabilities and any(keyword in query_lower for keyword in ['data', 'analysis', 'metrics', 'report']):
+            score += 0.4
+            reasoning_parts.append("Data analysis capability match")
+        
+        # Score based on keywords
+        keyword_matches = sum(1 for keyword in agent_keywords if keyword.lower() in query_lower)
+        if keyword_matches > 0:
+            score += keyword_matches * 0.2
+            reasoning_parts.append(f"Keyword match: {keyword_matches} keywords")
+        
+        # Score based on domain
+        if agent_domain and agent_domain.lower() in query_lower:
+            score += 0.3
+            reasoning_parts.append(f"Domain expertise: {agent_domain}")
+        
+        # Score based on specialization
+        if agent_specialization and agent_specialization.lower() in query_lower:
+            score += 0.4
+            reasoning_parts.append(f"Specialization match: {agent_specialization}")
+        
+        # Domain-based scoring with query type alignment
+        query_type = analysis.get('query_type', 'general')
+        if query_type == 'analytical' and 'creative' in capabilities:
+            score *= 0.7  # Reduce creative agent score for analytical queries
+            reasoning_parts.append("Domain alignment penalty: creative agent for analytical query")
+        elif query_type == 'creative' and 'churn_analysis' in capabilities:
+            score *= 0.8  # Slight reduction for analytical agent on creative query
+            reasoning_parts.append("Domain alignment penalty: analytical agent for creative query")
+        elif query_type == 'analytical' and 'churn_analysis' in capabilities:
+            score *= 1.2  # Boost analytical agents for analytical queries
+            reasoning_parts.append("Domain alignment boost: analytical agent for analytical query")
+        elif query_type == 'creative' and 'creative_writing' in capabilities:
+            score *= 1.2  # Boost creative agents for creative queries
+            reasoning_parts.append("Domain alignment boost: creative agent for creative query")
+        
+        if 'general' in capabilities:
+            score += 0.2
+            reasoning_parts.append("General capability")
+        
+        # Legacy capability matching (for backward compatibility)
+        if 'code_execution' in capabilities and any(keyword in query_lower for keyword in ['code', 'function', 'program', 'script', 'python', 'javascript']):
+            score += 0.4
+            reasoning_parts.append("Strong code execution capability")
+        
+        if 'file_read' in capabilities and any(keyword in query_lower for keyword in ['read', 'file', 'document', 'data']):
+            score += 0.3
+            reasoning_parts.append("File reading capability")
+        
+        if 'calculator' in capabilities and any(keyword in query_lower for keyword in ['calculate', 'math', 'number', 'compute']):
+            score += 0.3
+            reasoning_parts.append("Mathematical calculation capability")
+        
+        # Domain matching
+        if query_type == 'technical' and 'technical' in agent.name.lower():
+            score += 0.3
+            reasoning_parts.append("Technical domain expertise")
+        elif query_type == 'creative' and 'creative' in agent.name.lower():
+            score += 0.3
+            reasoning_parts.append("Creative domain expertise")
+        
+        return score, reasoning_parts
+    
     def _select_optimal_agent_combination(self, query: str, analysis: Dict[str, Any], agent_analysis: Dict[str, Any], available_agents: List[AgentCapability]) -> List[AgentCapability]:
         """Select the optimal combination of agents based on scoring analysis"""
         try:
@@ -1319,7 +1268,7 @@ Provide your analysis in this JSON format:
                 }
             }
             
-            response = requests.post(
+            response = ollama_post(
                 f"{OLLAMA_BASE_URL}/api/generate",
                 json=ollama_payload,
                 timeout=int(ORCHESTRATOR_CONFIG['OLLAMA_TIMEOUT'])
@@ -1708,7 +1657,7 @@ Provide your analysis in this JSON format:
                 }
             }
             
-            response = requests.post(
+            response = ollama_post(
                 f"{OLLAMA_BASE_URL}/api/generate",
                 json=ollama_payload,
                 timeout=int(ORCHESTRATOR_CONFIG['OLLAMA_TIMEOUT'])
@@ -1961,7 +1910,7 @@ Create a professional technical response that matches the quality and structure
                 }
             }
             
-            response = requests.post(
+            response = ollama_post(
                 f"{OLLAMA_BASE_URL}/api/generate",
                 json=ollama_payload,
                 timeout=int(ORCHESTRATOR_CONFIG['AGENT_EXECUTION_TIMEOUT'])
@@ -3433,7 +3382,7 @@ Create a professional technical response that matches the quality and structure
                 }
             }
             
-            response = requests.post(
+            response = ollama_post(
                 f"{OLLAMA_BASE_URL}/api/generate",
                 json=ollama_payload,
                 timeout=45
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+Model Keep-Alive Scheduler
+Warm-up, per-model keep_alive and memory-pressure eviction for the shared Ollama daemon
+
+- warm-up: the core service models, then the models used by registered
+  agents (A2A and Strands SDK), are loaded at startup while they fit the
+  memory budget
+- keep_alive: /api/ps is polled at a fixed cadence; expires_at only changes
+  when a request touches the model, so a model whose expires_at changed since
+  the last poll served at least one request in between.
+  Those activity samples give a per-model request rate, which picks a
+  keep_alive tier; when a caller's own keep_alive is shorter than the tier,
+  the scheduler extends it with an empty /api/generate call
+- eviction: when the models resident in /api/ps exceed the memory budget (or
+  system memory runs short), the coldest models are unloaded with keep_alive 0
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set
+
+import psutil
+import requests
+
+from service_metrics import Counter, Gauge, registry
+
+logger = logging.getLogger(__name__)
+
+OLLAMA_BASE_URL = os.environ.get('OLLAMA_HOST', 'http://localhost:11434')
+A2A_AGENTS_URL = "http://localhost:5008/api/a2a/agents"
+STRANDS_SDK_AGENTS_URL = "http://localhost:5006/api/strands-sdk/agents"
+
+# Orchestrator (main_system_orchestrator) and text cleaning models, warmed before agent models
+CORE_MODELS = [m.strip() for m in os.environ.get('CORE_WARM_MODELS', 'granite4:micro,qwen3:1.7b').split(',') if m.strip()]
+
+POLL_INTERVAL_SECONDS = 15
+DISCOVERY_INTERVAL_SECONDS = 300
+RATE_WINDOW_SECONDS = 900
+WARM_UP_TIMEOUT_SECONDS = 120
+# (minimum active polls per minute, keep_alive seconds), hottest first
+KEEP_ALIVE_TIERS = ((0.5, 3600), (0.1, 1800), (0.0, 600))
+# A caller's keep_alive within this many seconds of the tier is left alone
+KEEP_ALIVE_TOLERANCE_SECONDS = 2 * POLL_INTERVAL_SECONDS
+# 0 = budget is MODEL_MEMORY_FRACTION of physical memory
+MODEL_MEMORY_BUDGET_GB = float(os.environ.get('MODEL_MEMORY_BUDGET_GB', 0))
+MODEL_MEMORY_FRACTION = 0.6
+MEMORY_PRESSURE_PERCENT = 90.0
+
+KEEP_ALIVE_SECONDS = registry.register(Gauge(
+    'agentos_model_keep_alive_seconds', 'keep_alive currently applied by the scheduler', ['model']))
+MODEL_WARMUPS = registry.register(Counter(
+    'agentos_model_warmups', 'Models pre-loaded by the keep-alive scheduler', ['model', 'outcome']))
+MODEL_EVICTIONS = registry.register(Counter(
+    'agentos_model_evictions', 'Models unloaded by the keep-alive scheduler', ['model', 'reason']))
+
+FRACTIONAL_SECONDS_PATTERN = re.compile(r'(\.\d{6})\d+')
+
+def parse_expires_at(value: Optional[str]) -> Optional[float]:
+    """Epoch seconds for an /api/ps expires_at (RFC 3339 with nanoseconds)"""
+    if not value:
+        return None
+    try:
+        value = FRACTIONAL_SECONDS_PATTERN.sub(r'\1', value.replace('Z', '+00:00'))
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        return None
+
+def unload_model(model: str, base_url: str = OLLAMA_BASE_URL, timeout: float = 10) -> Dict:
+    """Ask Ollama to drop model from memory now (keep_alive 0)"""
+    try:
+        response = requests.post(f"{base_url}/api/generate",
+                                 json={'model': model, 'keep_alive': 0}, timeout=timeout)
+        if response.status_code == 200:
+            return {'success': True, 'message': f'Model {model} unloaded'}
+        return {'success': False, 'error': f'Ollama API error: {response.status_code}'}
+    except requests.RequestException as e:
+        return {'success': False, 'error': str(e)}
+
+class ModelKeepAliveScheduler:
+    """Keeps the hot set of Ollama models resident and evicts cold ones"""
+
+    def __init__(self, base_url: str = OLLAMA_BASE_URL, poll_interval: float = POLL_INTERVAL_SECONDS,
+                 memory_budget_gb: float = MODEL_MEMORY_BUDGET_GB):
+        self.base_url = base_url
+        self.poll_interval = poll_interval
+        if not memory_budget_gb:
+            memory_budget_gb = psutil.virtual_memory().total * MODEL_MEMORY_FRACTION / (1024**3)
+        self.memory_budget_bytes = int(memory_budget_gb * (1024**3))
+        self.warm_models: List[str] = []  # core + agent models, warm-up order
+        self._activity: Dict[str, deque] = {}
+        self._last_expiry: Dict[str, float] = {}
+        self._own_expiry: Dict[str, float] = {}  # expiry set by our own warm-up/refresh, not a request
+        self._applied: Dict[str, int] = {}
+        self._loaded: Dict[str, Dict] = {}
+        self._last_discovery = 0.0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.stats_counters = {'polls': 0, 'warmups': 0, 'refreshes': 0, 'evictions': 0, 'poll_errors': 0}
+
+    # ------------------------------------------------------------------ discovery
+
+    def discover_models(self) -> List[str]:
+        """Core models followed by the models of registered agents (A2A, Strands SDK)"""
+        models = list(CORE_MODELS)
+        for url, field in ((A2A_AGENTS_URL, 'model'), (STRANDS_SDK_AGENTS_URL, 'model_id')):
+            try:
+                response = requests.get(url, timeout=5)
+                if response.status_code != 200:
+                    continue
+                data = response.json()
+                agents = data.get('agents', []) if isinstance(data, dict) else data
+                models.extend(agent.get(field) for agent in agents if isinstance(agent, dict))
+            except (requests.RequestException, ValueError):
+                continue  # service not running: its agents get warmed on a later discovery
+        seen: Set[str] = set()
+        return [m for m in models if isinstance(m, str) and m and not (m in seen or seen.add(m))]
+
+    def _installed_models(self) -> Dict[str, int]:
+        response = requests.get(f"{self.base_url}/api/tags", timeout=5)
+        response.raise_for_status()
+        return {model['name']: model.get('size', 0) for model in response.json().get('models', [])}
+
+    # ------------------------------------------------------------------ load / unload
+
+    def _load(self, model: str, keep_alive: int, timeout: float) -> bool:
+        """Load model (or reset its expiry) without generating anything"""
+        response = requests.post(f"{self.base_url}/api/generate",
+                                 json={'model': model, 'keep_alive': keep_alive}, timeout=timeout)
+        if response.status_code != 200:
+            return False
+        with self._lock:
+            self._own_expiry[model] = time.time() + keep_alive
+            self._applied[model] = keep_alive
+        KEEP_ALIVE_SECONDS.set(keep_alive, model)
+        return True
+
+    def warm_up(self, models: Optional[Iterable[str]] = None) -> Dict[str, str]:
+        """Pre-load models in order while they fit the memory budget; returns model -> outcome"""
+        models = list(models) if models is not None else self.discover_models()
+        try:
+            installed = self._installed_models()
+        except (requests.RequestException, ValueError) as e:
+            logger.warning(f"Model warm-up skipped, Ollama unavailable: {e}")
+            return {model: 'ollama_unavailable' for model in models}
+        # Agents often name models without a tag; Ollama lists them as name:latest
+        models = list(dict.fromkeys(
+            m if m in installed or f"{m}:latest" not in installed else f"{m}:latest" for m in models
+        ))
+
+        with self._lock:
+            for model in models:
+                if model not in self.warm_models:
+                    self.warm_models.append(model)
+            resident = sum(info['size'] for info in self._loaded.values())
+            loaded = set(self._loaded)
+
+        results = {}
+        for model in models:
+            if model in loaded:
+                results[model] = 'already_loaded'
+                continue
+            if model not in installed:
+                results[model] = 'not_installed'
+                continue
+            if resident + installed[model] > self.memory_budget_bytes:
+                results[model] = 'over_budget'
+                continue
+            try:
+                ok = self._load(model, self.keep_alive_for(model), WARM_UP_TIMEOUT_SECONDS)
+            except requests.RequestException:
+                ok = False
+            results[model] = 'loaded' if ok else 'error'
+            MODEL_WARMUPS.inc(model, results[model])
+            if ok:
+                resident += installed[model]
+                self.stats_counters['warmups'] += 1
+        logger.info(f"Model warm-up: {results}")
+        return results
+
+    def unload(self, model: str, reason: str = 'manual') -> Dict:
+        result = unload_model(model, self.base_url)
+        if result['success']:
+            with self._lock:
+                self._loaded.pop(model, None)
+                self._last_expiry.pop(model, None)
+                self._own_expiry.pop(model, None)
+                self._applied.pop(model, None)
+            MODEL_EVICTIONS.inc(model, reason)
+            KEEP_ALIVE_SECONDS.set(0, model)
+        return result
+
+    # ------------------------------------------------------------------ policy
+
+    def request_rate(self, model: str, now: Optional[float] = None) -> float:
+        """Active polls per minute over the rate window (a lower bound on requests per minute)"""
+        now = now or time.time()
+        with self._lock:
+            samples = self._activity.get(model)
+            if not samples:
+                return 0.0
+            while samples and samples[0] < now - RATE_WINDOW_SECONDS:
+                samples.popleft()
+            return len(samples) / (RATE_WINDOW_SECONDS / 60)
+
+    def keep_alive_for(self, model: str) -> Optional[int]:
+        """keep_alive tier for model; None leaves Ollama's default for models that are neither warm nor active"""
+        rate = self.request_rate(model)
+        if rate == 0 and model not in self.warm_models:
+            return None
+        for min_rate, seconds in KEEP_ALIVE_TIERS:
+            if rate >= min_rate:
+                return seconds
+        return KEEP_ALIVE_TIERS[-1][1]
+
+    # ------------------------------------------------------------------ polling
+
+    def poll(self):
+        """One scheduler pass: record activity from /api/ps, re-apply keep_alive, evict under pressure"""
+        response = requests.get(f"{self.base_url}/api/ps", timeout=5)
+        response.raise_for_status()
+        now = time.time()
+        loaded = {model['name']: model for model in response.json().get('models', [])}
+
+        active = []
+        with self._lock:
+            for name, model in loaded.items():
+                expiry = parse_expires_at(model.get('expires_at'))
+                previous = self._last_expiry.get(name)
+                own = self._own_expiry.pop(name, None)
+                self._last_expiry[name] = expiry
+                if expiry is None:
+                    continue
+                if own is not None and abs(expiry - own) <= KEEP_ALIVE_TOLERANCE_SECONDS:
+                    continue  # moved by our own warm-up/refresh
+                if previous is None and name in self._loaded:
+                    continue
+                if previous is None or abs(expiry - previous) > 1:
+                    self._activity.setdefault(name, deque()).append(now)
+                    active.append((name, expiry))
+            for name in set(self._last_expiry) - set(loaded):
+                self._last_expiry.pop(name, None)
+                self._applied.pop(name, None)
+            self._loaded = {name: {'size': model.get('size', 0), 'expires_at': model.get('expires_at')}
+                            for name, model in loaded.items()}
+            self.stats_counters['polls'] += 1
+
+        for name, expiry in active:
+            desired = self.keep_alive_for(name)
+            if desired is None or (expiry - now) + KEEP_ALIVE_TOLERANCE_SECONDS >= desired:
+                continue
+            try:
+                if self._load(name, desired, timeout=10):
+                    self.stats_counters['refreshes'] += 1
+            except requests.RequestException as e:
+                logger.warning(f"keep_alive refresh for {name} failed: {e}")
+
+        self.evict_cold_models()
+
+    def _under_pressure(self, resident: int) -> Optional[str]:
+        if resident > self.memory_budget_bytes:
+            return 'model_budget'
+        if resident and psutil.virtual_memory().percent >= MEMORY_PRESSURE_PERCENT:
+            return 'system_memory'
+        return None
+
+    def evict_cold_models(self) -> List[str]:
+        """Unload the coldest loaded models until resident models fit the budget.
+
+        Hot-tier models and models touched within the last two polls (likely
+        still serving) are never evicted.
+        """
+        now = time.time()
+        with self._lock:
+            sizes = {name: info['size'] for name, info in self._loaded.items()}
+            last_active = {name: (self._activity.get(name) or [0])[-1] for name in sizes}
+        resident = sum(sizes.values())
+        hot_floor = KEEP_ALIVE_TIERS[0][0]
+        candidates = sorted(
+            (name for name in sizes
+             if self.request_rate(name, now) < hot_floor and now - last_active[name] > 2 * self.poll_interval),
+            key=lambda name: (self.request_rate(name, now), name in self.warm_models, last_active[name])
+        )
+        evicted = []
+        for name in candidates:
+            reason = self._under_pressure(resident)
+            if reason is None:
+                break
+            if self.unload(name, reason)['success']:
+                resident -= sizes[name]
+                evicted.append(name)
+                self.stats_counters['evictions'] += 1
+                logger.info(f"Evicted cold model {name} ({reason})")
+        return evicted
+
+    # ------------------------------------------------------------------ lifecycle
+
+    def _run(self):
+        self.warm_up()
+        self._last_discovery = time.time()
+        while not self._stop.wait(self.poll_interval):
+            try:
+                if time.time() - self._last_discovery >= DISCOVERY_INTERVAL_SECONDS:
+                    self._last_discovery = time.time()
+                    new_models = [m for m in self.discover_models() if m not in self.warm_models]
+                    if new_models:
+                        self.warm_up(new_models)
+                self.poll()
+            except (requests.RequestException, ValueError) as e:
+                self.stats_counters['poll_errors'] += 1
+                logger.debug(f"Keep-alive poll failed: {e}")
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="model-keepalive", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def status(self) -> Dict:
+        now = time.time()
+        with self._lock:
+            loaded = dict(self._loaded)
+            applied = dict(self._applied)
+            warm = list(self.warm_models)
+        models = {}
+        for name in set(loaded) | set(warm):
+            models[name] = {
+                'loaded': name in loaded,
+                'size_gb': round(loaded.get(name, {}).get('size', 0) / (1024**3), 2),
+                'expires_at': loaded.get(name, {}).get('expires_at'),
+                'warm_set': name in warm,
+                'request_rate_per_min': round(self.request_rate(name, now), 3),
+                'keep_alive_seconds': applied.get(name),
+                'target_keep_alive_seconds': self.keep_alive_for(name)
+            }
+        return {
+            'running': bool(self._thread and self._thread.is_alive()),
+            'memory_budget_gb': round(self.memory_budget_bytes / (1024**3), 2),
+            'resident_gb': round(sum(info['size'] for info in loaded.values()) / (1024**3), 2),
+            'poll_interval_seconds': self.poll_interval,
+            'models': models,
+            **self.stats_counters
+        }
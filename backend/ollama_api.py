@@ -5,6 +5,7 @@ Provides basic endpoints for Ollama agent management
 
 from flask import Flask, request, jsonify
 from flask_cors import CORS
+from service_metrics import instrument_flask, ollama_post
 import requests
 import json
 import sqlite3
@@ -18,6 +19,7 @@ logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 CORS(app)
+instrument_flask(app, "ollama-api")
 
 # Ollama configuration
 OLLAMA_BASE_URL = "http://localhost:11434"
@@ -307,10 +309,11 @@ def generate_response():
             ollama_request['system'] = data.get('system')
         
         # Make request to Ollama
-        response = requests.post(
+        response = ollama_post(
             f"{OLLAMA_BASE_URL}/api/generate",
             json=ollama_request,
-            timeout=300  # 5 minute timeout
+            timeout=300,  # 5 minute timeout
+            priority="interactive"
         )
         
         if response.status_code == 200:
@@ -385,10 +388,11 @@ def execute_agent(agent_id):
                 }
             }
             
-            response = requests.post(
+            response = ollama_post(
                 f"{OLLAMA_BASE_URL}/api/generate",
                 json=ollama_request,
-                timeout=300
+                timeout=300,
+                priority="interactive"
             )
             
             if response.status_code == 200:
@@ -700,13 +704,14 @@ def ollama_terminal():
                 if prompt:
                     try:
                         # Generate response
-                        response = requests.post(f"{OLLAMA_BASE_URL}/api/generate", 
+                        response = ollama_post(f"{OLLAMA_BASE_URL}/api/generate", 
                                                json={
                                                    "model": model_name,
                                                    "prompt": prompt,
                                                    "stream": False
                                                }, 
-                                               timeout=60)
+                                               timeout=60,
+                                               priority="interactive")
                         if response.status_code == 200:
                             result = response.json()
                             return jsonify({
@@ -1372,7 +1377,7 @@ def execute_task_with_agent(task, agent, input_data, completed_tasks):
         }
         
         # Make request to Ollama
-        response = requests.post(
+        response = ollama_post(
             f"{OLLAMA_BASE_URL}/api/generate",
             json=ollama_request,
             timeout=60
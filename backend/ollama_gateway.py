@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Ollama Gateway
+Per-model admission control and priority queueing in front of the shared Ollama daemon
+
+Services reach Ollama through ollama_post() (service_metrics), or through
+ollama_route() for aiohttp clients, which route generate/chat/embedding calls
+here when OLLAMA_GATEWAY_URL is set and send the caller's priority class in
+the X-AgentOS-Priority header:
+
+    interactive    chat turns and direct agent runs a user is waiting on
+    orchestration  planning / query analysis (default)
+    background     output cleaning, ingestion and other deferrable work
+
+Each model gets a fixed number of concurrency slots. Requests beyond that
+wait in a per-model priority queue (interactive first, FIFO within a class).
+A request is shed with 429 and Retry-After instead of waiting out the
+caller's timeout when its class queue is full, when the predicted wait
+(queued requests ahead / slots x recent service time) exceeds its wait
+budget, or when it actually waits that long. The wait budget is the class's
+limit, shortened to leave room for generation within the caller's own
+timeout (sent by ollama_post in X-AgentOS-Timeout). Every other /api/* call
+(tags, ps, show, pull) is passed straight through.
+
+Not admitted here: the A2A service's pooled per-model backends (other ports,
+scaled by their own queue depth), and the utility agents and legacy
+orchestration modules that start-all-services.sh does not launch.
+"""
+
+import heapq
+import itertools
+import math
+import os
+import threading
+import time
+from typing import Dict
+
+import requests
+from flask import Flask, Response, jsonify, request, stream_with_context
+from flask_cors import CORS
+
+from service_metrics import PRIORITY_HEADER, TIMEOUT_HEADER, Counter, Gauge, Histogram, instrument_flask, registry
+
+app = Flask(__name__)
+CORS(app)
+instrument_flask(app, "ollama-gateway")
+
+OLLAMA_UPSTREAM_URL = os.environ.get('OLLAMA_UPSTREAM_URL', 'http://localhost:11434')
+GATEWAY_PORT = int(os.environ.get('OLLAMA_GATEWAY_PORT', 11435))
+
+PRIORITY_CLASSES = ('interactive', 'orchestration', 'background')  # highest first
+DEFAULT_PRIORITY = 'orchestration'
+MODEL_CONCURRENCY = int(os.environ.get('OLLAMA_GATEWAY_MODEL_CONCURRENCY', 2))
+# Longest a request may wait for a slot before it is shed, per class
+MAX_QUEUE_WAIT_SECONDS = {'interactive': 20.0, 'orchestration': 15.0, 'background': 5.0}
+MIN_QUEUE_WAIT_SECONDS = 1.0
+MAX_QUEUE_DEPTH = {'interactive': 32, 'orchestration': 16, 'background': 8}
+ADMITTED_ENDPOINTS = ('generate', 'chat', 'embed', 'embeddings')
+INITIAL_SERVICE_SECONDS = 5.0
+SERVICE_TIME_SMOOTHING = 0.2
+UPSTREAM_CONNECT_TIMEOUT = 5
+UPSTREAM_READ_TIMEOUT = 300
+QUEUE_WAIT_BUCKETS = (0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0)
+
+QUEUE_WAIT = registry.register(Histogram(
+    'agentos_ollama_gateway_queue_seconds', 'Time requests waited for a model slot',
+    ['model', 'priority'], buckets=QUEUE_WAIT_BUCKETS))
+GATEWAY_REQUESTS = registry.register(Counter(
+    'agentos_ollama_gateway_requests', 'Requests handled by the Ollama gateway', ['model', 'priority', 'outcome']))
+QUEUE_DEPTH = registry.register(Gauge(
+    'agentos_ollama_gateway_queued', 'Requests waiting for a model slot', ['model', 'priority']))
+SLOTS_IN_USE = registry.register(Gauge(
+    'agentos_ollama_gateway_slots_in_use', 'Model slots currently serving requests', ['model']))
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed instead of queued"""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+class _Waiter:
+    __slots__ = ('priority', 'event', 'granted', 'cancelled')
+
+    def __init__(self, priority: str):
+        self.priority = priority
+        self.event = threading.Event()
+        self.granted = False
+        self.cancelled = False
+
+class ModelAdmission:
+    """Concurrency slots and a priority wait queue for one model"""
+
+    def __init__(self, model: str, slots: int = MODEL_CONCURRENCY):
+        self.model = model
+        self.slots = slots
+        self.in_use = 0
+        self.service_seconds = INITIAL_SERVICE_SECONDS  # smoothed time a request holds a slot
+        self._queue = []  # (class rank, sequence, waiter)
+        self._queued = {priority: 0 for priority in PRIORITY_CLASSES}
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+
+    def _predicted_wait(self, rank: int) -> float:
+        ahead = sum(1 for entry in self._queue if entry[0] <= rank and not entry[2].cancelled)
+        return math.ceil((ahead + 1) / self.slots) * self.service_seconds
+
+    def _dequeued(self, waiter: _Waiter):
+        self._queued[waiter.priority] -= 1
+        QUEUE_DEPTH.set(self._queued[waiter.priority], self.model, waiter.priority)
+
+    def acquire(self, priority: str, caller_timeout: float = None) -> float:
+        """Wait for a slot; returns seconds queued or raises AdmissionRejected"""
+        rank = PRIORITY_CLASSES.index(priority)
+        with self._lock:
+            max_wait = MAX_QUEUE_WAIT_SECONDS[priority]
+            if caller_timeout:
+                max_wait = min(max_wait, max(caller_timeout - self.service_seconds, MIN_QUEUE_WAIT_SECONDS))
+            if self.in_use < self.slots and not any(self._queued.values()):
+                self.in_use += 1
+                SLOTS_IN_USE.set(self.in_use, self.model)
+                return 0.0
+            if self._queued[priority] >= MAX_QUEUE_DEPTH[priority]:
+                raise AdmissionRejected('queue_full', self._predicted_wait(rank))
+            predicted = self._predicted_wait(rank)
+            if predicted > max_wait:
+                raise AdmissionRejected('predicted_wait', predicted)
+            waiter = _Waiter(priority)
+            heapq.heappush(self._queue, (rank, next(self._sequence), waiter))
+            self._queued[priority] += 1
+            QUEUE_DEPTH.set(self._queued[priority], self.model, priority)
+
+        started = time.perf_counter()
+        waiter.event.wait(max_wait)
+        with self._lock:
+            if not waiter.granted:
+                # Left in the heap and skipped by release(); the slot count is untouched
+                waiter.cancelled = True
+                self._dequeued(waiter)
+                raise AdmissionRejected('wait_timeout', self._predicted_wait(rank))
+        return time.perf_counter() - started
+
+    def release(self, held_seconds: float):
+        """Return a slot, handing it straight to the next waiter by priority"""
+        with self._lock:
+            self.service_seconds += SERVICE_TIME_SMOOTHING * (held_seconds - self.service_seconds)
+            while self._queue:
+                _, _, waiter = heapq.heappop(self._queue)
+                if waiter.cancelled:
+                    continue
+                waiter.granted = True
+                self._dequeued(waiter)
+                waiter.event.set()
+                return
+            self.in_use -= 1
+            SLOTS_IN_USE.set(self.in_use, self.model)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'slots': self.slots,
+                'in_use': self.in_use,
+                'queued': dict(self._queued),
+                'service_seconds': round(self.service_seconds, 3)
+            }
+
+class OllamaGateway:
+    """Admission control for every model served by the upstream daemon"""
+
+    def __init__(self, slots: int = MODEL_CONCURRENCY):
+        self.slots = slots
+        self._models: Dict[str, ModelAdmission] = {}
+        self._lock = threading.Lock()
+
+    def admission(self, model: str) -> ModelAdmission:
+        with self._lock:
+            if model not in self._models:
+                self._models[model] = ModelAdmission(model, self.slots)
+            return self._models[model]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            models = dict(self._models)
+        return {name: admission.stats() for name, admission in models.items()}
+
+gateway = OllamaGateway()
+
+def _priority_from_request() -> str:
+    priority = (request.headers.get(PRIORITY_HEADER) or DEFAULT_PRIORITY).lower()
+    return priority if priority in PRIORITY_CLASSES else DEFAULT_PRIORITY
+
+def _caller_timeout():
+    try:
+        return float(request.headers.get(TIMEOUT_HEADER) or 0) or None
+    except ValueError:
+        return None
+
+def _upstream(method: str, endpoint: str, stream: bool) -> requests.Response:
+    return requests.request(
+        method, f"{OLLAMA_UPSTREAM_URL}/api/{endpoint}",
+        params=request.args, data=request.get_data(),
+        headers={'Content-Type': request.headers.get('Content-Type', 'application/json')},
+        stream=stream, timeout=(UPSTREAM_CONNECT_TIMEOUT, UPSTREAM_READ_TIMEOUT)
+    )
+
+def _relay(upstream: requests.Response, stream: bool, on_close=None) -> Response:
+    content_type = upstream.headers.get('Content-Type', 'application/json')
+    if stream:
+        response = Response(stream_with_context(upstream.iter_content(chunk_size=None)),
+                            status=upstream.status_code, content_type=content_type)
+    else:
+        response = Response(upstream.content, status=upstream.status_code, content_type=content_type)
+    # Runs once the body is fully sent or the client goes away, so streamed slots are held until the end
+    response.call_on_close(upstream.close)
+    if on_close:
+        response.call_on_close(on_close)
+    return response
+
+@app.route('/api/<path:endpoint>', methods=['GET', 'POST', 'DELETE'])
+def proxy(endpoint):
+    """Admit generation/embedding calls per model and priority; pass everything else through"""
+    payload = request.get_json(silent=True) or {}
+    stream = bool(payload.get('stream', True)) if endpoint in ('generate', 'chat', 'pull', 'push', 'create') else False
+    model = payload.get('model')
+    if endpoint not in ADMITTED_ENDPOINTS or not model:
+        try:
+            return _relay(_upstream(request.method, endpoint, stream), stream)
+        except requests.RequestException as e:
+            return jsonify({'error': f'Ollama upstream unavailable: {e}'}), 502
+
+    priority = _priority_from_request()
+    admission = gateway.admission(model)
+    try:
+        waited = admission.acquire(priority, _caller_timeout())
+    except AdmissionRejected as e:
+        GATEWAY_REQUESTS.inc(model, priority, f'shed_{e.reason}')
+        retry_after = max(1, math.ceil(e.retry_after))
+        response = jsonify({
+            'error': f'Ollama is saturated for {model}; retry in {retry_after}s',
+            'reason': e.reason,
+            'model': model,
+            'priority': priority
+        })
+        response.headers['Retry-After'] = str(retry_after)
+        return response, 429
+    QUEUE_WAIT.observe(waited, model, priority)
+
+    admitted_at = time.perf_counter()
+    released = threading.Event()
+
+    def release():
+        if not released.is_set():
+            released.set()
+            admission.release(time.perf_counter() - admitted_at)
+
+    try:
+        upstream = _upstream('POST', endpoint, stream)
+    except requests.RequestException as e:
+        release()
+        GATEWAY_REQUESTS.inc(model, priority, 'upstream_error')
+        return jsonify({'error': f'Ollama upstream unavailable: {e}'}), 502
+
+    GATEWAY_REQUESTS.inc(model, priority, 'admitted')
+    response = _relay(upstream, stream, on_close=release)
+    response.headers['X-Gateway-Queue-Seconds'] = f'{waited:.3f}'
+    return response
+
+@app.route('/api/ollama-gateway/stats', methods=['GET'])
+def gateway_stats():
+    """Slots, queue depths and smoothed service time per model"""
+    return jsonify({
+        'upstream': OLLAMA_UPSTREAM_URL,
+        'slots_per_model': gateway.slots,
+        'max_queue_wait_seconds': MAX_QUEUE_WAIT_SECONDS,
+        'max_queue_depth': MAX_QUEUE_DEPTH,
+        'models': gateway.stats()
+    })
+
+@app.route('/health', methods=['GET'])
+def health_check():
+    """Health check endpoint"""
+    try:
+        upstream_ok = requests.get(f"{OLLAMA_UPSTREAM_URL}/api/tags", timeout=3).status_code == 200
+    except requests.RequestException:
+        upstream_ok = False
+    return jsonify({
+        'status': 'healthy' if upstream_ok else 'degraded',
+        'service': 'ollama-gateway',
+        'upstream': OLLAMA_UPSTREAM_URL,
+        'upstream_available': upstream_ok
+    })
+
+if __name__ == '__main__':
+    print("🚦 Starting Ollama Gateway...")
+    print(f"📍 Port: {GATEWAY_PORT} → {OLLAMA_UPSTREAM_URL}")
+    print(f"🎯 {MODEL_CONCURRENCY} slots per model, priorities: {' > '.join(PRIORITY_CLASSES)}")
+
+    app.run(host='0.0.0.0', port=GATEWAY_PORT, debug=False, threaded=True)
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Query Analysis Service
+Shared, memoized LLM query analysis for the orchestrator front doors
+
+Front doors that only need to classify a query (chat, main and unified
+orchestrators) share one canonical, agent-independent analysis from
+analyze_canonical() and adapt it to their own shape, so the same query arriving
+through any of them is analyzed once per model. Front doors that pick agents in
+the same call (enhanced 5-stage, Strands orchestration) pass their own prompt
+and the agent list as context to analyze().
+
+The LLM call, JSON extraction and caching live here. Results are keyed by
+model + prompt template name/version + normalized query (+ any prompt context):
+
+- an in-process single-flight layer (ToolResultCache) so concurrent requests
+  for the same query share one LLM call
+- a SQLite (WAL) table shared by every backend process on the host, so the
+  same query arriving through another service is not analyzed again
+
+Only successfully parsed (and validated) analyses are cached; bump a template's
+version whenever its prompt changes so stale analyses are never served.
+"""
+
+import copy
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+import requests
+
+from service_metrics import ollama_post, register_cache, sqlite_timer
+from tool_result_cache import ToolResultCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ANALYSIS_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'query_analysis_cache.db')
+DEFAULT_ANALYSIS_TTL = 6 * 3600
+DEFAULT_OLLAMA_URL = "http://localhost:11434"
+
+# The shared analysis (bump the version whenever build_canonical_prompt changes)
+CANONICAL_ANALYSIS_TEMPLATE = "canonical.query_analysis"
+CANONICAL_ANALYSIS_VERSION = "1"
+CANONICAL_ANALYSIS_OPTIONS = {"temperature": 0.2, "top_p": 0.9}
+CANONICAL_ANALYSIS_KEYS = ('query_type', 'complexity_level', 'agentic_workflow_pattern', 'orchestration_strategy')
+
+class QueryAnalysisError(Exception):
+    """The LLM could not be reached or returned an HTTP error"""
+
+def normalize_query(query: str) -> str:
+    """Case, whitespace and trailing punctuation don't change an analysis"""
+    return re.sub(r'\s+', ' ', query).strip().lower().rstrip('?!. ')
+
+def extract_json_object(text: str) -> Optional[Dict[str, Any]]:
+    """Parse the response as JSON, or the outermost {...} within it"""
+    text = text.strip()
+    try:
+        parsed = json.loads(text)
+        return parsed if isinstance(parsed, dict) else None
+    except json.JSONDecodeError:
+        pass
+    start, end = text.find('{'), text.rfind('}') + 1
+    if start == -1 or end <= start:
+        return None
+    try:
+        parsed = json.loads(text[start:end])
+        return parsed if isinstance(parsed, dict) else None
+    except json.JSONDecodeError:
+        return None
+
+def build_canonical_prompt(query: str) -> str:
+    """Agent-independent analysis prompt; every field any classifying front door reads"""
+    return f"""You are the query analyst for a multi-agent system. Analyze this user query to determine how it should be orchestrated.
+
+Query: "{query}"
+
+GUIDELINES:
+- single_agent: the query has ONE clear intent that ONE agent can handle (e.g. "write a poem", "what is 5G?")
+- multi_agent: the query has MULTIPLE distinct tasks needing DIFFERENT expertise, e.g. sequential tasks
+  ("get data" then "analyze data" then "create policy") or words like "and then", "also", "plus" linking task types
+- varying_domain: the query explicitly spans different expertise areas
+- Technical or analytical work combined with creative generation is ALWAYS multi_agent
+  ("Explain 4G performance indicators and then create a poem", "Get weather data and write a story about it")
+- orchestration_strategy is "single" for one task, "sequential" when a task needs an earlier task's output,
+  "parallel" for independent tasks, "hybrid" for a mix
+
+Respond with ONLY a JSON object in this format:
+{{
+    "user_intent": "what the user wants to achieve",
+    "query_type": "technical|creative|analytical|calculation|research|general|multi_domain",
+    "domain": "primary domain (math, creative, technical, telecommunications, ...); join several with _and_, e.g. math_and_creative",
+    "complexity_level": "simple|moderate|complex",
+    "agentic_workflow_pattern": "single_agent|multi_agent|varying_domain",
+    "orchestration_strategy": "single|sequential|parallel|hybrid",
+    "task_nature": "direct|sequential|parallel",
+    "domain_analysis": {{
+        "primary_domain": "technical|creative|analytical",
+        "secondary_domains": [],
+        "is_multi_domain": false
+    }},
+    "required_expertise": ["expertise areas needed"],
+    "workflow_steps": [
+        {{"step": 1, "task": "first task", "required_expertise": "skills needed"}}
+    ],
+    "confidence": 0.85,
+    "reasoning": "Brief explanation of the analysis"
+}}"""
+
+class QueryAnalysisService:
+    """LLM query analysis with in-process and cross-process (SQLite) memoization"""
+
+    def __init__(self, db_path: str = DEFAULT_ANALYSIS_DB, ttl: float = DEFAULT_ANALYSIS_TTL):
+        self.db_path = db_path
+        self.ttl = ttl
+        self._local = threading.local()
+        self._memory = ToolResultCache(max_entries=1000)
+        self.stats = {'llm_calls': 0, 'db_hits': 0, 'parse_failures': 0}
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS query_analysis_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    template TEXT NOT NULL,
+                    template_version TEXT NOT NULL,
+                    normalized_query TEXT NOT NULL,
+                    analysis TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_query_analysis_expires ON query_analysis_cache(expires_at)')
+
+    def _connect(self) -> sqlite3.Connection:
+        """One long-lived connection per thread; WAL lets other processes read while one writes"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30.0)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def make_key(model: str, template: str, template_version: str, query: str, context: Any = None) -> str:
+        material = json.dumps([model, template, str(template_version), normalize_query(query), context],
+                              sort_keys=True, default=str)
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def analyze(self, query: str, prompt: str, *, model: str, template: str, template_version: str,
+                context: Any = None, options: Optional[Dict[str, Any]] = None, timeout: float = 30,
+                validate: Optional[Callable[[Dict[str, Any]], bool]] = None,
+                ollama_url: str = DEFAULT_OLLAMA_URL) -> Optional[Dict[str, Any]]:
+        """
+        Return the (possibly cached) analysis for query.
+
+        Returns None when the model answered without a valid JSON object (or it
+        failed validate); raises QueryAnalysisError when the LLM is unreachable.
+        Callers get their own copy and may modify it.
+        """
+        key = self.make_key(model, template, template_version, query, context)
+
+        def compute():
+            stored = self._load(key)
+            if stored is not None:
+                self.stats['db_hits'] += 1
+                return stored
+            analysis = self._call_llm(prompt, model, options, timeout, ollama_url, template)
+            if analysis is None or (validate and not validate(analysis)):
+                self.stats['parse_failures'] += 1
+                return None
+            self._store(key, model, template, template_version, query, analysis)
+            return analysis
+
+        analysis = self._memory.get_or_compute(template, key, compute, ttl=self.ttl, negative_ttl=0,
+                                               is_negative=lambda result: result is None)
+        return copy.deepcopy(analysis)
+
+    def analyze_canonical(self, query: str, *, model: str, timeout: float = 60,
+                          ollama_url: str = DEFAULT_OLLAMA_URL) -> Optional[Dict[str, Any]]:
+        """The shared agent-independent analysis of query (see build_canonical_prompt), or None"""
+        return self.analyze(
+            query, build_canonical_prompt(query),
+            model=model,
+            template=CANONICAL_ANALYSIS_TEMPLATE,
+            template_version=CANONICAL_ANALYSIS_VERSION,
+            options=CANONICAL_ANALYSIS_OPTIONS,
+            timeout=timeout,
+            validate=lambda result: all(key in result for key in CANONICAL_ANALYSIS_KEYS),
+            ollama_url=ollama_url
+        )
+
+    def _call_llm(self, prompt: str, model: str, options: Optional[Dict[str, Any]], timeout: float,
+                  ollama_url: str, template: str) -> Optional[Dict[str, Any]]:
+        self.stats['llm_calls'] += 1
+        try:
+            response = ollama_post(f"{ollama_url}/api/generate", json={
+                "model": model,
+                "prompt": prompt,
+                "stream": False,
+                "options": options or {"temperature": 0.3}
+            }, timeout=timeout)
+        except requests.RequestException as e:
+            raise QueryAnalysisError(f"LLM request failed: {e}") from e
+        if response.status_code != 200:
+            raise QueryAnalysisError(f"LLM request failed with status {response.status_code}")
+
+        analysis = extract_json_object(response.json().get('response', ''))
+        if analysis is None:
+            logger.warning(f"Query analysis ({template}): no valid JSON object in LLM response")
+        return analysis
+
+    def _load(self, key: str) -> Optional[Dict[str, Any]]:
+        with sqlite_timer('query_analysis', 'read'):
+            row = self._connect().execute(
+                'SELECT analysis FROM query_analysis_cache WHERE cache_key = ? AND expires_at > ?',
+                (key, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _store(self, key: str, model: str, template: str, template_version: str, query: str, analysis: Dict[str, Any]):
+        now = time.time()
+        try:
+            with sqlite_timer('query_analysis', 'write'), self._connect() as conn:
+                conn.execute('''
+                    INSERT OR REPLACE INTO query_analysis_cache
+                    (cache_key, model, template, template_version, normalized_query, analysis, created_at, expires_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (key, model, template, str(template_version), normalize_query(query),
+                      json.dumps(analysis), now, now + self.ttl))
+                conn.execute('DELETE FROM query_analysis_cache WHERE expires_at <= ?', (now,))
+        except sqlite3.Error as e:
+            # The in-process cache still has it; another process will just analyze again
+            logger.warning(f"Could not persist query analysis: {e}")
+
+    def invalidate(self, template: Optional[str] = None) -> int:
+        """Drop cached analyses, or only those of one template"""
+        self._memory.invalidate(template)
+        with self._connect() as conn:
+            if template is None:
+                cursor = conn.execute('DELETE FROM query_analysis_cache')
+            else:
+                cursor = conn.execute('DELETE FROM query_analysis_cache WHERE template = ?', (template,))
+        return cursor.rowcount
+
+    def get_stats(self) -> Dict[str, Any]:
+        entries = self._connect().execute(
+            'SELECT COUNT(*) FROM query_analysis_cache WHERE expires_at > ?', (time.time(),)
+        ).fetchone()[0]
+        return {**self.stats, 'persisted_entries': entries, 'memory': self._memory.get_stats()}
+
+_analysis_service = None
+_analysis_service_lock = threading.Lock()
+
+def get_query_analysis_service() -> QueryAnalysisService:
+    """Get the process-wide analysis service (database path from QUERY_ANALYSIS_DB)"""
+    global _analysis_service
+    if _analysis_service is None:
+        with _analysis_service_lock:
+            if _analysis_service is None:
+                _analysis_service = QueryAnalysisService(os.environ.get('QUERY_ANALYSIS_DB', DEFAULT_ANALYSIS_DB))
+                register_cache('query_analysis', _analysis_service._memory.get_stats)
+    return _analysis_service
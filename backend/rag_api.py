@@ -10,6 +10,7 @@ import aiohttp
 from typing import Dict, Any, List, Optional
 import logging
 from pydantic import BaseModel
+from service_metrics import instrument_fastapi, ollama_route
 import hashlib
 import time
 from datetime import datetime
@@ -41,6 +42,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+instrument_fastapi(app, "rag-api")
 
 # Database setup
 DB_PATH = "rag_documents.db"
@@ -550,8 +552,9 @@ async def generate_ollama_response(model: str, prompt: str):
             "stream": False
         }
         
+        url, headers = ollama_route(f"{OLLAMA_HOST}/api/generate", priority="interactive", timeout=60)
         async with aiohttp.ClientSession() as session:
-            async with session.post(f"{OLLAMA_HOST}/api/generate", json=payload, timeout=60) as response:
+            async with session.post(url, json=payload, headers=headers, timeout=60) as response:
                 if response.status == 200:
                     result = await response.json()
                     return result.get("response", "No response generated")
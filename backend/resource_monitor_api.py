@@ -11,14 +11,22 @@ import os
 import requests
 from flask import Flask, jsonify, request
 from flask_cors import CORS
+from service_metrics import instrument_flask
+from model_keepalive_scheduler import ModelKeepAliveScheduler, unload_model as ollama_unload_model
+import threading
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 app = Flask(__name__)
 CORS(app)
+instrument_flask(app, "resource-monitor")
 
 # Configuration
 OLLAMA_BASE_URL = "http://localhost:11434"
+OLLAMA_GATEWAY_URL = "http://localhost:11435"
+MODEL_WARMUP_ENABLED = os.environ.get('MODEL_WARMUP_ENABLED', 'true').lower() == 'true'
 OLLAMA_API_URL = "http://localhost:5002"
 RAG_API_URL = "http://localhost:5003"
 STRANDS_API_URL = "http://localhost:5004"
@@ -43,23 +51,74 @@ SYNTHETIC_DATA_URL = "http://localhost:5042"
 UTILITY_ORCHESTRATION_URL = "http://localhost:5043"
 UTILITY_API_GATEWAY_URL = "http://localhost:5044/api/utility"
 
+# Cadence of the background sampler; endpoints only read what it last recorded
+SAMPLE_INTERVAL_SECONDS = 2
+SERVICE_STATUS_INTERVAL_SECONDS = 10
+HISTORY_SIZE = 300  # 10 minutes of samples, for sparklines
+HEALTH_PROBE_TIMEOUT = 3
+
+# Health probes, run concurrently: 'describe' builds the running message from the
+# JSON health payload; without it any 200 counts as running. 'json' makes it a POST.
+SERVICE_PROBES = [
+    {'key': 'ollama_core', 'port': 11434, 'name': 'Ollama Core', 'url': f"{OLLAMA_BASE_URL}/api/tags"},
+    {'key': 'ollama_gateway', 'port': 11435, 'name': 'Ollama Gateway', 'url': f"{OLLAMA_GATEWAY_URL}/health",
+     'describe': lambda data: f"Ollama Gateway running (Upstream {'available' if data.get('upstream_available') else 'unavailable'})"},
+    {'key': 'ollama_api', 'port': 5002, 'name': 'Ollama API', 'url': f"{OLLAMA_API_URL}/health"},
+    {'key': 'rag_api', 'port': 5003, 'name': 'RAG API', 'url': f"{RAG_API_URL}/health"},
+    {'key': 'strands_api', 'port': 5004, 'name': 'Strands API', 'url': f"{STRANDS_API_URL}/api/strands/health"},
+    {'key': 'chat_orchestrator', 'port': 5005, 'name': 'Chat Orchestrator', 'url': f"{CHAT_ORCHESTRATOR_URL}/health"},
+    {'key': 'strands_sdk', 'port': 5006, 'name': 'Strands SDK', 'url': f"{STRANDS_SDK_URL}/health",
+     'describe': lambda data: f"Strands SDK running ({data.get('sdk_type', 'unknown')})"},
+    {'key': 'a2a_service', 'port': 5008, 'name': 'A2A Service', 'url': f"{A2A_API_URL}/health",
+     'describe': lambda data: f"A2A Service running ({data.get('agents_registered', 0)} agents)"},
+    # Strands Orchestration replaced by Enhanced Orchestration
+    {'key': 'agent_registry', 'port': 5010, 'name': 'Agent Registry', 'url': f"{AGENT_REGISTRY_URL}/health"},
+    {'key': 'enhanced_orchestration', 'port': 5014, 'name': 'Enhanced Orchestration',
+     'url': f"{ENHANCED_ORCHESTRATION_URL}/api/enhanced-orchestration/health",
+     'describe': lambda data: f"Enhanced Orchestration running (Model: {data.get('orchestrator_model', 'unknown')}, Sessions: {data.get('active_sessions', 0)})"},
+    {'key': 'a2a_observability', 'port': 5018, 'name': 'A2A Observability', 'url': f"{A2A_OBSERVABILITY_URL}/health",
+     'describe': lambda data: f"A2A Observability running (Traces: {data.get('total_traces', 0)}, Handoffs: {data.get('total_handoffs', 0)})"},
+    {'key': 'text_cleaning', 'port': 5019, 'name': 'Text Cleaning Service', 'url': TEXT_CLEANING_URL,
+     'json': {"text": "test", "output_type": "test"}},
+    {'key': 'dynamic_context', 'port': 5020, 'name': 'Dynamic Context Refinement', 'url': f"{DYNAMIC_CONTEXT_URL}/health",
+     'describe': lambda data: f"Dynamic Context Refinement running (Agents: {data.get('registered_agents', 0)}, Refinements: {data.get('total_refinements', 0)})"},
+    {'key': 'working_orchestration', 'port': 5021, 'name': 'Working Orchestration API', 'url': WORKING_ORCHESTRATION_URL,
+     'describe': lambda data: "Working Orchestration API running (Unified System Orchestrator)"},
+    {'key': 'main_system_orchestrator', 'port': 5031, 'name': 'Main System Orchestrator', 'url': f"{MAIN_SYSTEM_ORCHESTRATOR_URL}/health",
+     'describe': lambda data: "Main System Orchestrator running (Multi-agent orchestration)"},
+    {'key': 'database_agent', 'port': 5041, 'name': 'Database Agent', 'url': f"{DATABASE_AGENT_URL}/health",
+     'describe': lambda data: f"Database Agent running (Model: {data.get('model', 'unknown')})"},
+    {'key': 'synthetic_data', 'port': 5042, 'name': 'Synthetic Data Service', 'url': f"{SYNTHETIC_DATA_URL}/health",
+     'describe': lambda data: f"Synthetic Data Service running (Models: {len(data.get('available_models', []))})"},
+    {'key': 'utility_orchestration', 'port': 5043, 'name': 'Utility Orchestration Engine', 'url': f"{UTILITY_ORCHESTRATION_URL}/health",
+     'describe': lambda data: f"Utility Orchestration Engine running (Services: {len(data.get('managed_services', []))})"},
+    {'key': 'utility_services', 'port': 5044, 'name': 'Utility Services Gateway', 'url': f"{UTILITY_API_GATEWAY_URL}/health",
+     'describe': lambda data: "Utility Services Gateway running (Database, Synthetic Data, Orchestration)"},
+    # Frontend Agent Bridge (port 5012) - REMOVED
+]
+
 class ResourceMonitor:
     """Monitor system resources and service status"""
     
     def __init__(self):
-        self.last_update = None
-        self.cached_metrics = None
-        self.cache_duration = 5  # seconds
+        self.history = deque(maxlen=HISTORY_SIZE)
+        self._snapshot = None
+        self._service_status = None
+        self._lock = threading.Lock()
+        self._probe_pool = ThreadPoolExecutor(max_workers=len(SERVICE_PROBES), thread_name_prefix="health-probe")
+        self._stop = threading.Event()
+        self._threads = []
+        psutil.cpu_percent(interval=None)  # prime: the first non-blocking reading is meaningless
     
-    def get_system_metrics(self):
-        """Get current system resource metrics"""
+    def _sample_system_metrics(self):
+        """Read current system resource metrics (non-blocking)"""
         try:
             # Memory metrics
             memory = psutil.virtual_memory()
             swap = psutil.swap_memory()
             
-            # CPU metrics
-            cpu_percent = psutil.cpu_percent(interval=1)
+            # CPU metrics: utilisation since the previous sample
+            cpu_percent = psutil.cpu_percent(interval=None)
             
             # Disk metrics (for Ollama models)
             disk_usage = psutil.disk_usage('/')
@@ -88,6 +147,34 @@ class ResourceMonitor:
         except Exception as e:
             return {'error': f'Failed to get system metrics: {str(e)}'}
     
+    def sample(self):
+        """Take one metrics sample, publish it as the snapshot and append it to the history"""
+        snapshot = self._sample_system_metrics()
+        with self._lock:
+            self._snapshot = snapshot
+            if 'error' not in snapshot:
+                self.history.append({
+                    'timestamp': snapshot['timestamp'],
+                    'cpu_percent': snapshot['cpu']['percent_used'],
+                    'memory_percent': snapshot['memory']['percent_used'],
+                    'memory_used_gb': snapshot['memory']['used_gb'],
+                    'swap_used_gb': snapshot['memory']['swap_used_gb'],
+                    'load_1m': round(snapshot['cpu']['load_average'][0], 2)
+                })
+        return snapshot
+    
+    def get_system_metrics(self):
+        """Latest system metrics snapshot (sampled now only if the sampler has not run yet)"""
+        with self._lock:
+            snapshot = self._snapshot
+        return snapshot if snapshot is not None else self.sample()
+    
+    def get_history(self, limit=None):
+        """Recent samples, oldest first"""
+        with self._lock:
+            samples = list(self.history)
+        return samples[-limit:] if limit else samples
+    
     def get_ollama_models(self):
         """Get Ollama model information"""
         try:
@@ -135,391 +222,68 @@ class ResourceMonitor:
     
     def unload_model(self, model_name):
         """Unload a specific model from memory"""
-        try:
-            response = requests.post(f"{OLLAMA_BASE_URL}/api/generate", 
-                                   json={'model': model_name, 'prompt': '', 'stream': False}, 
-                                   timeout=10)
-            # This is a workaround - we need to send a request to trigger unloading
-            # In practice, models unload automatically after inactivity
-            return {'success': True, 'message': f'Model {model_name} will unload after inactivity'}
-        except Exception as e:
-            return {'success': False, 'error': str(e)}
+        return ollama_unload_model(model_name, OLLAMA_BASE_URL)
     
-    def get_service_status(self):
-        """Get status of all backend services"""
-        services = {}
-        
-        # Check Ollama Core
-        try:
-            response = requests.get(f"{OLLAMA_BASE_URL}/api/tags", timeout=3)
-            services['ollama_core'] = {
-                'status': 'running' if response.status_code == 200 else 'error',
-                'port': 11434,
-                'message': 'Ollama Core is running' if response.status_code == 200 else 'Ollama Core error'
-            }
-        except:
-            services['ollama_core'] = {
-                'status': 'stopped',
-                'port': 11434,
-                'message': 'Ollama Core is not running'
-            }
-        
-        # Check Ollama API
-        try:
-            response = requests.get(f"{OLLAMA_API_URL}/health", timeout=3)
-            services['ollama_api'] = {
-                'status': 'running' if response.status_code == 200 else 'error',
-                'port': 5002,
-                'message': 'Ollama API is running' if response.status_code == 200 else 'Ollama API error'
-            }
-        except:
-            services['ollama_api'] = {
-                'status': 'stopped',
-                'port': 5002,
-                'message': 'Ollama API is not running'
-            }
-        
-        # Check RAG API
-        try:
-            response = requests.get(f"{RAG_API_URL}/health", timeout=3)
-            services['rag_api'] = {
-                'status': 'running' if response.status_code == 200 else 'error',
-                'port': 5003,
-                'message': 'RAG API is running' if response.status_code == 200 else 'RAG API error'
-            }
-        except:
-            services['rag_api'] = {
-                'status': 'stopped',
-                'port': 5003,
-                'message': 'RAG API is not running'
-            }
-        
-        # Check Strands API
-        try:
-            response = requests.get(f"{STRANDS_API_URL}/api/strands/health", timeout=3)
-            services['strands_api'] = {
-                'status': 'running' if response.status_code == 200 else 'error',
-                'port': 5004,
-                'message': 'Strands API is running' if response.status_code == 200 else 'Strands API error'
-            }
-        except:
-            services['strands_api'] = {
-                'status': 'stopped',
-                'port': 5004,
-                'message': 'Strands API is not running'
-            }
-        
-        # Check Chat Orchestrator
-        try:
-            response = requests.get(f"{CHAT_ORCHESTRATOR_URL}/health", timeout=3)
-            services['chat_orchestrator'] = {
-                'status': 'running' if response.status_code == 200 else 'error',
-                'port': 5005,
-                'message': 'Chat Orchestrator is running' if response.status_code == 200 else 'Chat Orchestrator error'
-            }
-        except:
-            services['chat_orchestrator'] = {
-                'status': 'stopped',
-                'port': 5005,
-                'message': 'Chat Orchestrator is not running'
-            }
-        
-        # Check Strands SDK
-        try:
-            response = requests.get(f"{STRANDS_SDK_URL}/health", timeout=3)
-            if response.status_code == 200:
-                data = response.json()
-                services['strands_sdk'] = {
-                    'status': 'running',
-                    'port': 5006,
-                    'message': f"Strands SDK running ({data.get('sdk_type', 'unknown')})"
-                }
-            else:
-                services['strands_sdk'] = {
-                    'status': 'error',
-                    'port': 5006,
-                    'message': f'Strands SDK error: {response.status_code}'
-                }
-        except:
-            services['strands_sdk'] = {
-                'status': 'stopped',
-                'port': 5006,
-                'message': 'Strands SDK is not running'
-            }
-        
-        # Check A2A Service
-        try:
-            response = requests.get(f"{A2A_API_URL}/health", timeout=3)
-            if response.status_code == 200:
-                data = response.json()
-                services['a2a_service'] = {
-                    'status': 'running',
-                    'port': 5008,
-                    'message': f"A2A Service running ({data.get('agents_registered', 0)} agents)"
-                }
-            else:
-                services['a2a_service'] = {
-                    'status': 'error',
-                    'port': 5008,
-                    'message': f'A2A Service error: {response.status_code}'
-                }
-        except:
-            services['a2a_service'] = {
-                'status': 'stopped',
-                'port': 5008,
-                'message': 'A2A Service is not running'
-            }
-        
-        # Strands Orchestration replaced by Enhanced Orchestration
-        
-        # Check Agent Registry
-        try:
-            response = requests.get(f"{AGENT_REGISTRY_URL}/health", timeout=3)
-            services['agent_registry'] = {
-                'status': 'running' if response.status_code == 200 else 'error',
-                'port': 5010,
-                'message': 'Agent Registry is running' if response.status_code == 200 else 'Agent Registry error'
-            }
-        except:
-            services['agent_registry'] = {
-                'status': 'stopped',
-                'port': 5010,
-                'message': 'Agent Registry is not running'
-            }
-        
-        # Check Enhanced Orchestration
-        try:
-            response = requests.get(f"{ENHANCED_ORCHESTRATION_URL}/api/enhanced-orchestration/health", timeout=3)
-            if response.status_code == 200:
-                data = response.json()
-                services['enhanced_orchestration'] = {
-                    'status': 'running',
-                    'port': 5014,
-                    'message': f"Enhanced Orchestration running (Model: {data.get('orchestrator_model', 'unknown')}, Sessions: {data.get('active_sessions', 0)})"
-                }
-            else:
-                services['enhanced_orchestration'] = {
-                    'status': 'error',
-                    'port': 5014,
-                    'message': f'Enhanced Orchestration error: {response.status_code}'
-                }
-        except:
-            services['enhanced_orchestration'] = {
-                'status': 'stopped',
-                'port': 5014,
-                'message': 'Enhanced Orchestration is not running'
-            }
-        
-        # Check A2A Observability API
-        try:
-            response = requests.get(f"{A2A_OBSERVABILITY_URL}/health", timeout=3)
-            if response.status_code == 200:
-                data = response.json()
-                services['a2a_observability'] = {
-                    'status': 'running',
-                    'port': 5018,
-                    'message': f"A2A Observability running (Traces: {data.get('total_traces', 0)}, Handoffs: {data.get('total_handoffs', 0)})"
-                }
-            else:
-                services['a2a_observability'] = {
-                    'status': 'error',
-                    'port': 5018,
-                    'message': f'A2A Observability error: {response.status_code}'
-                }
-        except:
-            services['a2a_observability'] = {
-                'status': 'stopped',
-                'port': 5018,
-                'message': 'A2A Observability is not running'
-            }
-        
-        # Check Text Cleaning Service
-        try:
-            response = requests.post(f"{TEXT_CLEANING_URL}", json={"text": "test", "output_type": "test"}, timeout=3)
-            services['text_cleaning'] = {
-                'status': 'running' if response.status_code == 200 else 'error',
-                'port': 5019,
-                'message': 'Text Cleaning Service is running' if response.status_code == 200 else 'Text Cleaning Service error'
-            }
-        except:
-            services['text_cleaning'] = {
-                'status': 'stopped',
-                'port': 5019,
-                'message': 'Text Cleaning Service is not running'
-            }
-        
-        # Check Dynamic Context Refinement API
-        try:
-            response = requests.get(f"{DYNAMIC_CONTEXT_URL}/health", timeout=3)
-            if response.status_code == 200:
-                data = response.json()
-                services['dynamic_context'] = {
-                    'status': 'running',
-                    'port': 5020,
-                    'message': f"Dynamic Context Refinement running (Agents: {data.get('registered_agents', 0)}, Refinements: {data.get('total_refinements', 0)})"
-                }
-            else:
-                services['dynamic_context'] = {
-                    'status': 'error',
-                    'port': 5020,
-                    'message': f'Dynamic Context Refinement error: {response.status_code}'
-                }
-        except:
-            services['dynamic_context'] = {
-                'status': 'stopped',
-                'port': 5020,
-                'message': 'Dynamic Context Refinement is not running'
-            }
-        
-        # Check Working Orchestration API (Unified System)
-        try:
-            response = requests.get(f"{WORKING_ORCHESTRATION_URL}", timeout=3)
-            if response.status_code == 200:
-                data = response.json()
-                services['working_orchestration'] = {
-                    'status': 'running',
-                    'port': 5021,
-                    'message': f"Working Orchestration API running (Unified System Orchestrator)"
-                }
-            else:
-                services['working_orchestration'] = {
-                    'status': 'error',
-                    'port': 5021,
-                    'message': f'Working Orchestration API error: {response.status_code}'
-                }
-        except:
-            services['working_orchestration'] = {
-                'status': 'stopped',
-                'port': 5021,
-                'message': 'Working Orchestration API is not running'
-            }
-        
-        # Check Main System Orchestrator (from start-all-services.sh)
-        try:
-            response = requests.get(f"{MAIN_SYSTEM_ORCHESTRATOR_URL}/health", timeout=3)
-            if response.status_code == 200:
-                data = response.json()
-                services['main_system_orchestrator'] = {
-                    'status': 'running',
-                    'port': 5031,
-                    'message': f"Main System Orchestrator running (Multi-agent orchestration)"
-                }
-            else:
-                services['main_system_orchestrator'] = {
-                    'status': 'error',
-                    'port': 5031,
-                    'message': f'Main System Orchestrator error: {response.status_code}'
-                }
-        except:
-            services['main_system_orchestrator'] = {
-                'status': 'stopped',
-                'port': 5031,
-                'message': 'Main System Orchestrator is not running'
-            }
-        
-        # Check Database Agent Service
+    def _probe(self, probe):
+        """Status entry for one service health probe"""
+        name, port = probe['name'], probe['port']
         try:
-            response = requests.get(f"{DATABASE_AGENT_URL}/health", timeout=3)
-            if response.status_code == 200:
-                data = response.json()
-                services['database_agent'] = {
-                    'status': 'running',
-                    'port': 5041,
-                    'message': f"Database Agent running (Model: {data.get('model', 'unknown')})"
-                }
+            if 'json' in probe:
+                response = requests.post(probe['url'], json=probe['json'], timeout=HEALTH_PROBE_TIMEOUT)
             else:
-                services['database_agent'] = {
-                    'status': 'error',
-                    'port': 5041,
-                    'message': f'Database Agent error: {response.status_code}'
-                }
-        except:
-            services['database_agent'] = {
-                'status': 'stopped',
-                'port': 5041,
-                'message': 'Database Agent is not running'
-            }
-        
-        # Check Synthetic Data Service
-        try:
-            response = requests.get(f"{SYNTHETIC_DATA_URL}/health", timeout=3)
-            if response.status_code == 200:
-                data = response.json()
-                services['synthetic_data'] = {
-                    'status': 'running',
-                    'port': 5042,
-                    'message': f"Synthetic Data Service running (Models: {len(data.get('available_models', []))})"
-                }
-            else:
-                services['synthetic_data'] = {
-                    'status': 'error',
-                    'port': 5042,
-                    'message': f'Synthetic Data Service error: {response.status_code}'
-                }
-        except:
-            services['synthetic_data'] = {
-                'status': 'stopped',
-                'port': 5042,
-                'message': 'Synthetic Data Service is not running'
-            }
-        
-        # Check Utility Orchestration Engine
-        try:
-            response = requests.get(f"{UTILITY_ORCHESTRATION_URL}/health", timeout=3)
-            if response.status_code == 200:
-                data = response.json()
-                services['utility_orchestration'] = {
-                    'status': 'running',
-                    'port': 5043,
-                    'message': f"Utility Orchestration Engine running (Services: {len(data.get('managed_services', []))})"
-                }
-            else:
-                services['utility_orchestration'] = {
-                    'status': 'error',
-                    'port': 5043,
-                    'message': f'Utility Orchestration Engine error: {response.status_code}'
-                }
-        except:
-            services['utility_orchestration'] = {
-                'status': 'stopped',
-                'port': 5043,
-                'message': 'Utility Orchestration Engine is not running'
-            }
-        
-        # Check Utility Services Gateway
-        try:
-            response = requests.get(f"{UTILITY_API_GATEWAY_URL}/health", timeout=3)
-            if response.status_code == 200:
-                data = response.json()
-                services['utility_services'] = {
-                    'status': 'running',
-                    'port': 5044,
-                    'message': f"Utility Services Gateway running (Database, Synthetic Data, Orchestration)"
-                }
-            else:
-                services['utility_services'] = {
-                    'status': 'error',
-                    'port': 5044,
-                    'message': f'Utility Services Gateway error: {response.status_code}'
-                }
-        except:
-            services['utility_services'] = {
-                'status': 'stopped',
-                'port': 5044,
-                'message': 'Utility Services Gateway is not running'
-            }
-        
-        # Check Frontend Agent Bridge - REMOVED
-        # services['frontend_agent_bridge'] = {
-        #     'status': 'removed',
-        #     'port': 5012,
-        #     'message': 'Frontend Agent Bridge has been removed from the system'
-        # }
-        
+                response = requests.get(probe['url'], timeout=HEALTH_PROBE_TIMEOUT)
+            describe = probe.get('describe')
+            if response.status_code != 200:
+                message = f'{name} error: {response.status_code}' if describe else f'{name} error'
+                return {'status': 'error', 'port': port, 'message': message}
+            message = describe(response.json()) if describe else f'{name} is running'
+            return {'status': 'running', 'port': port, 'message': message}
+        except Exception:
+            return {'status': 'stopped', 'port': port, 'message': f'{name} is not running'}
+    
+    def refresh_service_status(self):
+        """Probe all backend services concurrently and publish the result"""
+        results = self._probe_pool.map(self._probe, SERVICE_PROBES)
+        services = {probe['key']: result for probe, result in zip(SERVICE_PROBES, results)}
+        with self._lock:
+            self._service_status = services
         return services
+    
+    def get_service_status(self):
+        """Status of all backend services from the last refresh (probed now only before the first one)"""
+        with self._lock:
+            services = self._service_status
+        return services if services is not None else self.refresh_service_status()
+    
+    def _run(self, interval, task):
+        while True:
+            try:
+                task()
+            except Exception as e:
+                print(f"⚠️ Resource monitor {task.__name__} failed: {e}")
+            if self._stop.wait(interval):
+                return
+    
+    def start(self):
+        """Start the background metrics sampler and service status refresher"""
+        if any(thread.is_alive() for thread in self._threads):
+            return
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._run, args=(SAMPLE_INTERVAL_SECONDS, self.sample),
+                             name="resource-sampler", daemon=True),
+            threading.Thread(target=self._run, args=(SERVICE_STATUS_INTERVAL_SECONDS, self.refresh_service_status),
+                             name="service-status", daemon=True)
+        ]
+        for thread in self._threads:
+            thread.start()
+    
+    def stop(self):
+        self._stop.set()
 
 # Initialize resource monitor
 monitor = ResourceMonitor()
+keepalive_scheduler = ModelKeepAliveScheduler(OLLAMA_BASE_URL)
 
 @app.route('/api/resource-monitor/metrics', methods=['GET'])
 def get_metrics():
@@ -527,6 +291,15 @@ def get_metrics():
     metrics = monitor.get_system_metrics()
     return jsonify(metrics)
 
+@app.route('/api/resource-monitor/history', methods=['GET'])
+def get_metrics_history():
+    """Recent metrics samples (ring buffer) for sparklines"""
+    limit = request.args.get('limit', type=int)
+    return jsonify({
+        'interval_seconds': SAMPLE_INTERVAL_SECONDS,
+        'samples': monitor.get_history(limit)
+    })
+
 @app.route('/api/resource-monitor/ollama-models', methods=['GET'])
 def get_ollama_models():
     """Get all Ollama models (cached and loaded)"""
@@ -547,9 +320,21 @@ def unload_model():
     if not model_name:
         return jsonify({'error': 'model_name is required'}), 400
     
-    result = monitor.unload_model(model_name)
+    result = keepalive_scheduler.unload(model_name)
     return jsonify(result)
 
+@app.route('/api/resource-monitor/keep-alive', methods=['GET'])
+def get_keep_alive_status():
+    """Warm set, request rates and keep_alive applied per model"""
+    return jsonify(keepalive_scheduler.status())
+
+@app.route('/api/resource-monitor/warm-up', methods=['POST'])
+def warm_up_models():
+    """Pre-load models (default: core and registered agent models)"""
+    data = request.get_json(silent=True) or {}
+    results = keepalive_scheduler.warm_up(data.get('models'))
+    return jsonify({'results': results})
+
 @app.route('/api/resource-monitor/service-status', methods=['GET'])
 def get_service_status():
     """Get status of all backend services"""
@@ -570,5 +355,11 @@ if __name__ == '__main__':
     print("📍 Port: 5011")
     print("📊 Monitoring system resources and services")
     
+    monitor.start()
+    
+    if MODEL_WARMUP_ENABLED:
+        keepalive_scheduler.start()
+        print("🔥 Model warm-up and keep-alive scheduler started")
+    
     app.run(host='0.0.0.0', port=5011, debug=False)
 
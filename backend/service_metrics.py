@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""
+Service Metrics
+Shared OpenMetrics (Prometheus) instrumentation for the backend services
+
+    app = Flask(__name__)
+    CORS(app)
+    instrument_flask(app, "chat-orchestrator")     # or instrument_fastapi(app, ...)
+
+adds GET /metrics with:
+
+- agentos_http_request_duration_seconds / agentos_http_requests_total per
+  method, route template and status, and agentos_http_requests_in_flight
+- agentos_ollama_* call durations, server-reported durations and prompt/eval
+  token counts, recorded by ollama_post() (a drop-in for requests.post)
+- agentos_sqlite_query_duration_seconds, recorded with `with sqlite_timer(db, op):`
+- agentos_cache_* lookups and entries for caches registered with register_cache()
+
+When OLLAMA_GATEWAY_URL is set, ollama_post() sends calls for the local Ollama
+daemon through the admission gateway (ollama_gateway.py) instead, tagged with
+the caller's priority class: ollama_post(url, priority='interactive', ...).
+Async clients (aiohttp) get the same URL and headers from ollama_route().
+
+Recording is a lock plus a list increment per sample; cache statistics are
+read from the caches only when /metrics is scraped.
+"""
+
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+from urllib.parse import urlparse
+
+import requests
+
+OPENMETRICS_CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+PROMETHEUS_TEXT_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+HTTP_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+OLLAMA_LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0)
+SQLITE_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0, 5.0)
+
+OLLAMA_DAEMON_URL = 'http://localhost:11434'
+OLLAMA_GATEWAY_URL = os.environ.get('OLLAMA_GATEWAY_URL', '').rstrip('/')
+PRIORITY_HEADER = 'X-AgentOS-Priority'
+TIMEOUT_HEADER = 'X-AgentOS-Timeout'
+
+def _escape(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[Any, ...], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+class _Metric:
+    """Base for a metric family with a fixed set of label names"""
+
+    metric_type = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series: Dict[Tuple, Any] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, label_values: Tuple) -> Tuple:
+        if len(label_values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {label_values}")
+        return tuple(str(value) for value in label_values)
+
+    def header(self, family: str = None) -> List[str]:
+        family = family or self.name
+        return [f'# HELP {family} {self.documentation}', f'# TYPE {family} {self.metric_type}']
+
+    def render(self, openmetrics: bool = True) -> List[str]:
+        raise NotImplementedError
+
+class Counter(_Metric):
+    metric_type = 'counter'
+
+    def inc(self, *label_values, amount: float = 1):
+        key = self._key(label_values)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def render(self, openmetrics: bool = True) -> List[str]:
+        with self._lock:
+            series = list(self._series.items())
+        # OpenMetrics names the counter family without _total; the Prometheus text format names it after the sample
+        return self.header(self.name if openmetrics else f'{self.name}_total') + [
+            f'{self.name}_total{_format_labels(self.labelnames, key)} {_format_value(value)}' for key, value in series
+        ]
+
+class Gauge(_Metric):
+    metric_type = 'gauge'
+
+    def set(self, value: float, *label_values):
+        key = self._key(label_values)
+        with self._lock:
+            self._series[key] = value
+
+    def inc(self, *label_values, amount: float = 1):
+        key = self._key(label_values)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def dec(self, *label_values, amount: float = 1):
+        self.inc(*label_values, amount=-amount)
+
+    def render(self, openmetrics: bool = True) -> List[str]:
+        with self._lock:
+            series = list(self._series.items())
+        return self.header() + [
+            f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}' for key, value in series
+        ]
+
+class Histogram(_Metric):
+    """Fixed-bucket histogram; observe() is one bisect and one increment"""
+
+    metric_type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = HTTP_LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *label_values):
+        key = self._key(label_values)
+        position = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # [per-bucket counts (last is +Inf), sum]
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][position] += 1
+            series[1] += value
+
+    def render(self, openmetrics: bool = True) -> List[str]:
+        with self._lock:
+            series = [(key, list(counts), total) for key, (counts, total) in self._series.items()]
+        lines = self.header()
+        for key, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}')
+            lines.append(f'{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}')
+        return lines
+
+class MetricsRegistry:
+    """Metric families plus scrape-time collectors"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[bool], List[str]]] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+        return metric
+
+    def add_collector(self, collector: Callable[[bool], List[str]]):
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self, openmetrics: bool = True) -> str:
+        with self._lock:
+            metrics, collectors = list(self._metrics.values()), list(self._collectors)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render(openmetrics))
+        for collector in collectors:
+            try:
+                lines.extend(collector(openmetrics))
+            except Exception:
+                # A broken collector must not take the whole scrape down
+                continue
+        if openmetrics:
+            lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+# Global registry
+registry = MetricsRegistry()
+
+SERVICE_INFO = registry.register(Gauge('agentos_service_info', 'Service identity', ['service']))
+HTTP_REQUESTS = registry.register(Counter(
+    'agentos_http_requests', 'HTTP requests handled', ['method', 'route', 'status']))
+HTTP_LATENCY = registry.register(Histogram(
+    'agentos_http_request_duration_seconds', 'HTTP request latency', ['method', 'route'], HTTP_LATENCY_BUCKETS))
+HTTP_IN_FLIGHT = registry.register(Gauge('agentos_http_requests_in_flight', 'HTTP requests currently being handled'))
+OLLAMA_REQUESTS = registry.register(Counter(
+    'agentos_ollama_requests', 'Ollama API calls', ['model', 'endpoint', 'outcome']))
+OLLAMA_LATENCY = registry.register(Histogram(
+    'agentos_ollama_request_duration_seconds', 'Ollama call wall-clock latency', ['model', 'endpoint'],
+    OLLAMA_LATENCY_BUCKETS))
+OLLAMA_SERVER_DURATION = registry.register(Histogram(
+    'agentos_ollama_total_duration_seconds', 'Ollama-reported total_duration', ['model'], OLLAMA_LATENCY_BUCKETS))
+OLLAMA_EVAL_TOKENS = registry.register(Counter(
+    'agentos_ollama_eval_tokens', 'Tokens generated (eval_count)', ['model']))
+OLLAMA_PROMPT_TOKENS = registry.register(Counter(
+    'agentos_ollama_prompt_tokens', 'Prompt tokens evaluated (prompt_eval_count)', ['model']))
+SQLITE_LATENCY = registry.register(Histogram(
+    'agentos_sqlite_query_duration_seconds', 'SQLite statement/transaction latency', ['db', 'operation'],
+    SQLITE_LATENCY_BUCKETS))
+
+def observe_http_request(method: str, route: str, status: int, seconds: float):
+    HTTP_REQUESTS.inc(method, route, status)
+    HTTP_LATENCY.observe(seconds, method, route)
+
+def observe_ollama_call(model: str, endpoint: str, seconds: float, outcome: str = 'success',
+                        data: Dict[str, Any] = None):
+    """Record one Ollama call; data is the (non-streaming) JSON response, for token counts"""
+    model = model or 'unknown'
+    OLLAMA_REQUESTS.inc(model, endpoint, outcome)
+    OLLAMA_LATENCY.observe(seconds, model, endpoint)
+    if data:
+        if data.get('total_duration'):
+            OLLAMA_SERVER_DURATION.observe(data['total_duration'] / 1e9, model)
+        if data.get('eval_count'):
+            OLLAMA_EVAL_TOKENS.inc(model, amount=data['eval_count'])
+        if data.get('prompt_eval_count'):
+            OLLAMA_PROMPT_TOKENS.inc(model, amount=data['prompt_eval_count'])
+
+def ollama_route(url: str, priority: str = None, timeout: Any = None,
+                 headers: Dict[str, str] = None) -> Tuple[str, Dict[str, str]]:
+    """(url, headers) for an Ollama call, rewritten for the admission gateway when one is configured"""
+    headers = dict(headers or {})
+    if OLLAMA_GATEWAY_URL and url.startswith(OLLAMA_DAEMON_URL + '/'):
+        # Dedicated per-agent backends (other ports) are not routed through the gateway
+        url = OLLAMA_GATEWAY_URL + url[len(OLLAMA_DAEMON_URL):]
+        if priority:
+            headers[PRIORITY_HEADER] = priority
+        if isinstance(timeout, (int, float)):
+            headers[TIMEOUT_HEADER] = str(timeout)
+    return url, headers
+
+def ollama_post(url: str, priority: str = None, **kwargs) -> requests.Response:
+    """requests.post for Ollama endpoints, recording latency, outcome and token counts.
+
+    priority ('interactive', 'orchestration', 'background') only matters when
+    the call goes through the admission gateway; a shed call comes back as 429.
+    """
+    payload = kwargs.get('json') or {}
+    model = payload.get('model')
+    endpoint = urlparse(url).path.rsplit('/api/', 1)[-1] or 'unknown'
+    url, headers = ollama_route(url, priority, kwargs.get('timeout'), kwargs.get('headers'))
+    if headers:
+        kwargs['headers'] = headers
+    started = time.perf_counter()
+    try:
+        response = requests.post(url, **kwargs)
+    except requests.RequestException:
+        observe_ollama_call(model, endpoint, time.perf_counter() - started, 'error')
+        raise
+    elapsed = time.perf_counter() - started
+
+    data = None
+    streaming = kwargs.get('stream') or payload.get('stream', True)
+    if response.status_code == 200 and not streaming and endpoint in ('generate', 'chat'):
+        try:
+            data = response.json()
+        except ValueError:
+            pass
+    outcome = {200: 'success', 429: 'shed'}.get(response.status_code, f'http_{response.status_code}')
+    observe_ollama_call(model, endpoint, elapsed, outcome, data)
+    return response
+
+@contextmanager
+def sqlite_timer(db: str, operation: str):
+    """Time a SQLite statement or transaction: `with sqlite_timer('chat', 'read'): ...`"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        SQLITE_LATENCY.observe(time.perf_counter() - started, db, operation)
+
+_caches: Dict[str, Callable[[], Dict[str, Any]]] = {}
+_caches_lock = threading.Lock()
+
+CACHE_LOOKUP_RESULTS = ('hits', 'negative_hits', 'misses', 'coalesced_waits')
+
+def register_cache(name: str, get_stats: Callable[[], Dict[str, Any]]):
+    """Expose a cache's counters at scrape time.
+
+    get_stats returns a dict with any of hits, negative_hits, misses,
+    coalesced_waits, evictions and entries (ToolResultCache.get_stats shape).
+    """
+    with _caches_lock:
+        first = not _caches
+        _caches[name] = get_stats
+    if first:
+        registry.add_collector(_collect_caches)
+
+def _collect_caches(openmetrics: bool = True) -> List[str]:
+    with _caches_lock:
+        caches = list(_caches.items())
+    lookups, evictions, entries = [], [], []
+    for name, get_stats in caches:
+        try:
+            stats = get_stats()
+        except Exception:
+            continue
+        cache = f'cache="{_escape(name)}"'
+        lookups += [f'agentos_cache_lookups_total{{{cache},result="{result}"}} {stats[result]}'
+                    for result in CACHE_LOOKUP_RESULTS if result in stats]
+        if 'evictions' in stats:
+            evictions.append(f'agentos_cache_evictions_total{{{cache}}} {stats["evictions"]}')
+        if 'entries' in stats:
+            entries.append(f'agentos_cache_entries{{{cache}}} {stats["entries"]}')
+
+    lines = []
+    for family, metric_type, documentation, samples in (
+        ('agentos_cache_lookups', 'counter', 'Cache lookups by result', lookups),
+        ('agentos_cache_evictions', 'counter', 'Cache evictions', evictions),
+        ('agentos_cache_entries', 'gauge', 'Entries currently cached', entries),
+    ):
+        if samples:
+            name = family if openmetrics or metric_type != 'counter' else f'{family}_total'
+            lines += [f'# HELP {name} {documentation}', f'# TYPE {name} {metric_type}'] + samples
+    return lines
+
+def render_metrics(accept: str = '') -> Tuple[str, str]:
+    """(body, content type) for a /metrics response, honouring the scraper's Accept header"""
+    openmetrics = 'application/openmetrics-text' in (accept or '')
+    return registry.render(openmetrics), OPENMETRICS_CONTENT_TYPE if openmetrics else PROMETHEUS_TEXT_CONTENT_TYPE
+
+def instrument_flask(app, service_name: str):
+    """Record latency/status per route and in-flight requests, and serve GET /metrics"""
+    from flask import Response, g, request
+
+    SERVICE_INFO.set(1, service_name)
+
+    @app.before_request
+    def _metrics_start():
+        g._metrics_started = time.perf_counter()
+        HTTP_IN_FLIGHT.inc()
+
+    @app.after_request
+    def _metrics_status(response):
+        g._metrics_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def _metrics_finish(exc):
+        started = g.pop('_metrics_started', None)
+        if started is None:
+            return
+        HTTP_IN_FLIGHT.dec()
+        # Route template, not the raw path, so ids don't explode the label set
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        observe_http_request(request.method, route, g.pop('_metrics_status', 500), time.perf_counter() - started)
+
+    def metrics_endpoint():
+        body, content_type = render_metrics(request.headers.get('Accept', ''))
+        return Response(body, content_type=content_type)
+
+    app.add_url_rule('/metrics', 'service_metrics', metrics_endpoint, methods=['GET'])
+    return app
+
+def instrument_fastapi(app, service_name: str):
+    """FastAPI/Starlette equivalent of instrument_flask"""
+    from starlette.requests import Request
+    from starlette.responses import Response
+
+    SERVICE_INFO.set(1, service_name)
+
+    @app.middleware("http")
+    async def _metrics_middleware(request: Request, call_next):
+        started = time.perf_counter()
+        HTTP_IN_FLIGHT.inc()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            route = getattr(request.scope.get('route'), 'path', 'unmatched')
+            observe_http_request(request.method, route, status, time.perf_counter() - started)
+
+    @app.get('/metrics', include_in_schema=False)
+    async def metrics_endpoint(request: Request):
+        body, content_type = render_metrics(request.headers.get('accept', ''))
+        return Response(body, media_type=content_type)
+
+    return app
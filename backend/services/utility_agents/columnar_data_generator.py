@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Columnar Data Generator
+Vectorized synthetic data generation for the Synthetic Data Agent Service
+
+Tables are generated column by column instead of row by row:
+- numeric and date columns are drawn as whole arrays from a seeded RNG
+  (NumPy when available, the random module otherwise)
+- text columns index into Faker value pools sampled once per generator
+- LLM samples are expanded by tiling the sample rows and applying vectorized
+  variations
+
+The same seed always produces the same table: seeded generators date
+everything relative to a fixed reference date instead of today.
+"""
+
+import random
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from faker import Faker
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+FAKER_POOL_SIZE = 5000
+SEEDED_REFERENCE_DATE = date(2025, 1, 1)
+SKIPPED_COLUMNS = ('created_at', 'updated_at', 'timestamp')
+
+def generated_columns(schema: List[Dict]) -> List[Dict]:
+    """Columns that get generated values: auto-increment ids and timestamps are left to the database"""
+    return [
+        col for col in schema
+        if not (col.get('primary_key') and col['name'].lower() == 'id')
+        and col['name'].lower() not in SKIPPED_COLUMNS
+    ]
+
+class ColumnarTable:
+    """Generated rows held as one sequence per column"""
+
+    def __init__(self, columns: Dict[str, Sequence], count: int):
+        self.columns = columns
+        self.count = count
+
+    @property
+    def names(self) -> List[str]:
+        return list(self.columns)
+
+    def column_lists(self) -> Dict[str, list]:
+        """Columns as plain Python lists (NumPy scalars are not JSON/SQLite friendly)"""
+        return {
+            name: values.tolist() if hasattr(values, 'tolist') else list(values)
+            for name, values in self.columns.items()
+        }
+
+    def iter_rows(self) -> Iterator[Tuple]:
+        return zip(*self.column_lists().values())
+
+    def iter_chunks(self, chunk_size: int) -> Iterator[List[Tuple]]:
+        """Row tuples in chunks of chunk_size; column slices are converted one chunk at a time"""
+        for start in range(0, self.count, chunk_size):
+            end = min(start + chunk_size, self.count)
+            chunk = [
+                values[start:end].tolist() if hasattr(values, 'tolist') else list(values[start:end])
+                for values in self.columns.values()
+            ]
+            yield list(zip(*chunk))
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        names = self.names
+        return [dict(zip(names, row)) for row in self.iter_rows()]
+
+class ColumnarDataGenerator:
+    """Seeded, vectorized column generator mirroring the service's Faker rules"""
+
+    def __init__(self, seed: Optional[int] = None, pool_size: int = FAKER_POOL_SIZE,
+                 reference_date: Optional[date] = None):
+        self.seed = seed
+        self.pool_size = pool_size
+        if reference_date is None and seed is not None:
+            reference_date = SEEDED_REFERENCE_DATE
+        # Dates and datetimes are generated backwards from this instant
+        self._now = (datetime.combine(reference_date, datetime.min.time()) if reference_date
+                     else datetime.now().replace(microsecond=0))
+        self._random = random.Random(seed)
+        self._rng = np.random.default_rng(seed) if NUMPY_AVAILABLE else None
+        self._faker = Faker()
+        if seed is not None:
+            self._faker.seed_instance(seed)
+        self._pools: Dict[str, Sequence] = {}
+
+    # ------------------------------------------------------------------ primitives
+
+    def _integers(self, low: int, high: int, count: int):
+        """Uniform integers in [low, high]"""
+        if self._rng is not None:
+            return self._rng.integers(low, high + 1, count)
+        randint = self._random.randint
+        return [randint(low, high) for _ in range(count)]
+
+    def _decimals(self, low: float, high: float, count: int):
+        """Uniform values in [low, high) rounded to 2 places"""
+        if self._rng is not None:
+            return np.round(self._rng.uniform(low, high, count), 2)
+        uniform = self._random.uniform
+        return [round(uniform(low, high), 2) for _ in range(count)]
+
+    def _choice(self, pool: Sequence, count: int):
+        """count values drawn (with replacement) from pool"""
+        if self._rng is not None:
+            return pool[self._rng.integers(0, len(pool), count)]
+        return self._random.choices(pool, k=count)
+
+    def _pool(self, kind: str, count: int) -> Sequence:
+        """Faker value pool, sampled once per generator (never more values than rows requested)"""
+        pool = self._pools.get(kind)
+        if pool is None:
+            if kind == 'node':
+                values = [f"NODE_{number}" for number in range(1000, 10000)]
+            elif kind == 'date':
+                today = self._now.date()
+                values = [(today - timedelta(days=days)).isoformat() for days in range(366)]
+            else:
+                make = {
+                    'email': self._faker.email,
+                    'name': self._faker.name,
+                    'address': self._faker.address,
+                    'phone': self._faker.phone_number,
+                    'word': self._faker.word,
+                }[kind]
+                values = [make() for _ in range(max(1, min(self.pool_size, count)))]
+            pool = np.array(values, dtype=object) if NUMPY_AVAILABLE else values
+            self._pools[kind] = pool
+        return pool
+
+    def _datetimes(self, count: int, window_seconds: int = 30 * 86400):
+        """ISO datetimes uniformly spread over the last window_seconds"""
+        now = self._now
+        offsets = self._integers(0, window_seconds, count)
+        if self._rng is not None:
+            stamps = np.datetime64(now, 's') - offsets.astype('timedelta64[s]')
+            return np.datetime_as_string(stamps, unit='s').astype(object)
+        return [(now - timedelta(seconds=offset)).isoformat() for offset in offsets]
+
+    @staticmethod
+    def _text_kind(col_name: str) -> str:
+        name = col_name.lower()
+        for keyword, kind in (('email', 'email'), ('name', 'name'), ('address', 'address'), ('phone', 'phone')):
+            if keyword in name:
+                return kind
+        return 'node' if 'node' in name or 'cell' in name else 'word'
+
+    # ------------------------------------------------------------------ columns
+
+    def column(self, col_name: str, col_type: str, count: int):
+        """A whole column of values for one schema column (same rules as per-value Faker generation)"""
+        col_type_upper = col_type.upper()
+        if col_type_upper == 'TEXT':
+            kind = self._text_kind(col_name)
+            if kind == 'email':
+                # Pooled values repeat (and email columns are often UNIQUE); keep them distinct
+                return self._unique_emails(count)
+            return self._choice(self._pool(kind, count), count)
+        if col_type_upper == 'INTEGER':
+            return self._integers(1, 1000, count)
+        if 'DECIMAL' in col_type_upper:
+            return self._decimals(1.0, 100.0, count)
+        if col_type_upper == 'DATE':
+            return self._choice(self._pool('date', count), count)
+        if col_type_upper == 'DATETIME':
+            return self._datetimes(count)
+        return self._choice(self._pool('word', count), count)
+
+    def _unique_emails(self, count: int) -> List[str]:
+        """Pooled emails made distinct with a per-row suffix on the local part"""
+        emails = self._choice(self._pool('email', count), count)
+        emails = emails.tolist() if hasattr(emails, 'tolist') else emails
+        return [f"{local}.{index}@{domain}" for index, (local, _, domain) in
+                enumerate(email.partition('@') for email in emails)]
+
+    def generate(self, schema: List[Dict], count: int) -> ColumnarTable:
+        """Faker-style table for schema"""
+        return ColumnarTable({
+            col['name']: self.column(col['name'], col['type'], count) for col in generated_columns(schema)
+        }, count)
+
+    def expand_samples(self, samples: List[Dict], schema: List[Dict], count: int) -> ColumnarTable:
+        """Tile LLM sample rows to count rows with per-row variations.
+
+        Numeric INTEGER/DECIMAL values are jittered (±10 / ±5.0), strings get a
+        _<row> suffix (row 0 keeps the original), and columns the samples don't
+        cover fall back to Faker-style generation.
+        """
+        if NUMPY_AVAILABLE:
+            template_index = np.arange(count) % len(samples)
+        else:
+            template_index = [index % len(samples) for index in range(count)]
+
+        columns = {}
+        for col in generated_columns(schema):
+            col_name, col_type = col['name'], col['type'].upper()
+            if not all(col_name in sample for sample in samples):
+                if any(col_name in sample for sample in samples):
+                    columns[col_name] = self._expand_mixed(samples, col_name, col['type'], count)
+                else:
+                    columns[col_name] = self.column(col_name, col['type'], count)
+                continue
+
+            base_values = [sample[col_name] for sample in samples]
+            numeric = all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in base_values)
+            if numeric and 'INTEGER' in col_type:
+                columns[col_name] = self._jitter_integers(self._take(base_values, template_index), count)
+            elif numeric and 'DECIMAL' in col_type:
+                columns[col_name] = self._jitter_decimals(self._take(base_values, template_index), count)
+            elif all(isinstance(value, str) for value in base_values):
+                columns[col_name] = [value if index == 0 else f"{value}_{index}" for index, value in
+                                     enumerate(self._take_list(base_values, template_index))]
+            else:
+                columns[col_name] = self._take_list(base_values, template_index)
+        return ColumnarTable(columns, count)
+
+    @staticmethod
+    def _take(values: List, index):
+        """Numeric template values repeated along index"""
+        if NUMPY_AVAILABLE:
+            return np.asarray(values)[index]
+        return [values[position] for position in index]
+
+    @staticmethod
+    def _take_list(values: List, index) -> list:
+        """Arbitrary template values repeated along index"""
+        if NUMPY_AVAILABLE:
+            pool = np.empty(len(values), dtype=object)
+            for position, value in enumerate(values):
+                pool[position] = value
+            return pool[index].tolist()
+        return [values[position] for position in index]
+
+    def _jitter_integers(self, base, count: int):
+        if NUMPY_AVAILABLE:
+            return base + self._rng.integers(-10, 11, count)
+        randint = self._random.randint
+        return [value + randint(-10, 10) for value in base]
+
+    def _jitter_decimals(self, base, count: int):
+        if NUMPY_AVAILABLE:
+            return np.round(base + self._rng.uniform(-5.0, 5.0, count), 2)
+        uniform = self._random.uniform
+        return [round(value + uniform(-5.0, 5.0), 2) for value in base]
+
+    def _expand_mixed(self, samples: List[Dict], col_name: str, col_type: str, count: int) -> list:
+        """Column present in only some samples: template value where present, generated value otherwise"""
+        generated = self.column(col_name, col_type, count)
+        generated = generated.tolist() if hasattr(generated, 'tolist') else list(generated)
+        col_type_upper = col_type.upper()
+        result = []
+        for index in range(count):
+            sample = samples[index % len(samples)]
+            if col_name not in sample:
+                result.append(generated[index])
+                continue
+            value = sample[col_name]
+            if isinstance(value, bool):
+                result.append(value)
+            elif isinstance(value, (int, float)) and 'INTEGER' in col_type_upper:
+                result.append(value + self._random.randint(-10, 10))
+            elif isinstance(value, (int, float)) and 'DECIMAL' in col_type_upper:
+                result.append(round(value + self._random.uniform(-5.0, 5.0), 2))
+            elif isinstance(value, str):
+                result.append(value if index == 0 else f"{value}_{index}")
+            else:
+                result.append(value)
+        return result
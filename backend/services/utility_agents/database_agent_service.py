@@ -5,28 +5,62 @@ Port: 5041
 Purpose: Convert natural language descriptions to SQL databases
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 import sqlite3
 import os
+import sys
 import json
 import re
+import base64
+import hashlib
 import requests
 from datetime import datetime
 import logging
 
+from sqlite_connection_pool import ReadOnlyConnectionPool
+from sql_query_guard import QueryRejectedError, QueryTimeoutError, SQLQueryGuard
+
+# service_metrics lives in backend/, two levels up from the utility agents
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from service_metrics import instrument_flask, sqlite_timer
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 CORS(app)
+instrument_flask(app, "database-agent")
+
+# Server-side result limits for SELECT queries
+QUERY_PAGE_SIZE = 1000
+MAX_QUERY_PAGE_SIZE = 10000
+STREAM_FETCH_SIZE = 500
+
+# Simple single-table SELECTs over a rowid table can be paged by rowid (keyset); anything else
+# (views, WITHOUT ROWID tables, joins, aggregates) pages by offset
+SIMPLE_SELECT_PATTERN = re.compile(
+    r'^\s*SELECT\s+(?P<columns>.+?)\s+FROM\s+(?P<table>"[^"]+"|\w+)(?:\s+WHERE\s+(?P<where>.+?))?\s*;?\s*$',
+    re.IGNORECASE | re.DOTALL
+)
+WITHOUT_ROWID_PATTERN = re.compile(r'\bWITHOUT\s+ROWID\b', re.IGNORECASE)
+NON_KEYSET_KEYWORDS = re.compile(
+    r'\b(JOIN|UNION|INTERSECT|EXCEPT|GROUP|ORDER|LIMIT|OFFSET|DISTINCT|HAVING|WINDOW|OVER)\b'
+    r'|\b(COUNT|SUM|AVG|MIN|MAX|TOTAL|GROUP_CONCAT)\s*\(|\(\s*SELECT',
+    re.IGNORECASE
+)
+
+class QueryCursorError(ValueError):
+    """Raised for a page cursor that is malformed or belongs to a different query"""
 
 class DatabaseAgentService:
     def __init__(self):
         self.port = 5041
         self.databases_path = "backend/utility_databases"
         self.available_models = []
+        self.read_pool = ReadOnlyConnectionPool()
+        self.query_guard = SQLQueryGuard()
         self.ensure_databases_directory()
         self.discover_available_models()
         logger.info(f"Database Agent Service initialized on port {self.port}")
@@ -563,16 +597,17 @@ Generate the SQL:"""
             
             # Create database file
             db_path = os.path.join(self.databases_path, f"{database_name}.db")
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-            
-            # Execute schema creation
-            for table_sql in schema["tables"]:
-                cursor.execute(table_sql)
-                logger.info(f"Created table in {database_name}.db")
-            
-            conn.commit()
-            conn.close()
+            with sqlite_timer('utility_databases', 'create'):
+                conn = sqlite3.connect(db_path)
+                cursor = conn.cursor()
+                
+                # Execute schema creation
+                for table_sql in schema["tables"]:
+                    cursor.execute(table_sql)
+                    logger.info(f"Created table in {database_name}.db")
+                
+                conn.commit()
+                conn.close()
             
             logger.info(f"Database created successfully: {db_path}")
             
@@ -609,42 +644,280 @@ Generate the SQL:"""
         
         return databases
     
-    def query_database(self, database_name: str, query: str):
-        """Execute SQL query on specified database"""
+    @staticmethod
+    def _is_read_query(query: str) -> bool:
+        return query.strip().upper().startswith(('SELECT', 'WITH'))
+    
+    @staticmethod
+    def _query_fingerprint(query: str) -> str:
+        return hashlib.sha1(' '.join(query.split()).encode()).hexdigest()[:12]
+    
+    def _encode_cursor(self, query: str, kind: str, value: int) -> str:
+        token = json.dumps({"q": self._query_fingerprint(query), "k": kind, "v": value}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(token.encode()).decode().rstrip('=')
+    
+    def _decode_cursor(self, query: str, cursor: str):
+        """(kind, value) from a page cursor issued for this query"""
         try:
-            db_path = os.path.join(self.databases_path, f"{database_name}.db")
+            token = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+            kind, value = token["k"], int(token["v"])
+        except (ValueError, KeyError, TypeError):
+            raise QueryCursorError("Invalid cursor")
+        if token.get("q") != self._query_fingerprint(query) or kind not in ("rowid", "offset"):
+            raise QueryCursorError("Cursor does not belong to this query")
+        return kind, value
+    
+    @staticmethod
+    def _is_rowid_table(conn: sqlite3.Connection, name: str) -> bool:
+        """True for an ordinary table with a rowid (views and WITHOUT ROWID tables have none to page by)"""
+        if name.startswith('"'):
+            name = name[1:-1].replace('""', '"')
+        row = conn.execute("SELECT type, sql FROM sqlite_master WHERE name = ? COLLATE NOCASE", (name,)).fetchone()
+        return bool(row) and row[0] == 'table' and not WITHOUT_ROWID_PATTERN.search(row[1] or '')
+    
+    def _keyset_query(self, conn: sqlite3.Connection, query: str):
+        """Rewrite a simple SELECT over one rowid table to page by rowid, or None when it can't be"""
+        match = SIMPLE_SELECT_PATTERN.match(query)
+        if not match or NON_KEYSET_KEYWORDS.search(query) or not self._is_rowid_table(conn, match.group('table')):
+            return None
+        where = f"({match.group('where')}) AND " if match.group('where') else ""
+        return (f"SELECT _rowid_ AS __page_key, {match.group('columns')} FROM {match.group('table')} "
+                f"WHERE {where}_rowid_ > ? ORDER BY _rowid_ LIMIT ?")
+    
+    def _fetch_page(self, conn: sqlite3.Connection, db_path: str, query: str, limit: int, cursor: str = None):
+        """(columns, rows, next_cursor) for one page of a read query
+        
+        The query guard costs the paged statement that runs, not the raw query,
+        so a large table can still be read a page at a time.
+        """
+        kind, value = self._decode_cursor(query, cursor) if cursor else (None, None)
+        keyset_sql = self._keyset_query(conn, query) if kind in (None, "rowid") else None
+        if kind == "rowid" and keyset_sql is None:
+            raise QueryCursorError("Cursor does not belong to this query")
+        if keyset_sql:
+            paged_sql, params, row_limit = keyset_sql, (value or 0, limit + 1), limit + 1
+        else:
+            offset = value or 0
+            paged_sql = f"SELECT * FROM ({query.strip().rstrip(';')}) LIMIT ? OFFSET ?"
+            params, row_limit = (limit + 1, offset), offset + limit + 1
+        self.query_guard.check(conn, db_path, paged_sql, params, row_limit)
+        
+        db_cursor = conn.cursor()
+        try:
+            db_cursor.execute(paged_sql, params)
+            if keyset_sql:
+                columns = [col[0] for col in db_cursor.description][1:]
+                rows = db_cursor.fetchall()
+                has_more = len(rows) > limit
+                rows = rows[:limit]
+                next_cursor = self._encode_cursor(query, "rowid", rows[-1][0]) if has_more else None
+                return columns, [row[1:] for row in rows], next_cursor
+            
+            columns = [col[0] for col in db_cursor.description]
+            rows = db_cursor.fetchall()
+            has_more = len(rows) > limit
+            next_cursor = self._encode_cursor(query, "offset", offset + limit) if has_more else None
+            return columns, rows[:limit], next_cursor
+        finally:
+            db_cursor.close()
+    
+    def _database_path(self, database_name: str) -> str:
+        return os.path.join(self.databases_path, f"{database_name}.db")
+    
+    def query_database(self, database_name: str, query: str, limit: int = None, cursor: str = None,
+                       timeout: float = None):
+        """Execute SQL query on specified database; SELECTs return one page of at most limit rows"""
+        conn = None
+        try:
+            db_path = self._database_path(database_name)
             
             if not os.path.exists(db_path):
                 return {"error": f"Database {database_name} not found", "status": "error"}
             
-            conn = sqlite3.connect(db_path)
-            conn.row_factory = sqlite3.Row  # Enable column access by name
-            cursor = conn.cursor()
-            
-            cursor.execute(query)
-            
-            if query.strip().upper().startswith('SELECT'):
-                results = [dict(row) for row in cursor.fetchall()]
+            if self._is_read_query(query):
+                limit = max(1, min(limit or QUERY_PAGE_SIZE, MAX_QUERY_PAGE_SIZE))
+                with sqlite_timer('utility_databases', 'read'), self.read_pool.connection(db_path) as read_conn:
+                    with self.query_guard.time_budget(read_conn, query, timeout):
+                        columns, rows, next_cursor = self._fetch_page(read_conn, db_path, query, limit, cursor)
+                results = [dict(zip(columns, row)) for row in rows]
                 return {
                     "results": results,
+                    "columns": columns,
                     "row_count": len(results),
+                    "limit": limit,
+                    "has_more": next_cursor is not None,
+                    "next_cursor": next_cursor,
                     "status": "success"
                 }
-            else:
+            
+            conn = sqlite3.connect(db_path)
+            with sqlite_timer('utility_databases', 'write'):
+                with self.query_guard.time_budget(conn, query, timeout):
+                    conn.execute(query)
                 conn.commit()
-                return {
-                    "message": "Query executed successfully",
-                    "status": "success"
+            return {
+                "message": "Query executed successfully",
+                "status": "success"
+            }
+            
+        except QueryCursorError:
+            raise
+        except (QueryRejectedError, QueryTimeoutError) as e:
+            logger.warning(f"Query aborted on {database_name}: {str(e)}")
+            return {
+                "error": str(e),
+                "error_type": "query_rejected" if isinstance(e, QueryRejectedError) else "query_timeout",
+                "status": "error"
+            }
+        except Exception as e:
+            logger.error(f"Error executing query: {str(e)}")
+            return {
+                "error": str(e),
+                "status": "error"
+            }
+        finally:
+            if conn:
+                conn.close()
+    
+    def stream_query(self, database_name: str, query: str, limit: int = None, timeout: float = None):
+        """Yield NDJSON lines for a read query: one object per row, then a summary line.
+
+        Reads without a LIMIT get one injected (limit, or the guard's default), and
+        the time budget applies to each fetched batch rather than the whole stream.
+        """
+        db_path = self._database_path(database_name)
+        if not os.path.exists(db_path):
+            yield json.dumps({"error": f"Database {database_name} not found", "status": "error"}) + "\n"
+            return
+        if not self._is_read_query(query):
+            yield json.dumps({"error": "Only SELECT queries can be streamed", "status": "error"}) + "\n"
+            return
+        
+        row_count = 0
+        try:
+            limited_query, injected_limit = self.query_guard.apply_limit(query, limit)
+            with self.read_pool.connection(db_path) as conn:
+                self.query_guard.check(conn, db_path, limited_query)
+                db_cursor = conn.cursor()
+                try:
+                    with self.query_guard.time_budget(conn, query, timeout) as budget:
+                        with sqlite_timer('utility_databases', 'stream'):
+                            db_cursor.execute(limited_query)
+                        columns = [col[0] for col in db_cursor.description or ()]
+                        while limit is None or row_count < limit:
+                            size = STREAM_FETCH_SIZE if limit is None else min(STREAM_FETCH_SIZE, limit - row_count)
+                            budget.restart()
+                            rows = db_cursor.fetchmany(size)
+                            if not rows:
+                                break
+                            row_count += len(rows)
+                            yield ''.join(json.dumps(dict(zip(columns, row)), default=str) + "\n" for row in rows)
+                finally:
+                    db_cursor.close()
+            yield json.dumps({
+                "status": "success",
+                "row_count": row_count,
+                "columns": columns,
+                "limit_applied": injected_limit
+            }) + "\n"
+        except (QueryRejectedError, QueryTimeoutError) as e:
+            logger.warning(f"Streamed query aborted on {database_name}: {str(e)}")
+            yield json.dumps({
+                "error": str(e),
+                "error_type": "query_rejected" if isinstance(e, QueryRejectedError) else "query_timeout",
+                "status": "error",
+                "row_count": row_count
+            }) + "\n"
+        except Exception as e:
+            logger.error(f"Error streaming query: {str(e)}")
+            yield json.dumps({"error": str(e), "status": "error", "row_count": row_count}) + "\n"
+
+    NUMERIC_TYPE_MARKERS = ('INT', 'DECIMAL', 'REAL', 'NUMERIC', 'FLOAT', 'DOUBLE')
+    TEXT_TYPE_MARKERS = ('TEXT', 'CHAR', 'CLOB')
+    
+    @staticmethod
+    def _quote_identifier(name: str) -> str:
+        """Quote a table/column name for safe interpolation into SQL"""
+        return '"' + name.replace('"', '""') + '"'
+    
+    def profile_table(self, database_name: str, table_name: str, sample_limit: int = 5, max_text_columns: int = 3):
+        """Compute per-column statistics for a table in a single aggregate pass"""
+        conn = None
+        try:
+            db_path = os.path.join(self.databases_path, f"{database_name}.db")
+            
+            if not os.path.exists(db_path):
+                return {"error": f"Database {database_name} not found", "status": "error"}
+            
+            conn = sqlite3.connect(db_path)
+            cursor = conn.cursor()
+            
+            cursor.execute(f"PRAGMA table_info({self._quote_identifier(table_name)})")
+            columns = cursor.fetchall()
+            if not columns:
+                return {"error": f"Table {table_name} not found in database {database_name}", "status": "error"}
+            
+            numeric_columns = [col[1] for col in columns if any(m in (col[2] or '').upper() for m in self.NUMERIC_TYPE_MARKERS)]
+            text_columns = [col[1] for col in columns if any(m in (col[2] or '').upper() for m in self.TEXT_TYPE_MARKERS)]
+            
+            # One SELECT computes every aggregate, so the table is scanned once
+            select_parts = ["COUNT(*)"]
+            for col in numeric_columns:
+                quoted = self._quote_identifier(col)
+                select_parts.extend([f"MIN({quoted})", f"MAX({quoted})", f"AVG({quoted})", f"COUNT({quoted})"])
+            for col in text_columns:
+                quoted = self._quote_identifier(col)
+                select_parts.extend([f"COUNT(DISTINCT {quoted})", f"COUNT({quoted})"])
+            
+            with sqlite_timer('utility_databases', 'profile'):
+                cursor.execute(f"SELECT {', '.join(select_parts)} FROM {self._quote_identifier(table_name)}")
+                row = iter(cursor.fetchone())
+            
+            profile = {
+                "total_records": next(row),
+                "numeric_columns": {},
+                "text_columns": {}
+            }
+            for col in numeric_columns:
+                min_value, max_value, avg_value, non_null = next(row), next(row), next(row), next(row)
+                profile["numeric_columns"][col] = {
+                    "min": min_value,
+                    "max": max_value,
+                    "avg": avg_value,
+                    "null_count": profile["total_records"] - non_null
+                }
+            for col in text_columns:
+                distinct_count, non_null = next(row), next(row)
+                profile["text_columns"][col] = {
+                    "distinct_count": distinct_count,
+                    "null_count": profile["total_records"] - non_null
                 }
             
-            conn.close()
+            # Sample values stay on this connection rather than costing a request each
+            for col in text_columns[:max_text_columns]:
+                quoted = self._quote_identifier(col)
+                cursor.execute(
+                    f"SELECT DISTINCT {quoted} FROM {self._quote_identifier(table_name)} LIMIT ?",
+                    (sample_limit,)
+                )
+                profile["text_columns"][col]["sample_values"] = [r[0] for r in cursor.fetchall()]
+            
+            return {
+                "database_name": database_name,
+                "table_name": table_name,
+                "profile": profile,
+                "status": "success"
+            }
             
         except Exception as e:
-            logger.error(f"Error executing query: {str(e)}")
+            logger.error(f"Error profiling table: {str(e)}")
             return {
                 "error": str(e),
                 "status": "error"
             }
+        finally:
+            if conn:
+                conn.close()
 
 # Initialize service
 db_service = DatabaseAgentService()
@@ -656,9 +929,21 @@ def health_check():
         "status": "healthy",
         "service": "Database Agent Service",
         "port": db_service.port,
+        "query_guard": {
+            key: value for key, value in db_service.query_guard.stats().items() if key != "recent_aborts"
+        },
         "timestamp": datetime.now().isoformat()
     })
 
+@app.route('/api/database/query-stats', methods=['GET'])
+def get_query_stats():
+    """Query guard counters (checked, rejected, timed out, limits injected) and recent aborted queries"""
+    return jsonify({
+        "success": True,
+        "query_guard": db_service.query_guard.stats(),
+        "connection_pool": db_service.read_pool.stats()
+    })
+
 @app.route('/api/models/status', methods=['GET'])
 def get_model_status():
     """Get information about available models for user selection"""
@@ -846,7 +1131,20 @@ def query_database(database_name):
             }), 400
         
         query = data['query']
-        result = db_service.query_database(database_name, query)
+        limit = data.get('limit')
+        timeout = data.get('timeout')  # seconds, capped by the query guard
+        
+        # NDJSON streaming: rows are written as they are fetched instead of buffered into one response
+        if data.get('stream') or 'application/x-ndjson' in request.headers.get('Accept', ''):
+            return Response(
+                stream_with_context(db_service.stream_query(database_name, query, limit, timeout)),
+                mimetype='application/x-ndjson'
+            )
+        
+        try:
+            result = db_service.query_database(database_name, query, limit, data.get('cursor'), timeout)
+        except QueryCursorError as e:
+            return jsonify({"error": str(e), "status": "error"}), 400
         
         return jsonify(result)
         
@@ -857,6 +1155,25 @@ def query_database(database_name):
             "status": "error"
         }), 500
 
+@app.route('/api/database/<database_name>/tables/<table_name>/profile', methods=['GET'])
+def profile_table(database_name, table_name):
+    """Get column statistics for a table in one response"""
+    try:
+        sample_limit = request.args.get('sample_limit', 5, type=int)
+        max_text_columns = request.args.get('max_text_columns', 3, type=int)
+        result = db_service.profile_table(database_name, table_name, sample_limit, max_text_columns)
+        
+        if result.get("status") == "error":
+            return jsonify(result), 404 if "not found" in result.get("error", "") else 500
+        return jsonify(result)
+        
+    except Exception as e:
+        logger.error(f"Error profiling table: {str(e)}")
+        return jsonify({
+            "error": str(e),
+            "status": "error"
+        }), 500
+
 @app.route('/api/database/<database_name>/schema', methods=['GET'])
 def get_database_schema(database_name):
     """Get database schema information"""
@@ -873,22 +1190,23 @@ def get_database_schema(database_name):
         cursor = conn.cursor()
         
         # Get table names
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-        tables = [row[0] for row in cursor.fetchall()]
-        
-        schema_info = {}
-        for table in tables:
-            cursor.execute(f"PRAGMA table_info({table})")
-            columns = cursor.fetchall()
-            schema_info[table] = [
-                {
-                    "name": col[1],
-                    "type": col[2],
-                    "not_null": bool(col[3]),
-                    "primary_key": bool(col[5])
-                }
-                for col in columns
-            ]
+        with sqlite_timer('utility_databases', 'schema'):
+            cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
+            tables = [row[0] for row in cursor.fetchall()]
+            
+            schema_info = {}
+            for table in tables:
+                cursor.execute(f"PRAGMA table_info({table})")
+                columns = cursor.fetchall()
+                schema_info[table] = [
+                    {
+                        "name": col[1],
+                        "type": col[2],
+                        "not_null": bool(col[3]),
+                        "primary_key": bool(col[5])
+                    }
+                    for col in columns
+                ]
         
         conn.close()
         
@@ -926,7 +1244,8 @@ def delete_database(database_name):
                 "status": "error"
             }), 404
         
-        # Delete the database file
+        # Delete the database file (pooled read connections first)
+        db_service.read_pool.close_database(db_path)
         os.remove(db_path)
         
         logger.info(f"Database deleted successfully: {db_path}")
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+SQL Query Guard
+Time budgets and cost checks for agent-issued SQL in the Database Agent Service
+
+- time budgets: a SQLite progress handler interrupts a statement once its
+  deadline passes (streams get a fresh budget per fetched batch)
+- cost check: EXPLAIN QUERY PLAN of the statement that actually runs is
+  inspected first; full table scans are costed with estimated row counts
+  (nested scans multiply) and the query is rejected above max_scan_rows. A
+  single streaming scan under a LIMIT stops early, so it costs at most the
+  rows the LIMIT lets through
+- row limits: exploratory reads without a LIMIT get one injected
+- aborted queries are counted by reason and the most recent are kept for
+  inspection
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+QUERY_TIMEOUT_SECONDS = float(os.environ.get('DB_QUERY_TIMEOUT_SECONDS', 10))
+MAX_QUERY_TIMEOUT_SECONDS = 120.0
+QUERY_MAX_SCAN_ROWS = int(os.environ.get('DB_QUERY_MAX_SCAN_ROWS', 5000000))
+EXPLORATORY_ROW_LIMIT = int(os.environ.get('DB_QUERY_DEFAULT_LIMIT', 100000))
+PROGRESS_HANDLER_INSTRUCTIONS = 10000  # VM instructions between deadline checks
+RECENT_ABORTS = 50
+
+TRAILING_LIMIT_PATTERN = re.compile(r'\bLIMIT\s+(\d+)(?:\s*(?:OFFSET|,)\s*(\d+))?\s*;?\s*$', re.IGNORECASE)
+# Plan steps that consume their whole input before emitting a row, so an outer LIMIT does not stop the scan
+BLOCKING_PLAN_STEPS = ('USE TEMP B-TREE', 'CO-ROUTINE', 'MATERIALIZE', 'COMPOUND')
+TABLE_REFERENCE_PATTERN = re.compile(
+    r'(?:\bFROM|\bJOIN|,)\s+"?(\w+)"?(?:\s+(?:AS\s+)?(\w+))?', re.IGNORECASE
+)
+NOT_ALIASES = {
+    'WHERE', 'JOIN', 'INNER', 'LEFT', 'RIGHT', 'FULL', 'CROSS', 'NATURAL', 'OUTER', 'ON', 'USING',
+    'GROUP', 'ORDER', 'LIMIT', 'HAVING', 'UNION', 'EXCEPT', 'INTERSECT', 'WINDOW', 'AS'
+}
+
+class QueryRejectedError(Exception):
+    """Raised when a query's plan is estimated to scan too many rows"""
+
+class QueryTimeoutError(Exception):
+    """Raised when a query runs past its time budget"""
+
+class QueryBudget:
+    """Deadline checked by the connection's progress handler"""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.restart()
+
+    def restart(self):
+        self.deadline = time.monotonic() + self.seconds
+
+    def expired(self) -> bool:
+        return time.monotonic() > self.deadline
+
+class SQLQueryGuard:
+    """Applies time budgets, plan cost checks and row limits to SQL queries"""
+
+    def __init__(self, timeout_seconds: float = QUERY_TIMEOUT_SECONDS, max_scan_rows: int = QUERY_MAX_SCAN_ROWS,
+                 default_limit: int = EXPLORATORY_ROW_LIMIT):
+        self.timeout_seconds = timeout_seconds
+        self.max_scan_rows = max_scan_rows
+        self.default_limit = default_limit
+        self._row_estimates: Dict[Tuple[str, int], Dict[str, int]] = {}
+        self._lock = threading.Lock()
+        self._counters = {"checked": 0, "rejected_full_scan": 0, "timed_out": 0, "limit_injected": 0}
+        self._recent_aborts = deque(maxlen=RECENT_ABORTS)
+
+    # ------------------------------------------------------------------ accounting
+
+    def _count(self, counter: str):
+        with self._lock:
+            self._counters[counter] += 1
+
+    def _record_abort(self, reason: str, query: str, detail: str):
+        with self._lock:
+            self._counters[reason] += 1
+            self._recent_aborts.append({
+                "reason": reason,
+                "query": query[:200],
+                "detail": detail,
+                "timestamp": time.time()
+            })
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                **self._counters,
+                "timeout_seconds": self.timeout_seconds,
+                "max_scan_rows": self.max_scan_rows,
+                "default_limit": self.default_limit,
+                "recent_aborts": list(self._recent_aborts)
+            }
+
+    # ------------------------------------------------------------------ row limits
+
+    def apply_limit(self, query: str, limit: Optional[int] = None) -> Tuple[str, Optional[int]]:
+        """(query, injected limit): reads without a trailing LIMIT are wrapped in one"""
+        if TRAILING_LIMIT_PATTERN.search(query):
+            return query, None
+        limit = limit or self.default_limit
+        self._count("limit_injected")
+        return f"SELECT * FROM ({query.strip().rstrip(';')}) LIMIT {int(limit)}", limit
+
+    # ------------------------------------------------------------------ plan cost
+
+    def _table_rows(self, conn: sqlite3.Connection, db_path: str) -> Dict[str, int]:
+        """Estimated rows per table: sqlite_stat1 when analyzed, else max(rowid); cached per file version"""
+        stat = os.stat(db_path)
+        key = (os.path.abspath(db_path), stat.st_mtime_ns)
+        with self._lock:
+            cached = self._row_estimates.get(key)
+        if cached is not None:
+            return cached
+
+        estimates: Dict[str, int] = {}
+        try:
+            for table, stat_text in conn.execute("SELECT tbl, stat FROM sqlite_stat1"):
+                rows = int((stat_text or '0').split()[0])
+                estimates[table.lower()] = max(estimates.get(table.lower(), 0), rows)
+        except (sqlite3.OperationalError, ValueError):
+            pass  # not analyzed
+        for (table,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall():
+            if table.lower() in estimates:
+                continue
+            try:
+                quoted = '"' + table.replace('"', '""') + '"'
+                estimates[table.lower()] = conn.execute(f"SELECT MAX(_rowid_) FROM {quoted}").fetchone()[0] or 0
+            except sqlite3.OperationalError:
+                estimates[table.lower()] = 0  # WITHOUT ROWID: no cheap estimate
+
+        with self._lock:
+            if len(self._row_estimates) > 64:
+                self._row_estimates.clear()
+            self._row_estimates[key] = estimates
+        return estimates
+
+    @staticmethod
+    def _aliases(query: str, tables: Dict[str, int]) -> Dict[str, str]:
+        """alias -> table for the tables referenced in query"""
+        aliases = {}
+        for table, alias in TABLE_REFERENCE_PATTERN.findall(query):
+            if table.lower() not in tables:
+                continue
+            aliases[table.lower()] = table.lower()
+            if alias and alias.upper() not in NOT_ALIASES:
+                aliases[alias.lower()] = table.lower()
+        return aliases
+
+    @staticmethod
+    def _trailing_limit(query: str) -> Optional[int]:
+        """Rows read to satisfy a literal trailing LIMIT (count plus offset), None without one"""
+        match = TRAILING_LIMIT_PATTERN.search(query)
+        return int(match.group(1)) + int(match.group(2) or 0) if match else None
+
+    def estimate_scan_rows(self, conn: sqlite3.Connection, db_path: str, query: str, params: tuple = (),
+                           row_limit: Optional[int] = None) -> Tuple[int, List[str]]:
+        """(estimated rows visited by full scans, scanned tables) from the query plan.
+
+        Scans in the same loop nest multiply (joins); separate subqueries add.
+        Index searches are treated as cheap and ignored. row_limit is the most
+        rows the statement reads to produce its output (LIMIT plus OFFSET; taken
+        from a literal trailing LIMIT when not given). It caps a plan that is a
+        single streaming scan; filtered scans may read further, which the time
+        budget bounds.
+        """
+        tables = self._table_rows(conn, db_path)
+        aliases = self._aliases(query, tables)
+        nests: Dict[int, int] = {}
+        scanned = []
+        blocking = False
+        for _, parent, _, detail in conn.execute(f"EXPLAIN QUERY PLAN {query}", params):
+            # An automatic index is built from a full pass over its table before the first row
+            blocking = blocking or detail.startswith(BLOCKING_PLAN_STEPS) or 'AUTOMATIC' in detail
+            parts = detail.split()
+            if len(parts) < 2 or parts[0] != 'SCAN' or parts[1] in ('CONSTANT', 'SUBQUERY'):
+                continue
+            table = aliases.get(parts[1].lower(), parts[1].lower())
+            if table not in tables:
+                continue  # CTE or subquery results: their base tables appear in the plan themselves
+            scanned.append(table)
+            nests[parent] = nests.get(parent, 1) * max(tables[table], 1)
+        cost = sum(nests.values())
+        row_limit = row_limit if row_limit is not None else self._trailing_limit(query)
+        if row_limit is not None and len(scanned) == 1 and not blocking:
+            cost = min(cost, row_limit)
+        return cost, scanned
+
+    def check(self, conn: sqlite3.Connection, db_path: str, query: str, params: tuple = (),
+              row_limit: Optional[int] = None):
+        """Raise QueryRejectedError when the plan's full scans exceed max_scan_rows
+
+        query is the statement that will run, with its params (see estimate_scan_rows for row_limit).
+        """
+        self._count("checked")
+        cost, scanned = self.estimate_scan_rows(conn, db_path, query, params, row_limit)
+        if cost > self.max_scan_rows:
+            detail = (f"Query plan fully scans {', '.join(scanned)} (~{cost:,} rows, limit {self.max_scan_rows:,}); "
+                      f"filter on an indexed column or narrow the join")
+            self._record_abort("rejected_full_scan", query, detail)
+            raise QueryRejectedError(detail)
+
+    # ------------------------------------------------------------------ time budgets
+
+    def timeout_for(self, requested: Optional[float]) -> float:
+        if not requested:
+            return self.timeout_seconds
+        return max(0.1, min(float(requested), MAX_QUERY_TIMEOUT_SECONDS))
+
+    @contextmanager
+    def time_budget(self, conn: sqlite3.Connection, query: str, seconds: Optional[float] = None) -> Iterator[QueryBudget]:
+        """Interrupt statements on conn that run past the budget (raises QueryTimeoutError)"""
+        budget = QueryBudget(self.timeout_for(seconds))
+        conn.set_progress_handler(lambda: 1 if budget.expired() else 0, PROGRESS_HANDLER_INSTRUCTIONS)
+        try:
+            yield budget
+        except sqlite3.OperationalError as e:
+            if 'interrupted' not in str(e):
+                raise
+            detail = f"Query exceeded its {budget.seconds:g}s time budget"
+            self._record_abort("timed_out", query, detail)
+            raise QueryTimeoutError(detail) from e
+        finally:
+            conn.set_progress_handler(None, 0)
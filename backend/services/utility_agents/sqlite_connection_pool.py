@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+SQLite Read-Only Connection Pool
+Cached, prepared read connections per database file for the Database Agent Service
+
+Connections are opened with file:...?mode=ro URIs, so a query issued through
+them can never modify the database. Each database file keeps a small stack of
+idle connections; connections are keyed by the file's inode so a database that
+is deleted and re-created never gets served from a stale handle.
+"""
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+from urllib.parse import quote
+
+POOL_SIZE_PER_DATABASE = 4
+READ_CACHE_SIZE_KB = 16000
+
+class ReadOnlyConnectionPool:
+    """Per-database pools of read-only SQLite connections"""
+
+    def __init__(self, pool_size: int = POOL_SIZE_PER_DATABASE):
+        self.pool_size = pool_size
+        self._idle: Dict[Tuple[str, int], List[sqlite3.Connection]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(db_path: str) -> Tuple[str, int]:
+        return os.path.abspath(db_path), os.stat(db_path).st_ino
+
+    @staticmethod
+    def _open(db_path: str) -> sqlite3.Connection:
+        uri = f"file:{quote(os.path.abspath(db_path))}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        conn.execute("PRAGMA query_only=ON")
+        conn.execute(f"PRAGMA cache_size=-{READ_CACHE_SIZE_KB}")
+        return conn
+
+    @contextmanager
+    def connection(self, db_path: str) -> Iterator[sqlite3.Connection]:
+        """Borrow a read-only connection for db_path; it returns to the pool afterwards"""
+        key = self._key(db_path)
+        with self._lock:
+            idle = self._idle.get(key)
+            conn = idle.pop() if idle else None
+        if conn is None:
+            conn = self._open(db_path)
+        reusable = True
+        try:
+            yield conn
+        except sqlite3.DatabaseError:
+            reusable = False
+            raise
+        finally:
+            if reusable and not conn.in_transaction:
+                with self._lock:
+                    idle = self._idle.setdefault(key, [])
+                    if len(idle) < self.pool_size:
+                        idle.append(conn)
+                        conn = None
+            if conn is not None:
+                conn.close()
+
+    def close_database(self, db_path: str):
+        """Close every pooled connection to db_path (before deleting or replacing the file)"""
+        path = os.path.abspath(db_path)
+        with self._lock:
+            keys = [key for key in self._idle if key[0] == path]
+            connections = [conn for key in keys for conn in self._idle.pop(key)]
+        for conn in connections:
+            conn.close()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "databases": len(self._idle),
+                "idle_connections": sum(len(idle) for idle in self._idle.values())
+            }
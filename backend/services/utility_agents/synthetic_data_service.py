@@ -8,14 +8,21 @@ Purpose: Generate realistic synthetic data for databases
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 import sqlite3
-import random
 import json
 import os
 import re
+import sys
 import requests
-from datetime import datetime, timedelta
-from faker import Faker
+from datetime import datetime
 import logging
+from itertools import chain
+
+from columnar_data_generator import ColumnarDataGenerator, ColumnarTable
+from sqlite_bulk_loader import BULK_CHUNK_SIZE, SQLiteBulkLoader, iter_ndjson
+
+# service_metrics lives in backend/, two levels up from the utility agents
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from service_metrics import instrument_flask, sqlite_timer
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -23,9 +30,7 @@ logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 CORS(app)
-
-# Initialize Faker
-fake = Faker()
+instrument_flask(app, "synthetic-data")
 
 class SyntheticDataService:
     def __init__(self):
@@ -63,8 +68,15 @@ class SyntheticDataService:
             logger.error(f"Model discovery failed: {str(e)}")
             self.primary_model = 'qwen3:1.7b'
     
-    def generate_realistic_data_with_llm(self, schema: list, count: int, table_name: str, model: str = None):
+    def generate_realistic_data_with_llm(self, schema: list, count: int, table_name: str, model: str = None,
+                                         seed: int = None):
         """Generate synthetic data using LLM to understand schema context"""
+        return self.generate_table_with_llm(schema, count, table_name, model, seed).to_records()
+    
+    def generate_table_with_llm(self, schema: list, count: int, table_name: str, model: str = None,
+                                seed: int = None) -> ColumnarTable:
+        """Generate synthetic data as columns: LLM samples expanded by the columnar generator, or Faker pools"""
+        generator = ColumnarDataGenerator(seed)
         try:
             # Use user-selected model or default
             selected_model = model if model and model in self.available_models else self.primary_model
@@ -122,112 +134,18 @@ Generate realistic, contextually appropriate data based on what the table repres
                     if isinstance(sample_data, list) and len(sample_data) > 0:
                         # Use LLM samples as templates and generate more using Faker
                         logger.info(f"LLM generated {len(sample_data)} sample entries, expanding to {count} with variations")
-                        return self._expand_llm_samples(sample_data, schema, count, table_name)
+                        return generator.expand_samples(
+                            [sample for sample in sample_data if isinstance(sample, dict)] or [{}], schema, count)
                     
                 except json.JSONDecodeError as e:
                     logger.warning(f"LLM response wasn't valid JSON: {str(e)}, using Faker fallback")
             
             # Fallback to Faker-based generation
-            return self._generate_with_faker(schema, count, table_name)
+            return generator.generate(schema, count)
             
         except Exception as e:
             logger.error(f"LLM data generation failed: {str(e)}, using Faker")
-            return self._generate_with_faker(schema, count, table_name)
-    
-    def _expand_llm_samples(self, samples: list, schema: list, count: int, table_name: str):
-        """Expand LLM samples to desired count using variations"""
-        data = []
-        
-        for i in range(count):
-            # Use LLM samples as templates
-            template = samples[i % len(samples)]
-            record = {}
-            
-            for col in schema:
-                col_name = col['name']
-                
-                # Skip auto-increment IDs
-                if col.get('primary_key') and col_name.lower() == 'id':
-                    continue
-                
-                # Skip timestamp fields
-                if col_name.lower() in ['created_at', 'updated_at', 'timestamp']:
-                    continue
-                
-                # Use template value with variations
-                if col_name in template:
-                    base_value = template[col_name]
-                    record[col_name] = self._create_variation(base_value, col['type'], i)
-                else:
-                    # Generate using Faker if not in template
-                    record[col_name] = self._generate_faker_value(col_name, col['type'])
-            
-            data.append(record)
-        
-        return data
-    
-    def _create_variation(self, base_value, col_type, index):
-        """Create variations of LLM-generated values"""
-        if isinstance(base_value, (int, float)) and 'INTEGER' in col_type.upper():
-            return base_value + random.randint(-10, 10)
-        elif isinstance(base_value, (int, float)) and 'DECIMAL' in col_type.upper():
-            return round(base_value + random.uniform(-5.0, 5.0), 2)
-        elif isinstance(base_value, str):
-            # Add variation to strings
-            return f"{base_value}_{index}" if index > 0 else base_value
-        return base_value
-    
-    def _generate_faker_value(self, col_name: str, col_type: str):
-        """Generate a single value using Faker based on column name and type"""
-        col_type_upper = col_type.upper()
-        col_name_lower = col_name.lower()
-        
-        if col_type_upper == 'TEXT':
-            if 'email' in col_name_lower:
-                return fake.email()
-            elif 'name' in col_name_lower:
-                return fake.name()
-            elif 'address' in col_name_lower:
-                return fake.address()
-            elif 'phone' in col_name_lower:
-                return fake.phone_number()
-            elif 'node' in col_name_lower or 'cell' in col_name_lower:
-                return f"NODE_{random.randint(1000, 9999)}"
-            else:
-                return fake.word()
-        elif col_type_upper == 'INTEGER':
-            return random.randint(1, 1000)
-        elif 'DECIMAL' in col_type_upper:
-            return round(random.uniform(1.0, 100.0), 2)
-        elif col_type_upper == 'DATE':
-            return fake.date_between(start_date='-1y', end_date='today').isoformat()
-        elif col_type_upper == 'DATETIME':
-            return fake.date_time_between(start_date='-30d', end_date='now').isoformat()
-        else:
-            return fake.word()
-    
-    def _generate_with_faker(self, schema: list, count: int, table_name: str):
-        """Generate data using Faker library (fallback)"""
-        data = []
-        
-        for i in range(count):
-            record = {}
-            
-            for col in schema:
-                col_name = col['name']
-                col_type = col['type']
-                
-                # Skip auto-increment IDs and timestamps
-                if col.get('primary_key') and col_name.lower() == 'id':
-                    continue
-                if col_name.lower() in ['created_at', 'updated_at', 'timestamp']:
-                    continue
-                
-                record[col_name] = self._generate_faker_value(col_name, col_type)
-            
-            data.append(record)
-        
-        return data
+            return generator.generate(schema, count)
     
     def generate_realistic_data(self, schema: dict, count: int, table_name: str = "data"):
         """Legacy method - redirect to LLM-powered generation"""
@@ -249,52 +167,40 @@ Generate realistic, contextually appropriate data based on what the table repres
     
     def populate_database(self, data: list, database_path: str, table_name: str):
         """Populate database with generated synthetic data"""
-        try:
-            conn = sqlite3.connect(database_path)
-            cursor = conn.cursor()
-            
-            if not data:
-                conn.close()
-                return {"status": "error", "message": "No data to insert"}
-            
-            # Get column names from first record
-            columns = list(data[0].keys())
-            columns_str = ', '.join(columns)
-            placeholders = ', '.join(['?' for _ in columns])
-            
-            # Insert data
-            for record in data:
-                values = [record.get(col) for col in columns]
-                sql = f"INSERT INTO {table_name} ({columns_str}) VALUES ({placeholders})"
-                cursor.execute(sql, values)
-            
-            conn.commit()
-            conn.close()
-            
-            logger.info(f"Successfully inserted {len(data)} records into {table_name}")
-            return {
-                "status": "success",
-                "records_inserted": len(data),
-                "table_name": table_name,
-                "database_path": database_path
-            }
-            
-        except Exception as e:
-            logger.error(f"Error populating database: {str(e)}")
-            return {
-                "status": "error",
-                "error": str(e),
-                "records_inserted": 0
-            }
+        if not data:
+            return {"status": "error", "message": "No data to insert"}
+        
+        # Get column names from first record
+        columns = list(data[0].keys())
+        rows = (tuple(record.get(col) for col in columns) for record in data)
+        with sqlite_timer('utility_databases', 'bulk_load'):
+            return SQLiteBulkLoader(database_path).load(table_name, columns, rows, expected_rows=len(data))
+    
+    def populate_table(self, table: ColumnarTable, database_path: str, table_name: str):
+        """Bulk load a generated ColumnarTable, converting columns to rows one chunk at a time"""
+        if not table.count or not table.names:
+            return {"status": "error", "message": "No data to insert"}
+        rows = chain.from_iterable(table.iter_chunks(BULK_CHUNK_SIZE))
+        with sqlite_timer('utility_databases', 'bulk_load'):
+            return SQLiteBulkLoader(database_path).load(table_name, table.names, rows, expected_rows=table.count)
+    
+    def populate_from_ndjson(self, lines, database_path: str, table_name: str, columns: list = None):
+        """Bulk load newline-delimited JSON records as they are read"""
+        columns, rows = iter_ndjson(lines, columns)
+        if not columns:
+            return {"status": "error", "message": "No data to insert"}
+        with sqlite_timer('utility_databases', 'bulk_load'):
+            return SQLiteBulkLoader(database_path).load(table_name, columns, rows)
     
     def get_table_names(self, database_path: str):
         """Get list of table names from database"""
         try:
-            conn = sqlite3.connect(database_path)
-            cursor = conn.cursor()
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-            tables = [row[0] for row in cursor.fetchall()]
-            conn.close()
+            with sqlite_timer('utility_databases', 'schema'):
+                conn = sqlite3.connect(database_path)
+                cursor = conn.cursor()
+                cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
+                tables = [row[0] for row in cursor.fetchall()]
+                conn.close()
             return tables
         except Exception as e:
             logger.error(f"Error getting table names: {str(e)}")
@@ -303,11 +209,12 @@ Generate realistic, contextually appropriate data based on what the table repres
     def get_table_schema(self, database_path: str, table_name: str):
         """Get schema information for a specific table"""
         try:
-            conn = sqlite3.connect(database_path)
-            cursor = conn.cursor()
-            cursor.execute(f"PRAGMA table_info({table_name})")
-            columns = cursor.fetchall()
-            conn.close()
+            with sqlite_timer('utility_databases', 'schema'):
+                conn = sqlite3.connect(database_path)
+                cursor = conn.cursor()
+                cursor.execute(f"PRAGMA table_info({table_name})")
+                columns = cursor.fetchall()
+                conn.close()
             
             schema = []
             for col in columns:
@@ -359,6 +266,7 @@ def generate_data():
         table_name = data.get('table_name', 'data')
         count = data.get('count', 10)
         model = data.get('model')
+        seed = data.get('seed')  # same seed, same data
         
         if count <= 0 or count > 10000:
             return jsonify({
@@ -389,7 +297,7 @@ def generate_data():
         
         # Generate data using LLM
         logger.info(f"Generating preview data for {table_name} using LLM: {model or 'default'}")
-        generated_data = synthetic_service.generate_realistic_data_with_llm(table_schema, count, table_name, model)
+        generated_data = synthetic_service.generate_realistic_data_with_llm(table_schema, count, table_name, model, seed)
         
         return jsonify({
             "success": True,
@@ -420,6 +328,7 @@ def populate_database():
         table_name = data.get('table_name', 'data')
         record_count = data.get('count', 100)
         model = data.get('model')  # User-selected LLM model
+        seed = data.get('seed')
         
         if not database_name:
             return jsonify({
@@ -445,17 +354,17 @@ def populate_database():
         
         # Generate data using LLM
         logger.info(f"Generating {record_count} records for {table_name} using LLM: {model or 'default'}")
-        generated_data = synthetic_service.generate_realistic_data_with_llm(table_schema, record_count, table_name, model)
+        generated_table = synthetic_service.generate_table_with_llm(table_schema, record_count, table_name, model, seed)
         
         # Populate database
-        result = synthetic_service.populate_database(generated_data, database_path, table_name)
+        result = synthetic_service.populate_table(generated_table, database_path, table_name)
         
         return jsonify({
             "success": result["status"] == "success",
             "result": result,
             "database_name": database_name,
             "table_name": table_name,
-            "records_generated": len(generated_data)
+            "records_generated": generated_table.count
         })
         
     except Exception as e:
@@ -466,6 +375,46 @@ def populate_database():
             "status": "error"
         }), 500
 
+@app.route('/api/synthetic-data/populate/stream', methods=['POST'])
+def populate_database_stream():
+    """Populate a table from an NDJSON request body (one JSON record per line), streamed into the database"""
+    try:
+        database_name = request.args.get('database_name')
+        table_name = request.args.get('table_name', 'data')
+        columns = request.args.get('columns')  # optional comma-separated column order
+        
+        if not database_name:
+            return jsonify({
+                "error": "Database name is required",
+                "status": "error"
+            }), 400
+        
+        database_path = os.path.join(synthetic_service.databases_path, f"{database_name}.db")
+        if not os.path.exists(database_path):
+            return jsonify({
+                "error": f"Database {database_name} not found",
+                "status": "error"
+            }), 404
+        
+        columns = [col.strip() for col in columns.split(',') if col.strip()] if columns else None
+        result = synthetic_service.populate_from_ndjson(request.stream, database_path, table_name, columns)
+        
+        return jsonify({
+            "success": result["status"] == "success",
+            "result": result,
+            "database_name": database_name,
+            "table_name": table_name,
+            "records_inserted": result.get("records_inserted", 0)
+        }), 200 if result["status"] == "success" else 400
+        
+    except Exception as e:
+        logger.error(f"Error streaming records into database: {str(e)}")
+        return jsonify({
+            "success": False,
+            "error": str(e),
+            "status": "error"
+        }), 500
+
 @app.route('/api/synthetic-data/database/<database_name>/tables', methods=['GET'])
 def get_database_tables(database_name):
     """Get list of tables in database"""
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Test paged SELECTs in the Database Agent Service against a temporary database
+"""
+
+import base64
+import json
+import os
+import sqlite3
+import tempfile
+
+from database_agent_service import DatabaseAgentService
+from service_metrics import render_metrics
+from sql_query_guard import SQLQueryGuard
+
+ROWS = 25
+
+def make_service(directory):
+    service = DatabaseAgentService()
+    service.databases_path = directory
+    conn = sqlite3.connect(os.path.join(directory, 'shop.db'))
+    conn.executescript("""
+        CREATE TABLE orders (id INTEGER PRIMARY KEY, customer TEXT, amount REAL);
+        CREATE VIEW big_orders AS SELECT id, customer, amount FROM orders WHERE amount >= 0;
+        CREATE TABLE skus (code TEXT PRIMARY KEY, name TEXT) WITHOUT ROWID;
+    """)
+    conn.executemany("INSERT INTO orders (customer, amount) VALUES (?, ?)",
+                     [(f'customer {index}', index * 1.5) for index in range(ROWS)])
+    conn.executemany("INSERT INTO skus VALUES (?, ?)", [(f'SKU{index:03d}', f'item {index}') for index in range(ROWS)])
+    conn.commit()
+    conn.close()
+    return service
+
+def page_through(service, query, limit=10):
+    """All rows of query, fetched page by page; also returns the cursor kinds used"""
+    rows, kinds, cursor = [], set(), None
+    while True:
+        page = service.query_database('shop', query, limit=limit, cursor=cursor)
+        assert page['status'] == 'success', page
+        rows += page['results']
+        cursor = page['next_cursor']
+        if not cursor:
+            return rows, kinds
+        kinds.add(json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))['k'])
+
+def test_table_pages_by_rowid():
+    with tempfile.TemporaryDirectory() as directory:
+        rows, kinds = page_through(make_service(directory), "SELECT * FROM orders")
+        assert len(rows) == ROWS and kinds == {'rowid'}
+    print("✅ Rowid table paged by keyset")
+
+def test_view_pages_by_offset():
+    with tempfile.TemporaryDirectory() as directory:
+        rows, kinds = page_through(make_service(directory), "SELECT * FROM big_orders")
+        assert len(rows) == ROWS and kinds == {'offset'}
+        assert [row['id'] for row in rows] == list(range(1, ROWS + 1))
+    print("✅ View paged by offset (no NULL rowids)")
+
+def test_without_rowid_table_pages_by_offset():
+    with tempfile.TemporaryDirectory() as directory:
+        rows, kinds = page_through(make_service(directory), "SELECT code, name FROM skus WHERE name LIKE 'item%'")
+        assert len(rows) == ROWS and kinds == {'offset'}
+        assert len({row['code'] for row in rows}) == ROWS
+    print("✅ WITHOUT ROWID table paged by offset")
+
+def test_guard_checks_the_page_not_the_raw_query():
+    with tempfile.TemporaryDirectory() as directory:
+        service = make_service(directory)
+        service.query_guard = SQLQueryGuard(max_scan_rows=15)
+        page = service.query_database('shop', "SELECT * FROM big_orders", limit=10)
+        assert page['status'] == 'success' and page['row_count'] == 10, page
+        deep = service.query_database('shop', "SELECT * FROM big_orders", limit=10, cursor=page['next_cursor'])
+        assert deep['error_type'] == 'query_rejected', deep
+    print("✅ Query guard costs the paged statement (first page fits, deeper offsets do not)")
+
+def sqlite_reads_recorded():
+    prefix = 'agentos_sqlite_query_duration_seconds_count{db="utility_databases",operation="read"} '
+    lines = [line for line in render_metrics()[0].splitlines() if line.startswith(prefix)]
+    return int(lines[0][len(prefix):]) if lines else 0
+
+def test_queries_are_timed():
+    with tempfile.TemporaryDirectory() as directory:
+        service = make_service(directory)
+        before = sqlite_reads_recorded()
+        page_through(service, "SELECT * FROM orders")
+        assert sqlite_reads_recorded() - before == 3
+    print("✅ Each page read is recorded in the SQLite latency histogram")
+
+if __name__ == "__main__":
+    print("🧪 Testing Database Agent Service paging...")
+    test_table_pages_by_rowid()
+    test_view_pages_by_offset()
+    test_without_rowid_table_pages_by_offset()
+    test_guard_checks_the_page_not_the_raw_query()
+    test_queries_are_timed()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test the SQL query guard's plan costing, row limits and time budgets against a temporary database
+"""
+
+import os
+import sqlite3
+import tempfile
+
+from sql_query_guard import QueryRejectedError, QueryTimeoutError, SQLQueryGuard
+
+ROWS = 2000
+
+def make_database(directory):
+    db_path = os.path.join(directory, 'warehouse.db')
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        CREATE TABLE events (id INTEGER PRIMARY KEY, kind TEXT, amount REAL);
+        CREATE TABLE regions (id INTEGER PRIMARY KEY, name TEXT);
+    """)
+    conn.executemany("INSERT INTO events (kind, amount) VALUES (?, ?)",
+                     [(f'kind {index % 7}', index * 0.5) for index in range(ROWS)])
+    conn.executemany("INSERT INTO regions (name) VALUES (?)", [(f'region {index}',) for index in range(50)])
+    conn.commit()
+    return db_path, conn
+
+def rejected(guard, conn, db_path, query, params=(), row_limit=None):
+    try:
+        guard.check(conn, db_path, query, params, row_limit)
+        return False
+    except QueryRejectedError:
+        return True
+
+def test_full_scan_over_limit_is_rejected():
+    with tempfile.TemporaryDirectory() as directory:
+        db_path, conn = make_database(directory)
+        guard = SQLQueryGuard(max_scan_rows=500)
+        assert rejected(guard, conn, db_path, "SELECT * FROM events")
+        assert not rejected(guard, conn, db_path, "SELECT * FROM events WHERE id = 5")
+        assert not rejected(guard, conn, db_path, "SELECT * FROM regions")
+        assert guard.stats()['rejected_full_scan'] == 1
+        conn.close()
+    print("✅ Unbounded full scan rejected, index search and small table allowed")
+
+def test_paged_statement_is_costed_by_its_limit():
+    with tempfile.TemporaryDirectory() as directory:
+        db_path, conn = make_database(directory)
+        guard = SQLQueryGuard(max_scan_rows=500)
+        paged = "SELECT * FROM (SELECT * FROM events) LIMIT ? OFFSET ?"
+        assert not rejected(guard, conn, db_path, paged, (101, 0), row_limit=101)
+        assert rejected(guard, conn, db_path, paged, (101, 900), row_limit=1001)  # deep offsets still read the rows
+        assert not rejected(guard, conn, db_path, "SELECT * FROM events LIMIT 100")
+        assert rejected(guard, conn, db_path, "SELECT * FROM events LIMIT 100 OFFSET 600")
+        conn.close()
+    print("✅ Paged statements costed by the rows their LIMIT and OFFSET read")
+
+def test_blocking_plans_ignore_the_limit():
+    with tempfile.TemporaryDirectory() as directory:
+        db_path, conn = make_database(directory)
+        guard = SQLQueryGuard(max_scan_rows=500)
+        for query in ("SELECT * FROM (SELECT * FROM events ORDER BY amount DESC) LIMIT ? OFFSET ?",
+                      "SELECT * FROM (SELECT kind, COUNT(*) FROM events GROUP BY kind) LIMIT ? OFFSET ?",
+                      "SELECT * FROM (SELECT COUNT(*) FROM events) LIMIT ? OFFSET ?"):
+            assert rejected(guard, conn, db_path, query, (11, 0), row_limit=11), query
+        assert rejected(guard, conn, db_path, "SELECT * FROM (SELECT * FROM regions r, events e) LIMIT ? OFFSET ?",
+                        (11, 0), row_limit=11)
+        assert not rejected(guard, conn, db_path,
+                            "SELECT * FROM (SELECT * FROM events e JOIN regions r ON r.id = e.id) LIMIT ? OFFSET ?",
+                            (11, 0), row_limit=11)  # one scan driving an index search still streams
+        conn.close()
+    print("✅ Sorts, aggregates and nested scans are costed in full despite a LIMIT")
+
+def test_apply_limit_injects_once():
+    guard = SQLQueryGuard(default_limit=250)
+    assert guard.apply_limit("SELECT * FROM events;") == ("SELECT * FROM (SELECT * FROM events) LIMIT 250", 250)
+    assert guard.apply_limit("SELECT * FROM events LIMIT 10") == ("SELECT * FROM events LIMIT 10", None)
+    assert guard.apply_limit("SELECT * FROM events", 40)[1] == 40
+    print("✅ LIMIT injected only into reads without one")
+
+def test_time_budget_interrupts_long_query():
+    with tempfile.TemporaryDirectory() as directory:
+        db_path, conn = make_database(directory)
+        guard = SQLQueryGuard()
+        endless = "WITH RECURSIVE n(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM n) SELECT COUNT(*) FROM n"
+        try:
+            with guard.time_budget(conn, endless, 0.2):
+                conn.execute(endless).fetchall()
+            assert False, "expected a timeout"
+        except QueryTimeoutError:
+            pass
+        assert guard.stats()['timed_out'] == 1
+        assert conn.execute("SELECT COUNT(*) FROM events").fetchone()[0] == ROWS  # handler removed
+        conn.close()
+    print("✅ Time budget interrupts a runaway query")
+
+if __name__ == "__main__":
+    print("🧪 Testing SQL query guard...")
+    test_full_scan_over_limit_is_rejected()
+    test_paged_statement_is_costed_by_its_limit()
+    test_blocking_plans_ignore_the_limit()
+    test_apply_limit_injects_once()
+    test_time_budget_interrupts_long_query()
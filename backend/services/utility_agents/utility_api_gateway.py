@@ -5,20 +5,26 @@ Port: 5044
 Purpose: Central API gateway for all utility services
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 import requests
 import os
+import sys
 import json
 import logging
 from datetime import datetime
 
+# service_metrics lives in backend/, two levels up from the utility agents
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from service_metrics import instrument_flask
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 CORS(app)
+instrument_flask(app, "utility-api-gateway")
 
 class UtilityAPIGateway:
     def __init__(self):
@@ -253,13 +259,25 @@ def create_database():
 def query_database(database_name):
     """Execute SQL query on database"""
     try:
+        data = request.get_json()
+        stream = bool(data and data.get('stream')) or 'application/x-ndjson' in request.headers.get('Accept', '')
+        
         # Forward request to database service
         response = requests.post(
             f"{api_gateway.services['database']}/api/database/{database_name}/query",
-            json=request.get_json(),
+            json=data,
+            headers={'Accept': 'application/x-ndjson'} if stream else None,
+            stream=stream,
             timeout=30
         )
         
+        if stream:
+            # Relay NDJSON rows as they arrive rather than buffering the result set
+            return Response(
+                response.iter_content(chunk_size=None),
+                status=response.status_code,
+                mimetype='application/x-ndjson'
+            )
         return jsonify(response.json()), response.status_code
         
     except requests.exceptions.RequestException as e:
@@ -275,6 +293,31 @@ def query_database(database_name):
             "error": str(e)
         }), 500
 
+@app.route('/api/utility/database/<database_name>/tables/<table_name>/profile', methods=['GET'])
+def profile_database_table(database_name, table_name):
+    """Get column statistics for a table via the database service"""
+    try:
+        response = requests.get(
+            f"{api_gateway.services['database']}/api/database/{database_name}/tables/{table_name}/profile",
+            params=request.args,
+            timeout=30
+        )
+        
+        return jsonify(response.json()), response.status_code
+        
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Error profiling table: {str(e)}")
+        return jsonify({
+            "success": False,
+            "error": f"Failed to connect to database service: {str(e)}"
+        }), 500
+    except Exception as e:
+        logger.error(f"Error profiling table: {str(e)}")
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
 @app.route('/api/utility/database/<database_name>/delete', methods=['DELETE'])
 def delete_database(database_name):
     """Delete a database"""
@@ -9,16 +9,23 @@ from flask import Flask, request, jsonify
 from flask_cors import CORS
 import requests
 import json
+import os
+import sys
 import logging
 from datetime import datetime
 import re
 
+# service_metrics lives in backend/, two levels up from the utility agents
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from service_metrics import instrument_flask
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 CORS(app)
+instrument_flask(app, "utility-orchestration")
 
 class UtilityOrchestrationEngine:
     def __init__(self):
@@ -4,17 +4,24 @@ Provides advanced AI agent reasoning, multi-agent orchestration, and workflow ex
 Based on Amazon Strands Agents SDK principles
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
+from service_metrics import Counter, instrument_flask, observe_ollama_call, ollama_post, ollama_route, registry
 import requests
 import json
 import sqlite3
 import uuid
+import time
 import asyncio
 import aiohttp
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from difflib import SequenceMatcher
 import logging
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, List, Any, Optional
 import re
 
 # Configure logging
@@ -23,11 +30,31 @@ logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 CORS(app)
+instrument_flask(app, "strands-api")
 
 # Configuration
 OLLAMA_BASE_URL = "http://localhost:11434"
 STRANDS_DATABASE_PATH = "strands_agents.db"
 
+# Concurrent generate calls allowed per model (Ollama queues anything beyond its parallel slots)
+MODEL_CONCURRENCY_LIMIT = int(os.environ.get('STRANDS_MODEL_CONCURRENCY', 2))
+SUBTASK_WORKERS = 8
+
+# Early exit and per-request budgets for sequential/adaptive reasoning
+EARLY_EXIT_CONFIDENCE = 0.85
+REFLECTION_CONVERGENCE_RATIO = 0.9  # successive reflections this similar count as "no change"
+DEFAULT_MAX_LLM_CALLS = 8
+DEFAULT_REFLECTION_ROUNDS = 1  # more rounds (up to chain_of_thought_depth) are opt-in via reflection_rounds
+DEFAULT_TOKEN_BUDGET = 0  # 0 = unlimited
+
+CONFIDENCE_PATTERN = re.compile(r'CONFIDENCE\s*[:=]\s*([0-9]*\.?[0-9]+)\s*(%)?', re.IGNORECASE)
+CHANGES_NEEDED_PATTERN = re.compile(r'CHANGES\s+NEEDED\s*[:=]\s*\**\s*(yes|no)', re.IGNORECASE)
+
+REASONING_LLM_CALLS = registry.register(Counter(
+    'agentos_reasoning_llm_calls', 'LLM calls made by Strands reasoning', ['pattern']))
+REASONING_CALLS_SAVED = registry.register(Counter(
+    'agentos_reasoning_llm_calls_saved', 'LLM calls skipped by early exit or budget', ['pattern', 'reason']))
+
 def init_strands_database():
     """Initialize SQLite database for Strands agents"""
     conn = sqlite3.connect(STRANDS_DATABASE_PATH)
@@ -135,8 +162,19 @@ init_strands_database()
 class StrandsLLMClient:
     """Client for communicating with Ollama Core for LLM inference"""
     
-    def __init__(self):
+    def __init__(self, model_concurrency: int = MODEL_CONCURRENCY_LIMIT):
         self.ollama_base_url = OLLAMA_BASE_URL
+        self.model_concurrency = model_concurrency
+        self._model_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._slots_lock = threading.Lock()
+    
+    def _model_slot(self, model: str) -> threading.BoundedSemaphore:
+        """Semaphore bounding concurrent synchronous calls to one model"""
+        with self._slots_lock:
+            slot = self._model_slots.get(model)
+            if slot is None:
+                slot = self._model_slots[model] = threading.BoundedSemaphore(self.model_concurrency)
+            return slot
     
     async def generate_response(self, model: str, prompt: str, **kwargs) -> Dict[str, Any]:
         """Direct call to Ollama Core for LLM inference"""
@@ -152,13 +190,17 @@ class StrandsLLMClient:
                     }
                 }
                 
+                url, headers = ollama_route(f"{self.ollama_base_url}/api/generate", timeout=300)
+                started = time.perf_counter()
                 async with session.post(
-                    f"{self.ollama_base_url}/api/generate",
+                    url,
                     json=payload,
+                    headers=headers,
                     timeout=aiohttp.ClientTimeout(total=300)
                 ) as response:
                     if response.status == 200:
                         result = await response.json()
+                        observe_ollama_call(model, "generate", time.perf_counter() - started, data=result)
                         return {
                             'response': result.get('response', ''),
                             'tokens_used': result.get('eval_count', 0),
@@ -166,6 +208,8 @@ class StrandsLLMClient:
                             'success': True
                         }
                     else:
+                        outcome = 'shed' if response.status == 429 else f"http_{response.status}"
+                        observe_ollama_call(model, "generate", time.perf_counter() - started, outcome)
                         return {
                             'response': '',
                             'tokens_used': 0,
@@ -182,21 +226,22 @@ class StrandsLLMClient:
             }
     
     def generate_response_sync(self, model: str, prompt: str, **kwargs) -> Dict[str, Any]:
-        """Synchronous wrapper for generate_response"""
+        """Synchronous wrapper for generate_response (at most model_concurrency calls per model at once)"""
         try:
-            response = requests.post(
-                f"{self.ollama_base_url}/api/generate",
-                json={
-                    "model": model,
-                    "prompt": prompt,
-                    "stream": False,
-                    "options": {
-                        "temperature": kwargs.get('temperature', 0.7, timeout=30),
-                        "num_predict": kwargs.get('max_tokens', 1000)
-                    }
-                },
-                timeout=300
-            )
+            with self._model_slot(model):
+                response = ollama_post(
+                    f"{self.ollama_base_url}/api/generate",
+                    json={
+                        "model": model,
+                        "prompt": prompt,
+                        "stream": False,
+                        "options": {
+                            "temperature": kwargs.get('temperature', 0.7),
+                            "num_predict": kwargs.get('max_tokens', 1000)
+                        }
+                    },
+                    timeout=300
+                )
             
             if response.status_code == 200:
                 result = response.json()
@@ -222,14 +267,82 @@ class StrandsLLMClient:
                 'success': False
             }
 
+class ReasoningBudget:
+    """Per-request cap on LLM calls and tokens for one reasoning run"""
+    
+    def __init__(self, max_llm_calls: int = DEFAULT_MAX_LLM_CALLS, max_tokens: int = DEFAULT_TOKEN_BUDGET):
+        self.max_llm_calls = max_llm_calls
+        self.max_tokens = max_tokens
+        self.llm_calls = 0
+        self.tokens = 0
+    
+    def charge(self, response: Dict[str, Any]):
+        self.llm_calls += 1
+        self.tokens += response.get('tokens_used', 0) or 0
+    
+    def can_afford(self, reserve: int = 0) -> bool:
+        """Whether one more call fits, keeping `reserve` calls back (e.g. for the final answer)"""
+        if self.llm_calls + 1 + reserve > self.max_llm_calls:
+            return False
+        return not self.max_tokens or self.tokens < self.max_tokens
+    
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            'max_llm_calls': self.max_llm_calls,
+            'max_tokens': self.max_tokens,
+            'llm_calls': self.llm_calls,
+            'tokens': self.tokens
+        }
+
+def parse_confidence(text: str) -> Optional[float]:
+    """Last 'CONFIDENCE: x' in text, as 0-1 (percentages accepted)"""
+    matches = CONFIDENCE_PATTERN.findall(text or '')
+    if not matches:
+        return None
+    value, percent = matches[-1]
+    confidence = float(value)
+    if percent or confidence > 1:
+        confidence /= 100
+    return min(max(confidence, 0.0), 1.0)
+
+def parse_changes_needed(text: str) -> Optional[bool]:
+    match = CHANGES_NEEDED_PATTERN.search(text or '')
+    return match.group(1).lower() == 'yes' if match else None
+
 class StrandsReasoningEngine:
     """Core Strands reasoning engine implementing Amazon Strands SDK patterns"""
     
     def __init__(self):
         self.llm_client = StrandsLLMClient()
+        self.subtask_executor = ThreadPoolExecutor(max_workers=SUBTASK_WORKERS, thread_name_prefix='strands-subtask')
+        self._stats_lock = threading.Lock()
+        self.reasoning_stats = {'runs': 0, 'llm_calls': 0, 'llm_calls_saved': 0, 'early_exits': {}}
+    
+    def create_budget(self, agent_config: Dict[str, Any]) -> ReasoningBudget:
+        return ReasoningBudget(
+            int(agent_config.get('max_llm_calls') or DEFAULT_MAX_LLM_CALLS),
+            int(agent_config.get('token_budget') or DEFAULT_TOKEN_BUDGET)
+        )
     
-    def execute_agent(self, agent_config: Dict[str, Any], input_text: str) -> Dict[str, Any]:
-        """Execute Strands agent with specified reasoning pattern"""
+    def record_reasoning_run(self, pattern: str, llm_calls: int, calls_saved: int, early_exit: Optional[str]):
+        REASONING_LLM_CALLS.inc(pattern, amount=llm_calls)
+        if calls_saved:
+            REASONING_CALLS_SAVED.inc(pattern, early_exit or 'unknown', amount=calls_saved)
+        with self._stats_lock:
+            self.reasoning_stats['runs'] += 1
+            self.reasoning_stats['llm_calls'] += llm_calls
+            self.reasoning_stats['llm_calls_saved'] += calls_saved
+            if early_exit:
+                exits = self.reasoning_stats['early_exits']
+                exits[early_exit] = exits.get(early_exit, 0) + 1
+    
+    def get_reasoning_stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {**self.reasoning_stats, 'early_exits': dict(self.reasoning_stats['early_exits'])}
+    
+    def execute_agent(self, agent_config: Dict[str, Any], input_text: str,
+                      on_event: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """Execute Strands agent with specified reasoning pattern (on_event receives partial results)"""
         reasoning_pattern = agent_config.get('reasoning_pattern', 'sequential')
         
         if reasoning_pattern == 'sequential':
@@ -237,16 +350,30 @@ class StrandsReasoningEngine:
         elif reasoning_pattern == 'adaptive':
             return self.execute_adaptive_reasoning(agent_config, input_text)
         elif reasoning_pattern == 'parallel':
-            return self.execute_parallel_reasoning(agent_config, input_text)
+            return self.execute_parallel_reasoning(agent_config, input_text, on_event)
         else:
             return self.execute_sequential_reasoning(agent_config, input_text)
     
-    def execute_sequential_reasoning(self, agent_config: Dict[str, Any], input_text: str) -> Dict[str, Any]:
-        """Execute sequential reasoning pattern (ReAct-style)"""
+    def execute_sequential_reasoning(self, agent_config: Dict[str, Any], input_text: str,
+                                     budget: Optional[ReasoningBudget] = None, record: bool = True) -> Dict[str, Any]:
+        """Execute sequential reasoning pattern (ReAct-style)
+        
+        When the plan calls for reflection, the agent reflects once, or for up to
+        reflection_rounds rounds (capped at chain_of_thought_depth) when the agent
+        opts in. Reflection stops early once the plan or a reflection reports
+        confidence above the early-exit threshold, a reflection reports no changes
+        needed (or repeats the previous one), or the budget is down to the
+        final-answer call. llm_calls_saved counts the calls skipped relative to
+        the default single-reflection plan.
+        """
         reasoning_trace = []
         current_context = input_text
         total_tokens = 0
         llm_calls = 0
+        budget = budget or self.create_budget(agent_config)
+        threshold = float(agent_config.get('early_exit_confidence') or EARLY_EXIT_CONFIDENCE)
+        early_exit = None
+        previous_reflection = None
         
         try:
             # Step 1: Initial planning
@@ -258,6 +385,7 @@ class StrandsReasoningEngine:
                 temperature=agent_config.get('temperature', 0.7),
                 max_tokens=agent_config.get('max_tokens', 1000)
             )
+            budget.charge(planning_response)
             
             if not planning_response['success']:
                 return self.create_error_result(f"Planning failed: {planning_response['error']}")
@@ -265,6 +393,10 @@ class StrandsReasoningEngine:
             llm_calls += 1
             total_tokens += planning_response['tokens_used']
             
+            plan_confidence = parse_confidence(planning_response['response'])
+            if plan_confidence is not None and plan_confidence >= threshold:
+                early_exit = 'confident_plan'
+            
             reasoning_trace.append({
                 'step': 1,
                 'type': 'planning',
@@ -277,7 +409,7 @@ class StrandsReasoningEngine:
             # Step 2: Execute planned actions
             planned_actions = self.parse_planned_actions(planning_response['response'])
             
-            for i, action in enumerate(planned_actions[:agent_config.get('chain_of_thought_depth', 3)]):
+            for action in planned_actions:
                 if action['type'] == 'tool_call':
                     # Tool execution (placeholder - would integrate with actual tools)
                     tool_result = self.execute_tool_placeholder(action['tool'], action.get('params', {}))
@@ -290,32 +422,58 @@ class StrandsReasoningEngine:
                         'timestamp': datetime.now().isoformat()
                     })
                     current_context += f"\nTool result: {tool_result}"
+            
+            # Step 3: Reflect until an early exit (one round unless the agent opts into more)
+            planned_reflections = self.planned_reflections(agent_config, planned_actions)
+            max_reflections = min(int(agent_config.get('reflection_rounds') or DEFAULT_REFLECTION_ROUNDS),
+                                  int(agent_config.get('chain_of_thought_depth') or 3)) if planned_reflections else 0
+            reflections_run = 0
+            
+            for _ in range(max_reflections):
+                if early_exit is None and not budget.can_afford(reserve=1):
+                    early_exit = 'budget'
+                if early_exit:
+                    break
                 
-                elif action['type'] == 'reflection' and agent_config.get('reflection_enabled', True):
-                    reflection_prompt = self.build_reflection_prompt(agent_config, current_context, input_text)
-                    
-                    reflection_response = self.llm_client.generate_response_sync(
-                        model=agent_config['model'],
-                        prompt=reflection_prompt,
-                        temperature=agent_config.get('temperature', 0.7)
-                    )
-                    
-                    if reflection_response['success']:
-                        llm_calls += 1
-                        total_tokens += reflection_response['tokens_used']
-                        
-                        reasoning_trace.append({
-                            'step': len(reasoning_trace) + 1,
-                            'type': 'reflection',
-                            'prompt': reflection_prompt,
-                            'response': reflection_response['response'],
-                            'tokens_used': reflection_response['tokens_used'],
-                            'timestamp': datetime.now().isoformat()
-                        })
-                        
-                        current_context += f"\nReflection: {reflection_response['response']}"
-            
-            # Step 3: Generate final response
+                reflection_prompt = self.build_reflection_prompt(agent_config, current_context, input_text)
+                
+                reflection_response = self.llm_client.generate_response_sync(
+                    model=agent_config['model'],
+                    prompt=reflection_prompt,
+                    temperature=agent_config.get('temperature', 0.7)
+                )
+                budget.charge(reflection_response)
+                reflections_run += 1
+                
+                if not reflection_response['success']:
+                    break
+                
+                llm_calls += 1
+                total_tokens += reflection_response['tokens_used']
+                
+                reasoning_trace.append({
+                    'step': len(reasoning_trace) + 1,
+                    'type': 'reflection',
+                    'prompt': reflection_prompt,
+                    'response': reflection_response['response'],
+                    'tokens_used': reflection_response['tokens_used'],
+                    'timestamp': datetime.now().isoformat()
+                })
+                
+                current_context += f"\nReflection: {reflection_response['response']}"
+                
+                reflection = reflection_response['response']
+                confidence = parse_confidence(reflection)
+                if parse_changes_needed(reflection) is False:
+                    early_exit = 'no_change'
+                elif confidence is not None and confidence >= threshold:
+                    early_exit = 'confident_reflection'
+                elif previous_reflection and SequenceMatcher(
+                        None, previous_reflection, reflection).ratio() >= REFLECTION_CONVERGENCE_RATIO:
+                    early_exit = 'converged'
+                previous_reflection = reflection
+            
+            # Step 4: Generate final response
             final_prompt = self.build_final_response_prompt(agent_config, current_context, input_text)
             
             final_response = self.llm_client.generate_response_sync(
@@ -323,6 +481,7 @@ class StrandsReasoningEngine:
                 prompt=final_prompt,
                 temperature=agent_config.get('temperature', 0.7)
             )
+            budget.charge(final_response)
             
             if not final_response['success']:
                 return self.create_error_result(f"Final response failed: {final_response['error']}")
@@ -339,6 +498,12 @@ class StrandsReasoningEngine:
                 'timestamp': datetime.now().isoformat()
             })
             
+            if reflections_run >= max_reflections:
+                early_exit = None  # only report exits that skipped a reflection
+            calls_saved = max(planned_reflections - reflections_run, 0)
+            if record:
+                self.record_reasoning_run('sequential', llm_calls, calls_saved, early_exit)
+            
             return {
                 'final_answer': final_response['response'],
                 'reasoning_trace': reasoning_trace,
@@ -347,6 +512,9 @@ class StrandsReasoningEngine:
                 'llm_calls': llm_calls,
                 'tools_used': self.extract_tools_used(reasoning_trace),
                 'reflection_steps': self.extract_reflections(reasoning_trace),
+                'early_exit': early_exit,
+                'llm_calls_saved': calls_saved,
+                'budget': budget.as_dict(),
                 'success': True
             }
             
@@ -361,6 +529,7 @@ class StrandsReasoningEngine:
         current_context = input_text
         total_tokens = 0
         llm_calls = 0
+        budget = self.create_budget(agent_config)
         
         try:
             # Initial assessment
@@ -377,6 +546,7 @@ class StrandsReasoningEngine:
             4. Complex analysis required
             
             Provide your assessment and recommended approach.
+            End with a line "CONFIDENCE: <0-1>" for how confident you are that a direct response is enough.
             """
             
             assessment_response = self.llm_client.generate_response_sync(
@@ -384,6 +554,7 @@ class StrandsReasoningEngine:
                 prompt=assessment_prompt,
                 temperature=agent_config.get('temperature', 0.7)
             )
+            budget.charge(assessment_response)
             
             if not assessment_response['success']:
                 return self.create_error_result(f"Assessment failed: {assessment_response['error']}")
@@ -400,14 +571,26 @@ class StrandsReasoningEngine:
                 'timestamp': datetime.now().isoformat()
             })
             
-            # Adapt strategy based on assessment
-            if 'simple' in assessment_response['response'].lower():
+            # Adapt strategy based on assessment: a confident assessment answers directly
+            threshold = float(agent_config.get('early_exit_confidence') or EARLY_EXIT_CONFIDENCE)
+            assessment_confidence = parse_confidence(assessment_response['response'])
+            if assessment_confidence is not None and assessment_confidence >= threshold:
+                direct_reason = 'confident_assessment'
+            elif 'simple' in assessment_response['response'].lower():
+                direct_reason = 'direct'
+            elif not budget.can_afford(reserve=2):
+                direct_reason = 'budget'  # no room for planning + final answer
+            else:
+                direct_reason = None
+            
+            if direct_reason:
                 # Direct response
                 final_response = self.llm_client.generate_response_sync(
                     model=agent_config['model'],
                     prompt=f"{agent_config.get('system_prompt', '')}\n\nTask: {input_text}\n\nResponse:",
                     temperature=agent_config.get('temperature', 0.7)
                 )
+                budget.charge(final_response)
                 
                 if final_response['success']:
                     llm_calls += 1
@@ -421,24 +604,51 @@ class StrandsReasoningEngine:
                         'timestamp': datetime.now().isoformat()
                     })
                     
+                    # One direct call replaced the sequential fallback: planning, its reflection, final answer
+                    sequential_calls = 2 + self.planned_reflections(agent_config)
+                    calls_saved = sequential_calls - 1
+                    self.record_reasoning_run('adaptive', llm_calls, calls_saved, direct_reason)
+                    
                     return {
                         'final_answer': final_response['response'],
                         'reasoning_trace': reasoning_trace,
                         'total_tokens': total_tokens,
                         'llm_calls': llm_calls,
                         'strategy': 'direct',
+                        'early_exit': direct_reason,
+                        'llm_calls_saved': calls_saved,
+                        'budget': budget.as_dict(),
                         'success': True
                     }
+                
+                return self.create_error_result(f"Direct response failed: {final_response['error']}")
             else:
-                # Fall back to sequential reasoning for complex tasks
-                return self.execute_sequential_reasoning(agent_config, input_text)
+                # Fall back to sequential reasoning for complex tasks, sharing the budget
+                result = self.execute_sequential_reasoning(agent_config, input_text, budget, record=False)
+                if result.get('success'):
+                    for step in result['reasoning_trace']:
+                        step['step'] += len(reasoning_trace)
+                    result['reasoning_trace'] = reasoning_trace + result['reasoning_trace']
+                    result['total_tokens'] += total_tokens
+                    result['llm_calls'] += llm_calls
+                    result['total_steps'] = len(result['reasoning_trace'])
+                    result['strategy'] = 'sequential'
+                    self.record_reasoning_run('adaptive', result['llm_calls'], result['llm_calls_saved'],
+                                              result['early_exit'])
+                return result
             
         except Exception as e:
             logger.error(f"Error in adaptive reasoning: {str(e)}")
             return self.create_error_result(str(e))
     
-    def execute_parallel_reasoning(self, agent_config: Dict[str, Any], input_text: str) -> Dict[str, Any]:
-        """Execute parallel reasoning pattern (multiple reasoning paths)"""
+    def execute_parallel_reasoning(self, agent_config: Dict[str, Any], input_text: str,
+                                   on_event: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """Execute parallel reasoning pattern (multiple reasoning paths)
+        
+        Subtasks are dispatched concurrently (bounded per model by the LLM client);
+        each completed subtask is reported to on_event as it finishes.
+        """
+        emit = on_event or (lambda event: None)
         # Simplified parallel reasoning - break task into subtasks
         reasoning_trace = []
         total_tokens = 0
@@ -480,26 +690,18 @@ class StrandsReasoningEngine:
                 'timestamp': datetime.now().isoformat()
             })
             
-            # Execute subtasks
+            # Execute subtasks concurrently
             subtasks = self.parse_subtasks(breakdown_response['response'])
-            subtask_results = []
+            emit({'type': 'task_breakdown', 'subtasks': subtasks})
+            results_by_index = {}
             
-            for i, subtask in enumerate(subtasks):
-                subtask_prompt = f"""
-                You are {agent_config.get('role', 'an AI assistant')}.
-                System: {agent_config.get('system_prompt', '')}
-                
-                Original task: {input_text}
-                Your subtask: {subtask}
-                
-                Complete this subtask:
-                """
-                
-                subtask_response = self.llm_client.generate_response_sync(
-                    model=agent_config['model'],
-                    prompt=subtask_prompt,
-                    temperature=agent_config.get('temperature', 0.7)
-                )
+            futures = {
+                self.subtask_executor.submit(self.execute_subtask, agent_config, input_text, subtask): index
+                for index, subtask in enumerate(subtasks)
+            }
+            for future in as_completed(futures):
+                index = futures[future]
+                subtask_response = future.result()
                 
                 if subtask_response['success']:
                     llm_calls += 1
@@ -508,13 +710,27 @@ class StrandsReasoningEngine:
                     reasoning_trace.append({
                         'step': len(reasoning_trace) + 1,
                         'type': 'subtask_execution',
-                        'subtask': subtask,
+                        'subtask_index': index,
+                        'subtask': subtasks[index],
                         'response': subtask_response['response'],
                         'tokens_used': subtask_response['tokens_used'],
                         'timestamp': datetime.now().isoformat()
                     })
                     
-                    subtask_results.append(subtask_response['response'])
+                    results_by_index[index] = subtask_response['response']
+                
+                emit({
+                    'type': 'subtask_complete',
+                    'subtask_index': index,
+                    'subtask': subtasks[index],
+                    'success': subtask_response['success'],
+                    'response': subtask_response['response'],
+                    'tokens_used': subtask_response['tokens_used'],
+                    'error': subtask_response.get('error')
+                })
+            
+            subtask_results = [results_by_index[index] for index in sorted(results_by_index)]
+            emit({'type': 'synthesis_started', 'completed_subtasks': len(subtask_results)})
             
             # Synthesize results
             synthesis_prompt = f"""
@@ -565,6 +781,24 @@ class StrandsReasoningEngine:
             logger.error(f"Error in parallel reasoning: {str(e)}")
             return self.create_error_result(str(e))
     
+    def execute_subtask(self, agent_config: Dict[str, Any], input_text: str, subtask: str) -> Dict[str, Any]:
+        """Run one parallel-reasoning subtask"""
+        subtask_prompt = f"""
+                You are {agent_config.get('role', 'an AI assistant')}.
+                System: {agent_config.get('system_prompt', '')}
+                
+                Original task: {input_text}
+                Your subtask: {subtask}
+                
+                Complete this subtask:
+                """
+        
+        return self.llm_client.generate_response_sync(
+            model=agent_config['model'],
+            prompt=subtask_prompt,
+            temperature=agent_config.get('temperature', 0.7)
+        )
+    
     def build_planning_prompt(self, agent_config: Dict[str, Any], input_text: str) -> str:
         """Build planning prompt for sequential reasoning"""
         return f"""
@@ -582,6 +816,7 @@ Plan your approach step by step. Consider:
 Available tools: {agent_config.get('tools_config', '[]')}
 
 Provide a clear plan with specific actions you will take.
+End with a line "CONFIDENCE: <0-1>" for how confident you are that the plan answers the task without further reflection.
 """
     
     def build_reflection_prompt(self, agent_config: Dict[str, Any], current_context: str, original_input: str) -> str:
@@ -600,6 +835,7 @@ Reflect on your progress so far:
 4. Are there any issues or concerns?
 
 Provide your reflection and next steps.
+End with two lines: "CHANGES NEEDED: yes|no" and "CONFIDENCE: <0-1>".
 """
     
     def build_final_response_prompt(self, agent_config: Dict[str, Any], current_context: str, original_input: str) -> str:
@@ -615,6 +851,17 @@ Based on all the work above, provide your final comprehensive answer to the orig
 Be clear, accurate, and helpful.
 """
     
+    def planned_reflections(self, agent_config: Dict[str, Any],
+                            planned_actions: Optional[List[Dict[str, Any]]] = None) -> int:
+        """Reflection calls in the default sequential plan: one if reflection is enabled and planned
+        within the first chain_of_thought_depth actions (assumed planned when there is no plan yet)"""
+        if not agent_config.get('reflection_enabled', True):
+            return 0
+        if planned_actions is None:
+            return 1
+        depth = int(agent_config.get('chain_of_thought_depth') or 3)
+        return int(any(action['type'] == 'reflection' for action in planned_actions[:depth]))
+    
     def parse_planned_actions(self, planning_response: str) -> List[Dict[str, Any]]:
         """Parse planned actions from planning response"""
         actions = []
@@ -887,8 +1134,9 @@ def execute_strands_agent(agent_id):
         cursor.execute('SELECT * FROM strands_agents WHERE id = ?', (agent_id,))
         agent_row = cursor.fetchone()
         
+        conn.close()
+        
         if not agent_row:
-            conn.close()
             return jsonify({"error": "Strands agent not found"}), 404
         
         # Build agent config
@@ -909,66 +1157,115 @@ def execute_strands_agent(agent_id):
             'mcp_servers': json.loads(agent_row[13]) if agent_row[13] else []
         }
         
-        # Execute with Strands reasoning engine
-        start_time = datetime.now()
-        result = strands_reasoning_engine.execute_agent(agent_config, input_text)
-        end_time = datetime.now()
-        
-        execution_time = int((end_time - start_time).total_seconds() * 1000)
-        execution_id = str(uuid.uuid4())
+        # Per-request reasoning budget and early-exit overrides
+        for key in ('max_llm_calls', 'token_budget', 'early_exit_confidence'):
+            if data.get(key) is not None:
+                agent_config[key] = data[key]
         
-        # Store execution trace
-        cursor.execute('''
-            INSERT INTO strands_executions (
-                id, agent_id, input_text, output_text, reasoning_trace, tools_used,
-                reflection_steps, execution_time, tokens_used, tool_calls_count,
-                reflection_iterations, llm_calls_count, success, error_message, timestamp
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            execution_id,
-            agent_id,
-            input_text,
-            result.get('final_answer', ''),
-            json.dumps(result.get('reasoning_trace', [])),
-            json.dumps(result.get('tools_used', [])),
-            json.dumps(result.get('reflection_steps', [])),
-            execution_time,
-            result.get('total_tokens', 0),
-            len(result.get('tools_used', [])),
-            len(result.get('reflection_steps', [])),
-            result.get('llm_calls', 0),
-            result.get('success', False),
-            result.get('error', None)
-        ))
-        
-        conn.commit()
-        conn.close()
+        if data.get('stream'):
+            # NDJSON: partial results (e.g. parallel subtasks) as they complete, then the final result
+            return Response(
+                stream_with_context(_stream_strands_execution(agent_id, agent_config, input_text)),
+                mimetype='application/x-ndjson'
+            )
         
-        return jsonify({
-            "id": execution_id,
-            "agentId": agent_id,
-            "input": input_text,
-            "output": result.get('final_answer', ''),
-            "success": result.get('success', False),
-            "duration": execution_time,
-            "tokensUsed": result.get('total_tokens', 0),
-            "llmCalls": result.get('llm_calls', 0),
-            "toolsUsed": result.get('tools_used', []),
-            "reflectionSteps": len(result.get('reflection_steps', [])),
-            "reasoningTrace": result.get('reasoning_trace', []),
-            "timestamp": end_time.isoformat(),
-            "metadata": {
-                "reasoning_pattern": agent_config['reasoning_pattern'],
-                "model": agent_config['model'],
-                "total_steps": result.get('total_steps', 0),
-                "strategy": result.get('strategy', 'sequential')
-            }
-        })
+        return jsonify(_run_strands_execution(agent_id, agent_config, input_text))
         
     except Exception as e:
         logger.error(f"Error executing Strands agent: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+def _stream_strands_execution(agent_id: str, agent_config: Dict[str, Any], input_text: str):
+    """Run an execution on a worker thread, yielding its events as NDJSON lines"""
+    events = queue.Queue()
+    
+    def run():
+        try:
+            result = _run_strands_execution(agent_id, agent_config, input_text, on_event=events.put)
+            events.put({'type': 'result', 'result': result})
+        except Exception as e:
+            logger.error(f"Error executing Strands agent: {str(e)}")
+            events.put({'type': 'error', 'error': str(e)})
+    
+    threading.Thread(target=run, daemon=True).start()
+    while True:
+        event = events.get()
+        yield json.dumps(event) + "\n"
+        if event['type'] in ('result', 'error'):
+            break
+
+def _run_strands_execution(agent_id: str, agent_config: Dict[str, Any], input_text: str,
+                           on_event: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """Execute an agent, store its trace and build the execution response"""
+    # Execute with Strands reasoning engine
+    start_time = datetime.now()
+    result = strands_reasoning_engine.execute_agent(agent_config, input_text, on_event)
+    end_time = datetime.now()
+    
+    execution_time = int((end_time - start_time).total_seconds() * 1000)
+    execution_id = str(uuid.uuid4())
+    
+    # Store execution trace
+    conn = sqlite3.connect(STRANDS_DATABASE_PATH)
+    cursor = conn.cursor()
+    cursor.execute('''
+        INSERT INTO strands_executions (
+            id, agent_id, input_text, output_text, reasoning_trace, tools_used,
+            reflection_steps, execution_time, tokens_used, tool_calls_count,
+            reflection_iterations, llm_calls_count, success, error_message, timestamp
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', (
+        execution_id,
+        agent_id,
+        input_text,
+        result.get('final_answer', ''),
+        json.dumps(result.get('reasoning_trace', [])),
+        json.dumps(result.get('tools_used', [])),
+        json.dumps(result.get('reflection_steps', [])),
+        execution_time,
+        result.get('total_tokens', 0),
+        len(result.get('tools_used', [])),
+        len(result.get('reflection_steps', [])),
+        result.get('llm_calls', 0),
+        result.get('success', False),
+        result.get('error', None),
+        end_time.isoformat()
+    ))
+    
+    conn.commit()
+    conn.close()
+    
+    return {
+        "id": execution_id,
+        "agentId": agent_id,
+        "input": input_text,
+        "output": result.get('final_answer', ''),
+        "success": result.get('success', False),
+        "duration": execution_time,
+        "tokensUsed": result.get('total_tokens', 0),
+        "llmCalls": result.get('llm_calls', 0),
+        "toolsUsed": result.get('tools_used', []),
+        "reflectionSteps": len(result.get('reflection_steps', [])),
+        "reasoningTrace": result.get('reasoning_trace', []),
+        "timestamp": end_time.isoformat(),
+        "metadata": {
+            "reasoning_pattern": agent_config['reasoning_pattern'],
+            "model": agent_config['model'],
+            "total_steps": result.get('total_steps', 0),
+            "strategy": result.get('strategy', 'sequential')
+        }
+    }
+
+@app.route('/api/strands/reasoning/metrics', methods=['GET'])
+def get_reasoning_metrics():
+    """Reasoning runs, LLM calls made and calls saved by early exit / budgets"""
+    return jsonify({
+        **strands_reasoning_engine.get_reasoning_stats(),
+        "early_exit_confidence": EARLY_EXIT_CONFIDENCE,
+        "default_max_llm_calls": DEFAULT_MAX_LLM_CALLS,
+        "timestamp": datetime.now().isoformat()
+    })
+
 @app.route('/api/strands/agents/<agent_id>/metrics', methods=['GET'])
 def get_strands_agent_metrics(agent_id):
     """Get performance metrics for a Strands agent"""
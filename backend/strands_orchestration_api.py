@@ -26,7 +26,9 @@ import threading
 from typing import Dict, List, Any, Optional, Union
 import logging
 import requests
-import re
+
+from query_analysis_service import get_query_analysis_service
+from service_metrics import instrument_flask, ollama_post
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -36,9 +38,14 @@ logger = logging.getLogger(__name__)
 ORCHESTRATOR_MODEL = "qwen3:1.7b"  # Use working model for orchestration
 ORCHESTRATOR_OLLAMA_URL = "http://localhost:11434"
 
+# Cache identity of the query analysis prompt (bump the version when the prompt changes)
+QUERY_ANALYSIS_TEMPLATE = "strands_orchestration.query_analysis"
+QUERY_ANALYSIS_TEMPLATE_VERSION = "1"
+
 # Initialize Flask app
 app = Flask(__name__)
 CORS(app, origins="*")
+instrument_flask(app, "strands-orchestration")
 socketio = SocketIO(app, cors_allowed_origins="*")
 
 # WebSocket event handlers
@@ -291,63 +298,30 @@ Respond with ONLY a valid JSON object following this exact format:
     "reasoning": "Explain your strategy selection and agent choices"
 }}"""
         
-        # Call Ollama with phi3 model (smaller, memory-efficient)
-        logger.info(f"Calling Ollama with model: {ORCHESTRATOR_MODEL}")
-        logger.info(f"Prompt length: {len(prompt)} characters")
-        
-        response = requests.post(f"{ORCHESTRATOR_OLLAMA_URL}/api/generate", 
-                               json={
-                                   "model": ORCHESTRATOR_MODEL,
-                                   "prompt": prompt,
-                                   "stream": False,
-                                   "options": {
-                                       "temperature": 0.1,
-                                       "top_p": 0.9,
-                                       "max_tokens": 1000
-                                   }
-                               }, timeout=30)
-        
-        logger.info(f"Ollama response status: {response.status_code}")
+        # Call Ollama through the shared analysis service (memoized across services)
+        logger.info(f"Analyzing with model: {ORCHESTRATOR_MODEL} (prompt length: {len(prompt)} characters)")
+        required_keys = ['query_type', 'selected_agents', 'execution_strategy']
+        analysis = get_query_analysis_service().analyze(
+            query, prompt,
+            model=ORCHESTRATOR_MODEL,
+            template=QUERY_ANALYSIS_TEMPLATE,
+            template_version=QUERY_ANALYSIS_TEMPLATE_VERSION,
+            context=agent_summary,
+            options={
+                "temperature": 0.1,
+                "top_p": 0.9,
+                "max_tokens": 1000
+            },
+            timeout=30,
+            validate=lambda result: all(k in result for k in required_keys),
+            ollama_url=ORCHESTRATOR_OLLAMA_URL
+        )
         
-        if response.status_code == 200:
-            result = response.json()
-            llm_response = result.get('response', '').strip()
-            logger.info(f"LLM Response: {llm_response}")
-            
-            # Extract JSON from LLM response with multiple strategies
-            analysis = None
-            try:
-                # Strategy 1: Try to parse the entire response as JSON
-                analysis = json.loads(llm_response)
-                logger.info("✅ Successfully parsed LLM response as JSON")
-            except json.JSONDecodeError as e1:
-                logger.warning(f"Strategy 1 failed: {e1}")
-                try:
-                    # Strategy 2: Find JSON object in the response
-                    json_match = re.search(r'\{.*\}', llm_response, re.DOTALL)
-                    if json_match:
-                        analysis = json.loads(json_match.group())
-                        logger.info("✅ Successfully extracted JSON from LLM response")
-                    else:
-                        logger.warning("❌ No JSON object found in LLM response")
-                except json.JSONDecodeError as e2:
-                    logger.error(f"❌ Strategy 2 failed: {e2}")
-            
-            # Validate analysis structure
-            if analysis and isinstance(analysis, dict):
-                required_keys = ['query_type', 'selected_agents', 'execution_strategy']
-                missing_keys = [k for k in required_keys if k not in analysis]
-                if not missing_keys:
-                    logger.info(f"✅ LLM analysis successful: {analysis.get('query_type')} -> {analysis.get('selected_agents')}")
-                    logger.info(f"✅ LLM reasoning: {analysis.get('reasoning', 'No reasoning provided')}")
-                    return analysis
-                else:
-                    logger.warning(f"❌ LLM analysis missing required keys: {missing_keys}")
-                    logger.warning(f"Available keys: {list(analysis.keys())}")
-            else:
-                logger.warning(f"❌ LLM analysis is not a valid dictionary. Type: {type(analysis)}")
-        else:
-            logger.error(f"❌ LLM request failed with status {response.status_code}: {response.text}")
+        if analysis is not None:
+            logger.info(f"✅ LLM analysis successful: {analysis.get('query_type')} -> {analysis.get('selected_agents')}")
+            logger.info(f"✅ LLM reasoning: {analysis.get('reasoning', 'No reasoning provided')}")
+            return analysis
+        logger.warning(f"❌ LLM analysis missing or without required keys: {required_keys}")
         
         logger.info("Falling back to context-aware analysis")
         return create_fallback_analysis(query, available_agents)
@@ -783,7 +757,7 @@ Synthesized Response:
 """
         
         # Use the orchestrator model for synthesis
-        synthesis_response = requests.post(
+        synthesis_response = ollama_post(
             'http://localhost:11434/api/generate',
             json={
                 "model": ORCHESTRATOR_MODEL,
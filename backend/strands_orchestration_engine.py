@@ -417,7 +417,8 @@ Provide a comprehensive response that builds on the previous work."""
                                 execution_start=False,
                                 output_data=agent_response,
                                 execution_time=execution_time,
-                                tools_used=tools_used
+                                tools_used=tools_used,
+                                model=agent.get('model')
                             )
                             
                             # Complete handoff tracking
@@ -9,17 +9,21 @@ Port: 5006 (different from existing services)
 
 from flask import Flask, request, jsonify, Response
 from flask_cors import CORS
+from service_metrics import instrument_flask, ollama_post
 from flask_socketio import SocketIO, emit
 import sqlite3
 import uuid
 import json
 import time
 from datetime import datetime
+from typing import Optional
 import os
 import sys
 import concurrent.futures
 import threading
 import requests  # Move requests import outside try block for cleanup functions
+from agent_memory_store import get_memory_store
+from tool_result_cache import tool_result_cache, cached_tool
 
 # Database setup
 DATABASE_PATH = "strands_sdk_agents.db"
@@ -213,8 +217,6 @@ Remember: You are not just a generic assistant - you are a specialized {agent_na
         def generate(self, prompt: str, system_prompt: str = None) -> str:
             """Generate response using real Ollama"""
             try:
-                import requests
-                
                 # Prepare the request payload
                 payload = {
                     "model": self.model_id,
@@ -234,10 +236,11 @@ Remember: You are not just a generic assistant - you are a specialized {agent_na
                 print(f"[Strands SDK] Calling real Ollama with model: {self.model_id}")
                 
                 # Make request to Ollama
-                response = requests.post(
+                response = ollama_post(
                     f"{self.host}/api/generate",
                     json=payload,
-                    timeout=180
+                    timeout=180,
+                    priority="interactive"
                 )
                 
                 if response.status_code == 200:
@@ -293,8 +296,6 @@ if 'OllamaModel' not in globals():
         def generate(self, prompt: str, system_prompt: str = None) -> str:
             """Generate response using real Ollama"""
             try:
-                import requests
-                
                 payload = {
                     "model": self.model_id,
                     "prompt": prompt,
@@ -309,10 +310,11 @@ if 'OllamaModel' not in globals():
                 if system_prompt:
                     payload["system"] = system_prompt
                 
-                response = requests.post(
+                response = ollama_post(
                     f"{self.host}/api/generate",
                     json=payload,
-                    timeout=180
+                    timeout=180,
+                    priority="interactive"
                 )
                 
                 if response.status_code == 200:
@@ -347,6 +349,17 @@ def tool(func):
     func._is_tool = True
     return func
 
+# Fallback search strategies run concurrently; the whole search is bounded by one deadline
+WEB_SEARCH_DEADLINE = 12
+_search_executor = concurrent.futures.ThreadPoolExecutor(max_workers=8, thread_name_prefix='web-search')
+
+class WebSearchUnavailable(Exception):
+    """Raised when no search strategy got an answer (request errors or the deadline), so nothing is cached"""
+
+def _is_failed_search(result: str) -> bool:
+    """web_search results that should only be negatively cached: every strategy came back empty"""
+    return not result or result.startswith("I searched for")
+
 # Strands SDK Tool Implementations
 @tool
 def web_search(query: str) -> str:
@@ -368,77 +381,117 @@ def web_search(query: str) -> str:
     Returns:
         Search results with summaries and source URLs when available.
     """
-    def try_search(search_query: str) -> str:
-        """Helper function to try a search query"""
+    try:
+        return _cached_web_search(query)
+    except Exception as e:
+        return f"Web search failed: {str(e)}"
+
+@cached_tool('web_search', is_negative=_is_failed_search)
+def _cached_web_search(query: str) -> str:
+    """web_search body; errors raise through the cache instead of being cached as results"""
+    def fetch_search(search_query: str) -> str:
+        """Query DuckDuckGo once; request errors propagate so they are never cached"""
+        url = f"https://api.duckduckgo.com/?q={search_query}&format=json&no_html=1&skip_disambig=1"
+        response = requests.get(url, timeout=10)
+        data = response.json()
+        
+        result = ""
+        if data.get('Abstract'):
+            result += f"Summary: {data['Abstract']}\n"
+        if data.get('AbstractURL'):
+            result += f"Source: {data['AbstractURL']}\n"
+        
+        # If no abstract, try related topics (memory-efficient)
+        if not result and data.get('RelatedTopics'):
+            topics = []
+            for topic in data['RelatedTopics'][:3]:
+                if isinstance(topic, dict) and topic.get('Text'):
+                    topics.append(f"• {topic['Text']}")
+            if topics:
+                result = "Related information:\n" + "\n".join(topics) + "\n"
+        
+        return result.strip()
+    
+    def try_search(search_query: str) -> Optional[str]:
+        """Helper function to try a search query, shared across strategies and requests via the cache
+        
+        Returns "" when DuckDuckGo has nothing and None when the request failed.
+        """
         try:
-            url = f"https://api.duckduckgo.com/?q={search_query}&format=json&no_html=1&skip_disambig=1"
-            response = requests.get(url, timeout=10)
-            data = response.json()
-            
-            result = ""
-            if data.get('Abstract'):
-                result += f"Summary: {data['Abstract']}\n"
-            if data.get('AbstractURL'):
-                result += f"Source: {data['AbstractURL']}\n"
-            
-            # If no abstract, try related topics (memory-efficient)
-            if not result and data.get('RelatedTopics'):
-                topics = []
-                for topic in data['RelatedTopics'][:3]:
-                    if isinstance(topic, dict) and topic.get('Text'):
-                        topics.append(f"• {topic['Text']}")
-                if topics:
-                    result = "Related information:\n" + "\n".join(topics) + "\n"
-            
-            return result.strip()
+            key = tool_result_cache.make_key('duckduckgo', search_query)
+            return tool_result_cache.get_or_compute('duckduckgo', key, lambda: fetch_search(search_query))
         except Exception:
-            return ""
+            return None
+    
+    news_keywords = ['latest', 'news', 'recent', 'current', 'breaking', 'today']
+    
+    # Candidate strategies in priority order: (search query, result formatter)
+    strategies = [(query, lambda result: result)]
+    
+    # Strategy 2: Extract key entities for news queries
+    if any(keyword in query.lower() for keyword in news_keywords):
+        entities = []
+        for word in query.lower().split():
+            if word.capitalize() in ['Nvidia', 'Apple', 'Google', 'Microsoft', 'Tesla', 'Amazon', 'Meta']:
+                entities.append(word.capitalize())
+            elif len(word) > 3 and word not in news_keywords and word not in ['the', 'and', 'for', 'with', 'top']:
+                entities.append(word.capitalize())
+        for entity in entities[:2]:  # Limit to 2 entities
+            strategies.append((entity, lambda result, entity=entity: f"Found information about {entity}:\n{result}\n\nNote: For latest news, try searching for '{entity} news' on a news website."))
     
+    # Strategy 3: Try simplified query (remove news-specific words)
+    simplified_query = query
+    for keyword in news_keywords + ['top', '-']:
+        simplified_query = simplified_query.replace(keyword, '').strip()
+    if simplified_query and simplified_query != query:
+        strategies.append((simplified_query, lambda result: f"Found general information about '{simplified_query}':\n{result}\n\nNote: For current news, try a news website or more specific search terms."))
+    
+    # Strategy 4: Try first meaningful word
+    words = [word for word in query.split() if len(word) > 3 and word.lower() not in news_keywords]
+    if words:
+        strategies.append((words[0], lambda result: f"Found information about '{words[0]}':\n{result}\n\nNote: For specific news, try searching on news websites."))
+    
+    # Drop strategies that would repeat an earlier query
+    unique_strategies = []
+    seen_queries = set()
+    for search_query, formatter in strategies:
+        if search_query not in seen_queries:
+            seen_queries.add(search_query)
+            unique_strategies.append((search_query, formatter))
+    strategies = unique_strategies
+    
+    # Launch every strategy at once; the first non-empty result wins and the rest are
+    # cancelled (requests already in flight finish in the background and warm the cache)
+    futures = {
+        _search_executor.submit(try_search, search_query): priority
+        for priority, (search_query, _) in enumerate(strategies)
+    }
+    winner = None
     try:
-        # Strategy 1: Try original query
-        result = try_search(query)
-        if result:
-            return result
-        
-        # Strategy 2: Extract key entities for news queries
-        news_keywords = ['latest', 'news', 'recent', 'current', 'breaking', 'today']
-        if any(keyword in query.lower() for keyword in news_keywords):
-            # Extract company/entity names (simple approach)
-            words = query.lower().split()
-            entities = []
-            for word in words:
-                if word.capitalize() in ['Nvidia', 'Apple', 'Google', 'Microsoft', 'Tesla', 'Amazon', 'Meta']:
-                    entities.append(word.capitalize())
-                elif len(word) > 3 and word not in news_keywords and word not in ['the', 'and', 'for', 'with', 'top']:
-                    entities.append(word.capitalize())
-            
-            # Try searching for each entity
-            for entity in entities[:2]:  # Limit to 2 entities
-                result = try_search(entity)
-                if result:
-                    return f"Found information about {entity}:\n{result}\n\nNote: For latest news, try searching for '{entity} news' on a news website."
-        
-        # Strategy 3: Try simplified query (remove news-specific words)
-        simplified_query = query
-        for keyword in ['latest', 'news', 'recent', 'current', 'breaking', 'today', 'top', '-']:
-            simplified_query = simplified_query.replace(keyword, '').strip()
-        
-        if simplified_query and simplified_query != query:
-            result = try_search(simplified_query)
-            if result:
-                return f"Found general information about '{simplified_query}':\n{result}\n\nNote: For current news, try a news website or more specific search terms."
-        
-        # Strategy 4: Try first meaningful word
-        words = [word for word in query.split() if len(word) > 3 and word.lower() not in ['latest', 'news', 'recent', 'current', 'breaking', 'today']]
-        if words:
-            result = try_search(words[0])
-            if result:
-                return f"Found information about '{words[0]}':\n{result}\n\nNote: For specific news, try searching on news websites."
-        
-        return f"I searched for '{query}' but couldn't find specific information. DuckDuckGo's API works best for general information about companies, people, and concepts rather than current news. For latest news, try:\n• Searching for just the company name (e.g., 'Nvidia')\n• Using a dedicated news website\n• Being more specific about what information you need"
-        
-    except Exception as e:
-        return f"Web search failed: {str(e)}"
+        for future in concurrent.futures.as_completed(futures, timeout=WEB_SEARCH_DEADLINE):
+            if future.result():
+                # Prefer the highest-priority strategy among those that finished together
+                done = [f for f in futures if f.done() and not f.cancelled() and f.result()]
+                winner = min(done, key=futures.get)
+                break
+    except concurrent.futures.TimeoutError:
+        print(f"[Strands SDK] Web search deadline of {WEB_SEARCH_DEADLINE}s reached for: {query}")
+    finally:
+        for future in futures:
+            future.cancel()
+    
+    if winner is not None:
+        _, formatter = strategies[futures[winner]]
+        return formatter(winner.result())
+    
+    # Only an answer of "nothing found" from every strategy is a real (negatively cached) empty result
+    answered = [f for f in futures if f.done() and not f.cancelled() and f.result() is not None]
+    if len(answered) < len(futures):
+        raise WebSearchUnavailable(f"no search strategy answered within {WEB_SEARCH_DEADLINE}s"
+                                   if any(not f.done() or f.cancelled() for f in futures)
+                                   else "search requests failed")
+    
+    return f"I searched for '{query}' but couldn't find specific information. DuckDuckGo's API works best for general information about companies, people, and concepts rather than current news. For latest news, try:\n• Searching for just the company name (e.g., 'Nvidia')\n• Using a dedicated news website\n• Being more specific about what information you need"
 
 @tool
 def calculator(expression: str) -> str:
@@ -478,6 +531,7 @@ def current_time() -> str:
     return f"Current date and time: {now.strftime('%Y-%m-%d %H:%M:%S')}"
 
 @tool
+@cached_tool('weather_api')
 def weather_api(location: str) -> str:
     """Get weather information for a location (mock implementation)"""
     return f"Weather information for {location} is not available in this demo version. This tool would typically connect to a weather API."
@@ -605,57 +659,43 @@ def analyze_database_data(database_name: str, table_name: str = None) -> str:
         if not table_name:
             return "Error: Table name is required for data analysis."
         
-        # Get table schema first
-        schema_response = requests.get(f"http://localhost:5044/api/utility/database/{database_name}/tables", timeout=10)
-        if schema_response.status_code != 200:
-            return f"Failed to get table schema: HTTP {schema_response.status_code}"
-        
-        schema_result = schema_response.json()
-        if not schema_result.get("success"):
-            return f"Failed to get schema: {schema_result.get('error')}"
-        
-        tables = schema_result.get("tables", [])
-        table_info = next((t for t in tables if t['name'] == table_name), None)
+        # The database service profiles every column in one aggregate pass
+        profile_response = requests.get(
+            f"http://localhost:5044/api/utility/database/{database_name}/tables/{table_name}/profile",
+            timeout=30
+        )
         
-        if not table_info:
+        if profile_response.status_code == 404:
             return f"Table '{table_name}' not found in database '{database_name}'"
+        if profile_response.status_code != 200:
+            return f"Failed to profile table: HTTP {profile_response.status_code}"
         
-        columns = table_info.get("schema", [])
-        
-        # Generate analysis queries based on column types
-        analysis_queries = []
+        profile_result = profile_response.json()
+        if profile_result.get("status") != "success":
+            return f"Failed to profile table: {profile_result.get('error', 'Unknown error')}"
         
-        # Count total records
-        analysis_queries.append(f"SELECT COUNT(*) as total_records FROM {table_name}")
+        profile = profile_result.get("profile", {})
+        analysis_results = [f"Total records: {profile.get('total_records', 0)}"]
         
-        # For numeric columns, get statistics
-        numeric_columns = [col['name'] for col in columns if 'INTEGER' in col['type'] or 'DECIMAL' in col['type'] or 'REAL' in col['type']]
-        for col in numeric_columns:
-            analysis_queries.append(f"SELECT MIN({col}) as min_{col}, MAX({col}) as max_{col}, AVG({col}) as avg_{col} FROM {table_name}")
-        
-        # For text columns, get sample values
-        text_columns = [col['name'] for col in columns if 'TEXT' in col['type']]
-        for col in text_columns[:3]:  # Limit to first 3 text columns
-            analysis_queries.append(f"SELECT DISTINCT {col} FROM {table_name} LIMIT 5")
-        
-        # Execute analysis queries
-        analysis_results = []
-        for query in analysis_queries:
-            query_response = requests.post(
-                f"http://localhost:5044/api/utility/database/{database_name}/query",
-                json={"query": query},
-                timeout=30
-            )
-            
-            if query_response.status_code == 200:
-                query_result = query_response.json()
-                if query_result.get("status") == "success":
-                    analysis_results.append(f"Query: {query}\nResult: {json.dumps(query_result.get('results', []), indent=2)}")
-        
-        if analysis_results:
-            return f"Data Analysis for '{table_name}' in '{database_name}':\n\n" + "\n\n".join(analysis_results)
-        else:
-            return f"No analysis data available for table '{table_name}'"
+        numeric_columns = profile.get("numeric_columns", {})
+        if numeric_columns:
+            lines = [
+                f"- {col}: min={stats['min']}, max={stats['max']}, avg={stats['avg']}, nulls={stats['null_count']}"
+                for col, stats in numeric_columns.items()
+            ]
+            analysis_results.append("Numeric columns:\n" + "\n".join(lines))
+        
+        text_columns = profile.get("text_columns", {})
+        if text_columns:
+            lines = []
+            for col, stats in text_columns.items():
+                line = f"- {col}: distinct={stats['distinct_count']}, nulls={stats['null_count']}"
+                if 'sample_values' in stats:
+                    line += f", samples={json.dumps(stats['sample_values'])}"
+                lines.append(line)
+            analysis_results.append("Text columns:\n" + "\n".join(lines))
+        
+        return f"Data Analysis for '{table_name}' in '{database_name}':\n\n" + "\n\n".join(analysis_results)
             
     except Exception as e:
         return f"Error analyzing database data: {str(e)}"
@@ -745,69 +785,99 @@ def file_write(file_path: str, content: str) -> str:
     except Exception as e:
         return f"Error writing to file {file_path}: {str(e)}"
 
+def _store_memory(key: str, value: str, namespace: str, ttl_seconds: float = None) -> str:
+    try:
+        get_memory_store().store(key, value, namespace=namespace, ttl_seconds=ttl_seconds)
+        return f"Stored memory: {key} = {value}"
+    except Exception as e:
+        return f"Error storing memory: {str(e)}"
+
+def _retrieve_memory(key: str, namespace: str, search_mode: str = "exact") -> str:
+    try:
+        store = get_memory_store()
+        if search_mode == 'exact':
+            entry = store.retrieve(key, namespace=namespace)
+            if entry:
+                return f"Memory {key}: {entry['value']} (stored: {entry['timestamp']})"
+            return f"No memory found for key: {key}"
+        
+        if search_mode == 'prefix':
+            entries = store.search_prefix(key, namespace=namespace)
+        else:
+            entries = store.search(key, namespace=namespace)
+        
+        if not entries:
+            return f"No memory found for key: {key}"
+        lines = [f"- {entry['key']}: {entry['value']} (stored: {entry['timestamp']})" for entry in entries]
+        return f"Memories matching '{key}':\n" + "\n".join(lines)
+    except Exception as e:
+        return f"Error retrieving memory: {str(e)}"
+
 @tool
-def memory_store(key: str, value: str) -> str:
+def memory_store(key: str, value: str, namespace: str = "default", ttl_seconds: float = None) -> str:
     """
     Store information in agent memory.
     
     Args:
         key: Memory key identifier
         value: Information to store
+        namespace: Memory namespace, normally the agent id
+        ttl_seconds: Optional time-to-live after which the entry expires
         
     Returns:
         Confirmation message
     """
-    try:
-        # Simple file-based memory storage
-        memory_file = './data/agent_memory.json'
-        os.makedirs(os.path.dirname(memory_file), exist_ok=True)
-        
-        # Load existing memory
-        if os.path.exists(memory_file):
-            with open(memory_file, 'r') as f:
-                memory = json.load(f)
-        else:
-            memory = {}
-        
-        # Store new memory
-        memory[key] = {
-            'value': value,
-            'timestamp': datetime.now().isoformat()
-        }
-        
-        # Save memory
-        with open(memory_file, 'w') as f:
-            json.dump(memory, f, indent=2)
-        
-        return f"Stored memory: {key} = {value}"
-    except Exception as e:
-        return f"Error storing memory: {str(e)}"
+    return _store_memory(key, value, namespace, ttl_seconds)
 
 @tool
-def memory_retrieve(key: str) -> str:
+def memory_retrieve(key: str, namespace: str = "default", search_mode: str = "exact") -> str:
     """
     Retrieve information from agent memory.
     
     Args:
-        key: Memory key identifier
+        key: Memory key identifier (or key prefix / search text, depending on search_mode)
+        namespace: Memory namespace, normally the agent id
+        search_mode: 'exact' key lookup, 'prefix' key-prefix scan, or
+                     'fuzzy'/'semantic' full-text relevance search over keys and values
         
     Returns:
         Retrieved information or error message
     """
-    try:
-        memory_file = './data/agent_memory.json'
-        if not os.path.exists(memory_file):
-            return f"No memory found for key: {key}"
-        
-        with open(memory_file, 'r') as f:
-            memory = json.load(f)
-        
-        if key in memory:
-            return f"Memory {key}: {memory[key]['value']} (stored: {memory[key]['timestamp']})"
-        else:
-            return f"No memory found for key: {key}"
-    except Exception as e:
-        return f"Error retrieving memory: {str(e)}"
+    return _retrieve_memory(key, namespace, search_mode)
+
+def build_memory_tools(agent_id: str) -> dict:
+    """memory_store / memory_retrieve tools bound to one agent's namespace (the model cannot pick another)"""
+    @tool
+    def memory_store(key: str, value: str, ttl_seconds: float = None) -> str:
+        """
+        Store information in agent memory.
+        
+        Args:
+            key: Memory key identifier
+            value: Information to store
+            ttl_seconds: Optional time-to-live after which the entry expires
+            
+        Returns:
+            Confirmation message
+        """
+        return _store_memory(key, value, agent_id, ttl_seconds)
+    
+    @tool
+    def memory_retrieve(key: str, search_mode: str = "exact") -> str:
+        """
+        Retrieve information from agent memory.
+        
+        Args:
+            key: Memory key identifier (or key prefix / search text, depending on search_mode)
+            search_mode: 'exact' key lookup, 'prefix' key-prefix scan, or
+                         'fuzzy'/'semantic' full-text relevance search over keys and values
+            
+        Returns:
+            Retrieved information or error message
+        """
+        return _retrieve_memory(key, agent_id, search_mode)
+    
+    return {'memory': memory_store, 'memory_store': memory_store, 'memory_retrieve': memory_retrieve}
 
 @tool
 def http_request(url: str, method: str = "GET", headers: dict = None, data: str = None) -> str:
@@ -829,15 +899,24 @@ def http_request(url: str, method: str = "GET", headers: dict = None, data: str
         if not any(domain in url for domain in allowed_domains):
             return f"Error: URL {url} not in allowed domains. Allowed: {allowed_domains}"
         
-        response = requests.request(
-            method=method,
-            url=url,
-            headers=headers or {},
-            data=data,
-            timeout=30
-        )
-        
-        return f"HTTP {method} {url} - Status: {response.status_code}\nResponse: {response.text[:500]}"
+        def send() -> str:
+            response = requests.request(
+                method=method,
+                url=url,
+                headers=headers or {},
+                data=data,
+                timeout=30
+            )
+            return f"HTTP {method} {url} - Status: {response.status_code}\nResponse: {response.text[:500]}"
+        
+        # Only idempotent GETs are cached; non-2xx responses are cached briefly as negative results
+        if method.upper() == 'GET':
+            key = tool_result_cache.make_key('http_request', url, headers or {}, data)
+            return tool_result_cache.get_or_compute(
+                'http_request', key, send,
+                is_negative=lambda result: " - Status: 2" not in result.split('\n', 1)[0]
+            )
+        return send()
     except Exception as e:
         return f"Error making HTTP request: {str(e)}"
 
@@ -1106,6 +1185,7 @@ except ImportError as e:
 
 app = Flask(__name__)
 CORS(app)
+instrument_flask(app, "strands-sdk-api")
 socketio = SocketIO(app, cors_allowed_origins="*")
 
 # Initialize database
@@ -1435,9 +1515,10 @@ def execute_strands_agent_stream(agent_id):
                     time.sleep(0.1)
                     
                     tool_functions = []
+                    agent_tools = {**AVAILABLE_TOOLS, **build_memory_tools(agent_id)}
                     for i, tool_name in enumerate(tools):
-                        if tool_name in AVAILABLE_TOOLS:
-                            tool_functions.append(AVAILABLE_TOOLS[tool_name])
+                        if tool_name in agent_tools:
+                            tool_functions.append(agent_tools[tool_name])
                             tools_loaded.append(tool_name)
                             
                             # Stream progress: Each tool loaded
@@ -1632,6 +1713,251 @@ def execute_strands_agent_stream(agent_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Concurrent tool execution for a single agent turn
+STRANDS_TOOL_MAX_WORKERS = int(os.environ.get('STRANDS_TOOL_MAX_WORKERS', '4'))
+STRANDS_TOOL_DEFAULT_TIMEOUT = 30
+STRANDS_TOOL_TIMEOUTS = {
+    'calculator': 5,
+    'current_time': 2,
+    'web_search': 45,
+    'database': 90,  # list_databases -> get_database_schema -> analyze_database_data chain
+}
+
+_tool_executor = concurrent.futures.ThreadPoolExecutor(
+    max_workers=STRANDS_TOOL_MAX_WORKERS,
+    thread_name_prefix='strands-tool'
+)
+
+CALCULATOR_KEYWORDS = ['calculate', 'compute', 'math', '+', '-', '*', '/', '=', 'x', '×', 'multiply', 'multiplication']
+SEARCH_KEYWORDS = ['search', 'find', 'look up', 'google', 'web', 'what is', 'who is', 'when', 'where', 'how']
+TIME_KEYWORDS = ['time', 'date', 'today', 'now', 'current']
+DATABASE_KEYWORDS = ['database', 'db', 'table', 'schema', 'data', 'analyze', '3g', '4g', 'network', 'performance', 'attributes', 'throughput']
+DATABASE_TOOLS = ['list_databases', 'get_database_schema', 'analyze_database_data']
+
+def _new_tool_outcome():
+    """Empty result of one tool invocation, merged into the agent turn by the caller"""
+    return {
+        'results': [],      # entries for tool_results
+        'tools_used': [],   # tool names actually executed
+        'operations': [],   # entries for operations_log
+        'context': []       # fragments appended to processed_input
+    }
+
+def _execute_calculator_tool(input_text):
+    """Extract a mathematical expression from the input and evaluate it"""
+    import re
+    outcome = _new_tool_outcome()
+    
+    # Look for patterns like "20 x 40 x 5000 + 215.45" or "what is 20 * 40 * 5000 + 215.45",
+    # then fall back to bare multiplication chains like "2x2x5x100"
+    complex_pattern = r'(?:what\s+is\s+|calculate\s+|compute\s+|solve\s+)?(\d+(?:\.\d+)?(?:\s*[x×*]\s*\d+(?:\.\d+)?)+(?:\s*[+\-*/]\s*\d+(?:\.\d+)?)*)'
+    mult_pattern = r'(\d+(?:\.\d+)?(?:\s*[x×*]\s*\d+(?:\.\d+)?)+)'
+    expr_match = re.search(complex_pattern, input_text, re.IGNORECASE) or re.search(mult_pattern, input_text)
+    
+    if expr_match:
+        # Convert x and × to * for proper evaluation
+        math_expr = re.sub(r'[x×]', '*', expr_match.group(1))
+        result = calculator(math_expr)
+        print(f"[Strands SDK] 🧮 CALCULATOR TOOL EXECUTED: {math_expr} = {result}")
+        outcome['results'].append(result)
+        outcome['tools_used'].append('calculator')
+        outcome['operations'].append({
+            'step': 'Calculator tool executed',
+            'details': f"Input: {math_expr} | Output: {result} | Status: Success",
+            'timestamp': datetime.now().isoformat(),
+            'tool_name': 'calculator',
+            'tool_input': math_expr,
+            'tool_output': result
+        })
+        outcome['context'].append(f"[Calculator Result: {math_expr} = {result}]")
+        return outcome
+    
+    # Simple binary operations like "6252525 / 4848992.5663", "15 + 23" or "15 - 23"
+    binary_operations = [
+        (r'(\d+(?:\.\d+)?)\s*/\s*(\d+(?:\.\d+)?)', '÷', lambda a, b: "Error: Division by zero" if b == 0 else a / b),
+        (r'(\d+(?:\.\d+)?)\s*\+\s*(\d+(?:\.\d+)?)', '+', lambda a, b: a + b),
+        (r'(\d+(?:\.\d+)?)\s*-\s*(\d+(?:\.\d+)?)', '-', lambda a, b: a - b),
+    ]
+    for pattern, symbol, apply in binary_operations:
+        op_match = re.search(pattern, input_text)
+        if not op_match:
+            continue
+        num1 = float(op_match.group(1))
+        num2 = float(op_match.group(2))
+        result = apply(num1, num2)
+        operation = f"{num1} {symbol} {num2}"
+        print(f"[Strands SDK] 🧮 CALCULATOR TOOL EXECUTED: {operation} = {result}")
+        outcome['results'].append(f"Calculator result: {operation} = {result}")
+        outcome['tools_used'].append('calculator')
+        outcome['operations'].append({
+            'step': 'Calculator tool executed',
+            'details': f"Input: {operation} | Output: {result} | Status: Success",
+            'timestamp': datetime.now().isoformat(),
+            'tool_name': 'calculator',
+            'tool_input': operation,
+            'tool_output': str(result)
+        })
+        outcome['context'].append(f"[Calculator Result: {operation} = {result}]")
+        break
+    
+    return outcome
+
+def _execute_web_search_tool(input_text):
+    """Run a web search for the raw user input"""
+    outcome = _new_tool_outcome()
+    search_result = web_search(input_text)
+    if search_result:
+        print(f"[Strands SDK] Web search tool executed for: {input_text}")
+        outcome['results'].append(f"Web search result: {search_result}")
+        outcome['tools_used'].append('web_search')
+        outcome['context'].append(f"[Web Search Result: {search_result}]")
+    return outcome
+
+def _execute_current_time_tool(input_text):
+    """Capture the current time for time/date questions"""
+    outcome = _new_tool_outcome()
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    print(f"[Strands SDK] Current time tool executed: {now}")
+    outcome['results'].append(f"Current time: {now}")
+    outcome['tools_used'].append('current_time')
+    outcome['context'].append(f"[Current Time: {now}]")
+    return outcome
+
+def _execute_database_tools(input_text, loaded_database_tools):
+    """Run the list -> schema -> analysis database chain (each step depends on the previous)"""
+    outcome = _new_tool_outcome()
+    if 'list_databases' not in loaded_database_tools:
+        return outcome
+    
+    db_list = list_databases()
+    print(f"[Strands SDK] Database list tool executed: {db_list}")
+    outcome['results'].append(f"Database list: {db_list}")
+    outcome['tools_used'].append('list_databases')
+    outcome['operations'].append({
+        'step': 'Database list tool executed',
+        'details': f"Tool: list_databases | Output: {db_list} | Status: Success",
+        'timestamp': datetime.now().isoformat(),
+        'tool_name': 'list_databases',
+        'tool_input': 'No input required',
+        'tool_output': db_list
+    })
+    outcome['context'].append(f"[Available Databases: {db_list}]")
+    
+    # Extract database names from lines like "- Telco_Network_3G_PerformanceDb (2 tables)"
+    db_names = []
+    if 'Available databases:' in db_list:
+        for line in db_list.split('\n'):
+            if '- ' in line and '(' in line:
+                db_names.append(line.split('- ')[1].split(' (')[0].strip())
+    
+    query = input_text.lower()
+    if not ('3g' in query or 'network' in query or 'performance' in query):
+        return outcome
+    
+    # Find the most relevant database based on keywords, falling back to the first one
+    selected_db = next(
+        (db_name for db_name in db_names
+         if any(keyword in db_name.lower() for keyword in ['3g', 'network', 'performance', 'telco'])),
+        db_names[0] if db_names else None
+    )
+    if not selected_db:
+        return outcome
+    
+    schema = get_database_schema(selected_db)
+    print(f"[Strands SDK] Database schema tool executed: {schema}")
+    outcome['results'].append(f"Database schema: {schema}")
+    outcome['tools_used'].append('get_database_schema')
+    outcome['operations'].append({
+        'step': 'Database schema tool executed',
+        'details': f"Tool: get_database_schema | Input: {selected_db} | Output: {schema[:200]}... | Status: Success",
+        'timestamp': datetime.now().isoformat(),
+        'tool_name': 'get_database_schema',
+        'tool_input': selected_db,
+        'tool_output': schema
+    })
+    outcome['context'].append(f"[Database Schema: {schema}]")
+    
+    table_names = []
+    if 'Table:' in schema:
+        for line in schema.split('\n'):
+            if line.strip().startswith('Table:'):
+                table_names.append(line.split('Table:')[1].strip())
+    
+    # For throughput questions prefer a performance-style table, otherwise use the first table
+    selected_table = None
+    if 'throughput' in query:
+        selected_table = next(
+            (table_name for table_name in table_names
+             if any(keyword in table_name.lower() for keyword in ['throughput', 'data_rate', 'performance', 'attributes', 'metrics'])),
+            None
+        )
+    if not selected_table and table_names:
+        selected_table = table_names[0]
+    if not selected_table:
+        return outcome
+    
+    analysis = analyze_database_data(selected_db, selected_table)
+    print(f"[Strands SDK] Database analysis tool executed: {analysis}")
+    outcome['results'].append(f"Database analysis: {analysis}")
+    outcome['tools_used'].append('analyze_database_data')
+    outcome['operations'].append({
+        'step': 'Database analysis tool executed',
+        'details': f"Tool: analyze_database_data | Input: {selected_db}, {selected_table} | Output: {analysis[:200]}... | Status: Success",
+        'timestamp': datetime.now().isoformat(),
+        'tool_name': 'analyze_database_data',
+        'tool_input': f'{selected_db}, {selected_table}',
+        'tool_output': analysis
+    })
+    outcome['context'].append(f"[Database Analysis: {analysis}]")
+    return outcome
+
+def _timed_tool_call(func):
+    """Run a tool callable and return its outcome with the time spent executing it"""
+    started = time.time()
+    outcome = func()
+    return outcome, time.time() - started
+
+def run_tools_concurrently(tool_calls):
+    """
+    Dispatch independent tool invocations on the shared bounded tool pool.
+    
+    tool_calls is a list of (name, callable) pairs. Each call gets its own timeout
+    from STRANDS_TOOL_TIMEOUTS, measured from submission. Outcomes are returned in
+    the order the calls were given, so prompts built from them are deterministic,
+    each carrying a timing entry for the operations log.
+    """
+    submitted = [
+        (name, time.time(), _tool_executor.submit(_timed_tool_call, func))
+        for name, func in tool_calls
+    ]
+    
+    outcomes = []
+    for name, submitted_at, future in submitted:
+        timeout = STRANDS_TOOL_TIMEOUTS.get(name, STRANDS_TOOL_DEFAULT_TIMEOUT)
+        try:
+            outcome, duration = future.result(timeout=max(0.0, submitted_at + timeout - time.time()))
+            status = 'Success'
+        except concurrent.futures.TimeoutError:
+            future.cancel()  # only takes effect if the tool never started
+            outcome, duration = _new_tool_outcome(), time.time() - submitted_at
+            status = f'Timeout after {timeout}s'
+            print(f"[Strands SDK] {name} tool timed out after {timeout}s")
+        except Exception as e:
+            outcome, duration = _new_tool_outcome(), time.time() - submitted_at
+            status = f'Error: {e}'
+            print(f"[Strands SDK] {name} tool error: {e}")
+        
+        outcome['operations'].append({
+            'step': f'{name.replace("_", " ").title()} tool timing',
+            'details': f"Tool: {name} | Duration: {duration * 1000:.0f}ms | Status: {status}",
+            'timestamp': datetime.now().isoformat(),
+            'tool_name': name,
+            'duration_ms': round(duration * 1000, 1),
+            'status': status
+        })
+        outcomes.append(outcome)
+    return outcomes
+
 @app.route('/api/strands-sdk/agents/<agent_id>/execute', methods=['POST'])
 def execute_strands_agent(agent_id):
     """Execute Strands SDK agent using official SDK patterns (non-streaming fallback)"""
@@ -1782,346 +2108,30 @@ def execute_strands_agent(agent_id):
             tool_results = []
             processed_input = input_text
             
-            # Check for calculator usage
-            if 'calculator' in tools_loaded:
-                calc_keywords = ['calculate', 'compute', 'math', '+', '-', '*', '/', '=', 'x', '×', 'multiply', 'multiplication']
-                if any(word in input_text.lower() for word in calc_keywords):
-                    try:
-                        # Extract mathematical expression
-                        import re
-                        
-                        # First, try to extract a complete mathematical expression
-                        # Look for patterns like "20 x 40 x 5000 + 215.45" or "what is 20 * 40 * 5000 + 215.45"
-                        # Updated pattern to handle multiple multiplications: 2x2x5x100
-                        complex_pattern = r'(?:what\s+is\s+|calculate\s+|compute\s+|solve\s+)?(\d+(?:\.\d+)?(?:\s*[x×*]\s*\d+(?:\.\d+)?)+(?:\s*[+\-*/]\s*\d+(?:\.\d+)?)*)'
-                        complex_match = re.search(complex_pattern, input_text, re.IGNORECASE)
-                        print(f"[Strands SDK] Complex pattern match result: {complex_match}")
-                        
-                        if complex_match:
-                            # Extract the mathematical expression
-                            math_expr = complex_match.group(1)
-                            # Convert x and × to * for proper evaluation
-                            math_expr = re.sub(r'[x×]', '*', math_expr)
-                            
-                            # Use the calculator tool with the complete expression
-                            try:
-                                result = calculator(math_expr)
-                                tool_results.append(result)
-                                tools_used.append('calculator')
-                                print(f"[Strands SDK] 🧮 CALCULATOR TOOL EXECUTED: {math_expr} = {result}")
-                                
-                                # Add detailed tool execution to operations log
-                                operations_log.append({
-                                    'step': 'Calculator tool executed',
-                                    'details': f"Input: {math_expr} | Output: {result} | Status: Success",
-                                    'timestamp': datetime.now().isoformat(),
-                                    'tool_name': 'calculator',
-                                    'tool_input': math_expr,
-                                    'tool_output': result
-                                })
-                                
-                                # Add calculator result to the prompt
-                                processed_input = f"{input_text}\n\n[Calculator Result: {math_expr} = {result}]"
-                                
-                            except Exception as calc_error:
-                                print(f"[Strands SDK] Calculator error: {calc_error}")
-                                # Fall back to simple pattern matching
-                                pass
-                        
-                        # Fallback to simple patterns if complex expression not found
-                        if not complex_match:
-                            # Look for multiplication patterns like "208679447 x 3672.23" or "15 * 23" or "2x2x5x100"
-                            mult_pattern = r'(\d+(?:\.\d+)?(?:\s*[x×*]\s*\d+(?:\.\d+)?)+)'
-                            mult_match = re.search(mult_pattern, input_text)
-                            
-                            # Look for division patterns like "6252525 / 4848992.5663"
-                            div_pattern = r'(\d+(?:\.\d+)?)\s*/\s*(\d+(?:\.\d+)?)'
-                            div_match = re.search(div_pattern, input_text)
-                            
-                            # Look for addition patterns like "15 + 23"
-                            add_pattern = r'(\d+(?:\.\d+)?)\s*\+\s*(\d+(?:\.\d+)?)'
-                            add_match = re.search(add_pattern, input_text)
-                            
-                            # Look for subtraction patterns like "15 - 23"
-                            sub_pattern = r'(\d+(?:\.\d+)?)\s*-\s*(\d+(?:\.\d+)?)'
-                            sub_match = re.search(sub_pattern, input_text)
-                        
-                        if mult_match:
-                            # Extract the complete multiplication expression
-                            math_expr = mult_match.group(1)
-                            # Convert x and × to * for proper evaluation
-                            math_expr = re.sub(r'[x×]', '*', math_expr)
-                            
-                            try:
-                                # Use the calculator tool with the complete expression
-                                result = calculator(math_expr)
-                                tool_results.append(result)
-                                tools_used.append('calculator')
-                                print(f"[Strands SDK] 🧮 CALCULATOR TOOL EXECUTED: {math_expr} = {result}")
-                                
-                                # Add detailed tool execution to operations log
-                                operations_log.append({
-                                    'step': 'Calculator tool executed',
-                                    'details': f"Input: {math_expr} | Output: {result} | Status: Success",
-                                    'timestamp': datetime.now().isoformat(),
-                                    'tool_name': 'calculator',
-                                    'tool_input': math_expr,
-                                    'tool_output': result
-                                })
-                            except Exception as calc_error:
-                                print(f"[Strands SDK] Calculator error in fallback: {calc_error}")
-                                # Fall back to simple two-number multiplication
-                                try:
-                                    # Extract first two numbers for simple calculation
-                                    simple_mult_pattern = r'(\d+(?:\.\d+)?)\s*[x×*]\s*(\d+(?:\.\d+)?)'
-                                    simple_match = re.search(simple_mult_pattern, input_text)
-                                    if simple_match:
-                                        num1 = float(simple_match.group(1))
-                                        num2 = float(simple_match.group(2))
-                                        result = num1 * num2
-                                        operation = f"{num1} × {num2}"
-                                        tool_results.append(f"Calculator result: {operation} = {result}")
-                                        tools_used.append('calculator')
-                                        print(f"[Strands SDK] 🧮 CALCULATOR TOOL EXECUTED (simple): {operation} = {result}")
-                                except Exception as e:
-                                    print(f"[Strands SDK] Calculator fallback error: {e}")
-                            
-                            # Add calculator result to the prompt
-                            processed_input = f"{input_text}\n\n[Calculator Result: {math_expr} = {result}]"
-                            
-                        elif div_match:
-                            num1 = float(div_match.group(1))
-                            num2 = float(div_match.group(2))
-                            if num2 == 0:
-                                result = "Error: Division by zero"
-                            else:
-                                result = num1 / num2
-                            operation = f"{num1} ÷ {num2}"
-                            tool_results.append(f"Calculator result: {operation} = {result}")
-                            tools_used.append('calculator')
-                            print(f"[Strands SDK] 🧮 CALCULATOR TOOL EXECUTED: {operation} = {result}")
-                            
-                            # Add detailed tool execution to operations log
-                            operations_log.append({
-                                'step': 'Calculator tool executed',
-                                'details': f"Input: {operation} | Output: {result} | Status: Success",
-                                'timestamp': datetime.now().isoformat(),
-                                'tool_name': 'calculator',
-                                'tool_input': operation,
-                                'tool_output': str(result)
-                            })
-                            
-                            # Add calculator result to the prompt
-                            processed_input = f"{input_text}\n\n[Calculator Result: {operation} = {result}]"
-                            
-                        elif add_match:
-                            num1 = float(add_match.group(1))
-                            num2 = float(add_match.group(2))
-                            result = num1 + num2
-                            operation = f"{num1} + {num2}"
-                            tool_results.append(f"Calculator result: {operation} = {result}")
-                            tools_used.append('calculator')
-                            print(f"[Strands SDK] 🧮 CALCULATOR TOOL EXECUTED: {operation} = {result}")
-                            
-                            # Add detailed tool execution to operations log
-                            operations_log.append({
-                                'step': 'Calculator tool executed',
-                                'details': f"Input: {operation} | Output: {result} | Status: Success",
-                                'timestamp': datetime.now().isoformat(),
-                                'tool_name': 'calculator',
-                                'tool_input': operation,
-                                'tool_output': str(result)
-                            })
-                            
-                            # Add calculator result to the prompt
-                            processed_input = f"{input_text}\n\n[Calculator Result: {operation} = {result}]"
-                            
-                        elif sub_match:
-                            num1 = float(sub_match.group(1))
-                            num2 = float(sub_match.group(2))
-                            result = num1 - num2
-                            operation = f"{num1} - {num2}"
-                            tool_results.append(f"Calculator result: {operation} = {result}")
-                            tools_used.append('calculator')
-                            print(f"[Strands SDK] 🧮 CALCULATOR TOOL EXECUTED: {operation} = {result}")
-                            
-                            # Add detailed tool execution to operations log
-                            operations_log.append({
-                                'step': 'Calculator tool executed',
-                                'details': f"Input: {operation} | Output: {result} | Status: Success",
-                                'timestamp': datetime.now().isoformat(),
-                                'tool_name': 'calculator',
-                                'tool_input': operation,
-                                'tool_output': str(result)
-                            })
-                            
-                            # Add calculator result to the prompt
-                            processed_input = f"{input_text}\n\n[Calculator Result: {operation} = {result}]"
-                    except Exception as e:
-                        print(f"[Strands SDK] Calculator tool error: {e}")
-            
-            # Check for web search usage
-            if 'web_search' in tools_loaded:
-                search_keywords = ['search', 'find', 'look up', 'google', 'web', 'what is', 'who is', 'when', 'where', 'how']
-                if any(word in input_text.lower() for word in search_keywords):
-                    try:
-                        # Extract search query
-                        search_query = input_text
-                        search_result = web_search(search_query)
-                        if search_result:
-                            tool_results.append(f"Web search result: {search_result}")
-                            tools_used.append('web_search')
-                            print(f"[Strands SDK] Web search tool executed for: {search_query}")
-                            
-                            # Add search result to the prompt
-                            processed_input = f"{input_text}\n\n[Web Search Result: {search_result}]"
-                    except Exception as e:
-                        print(f"[Strands SDK] Web search tool error: {e}")
+            # Detected tool invocations are independent of each other (the database
+            # tools form a single dependent chain), so run them concurrently and
+            # merge the results back in a fixed order.
+            lowered_input = input_text.lower()
+            loaded_database_tools = [tool for tool in tools_loaded if tool in DATABASE_TOOLS]
+            tool_calls = []
+            if 'calculator' in tools_loaded and any(word in lowered_input for word in CALCULATOR_KEYWORDS):
+                tool_calls.append(('calculator', lambda: _execute_calculator_tool(input_text)))
+            if 'web_search' in tools_loaded and any(word in lowered_input for word in SEARCH_KEYWORDS):
+                tool_calls.append(('web_search', lambda: _execute_web_search_tool(input_text)))
+            if 'current_time' in tools_loaded and any(word in lowered_input for word in TIME_KEYWORDS):
+                tool_calls.append(('current_time', lambda: _execute_current_time_tool(input_text)))
+            if loaded_database_tools and any(word in lowered_input for word in DATABASE_KEYWORDS):
+                tool_calls.append(('database', lambda: _execute_database_tools(input_text, loaded_database_tools)))
             
-            # Check for current time usage
-            if 'current_time' in tools_loaded:
-                time_keywords = ['time', 'date', 'today', 'now', 'current']
-                if any(word in input_text.lower() for word in time_keywords):
-                    try:
-                        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                        tool_results.append(f"Current time: {current_time}")
-                        tools_used.append('current_time')
-                        print(f"[Strands SDK] Current time tool executed: {current_time}")
-                        
-                        # Add time result to the prompt
-                        processed_input = f"{input_text}\n\n[Current Time: {current_time}]"
-                    except Exception as e:
-                        print(f"[Strands SDK] Current time tool error: {e}")
+            if tool_calls:
+                emit_progress(agent_id, "executing_tools", f"Running {len(tool_calls)} tool(s): {[name for name, _ in tool_calls]}", 55)
             
-            # Check for database tool usage - RESTORED WORKING APPROACH
-            database_tools = ['list_databases', 'get_database_schema', 'analyze_database_data']
-            loaded_database_tools = [tool for tool in tools_loaded if tool in database_tools]
-            
-            if loaded_database_tools:
-                db_keywords = ['database', 'db', 'table', 'schema', 'data', 'analyze', '3g', '4g', 'network', 'performance', 'attributes', 'throughput']
-                if any(word in input_text.lower() for word in db_keywords):
-                    try:
-                        # First, list available databases
-                        if 'list_databases' in loaded_database_tools:
-                            db_list = list_databases()
-                            tool_results.append(f"Database list: {db_list}")
-                            tools_used.append('list_databases')
-                            print(f"[Strands SDK] Database list tool executed: {db_list}")
-                            
-                            # Add detailed tool execution to operations log (like calculator)
-                            operations_log.append({
-                                'step': 'Database list tool executed',
-                                'details': f"Tool: list_databases | Output: {db_list} | Status: Success",
-                                'timestamp': datetime.now().isoformat(),
-                                'tool_name': 'list_databases',
-                                'tool_input': 'No input required',
-                                'tool_output': db_list
-                            })
-                            
-                            # Add database list to the prompt
-                            processed_input = f"{input_text}\n\n[Available Databases: {db_list}]"
-                            
-                            # Parse the database list to extract database names dynamically
-                            db_names = []
-                            if 'Available databases:' in db_list:
-                                lines = db_list.split('\n')
-                                for line in lines:
-                                    if '- ' in line and '(' in line:
-                                        # Extract database name from lines like "- Telco_Network_3G_PerformanceDb (2 tables)"
-                                        db_name = line.split('- ')[1].split(' (')[0].strip()
-                                        db_names.append(db_name)
-                            
-                            # If user mentions specific database keywords, get schema for the most relevant database
-                            if '3g' in input_text.lower() or 'network' in input_text.lower() or 'performance' in input_text.lower():
-                                # Find the most relevant database based on keywords
-                                selected_db = None
-                                for db_name in db_names:
-                                    if any(keyword in db_name.lower() for keyword in ['3g', 'network', 'performance', 'telco']):
-                                        selected_db = db_name
-                                        break
-                                
-                                if not selected_db and db_names:
-                                    selected_db = db_names[0]  # Use first database as fallback
-                                
-                                if selected_db:
-                                    schema = get_database_schema(selected_db)
-                                    tool_results.append(f"Database schema: {schema}")
-                                    tools_used.append('get_database_schema')
-                                    print(f"[Strands SDK] Database schema tool executed: {schema}")
-                                    
-                                    # Add detailed tool execution to operations log (like calculator)
-                                    operations_log.append({
-                                        'step': 'Database schema tool executed',
-                                        'details': f"Tool: get_database_schema | Input: {selected_db} | Output: {schema[:200]}... | Status: Success",
-                                        'timestamp': datetime.now().isoformat(),
-                                        'tool_name': 'get_database_schema',
-                                        'tool_input': selected_db,
-                                        'tool_output': schema
-                                    })
-                                
-                                    processed_input += f"\n\n[Database Schema: {schema}]"
-                                    
-                                    # Parse schema to extract table names dynamically
-                                    table_names = []
-                                    if 'Table:' in schema:
-                                        lines = schema.split('\n')
-                                        for line in lines:
-                                            if line.strip().startswith('Table:'):
-                                                table_name = line.split('Table:')[1].strip()
-                                                table_names.append(table_name)
-                                    
-                                    # Analyze the data - check if user is asking about throughput
-                                    if 'throughput' in input_text.lower():
-                                        # Find the most relevant table for throughput data
-                                        selected_table = None
-                                        for table_name in table_names:
-                                            if any(keyword in table_name.lower() for keyword in ['throughput', 'data_rate', 'performance', 'attributes', 'metrics']):
-                                                selected_table = table_name
-                                                break
-                                        
-                                        if not selected_table and table_names:
-                                            selected_table = table_names[0]  # Use first table as fallback
-                                        
-                                        if selected_table:
-                                            analysis = analyze_database_data(selected_db, selected_table)
-                                            tool_results.append(f"Database analysis: {analysis}")
-                                            tools_used.append('analyze_database_data')
-                                            print(f"[Strands SDK] Database analysis tool executed: {analysis}")
-                                            
-                                            # Add detailed tool execution to operations log (like calculator)
-                                            operations_log.append({
-                                                'step': 'Database analysis tool executed',
-                                                'details': f"Tool: analyze_database_data | Input: {selected_db}, {selected_table} | Output: {analysis[:200]}... | Status: Success",
-                                                'timestamp': datetime.now().isoformat(),
-                                                'tool_name': 'analyze_database_data',
-                                                'tool_input': f'{selected_db}, {selected_table}',
-                                                'tool_output': analysis
-                                            })
-                                            
-                                            processed_input += f"\n\n[Database Analysis: {analysis}]"
-                                    else:
-                                        # Default to first available table for general analysis
-                                        if table_names:
-                                            default_table = table_names[0]
-                                            analysis = analyze_database_data(selected_db, default_table)
-                                            tool_results.append(f"Database analysis: {analysis}")
-                                            tools_used.append('analyze_database_data')
-                                            print(f"[Strands SDK] Database analysis tool executed: {analysis}")
-                                            
-                                            # Add detailed tool execution to operations log (like calculator)
-                                            operations_log.append({
-                                                'step': 'Database analysis tool executed',
-                                                'details': f"Tool: analyze_database_data | Input: {selected_db}, {default_table} | Output: {analysis[:200]}... | Status: Success",
-                                                'timestamp': datetime.now().isoformat(),
-                                                'tool_name': 'analyze_database_data',
-                                                'tool_input': f'{selected_db}, {default_table}',
-                                                'tool_output': analysis
-                                            })
-                                            
-                                            processed_input += f"\n\n[Database Analysis: {analysis}]"
-                                
-                    except Exception as e:
-                        print(f"[Strands SDK] Database tool error: {e}")
+            for outcome in run_tools_concurrently(tool_calls):
+                tool_results.extend(outcome['results'])
+                tools_used.extend(outcome['tools_used'])
+                operations_log.extend(outcome['operations'])
+                for fragment in outcome['context']:
+                    processed_input += f"\n\n{fragment}"
             
             # Enhance system prompt with database tool instructions if database tools are loaded
             enhanced_system_prompt = agent_config['system_prompt']
@@ -2148,8 +2158,7 @@ For database-related queries, ALWAYS call these tools first before providing ana
                 full_prompt = f"{enhanced_system_prompt}\n\nUser: {input_text}\n\nAssistant:"
             
             # Call Ollama API directly
-            import requests
-            ollama_response = requests.post(
+            ollama_response = ollama_post(
                 f"{agent_config['host']}/api/generate",
                 json={
                     "model": agent_config['model_id'],
@@ -2160,7 +2169,8 @@ For database-related queries, ALWAYS call these tools first before providing ana
                         "max_tokens": enhanced_config.get('max_tokens', 1000)
                     }
                 },
-                timeout=120
+                timeout=120,
+                priority="interactive"
             )
             
             if ollama_response.status_code == 200:
@@ -3091,7 +3101,7 @@ def get_tool_configuration(tool_name):
                 'configuration': {
                     'search_mode': {
                         'type': 'select',
-                        'options': ['exact', 'fuzzy', 'semantic'],
+                        'options': ['exact', 'prefix', 'fuzzy', 'semantic'],
                         'default': 'exact',
                         'description': 'How to search for memories'
                     }
@@ -3390,6 +3400,23 @@ def get_agent_tool_traces(agent_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/strands-sdk/tools/cache', methods=['GET'])
+def get_tool_cache_stats():
+    """Get hit/miss statistics of the shared tool result cache"""
+    return jsonify({
+        'success': True,
+        'cache': tool_result_cache.get_stats()
+    })
+
+@app.route('/api/strands-sdk/tools/cache', methods=['DELETE'])
+def clear_tool_cache():
+    """Clear the tool result cache, optionally for one tool (?tool=web_search)"""
+    tool_result_cache.invalidate(request.args.get('tool'))
+    return jsonify({
+        'success': True,
+        'cache': tool_result_cache.get_stats()
+    })
+
 @app.route('/api/strands-sdk/tools/categories', methods=['GET'])
 def get_tool_categories():
     """Get tools organized by category"""
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Test the pooled Ollama backends of the A2A service with fake `ollama serve` processes
+"""
+
+import itertools
+import time
+
+from a2a_service import DedicatedOllamaManager, IDLE_BACKEND_TTL, SCALE_UP_QUEUE_DEPTH
+
+class FakeProcess:
+    pids = itertools.count(1000)
+
+    def __init__(self):
+        self.pid = next(self.pids)
+        self.returncode = None
+
+    def poll(self):
+        return self.returncode
+
+    def terminate(self):
+        self.returncode = 0
+
+    def wait(self, timeout=None):
+        return self.returncode
+
+class FakeManager(DedicatedOllamaManager):
+    """Starts fake processes that are ready immediately"""
+
+    def _start_ollama_process(self, port, model):
+        return FakeProcess()
+
+    def _wait_for_ollama_ready(self, instance, timeout=None):
+        instance.status = "running"
+        instance.ready.set()
+
+def saturate(manager, agent_id):
+    """Hold SCALE_UP_QUEUE_DEPTH requests open on the agent's backend, then close them"""
+    requests = [manager.track_request(agent_id) for _ in range(SCALE_UP_QUEUE_DEPTH)]
+    for request in requests:
+        request.__enter__()
+    deadline = time.time() + 5
+    while len(manager.instances) < 2 and time.time() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.05)  # let the scale-up thread finish awaiting readiness
+    for request in requests:
+        request.__exit__(None, None, None)
+
+def test_scale_out_instance_stays_with_its_model():
+    manager = FakeManager()
+    llama = manager.create_dedicated_backend('agent-llama', 'llama3.2')
+    saturate(manager, 'agent-llama')
+    scale_out = [i for i in manager.instances.values() if i.port != llama['port']]
+    assert len(scale_out) == 1 and scale_out[0].model == 'llama3.2' and scale_out[0].pinned
+    mistral = manager.create_dedicated_backend('agent-mistral', 'mistral')
+    assert mistral['port'] not in (llama['port'], scale_out[0].port)
+    assert scale_out[0].model == 'llama3.2'
+    assert sorted(i.model for i in manager.instances.values()) == ['llama3.2', 'llama3.2', 'mistral']
+    manager.stop()
+    print("✅ Scale-out backend is not repurposed for another model")
+
+def test_released_backend_is_repurposed():
+    manager = FakeManager()
+    llama = manager.create_dedicated_backend('agent-llama', 'llama3.2')
+    manager.release_backend('agent-llama')
+    mistral = manager.create_dedicated_backend('agent-mistral', 'mistral')
+    assert mistral['port'] == llama['port'] and len(manager.instances) == 1
+    manager.stop()
+    print("✅ Released warm backend is reused for the next model")
+
+def test_reaper_stops_idle_backends_in_background():
+    manager = FakeManager(reap_interval=0.05)
+    config = manager.create_dedicated_backend('agent-llama', 'llama3.2')
+    instance = manager.instances[config['port']]
+    manager.release_backend('agent-llama')
+    instance.idle_since = instance.last_used = time.time() - IDLE_BACKEND_TTL - 1
+    deadline = time.time() + 2
+    while manager.instances and time.time() < deadline:
+        time.sleep(0.01)
+    assert not manager.instances and instance.process.poll() is not None
+    manager.stop()
+    print("✅ Idle backend reaped without a cleanup request")
+
+if __name__ == "__main__":
+    print("🧪 Testing A2A backend pool...")
+    test_scale_out_instance_stays_with_its_model()
+    test_released_backend_is_repurposed()
+    test_reaper_stops_idle_backends_in_background()
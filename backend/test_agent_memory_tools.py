@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Test that per-agent memory tools keep each agent's memories in its own namespace
+(backed by a temporary memory database)
+"""
+
+import os
+import tempfile
+
+import strands_sdk_api
+from agent_memory_store import AgentMemoryStore
+
+def with_temp_store(check):
+    with tempfile.TemporaryDirectory() as directory:
+        store = AgentMemoryStore(os.path.join(directory, 'agent_memory.db'))
+        original, strands_sdk_api.get_memory_store = strands_sdk_api.get_memory_store, lambda: store
+        try:
+            check()
+        finally:
+            strands_sdk_api.get_memory_store = original
+
+def test_agents_do_not_read_each_others_memories():
+    def check():
+        alice = strands_sdk_api.build_memory_tools('agent-alice')
+        bob = strands_sdk_api.build_memory_tools('agent-bob')
+        alice['memory_store']('favourite_colour', 'green')
+        bob['memory_store']('favourite_colour', 'blue')
+        assert 'green' in alice['memory_retrieve']('favourite_colour')
+        assert 'blue' in bob['memory_retrieve']('favourite_colour')
+        assert 'blue' not in alice['memory_retrieve']('favourite', search_mode='prefix')
+        assert 'green' not in bob['memory_retrieve']('favourite colour', search_mode='fuzzy')
+    with_temp_store(check)
+    print("✅ Two agents storing the same key each read back their own value")
+
+def test_agent_memories_do_not_land_in_default_namespace():
+    def check():
+        strands_sdk_api.build_memory_tools('agent-carol')['memory_store']('secret', 'only carol knows')
+        assert strands_sdk_api.memory_retrieve('secret').startswith('No memory found')
+        assert 'only carol knows' in strands_sdk_api.memory_retrieve('secret', namespace='agent-carol')
+    with_temp_store(check)
+    print("✅ Agent memories stay out of the shared default namespace")
+
+if __name__ == "__main__":
+    print("🧪 Testing per-agent memory tools...")
+    test_agents_do_not_read_each_others_memories()
+    test_agent_memories_do_not_land_in_default_namespace()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Test the agent vector router with a deterministic in-process embedder
+(no Ollama needed)
+"""
+
+import hashlib
+import threading
+import time
+
+import numpy as np
+
+from agent_vector_router import AgentVectorRouter
+
+class StubEmbedRouter(AgentVectorRouter):
+    """Embeds text as a hash-seeded random unit vector; query embeddings are slow to widen races"""
+
+    def _embed(self, texts):
+        rows = []
+        for text in texts:
+            if text.startswith('query'):
+                time.sleep(0.01)
+            seed = int(hashlib.sha1(text.encode('utf-8')).hexdigest()[:8], 16)
+            rows.append(np.random.default_rng(seed).normal(size=16))
+        matrix = np.asarray(rows, dtype=np.float32)
+        return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+def make_agents(prefix, count):
+    return [{'id': f'{prefix}-{index}', 'name': f'{prefix} agent {index}', 'capabilities': [prefix]}
+            for index in range(count)]
+
+def test_rank_scores_every_agent():
+    router = StubEmbedRouter()
+    agents = make_agents('sales', 3)
+    ranked = router.rank('query about sales', agents)
+    assert sorted(agent['id'] for agent, _ in ranked) == ['sales-0', 'sales-1', 'sales-2']
+    assert all(0.0 <= score <= 1.0 for _, score in ranked)
+    print("✅ Every agent scored")
+
+def test_concurrent_refresh_with_different_agent_sets():
+    router = StubEmbedRouter()
+    agent_sets = [make_agents('sales', 3), make_agents('support', 5)]
+    errors = []
+
+    def route(agents, worker):
+        try:
+            for iteration in range(50):
+                ranked = router.rank(f'query {worker} {iteration}', agents)
+                assert {agent['id'] for agent, _ in ranked} == {agent['id'] for agent in agents}
+        except Exception as e:
+            errors.append(repr(e))
+
+    threads = [threading.Thread(target=route, args=(agent_sets[worker % 2], worker)) for worker in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors, errors[:3]
+    print("✅ Concurrent refreshes with different agent sets rank consistently")
+
+if __name__ == "__main__":
+    print("🧪 Testing agent vector router...")
+    test_rank_scores_every_agent()
+    test_concurrent_refresh_with_different_agent_sets()
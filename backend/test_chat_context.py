@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Test chat context trimming (stable prompt prefix) and num_ctx handling in the chat orchestrator
+"""
+
+import chat_orchestrator_api
+from chat_orchestrator_api import PINNED_HEAD_MESSAGES, TRIM_CHUNK_MESSAGES, OllamaClient
+
+SYSTEM = {"role": "system", "content": "You are a helpful assistant."}
+
+def conversation(turns):
+    return [{"role": "user" if index % 2 == 0 else "assistant", "content": f"message {index:03d} " + "x" * 200}
+            for index in range(turns)]
+
+def test_trimmed_prefix_is_stable_between_chunk_drops():
+    budget = 600
+    previous, prefix_changes, trims = None, 0, 0
+    for turns in range(1, 60):
+        messages = [SYSTEM] + conversation(turns)
+        trimmed = OllamaClient.trim_messages(messages, budget)
+        assert OllamaClient.estimate_tokens(trimmed) <= budget
+        assert trimmed[-1] is messages[-1]
+        if trimmed is not messages:
+            trims += 1
+            assert trimmed[:1 + PINNED_HEAD_MESSAGES] == messages[:1 + PINNED_HEAD_MESSAGES]
+        if previous is not None and trimmed[:len(previous)] != previous:
+            prefix_changes += 1
+        previous = trimmed
+    assert trims > 40
+    assert prefix_changes <= trims // (TRIM_CHUNK_MESSAGES - 1) + 1, (prefix_changes, trims)
+    print(f"✅ Prefix changed {prefix_changes} times over {trims} trimmed turns")
+
+def test_oversized_latest_message_is_kept():
+    messages = [SYSTEM] + conversation(5) + [{"role": "user", "content": "y" * 4000}]
+    trimmed = OllamaClient.trim_messages(messages, 600)
+    assert trimmed == [SYSTEM, messages[-1]]
+    print("✅ Latest message kept even when nothing else fits")
+
+class CapturedResponse:
+    status_code = 200
+
+    def json(self):
+        return {"message": {"content": "ok"}, "eval_count": 1, "total_duration": 0}
+
+def captured_options(**kwargs):
+    payloads = []
+    original = chat_orchestrator_api.ollama_post
+    chat_orchestrator_api.ollama_post = lambda url, **call: payloads.append(call["json"]) or CapturedResponse()
+    try:
+        OllamaClient.generate_response("llama3.2", [{"role": "user", "content": "hi"}], **kwargs)
+    finally:
+        chat_orchestrator_api.ollama_post = original
+    return payloads[0]["options"]
+
+def test_num_ctx_only_sent_when_configured():
+    assert "num_ctx" not in captured_options()
+    assert captured_options(num_ctx=8192)["num_ctx"] == 8192
+    print("✅ num_ctx left to the server unless the session sets contextWindow")
+
+if __name__ == "__main__":
+    print("🧪 Testing chat context handling...")
+    test_trimmed_prefix_is_stable_between_chunk_drops()
+    test_oversized_latest_message_is_kept()
+    test_num_ctx_only_sent_when_configured()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test the chat orchestrator's write-behind persistence against a temporary database
+"""
+
+import os
+import tempfile
+
+import chat_orchestrator_api
+from chat_orchestrator_api import ChatOrchestrator, ChatPersistence
+
+class ManualPersistence(ChatPersistence):
+    """Flushes only when asked, so each test controls when rows reach the database"""
+    FLUSH_INTERVAL = 3600
+
+def make_persistence(directory, persistence_class=ManualPersistence):
+    db_path = os.path.join(directory, 'chat.db')
+    original_path, chat_orchestrator_api.DATABASE_PATH = chat_orchestrator_api.DATABASE_PATH, db_path
+    try:
+        chat_orchestrator_api.init_database()
+    finally:
+        chat_orchestrator_api.DATABASE_PATH = original_path
+    persistence = persistence_class(db_path)
+    persistence.write("INSERT INTO chat_sessions (id, chat_type, config) VALUES ('s1', 'direct-llm', '{}')")
+    return persistence
+
+def stored_ids(persistence):
+    return {row[0] for row in persistence.read("SELECT id FROM chat_messages WHERE session_id = 's1'")}
+
+def test_bad_row_is_dropped_after_retries():
+    with tempfile.TemporaryDirectory() as directory:
+        persistence = make_persistence(directory)
+        persistence.enqueue_message('m1', 's1', 'user', 'hello')
+        persistence.flush()
+        persistence.enqueue_message('m1', 's1', 'user', 'duplicate id')  # can never be inserted
+        persistence.enqueue_message('m2', 's1', 'assistant', 'hi')
+        for _ in range(ManualPersistence.MAX_FLUSH_RETRIES):
+            persistence.flush()
+            assert stored_ids(persistence) == {'m1'}
+        persistence.enqueue_message('m3', 's1', 'user', 'later message')
+        persistence.flush()
+        assert stored_ids(persistence) == {'m1', 'm2', 'm3'}
+        assert persistence.pending_messages('s1') == []
+        persistence.enqueue_message('m4', 's1', 'assistant', 'batched again')
+        persistence.flush()
+        assert stored_ids(persistence) == {'m1', 'm2', 'm3', 'm4'}
+        persistence.close()
+    print("✅ A row that keeps failing is dropped without blocking later writes")
+
+class FlushBetweenReads(ManualPersistence):
+    """Commits the buffer right after the first history read, as the writer thread could"""
+
+    def __init__(self, db_path):
+        super().__init__(db_path)
+        self.flushed = False
+
+    def _after_read(self):
+        if not self.flushed:
+            self.flushed = True
+            self.flush()
+
+    def read(self, query, params=()):
+        rows = super().read(query, params)
+        self._after_read()
+        return rows
+
+    def pending_messages(self, session_id):
+        rows = super().pending_messages(session_id)
+        self._after_read()
+        return rows
+
+def test_history_sees_message_flushed_mid_read():
+    with tempfile.TemporaryDirectory() as directory:
+        persistence = make_persistence(directory, FlushBetweenReads)
+        persistence.enqueue_message('m1', 's1', 'user', 'hello')
+        orchestrator = ChatOrchestrator()
+        orchestrator._persistence = persistence
+        rows = orchestrator._fetch_history_rows('s1')
+        assert [row[0] for row in rows] == ['m1'], rows
+        persistence.close()
+    print("✅ History keeps a message committed between the buffer and database reads")
+
+def test_database_opened_on_first_use():
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, 'chat.db')
+        original_path, chat_orchestrator_api.DATABASE_PATH = chat_orchestrator_api.DATABASE_PATH, db_path
+        try:
+            orchestrator = ChatOrchestrator()
+            assert not os.path.exists(db_path)
+            chat_orchestrator_api.init_database()
+            orchestrator.create_session({'type': 'direct-llm'})
+            assert orchestrator.persistence.read("PRAGMA journal_mode")[0][0] == 'wal'
+            orchestrator.persistence.close()
+        finally:
+            chat_orchestrator_api.DATABASE_PATH = original_path
+    print("✅ Constructing the orchestrator leaves the database alone until it is used")
+
+if __name__ == "__main__":
+    print("🧪 Testing chat persistence...")
+    test_bad_row_is_dropped_after_retries()
+    test_history_sees_message_flushed_mid_read()
+    test_database_opened_on_first_use()
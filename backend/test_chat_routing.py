@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Test when the chat orchestrator's agent router trusts the embedding match and when it
+asks the routing LLM (embedding scores and the LLM are replaced by in-process fakes)
+"""
+
+import json
+
+import chat_orchestrator_api
+from chat_orchestrator_api import AGENT_ROUTE_CONFIDENCE, AgentRouter, OllamaClient
+
+AGENTS = [{'id': 'sales', 'name': 'Sales Agent'}, {'id': 'support', 'name': 'Support Agent'}]
+
+class FixedScores:
+    """Stands in for agent_vector_router with fixed similarities"""
+
+    def __init__(self, scores):
+        self.scores = scores
+
+    def rank(self, query, agents):
+        return sorted(((agent, self.scores[agent['id']]) for agent in agents), key=lambda item: item[1], reverse=True)
+
+    is_confident = staticmethod(chat_orchestrator_api.agent_vector_router.is_confident)
+
+def route(scores):
+    """(route, number of routing LLM calls) for a query whose agents score as given"""
+    calls = []
+    def fake_generate(model, messages, **options):
+        calls.append(model)
+        return {'content': json.dumps({'agent_id': 'sales', 'confidence': 0.9, 'reasoning': 'sales question'})}
+    originals = chat_orchestrator_api.agent_vector_router, OllamaClient.generate_response
+    chat_orchestrator_api.agent_vector_router = FixedScores(scores)
+    OllamaClient.generate_response = staticmethod(fake_generate)
+    try:
+        return AgentRouter().analyze_query('what did we sell last quarter?', AGENTS), len(calls)
+    finally:
+        chat_orchestrator_api.agent_vector_router = originals[0]
+        OllamaClient.generate_response = staticmethod(originals[1])
+
+def test_strong_vector_match_skips_routing_llm():
+    routing, llm_calls = route({'sales': 0.82, 'support': 0.4})
+    assert llm_calls == 0
+    assert routing.agent_id == 'sales' and routing.confidence > AGENT_ROUTE_CONFIDENCE
+    print("✅ Strong embedding match routes without the LLM call")
+
+def test_moderate_vector_match_still_asks_routing_llm():
+    routing, llm_calls = route({'sales': 0.6, 'support': 0.3})
+    assert llm_calls == 1
+    assert routing.agent_id == 'sales' and routing.confidence > AGENT_ROUTE_CONFIDENCE
+    print("✅ A 0.6 match below the routing threshold falls back to the routing LLM")
+
+if __name__ == "__main__":
+    print("🧪 Testing chat agent routing...")
+    test_strong_vector_match_skips_routing_llm()
+    test_moderate_vector_match_still_asks_routing_llm()
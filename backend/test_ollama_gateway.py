@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Test the Ollama gateway's per-model admission: priority ordering and load shedding
+"""
+
+import threading
+import time
+
+import ollama_gateway
+import service_metrics
+from ollama_gateway import MAX_QUEUE_DEPTH, AdmissionRejected, ModelAdmission
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.005)
+    assert condition()
+
+def queue(admission, priority, granted, caller_timeout=None):
+    """Start a request that waits for a slot; returns its thread"""
+    def run():
+        try:
+            admission.acquire(priority, caller_timeout)
+            granted.append(priority)
+        except AdmissionRejected as e:
+            granted.append(e.reason)
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+def test_slots_go_to_the_highest_priority_waiter():
+    admission = ModelAdmission('llama3.2', slots=1)
+    admission.service_seconds = 0.01
+    assert admission.acquire('background') == 0.0
+    granted = []
+    for index, priority in enumerate(['background', 'orchestration', 'interactive', 'orchestration']):
+        queue(admission, priority, granted)
+        wait_until(lambda: sum(admission.stats()['queued'].values()) == index + 1)
+    for count in range(1, 5):
+        admission.release(0.01)
+        wait_until(lambda: len(granted) == count)
+    assert granted == ['interactive', 'orchestration', 'orchestration', 'background'], granted
+    assert admission.stats()['in_use'] == 1
+    print("✅ Released slots go to interactive, then orchestration (FIFO), then background")
+
+def test_full_class_queue_is_shed():
+    admission = ModelAdmission('llama3.2', slots=1)
+    admission.service_seconds = 0.001
+    admission.acquire('interactive')
+    granted = []
+    for index in range(MAX_QUEUE_DEPTH['background']):
+        queue(admission, 'background', granted)
+        wait_until(lambda: admission.stats()['queued']['background'] == index + 1)
+    try:
+        admission.acquire('background')
+        assert False, "expected the request to be shed"
+    except AdmissionRejected as e:
+        assert e.reason == 'queue_full'
+    queue(admission, 'interactive', granted)  # other classes still queue
+    wait_until(lambda: admission.stats()['queued']['interactive'] == 1)
+    print("✅ Request beyond the class queue depth is shed")
+
+def test_predicted_wait_over_budget_is_shed():
+    admission = ModelAdmission('llama3.2', slots=1)
+    admission.acquire('interactive')
+    admission.service_seconds = ollama_gateway.MAX_QUEUE_WAIT_SECONDS['background'] + 1
+    started = time.perf_counter()
+    try:
+        admission.acquire('background')
+        assert False, "expected the request to be shed"
+    except AdmissionRejected as e:
+        assert e.reason == 'predicted_wait' and e.retry_after > ollama_gateway.MAX_QUEUE_WAIT_SECONDS['background']
+    assert time.perf_counter() - started < 0.5
+    print("✅ Request whose predicted wait exceeds its budget is shed immediately")
+
+def test_wait_timeout_releases_nothing():
+    original = ollama_gateway.MIN_QUEUE_WAIT_SECONDS
+    ollama_gateway.MIN_QUEUE_WAIT_SECONDS = 0.05
+    try:
+        admission = ModelAdmission('llama3.2', slots=1)
+        admission.service_seconds = 0.01
+        admission.acquire('interactive')
+        granted = []
+        queue(admission, 'orchestration', granted, caller_timeout=0.06).join(2)
+        assert granted == ['wait_timeout'], granted
+        admission.release(0.01)
+        assert admission.stats()['in_use'] == 0 and admission.acquire('background') == 0.0
+    finally:
+        ollama_gateway.MIN_QUEUE_WAIT_SECONDS = original
+    print("✅ Request that waits out its budget is shed and its slot is not leaked")
+
+def test_route_through_gateway():
+    original = service_metrics.OLLAMA_GATEWAY_URL
+    service_metrics.OLLAMA_GATEWAY_URL = 'http://localhost:11435'
+    try:
+        url, headers = service_metrics.ollama_route('http://localhost:11434/api/generate', 'background', 30)
+        assert url == 'http://localhost:11435/api/generate'
+        assert headers == {service_metrics.PRIORITY_HEADER: 'background', service_metrics.TIMEOUT_HEADER: '30'}
+        assert service_metrics.ollama_route('http://localhost:5023/api/generate', 'background', 30) == \
+            ('http://localhost:5023/api/generate', {})
+    finally:
+        service_metrics.OLLAMA_GATEWAY_URL = original
+    assert service_metrics.ollama_route('http://localhost:11434/api/generate', 'background') == \
+        ('http://localhost:11434/api/generate', {})
+    print("✅ Daemon calls are rewritten to the gateway; pooled backends are not")
+
+if __name__ == "__main__":
+    print("🧪 Testing Ollama gateway admission...")
+    test_slots_go_to_the_highest_priority_waiter()
+    test_full_class_queue_is_shed()
+    test_predicted_wait_over_budget_is_shed()
+    test_wait_timeout_releases_nothing()
+    test_route_through_gateway()
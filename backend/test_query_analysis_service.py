@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Test that the chat, main and unified orchestrators share one canonical query analysis
+(the LLM is an in-process fake; the cache lives in a temporary database)
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+
+import chat_orchestrator_api
+import query_analysis_service
+from main_system_orchestrator import MainSystemOrchestrator
+from query_analysis_service import QueryAnalysisService
+from unified_system_orchestrator import UnifiedSystemOrchestrator
+
+CANONICAL = {
+    "user_intent": "calculate a sum and write a poem about it",
+    "query_type": "multi_domain",
+    "domain": "math_and_creative",
+    "complexity_level": "moderate",
+    "agentic_workflow_pattern": "multi_agent",
+    "orchestration_strategy": "sequential",
+    "task_nature": "sequential",
+    "domain_analysis": {"primary_domain": "analytical", "secondary_domains": ["creative"], "is_multi_domain": True},
+    "required_expertise": ["mathematics", "creative_writing"],
+    "workflow_steps": [{"step": 1, "task": "Calculate 12 + 30", "required_expertise": "mathematics"},
+                       {"step": 2, "task": "Write a poem about the result", "required_expertise": "creative_writing"}],
+    "confidence": 0.9,
+    "reasoning": "A calculation feeds a creative task"
+}
+
+class FakeResponse:
+    status_code = 200
+
+    def json(self):
+        return {"response": json.dumps(CANONICAL)}
+
+def with_fake_llm(check):
+    """Run check with a fresh analysis service whose LLM calls are counted; returns the call count"""
+    calls = []
+    with tempfile.TemporaryDirectory() as directory:
+        originals = query_analysis_service._analysis_service, query_analysis_service.ollama_post
+        query_analysis_service._analysis_service = QueryAnalysisService(os.path.join(directory, 'analysis.db'))
+        query_analysis_service.ollama_post = lambda url, **call: calls.append(call["json"]["model"]) or FakeResponse()
+        try:
+            check()
+        finally:
+            query_analysis_service._analysis_service, query_analysis_service.ollama_post = originals
+    return calls
+
+def test_front_doors_share_one_analysis():
+    results = {}
+    def check():
+        main = MainSystemOrchestrator()
+        main.orchestrator_model = "qwen3:1.7b"
+        results['chat'] = chat_orchestrator_api.analyze_query_with_llm("Calculate 12 + 30 and then write a poem", "s1")
+        results['main'] = main.analyze_query_with_llm("calculate 12 + 30 and then write a poem?")
+        results['unified'] = asyncio.run(UnifiedSystemOrchestrator()._analyze_query_with_llm(
+            "Calculate 12 + 30 and then write a poem", "s2"))
+    calls = with_fake_llm(check)
+
+    assert calls == ["qwen3:1.7b"], calls
+    assert results['chat']['agentic_workflow_pattern'] == 'multi_agent'
+    assert results['chat']['query_type'] == 'general' and results['chat']['orchestration_strategy'] == 'sequential'
+    assert results['main']['workflow_steps'] == ["Calculate 12 + 30", "Write a poem about the result"]
+    assert results['main']['domain_analysis']['is_multi_domain'] is True
+    six_stage = results['unified']['analysis']
+    assert six_stage['stage_1_query_analysis']['domain'] == 'math_and_creative'
+    assert results['unified']['execution_strategy'] == 'sequential' and results['unified']['confidence'] == 0.9
+    print("✅ Chat, main and unified orchestrators adapt one shared LLM analysis")
+
+def test_models_are_analyzed_separately():
+    def check():
+        service = query_analysis_service.get_query_analysis_service()
+        for model in ("qwen3:1.7b", "granite4:micro", "qwen3:1.7b"):
+            assert service.analyze_canonical("What is 5G?", model=model)['query_type'] == 'multi_domain'
+    assert with_fake_llm(check) == ["qwen3:1.7b", "granite4:micro"]
+    print("✅ The canonical analysis is keyed by model")
+
+if __name__ == "__main__":
+    print("🧪 Testing shared query analysis...")
+    test_front_doors_share_one_analysis()
+    test_models_are_analyzed_separately()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Test the /metrics endpoint of an instrumented service (the A2A service on port 5008):
+route/status labels and both exposition formats
+"""
+
+from a2a_service import app
+from service_metrics import OPENMETRICS_CONTENT_TYPE, PROMETHEUS_TEXT_CONTENT_TYPE
+
+def request_count(body, method, route, status):
+    prefix = f'agentos_http_requests_total{{method="{method}",route="{route}",status="{status}"}} '
+    for line in body.splitlines():
+        if line.startswith(prefix):
+            return float(line[len(prefix):])
+    return 0.0
+
+def scrape(client, accept=''):
+    response = client.get('/metrics', headers={'Accept': accept} if accept else {})
+    assert response.status_code == 200
+    return response
+
+def test_requests_labelled_by_route_template_and_status():
+    client = app.test_client()
+    before = scrape(client).get_data(as_text=True)
+    assert client.get('/api/a2a/health').status_code == 200
+    assert client.post('/api/a2a/agents/agent-1/update-capabilities', json={}).status_code == 404
+    assert client.post('/api/a2a/agents/agent-2/update-capabilities', json={}).status_code == 404
+    assert client.get('/api/a2a/no-such-endpoint').status_code == 404
+    after = scrape(client).get_data(as_text=True)
+
+    expected = [('GET', '/api/a2a/health', 200, 1),
+                ('POST', '/api/a2a/agents/<agent_id>/update-capabilities', 404, 2),
+                ('GET', 'unmatched', 404, 1)]
+    for method, route, status, count in expected:
+        assert request_count(after, method, route, status) - request_count(before, method, route, status) == count, route
+    assert 'agent-1' not in after and 'agent-2' not in after
+    assert 'agentos_service_info{service="a2a-service"} 1' in after
+    print("✅ Requests counted per route template and status (ids stay out of labels)")
+
+def test_exposition_formats():
+    client = app.test_client()
+    client.get('/api/a2a/health')
+    text = scrape(client)
+    assert text.headers['Content-Type'] == PROMETHEUS_TEXT_CONTENT_TYPE
+    body = text.get_data(as_text=True)
+    assert '# TYPE agentos_http_requests_total counter' in body
+    assert '# TYPE agentos_http_request_duration_seconds histogram' in body
+    assert 'agentos_http_request_duration_seconds_bucket{method="GET",route="/api/a2a/health",le="+Inf"}' in body
+    assert '# EOF' not in body
+
+    openmetrics = scrape(client, 'application/openmetrics-text; version=1.0.0')
+    assert openmetrics.headers['Content-Type'] == OPENMETRICS_CONTENT_TYPE
+    body = openmetrics.get_data(as_text=True)
+    assert '# TYPE agentos_http_requests counter' in body
+    assert body.rstrip('\n').endswith('# EOF')
+    print("✅ Prometheus text and OpenMetrics exposition negotiated from Accept")
+
+if __name__ == "__main__":
+    print("🧪 Testing service metrics endpoint...")
+    test_requests_labelled_by_route_template_and_status()
+    test_exposition_formats()
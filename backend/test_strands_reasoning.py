@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Test sequential reasoning's reflection rounds, early exits and LLM budget
+with a scripted LLM client (no Ollama needed)
+"""
+
+from strands_api import StrandsReasoningEngine
+
+AGENT = {'model': 'llama3.2', 'role': 'an analyst', 'chain_of_thought_depth': 4, 'max_llm_calls': 10}
+
+class ScriptedLLM:
+    """Answers assessment, planning, reflection and final prompts from scripted responses"""
+
+    def __init__(self, plan, reflections):
+        self.plan = plan
+        self.reflections = list(reflections)
+        self.calls = []
+
+    def generate_response_sync(self, model, prompt, **kwargs):
+        if 'Assess this task' in prompt:
+            kind, response = 'assessment', 'A simple lookup. CONFIDENCE: 0.95'
+        elif 'Plan your approach' in prompt:
+            kind, response = 'planning', self.plan
+        elif 'Reflect on your progress' in prompt:
+            kind = 'reflection'
+            response = self.reflections.pop(0) if self.reflections else 'Keep refining. CHANGES NEEDED: yes'
+        else:
+            kind, response = 'final', 'Final answer'
+        self.calls.append(kind)
+        return {'response': response, 'tokens_used': 10, 'success': True}
+
+def run(plan, reflections, **config):
+    engine = StrandsReasoningEngine()
+    engine.llm_client = ScriptedLLM(plan, reflections)
+    result = engine.execute_sequential_reasoning({**AGENT, **config}, 'Compare Q1 and Q2 revenue')
+    assert result['success'], result
+    assert result['llm_calls'] == len(engine.llm_client.calls)
+    return result, engine.llm_client.calls
+
+REFLECTIVE_PLAN = 'I will think it through and reflect on each step. CONFIDENCE: 0.3'
+
+FINDINGS = ['Q2 revenue excludes the March refunds', 'EMEA figures use the old exchange rate',
+            'The Q1 baseline double counts renewals', 'Seasonality explains most of the gap',
+            'Two deals slipped from Q1 into Q2', 'Marketing spend moved between quarters']
+
+def distinct_reflections(count):
+    return [f'{FINDINGS[index % len(FINDINGS)]}. CHANGES NEEDED: yes CONFIDENCE: 0.{index % 5}'
+            for index in range(count)]
+
+def test_default_plan_reflects_once():
+    result, calls = run(REFLECTIVE_PLAN, distinct_reflections(10))
+    assert calls == ['planning', 'reflection', 'final'], calls
+    assert result['early_exit'] is None and result['llm_calls_saved'] == 0
+    print("✅ Sequential reasoning reflects once by default")
+
+def test_opt_in_rounds_capped_by_depth():
+    result, calls = run(REFLECTIVE_PLAN, distinct_reflections(10), reflection_rounds=10)
+    assert calls == ['planning'] + ['reflection'] * 4 + ['final'], calls
+    assert len(result['reflection_steps']) == 4
+    assert result['early_exit'] is None and result['llm_calls_saved'] == 0
+    print("✅ reflection_rounds opts into more rounds, up to chain_of_thought_depth")
+
+def test_early_exits_counted_against_default_plan():
+    cases = {
+        'no_change': distinct_reflections(1) + ['Looks right. CHANGES NEEDED: no CONFIDENCE: 0.5'],
+        'confident_reflection': distinct_reflections(1) + ['Solid. CHANGES NEEDED: yes CONFIDENCE: 0.95'],
+        'converged': ['Recheck the totals for Q2. CHANGES NEEDED: yes CONFIDENCE: 0.4'] * 2,
+    }
+    for reason, reflections in cases.items():
+        result, calls = run(REFLECTIVE_PLAN, reflections, reflection_rounds=4)
+        assert calls == ['planning', 'reflection', 'reflection', 'final'], (reason, calls)
+        assert result['early_exit'] == reason, (reason, result['early_exit'])
+        assert result['llm_calls_saved'] == 0, reason  # still more than the default plan's one reflection
+    result, calls = run('Reflect, then answer. CONFIDENCE: 0.9', [])
+    assert calls == ['planning', 'final'] and result['early_exit'] == 'confident_plan'
+    assert result['llm_calls_saved'] == 1
+    print("✅ Early exits stop extra rounds; only skipping the default reflection counts as saved")
+
+def test_budget_caps_reflections():
+    result, calls = run(REFLECTIVE_PLAN, distinct_reflections(10), reflection_rounds=4, max_llm_calls=4)
+    assert calls == ['planning', 'reflection', 'reflection', 'final'], calls
+    assert result['early_exit'] == 'budget' and result['llm_calls_saved'] == 0
+    assert result['budget']['llm_calls'] == 4
+    result, calls = run(REFLECTIVE_PLAN, distinct_reflections(10), max_llm_calls=2)
+    assert calls == ['planning', 'final'], calls
+    assert result['early_exit'] == 'budget' and result['llm_calls_saved'] == 1
+    print("✅ LLM call budget stops reflection and keeps the final answer")
+
+def test_direct_answer_saves_the_skipped_sequential_plan():
+    for reflection_enabled, saved in ((True, 2), (False, 1)):
+        engine = StrandsReasoningEngine()
+        engine.llm_client = ScriptedLLM(REFLECTIVE_PLAN, [])
+        result = engine.execute_adaptive_reasoning({**AGENT, 'reflection_enabled': reflection_enabled}, 'What is 2 + 2?')
+        assert engine.llm_client.calls == ['assessment', 'final'] and result['strategy'] == 'direct', result
+        assert result['llm_calls_saved'] == saved, (reflection_enabled, result['llm_calls_saved'])
+    print("✅ A direct adaptive answer counts the planning, reflection and final calls it replaced")
+
+if __name__ == "__main__":
+    print("🧪 Testing Strands sequential reasoning...")
+    test_default_plan_reflects_once()
+    test_opt_in_rounds_capped_by_depth()
+    test_early_exits_counted_against_default_plan()
+    test_budget_caps_reflections()
+    test_direct_answer_saves_the_skipped_sequential_plan()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Test the shared tool result cache against a local HTTP stub
+(no external endpoints are contacted)
+"""
+
+import json
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from tool_result_cache import ToolResultCache
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Counts requests; /empty returns no results, everything else a slow abstract"""
+    hits = 0
+    hits_lock = threading.Lock()
+
+    def do_GET(self):
+        with StubHandler.hits_lock:
+            StubHandler.hits += 1
+        time.sleep(0.2)
+        body = {} if self.path.startswith('/empty') else {'Abstract': f'result for {self.path}'}
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+def start_stub():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def fetch_abstract(base_url, path):
+    with urllib.request.urlopen(f"{base_url}{path}", timeout=5) as response:
+        return json.loads(response.read()).get('Abstract', '')
+
+def test_tool_result_cache():
+    server = start_stub()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    cache = ToolResultCache()
+
+    def search(path, **kwargs):
+        key = cache.make_key('web_search', path)
+        return cache.get_or_compute('web_search', key, lambda: fetch_abstract(base_url, path), **kwargs)
+
+    try:
+        print("🧪 Testing tool result cache...")
+
+        # Repeated calls are served from the cache
+        StubHandler.hits = 0
+        assert search('/nvidia') == 'result for /nvidia'
+        assert search('/nvidia') == 'result for /nvidia'
+        assert StubHandler.hits == 1, StubHandler.hits
+        print("✅ Positive results cached")
+
+        # Concurrent callers for the same key share one upstream request
+        StubHandler.hits = 0
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(search('/stampede'))) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert results == ['result for /stampede'] * 10
+        assert StubHandler.hits == 1, StubHandler.hits
+        assert cache.get_stats()['coalesced_waits'] >= 1
+        print("✅ Stampede coalesced into one request")
+
+        # Empty results are cached with the (shorter) negative TTL
+        StubHandler.hits = 0
+        assert search('/empty', negative_ttl=0.3) == ''
+        assert search('/empty', negative_ttl=0.3) == ''
+        assert StubHandler.hits == 1, StubHandler.hits
+        time.sleep(0.4)
+        search('/empty', negative_ttl=0.3)
+        assert StubHandler.hits == 2, StubHandler.hits
+        print("✅ Negative results cached and expired")
+
+        # Failures are never cached
+        calls = []
+        def failing():
+            calls.append(1)
+            raise ConnectionError("stub down")
+        for _ in range(2):
+            try:
+                cache.get_or_compute('web_search', cache.make_key('web_search', '/down'), failing)
+            except ConnectionError:
+                pass
+        assert len(calls) == 2
+        print("✅ Errors not cached")
+
+        print(f"📊 Cache stats: {cache.get_stats()}")
+    finally:
+        server.shutdown()
+
+if __name__ == "__main__":
+    test_tool_result_cache()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Test that the Strands SDK web_search tool caches answers and empty results but never errors
+(DuckDuckGo is replaced by an in-process fake)
+"""
+
+import strands_sdk_api
+from tool_result_cache import tool_result_cache
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+    def json(self):
+        return self.data
+
+class FakeDuckDuckGo:
+    """Stands in for the requests module: answers, returns nothing, or fails"""
+
+    def __init__(self, mode):
+        self.mode = mode
+        self.calls = 0
+
+    def get(self, url, timeout=None):
+        self.calls += 1
+        if self.mode == 'error':
+            raise ConnectionError("network unreachable")
+        if self.mode == 'empty':
+            return FakeResponse({})
+        return FakeResponse({'Abstract': 'Python is a programming language.', 'AbstractURL': 'https://python.org'})
+
+def search_twice(mode, query='python programming'):
+    tool_result_cache.invalidate()
+    fake = FakeDuckDuckGo(mode)
+    original, strands_sdk_api.requests = strands_sdk_api.requests, fake
+    try:
+        first = strands_sdk_api.web_search(query)
+        calls_after_first = fake.calls
+        second = strands_sdk_api.web_search(query)
+    finally:
+        strands_sdk_api.requests = original
+        tool_result_cache.invalidate()
+    return first, second, calls_after_first, fake.calls
+
+def test_answer_is_cached():
+    first, second, calls_after_first, calls = search_twice('ok')
+    assert first.startswith('Summary: Python') and second == first
+    assert calls == calls_after_first
+    print("✅ Search answer served from the cache")
+
+def test_request_errors_are_not_cached():
+    first, second, calls_after_first, calls = search_twice('error')
+    assert first.startswith('Web search failed') and second.startswith('Web search failed'), first
+    assert calls > calls_after_first
+    print("✅ Failed search retried on the next call instead of negatively cached")
+
+def test_empty_result_is_negatively_cached():
+    first, second, calls_after_first, calls = search_twice('empty')
+    assert first.startswith('I searched for') and second == first
+    assert calls == calls_after_first
+    print("✅ Genuinely empty search negatively cached")
+
+if __name__ == "__main__":
+    print("🧪 Testing web_search caching...")
+    test_answer_is_cached()
+    test_request_errors_are_not_cached()
+    test_empty_result_is_negatively_cached()
@@ -4,12 +4,13 @@ Enhanced Text Cleaning Service
 LLM-powered contextual formatter that intelligently parses and structures all outputs
 """
 
-import requests
 import json
 import logging
 from typing import Dict, Any, Optional, List
 from datetime import datetime
 
+from service_metrics import ollama_post
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -38,8 +39,9 @@ class TextCleaningService:
     def _call_formatting_llm(self, prompt: str) -> str:
         """Call the formatting LLM"""
         try:
-            response = requests.post(
+            response = ollama_post(
                 f"{self.ollama_url}/api/generate",
+                priority="background",
                 json={
                     "model": self.cleaning_model,
                     "prompt": prompt,
@@ -337,8 +339,9 @@ Cleaned output:"""
     def _call_cleaning_llm(self, prompt: str) -> str:
         """Call the cleaning LLM"""
         try:
-            response = requests.post(
+            response = ollama_post(
                 f"{self.ollama_url}/api/generate",
+                priority="background",
                 json={
                     "model": self.cleaning_model,
                     "prompt": prompt,
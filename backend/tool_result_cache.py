@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Tool Result Cache
+Shared in-process cache for external-facing agent tools (web_search, weather_api, http_request)
+
+- per-tool TTLs, with a shorter TTL for negative (empty/error) results
+- LRU bound on the number of entries
+- stampede protection: concurrent callers for the same key wait for a single
+  in-flight computation instead of all hitting the external endpoint
+"""
+
+import functools
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from service_metrics import register_cache
+
+# Seconds a result stays fresh, per tool
+TOOL_CACHE_TTLS = {
+    'web_search': 900,
+    'duckduckgo': 900,
+    'weather_api': 600,
+    'http_request': 60,
+}
+DEFAULT_TOOL_CACHE_TTL = 300
+
+# Empty results and errors are cached too, but only briefly
+TOOL_CACHE_NEGATIVE_TTLS = {
+    'web_search': 120,
+    'duckduckgo': 120,
+    'http_request': 15,
+}
+DEFAULT_TOOL_CACHE_NEGATIVE_TTL = 60
+
+def is_empty_result(result: Any) -> bool:
+    """Default negative-result check: None, empty or whitespace-only"""
+    return result is None or (isinstance(result, str) and not result.strip())
+
+class ToolResultCache:
+    """Thread-safe TTL + LRU cache with single-flight computation per key"""
+
+    def __init__(self, max_entries: int = 2000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, value, is_negative)
+        self._in_flight: Dict[tuple, threading.Event] = {}
+        self._lock = threading.Lock()
+        self.stats = {
+            'hits': 0,
+            'negative_hits': 0,
+            'misses': 0,
+            'coalesced_waits': 0,
+            'evictions': 0,
+        }
+
+    @staticmethod
+    def make_key(tool_name: str, *parts: Any) -> tuple:
+        return (tool_name, json.dumps(parts, sort_keys=True, default=str))
+
+    def _lookup(self, key: tuple):
+        """Return (found, value, is_negative); caller holds the lock"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None, False
+        expires_at, value, negative = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            return False, None, False
+        self._entries.move_to_end(key)
+        return True, value, negative
+
+    def get_or_compute(self, tool_name: str, key: tuple, compute: Callable[[], Any],
+                       ttl: Optional[float] = None, negative_ttl: Optional[float] = None,
+                       is_negative: Callable[[Any], bool] = is_empty_result) -> Any:
+        """Return the cached result for key, computing it at most once across concurrent callers"""
+        while True:
+            with self._lock:
+                found, value, negative = self._lookup(key)
+                if found:
+                    self.stats['negative_hits' if negative else 'hits'] += 1
+                    return value
+                waiter = self._in_flight.get(key)
+                if waiter is None:
+                    self._in_flight[key] = threading.Event()
+                    self.stats['misses'] += 1
+                    break
+                self.stats['coalesced_waits'] += 1
+            # Another thread is computing this key; wait and re-check.
+            # If it failed nothing was cached and the loop elects a new leader.
+            waiter.wait()
+
+        try:
+            value = compute()
+            negative = is_negative(value)
+            if negative:
+                lifetime = negative_ttl if negative_ttl is not None else TOOL_CACHE_NEGATIVE_TTLS.get(tool_name, DEFAULT_TOOL_CACHE_NEGATIVE_TTL)
+            else:
+                lifetime = ttl if ttl is not None else TOOL_CACHE_TTLS.get(tool_name, DEFAULT_TOOL_CACHE_TTL)
+            with self._lock:
+                if lifetime > 0:
+                    self._entries[key] = (time.time() + lifetime, value, negative)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+                        self.stats['evictions'] += 1
+            return value
+        finally:
+            with self._lock:
+                event = self._in_flight.pop(key, None)
+            if event:
+                event.set()
+
+    def invalidate(self, tool_name: Optional[str] = None):
+        """Drop all entries, or only those of one tool"""
+        with self._lock:
+            if tool_name is None:
+                self._entries.clear()
+            else:
+                for key in [k for k in self._entries if k[0] == tool_name]:
+                    del self._entries[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.stats['hits'] + self.stats['negative_hits'] + self.stats['misses']
+            return {
+                **self.stats,
+                'entries': len(self._entries),
+                'hit_rate': (self.stats['hits'] + self.stats['negative_hits']) / lookups if lookups else 0.0,
+            }
+
+# Global instance
+tool_result_cache = ToolResultCache()
+register_cache('tool_results', tool_result_cache.get_stats)
+
+def cached_tool(tool_name: str, ttl: Optional[float] = None, negative_ttl: Optional[float] = None,
+                is_negative: Callable[[Any], bool] = is_empty_result, cache: Optional[ToolResultCache] = None):
+    """Decorator caching a tool function's result on its arguments"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            target = cache or tool_result_cache
+            key = target.make_key(tool_name, args, kwargs)
+            return target.get_or_compute(tool_name, key, lambda: func(*args, **kwargs),
+                                         ttl=ttl, negative_ttl=negative_ttl, is_negative=is_negative)
+        return wrapper
+    return decorator
@@ -11,7 +11,6 @@ User Query → System Orchestrator (LLM) → Agent Registry → A2A Communicatio
 """
 
 import asyncio
-import json
 import logging
 import time
 import uuid
@@ -19,6 +18,8 @@ from datetime import datetime
 from typing import Dict, List, Any, Optional
 import requests
 
+from query_analysis_service import get_query_analysis_service
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -174,104 +175,72 @@ class UnifiedSystemOrchestrator:
                 del self.active_sessions[session_id]
     
     async def _analyze_query_with_llm(self, query: str, session_id: str) -> Dict[str, Any]:
-        """Stage 1: Use 6-stage LLM analysis"""
+        """Stage 1: 6-stage analysis built from the shared canonical query analysis"""
         try:
             logger.info(f"[{session_id}] 🔍 Performing 6-stage LLM analysis")
             
-            # Create comprehensive analysis prompt
-            analysis_prompt = f"""You are an advanced AI orchestrator. Analyze this user query using a 6-stage approach:
-
-QUERY: "{query}"
-
-Provide analysis in this JSON format:
-{{
-    "stage_1_query_analysis": {{
-        "user_intent": "what the user wants to achieve",
-        "domain": "primary domain (math, creative, technical, etc.)",
-        "complexity": "simple|moderate|complex",
-        "required_expertise": ["list of expertise areas needed"],
-        "context_requirements": "what context is needed"
-    }},
-    "stage_2_sequence_definition": {{
-        "workflow_steps": [
-            {{"step": 1, "task": "first task", "required_expertise": "skills needed"}},
-            {{"step": 2, "task": "second task", "required_expertise": "skills needed"}}
-        ],
-        "execution_flow": "how tasks should be executed"
-    }},
-    "stage_3_execution_strategy": {{
-        "strategy": "single|sequential|parallel",
-        "reasoning": "why this strategy is best",
-        "estimated_duration": "estimated time in seconds"
-    }},
-    "stage_4_agent_analysis": {{
-        "agent_requirements": [
-            {{"capability": "mathematics", "priority": "high", "reasoning": "needed for calculations"}},
-            {{"capability": "creative_writing", "priority": "medium", "reasoning": "needed for creative content"}}
-        ]
-    }},
-    "stage_5_agent_matching": {{
-        "matching_criteria": "how to match agents to tasks",
-        "preferred_agent_types": ["calculator", "creative_assistant"]
-    }},
-    "stage_6_orchestration_plan": {{
-        "final_strategy": "sequential",
-        "agent_sequence": "calculator -> creative_assistant",
-        "confidence": 0.9,
-        "success_criteria": "how to measure success"
-    }}
-}}"""
-
-            # Call LLM for analysis
-            response = requests.post(
-                f"{OLLAMA_BASE_URL}/api/generate",
-                json={
-                    "model": self.orchestrator_model,
-                    "prompt": analysis_prompt,
-                    "stream": False,
-                    "options": {
-                        "temperature": 0.2,
-                        "top_p": 0.9,
-                        "max_tokens": 2000
-                    }
-                },
-                timeout=60
+            analysis = get_query_analysis_service().analyze_canonical(
+                query,
+                model=self.orchestrator_model,
+                timeout=60,
+                ollama_url=OLLAMA_BASE_URL
             )
             
-            if response.status_code == 200:
-                result = response.json()
-                llm_response = result.get('response', '').strip()
-                
-                # Parse JSON response
-                try:
-                    # Extract JSON from response
-                    import re
-                    json_match = re.search(r'\{.*\}', llm_response, re.DOTALL)
-                    if json_match:
-                        json_text = json_match.group()
-                        analysis = json.loads(json_text)
-                        
-                        logger.info(f"[{session_id}] ✅ 6-stage analysis completed")
-                        return {
-                            "success": True,
-                            "analysis": analysis,
-                            "execution_strategy": analysis.get('stage_3_execution_strategy', {}).get('strategy', 'sequential'),
-                            "confidence": analysis.get('stage_6_orchestration_plan', {}).get('confidence', 0.8)
-                        }
-                    else:
-                        raise ValueError("No JSON found in LLM response")
-                except (json.JSONDecodeError, ValueError) as e:
-                    logger.error(f"[{session_id}] Failed to parse LLM analysis: {e}")
-                    # Fallback to simple analysis
-                    return self._fallback_analysis(query, session_id)
-            else:
-                logger.error(f"[{session_id}] LLM analysis failed: {response.status_code}")
+            if analysis is None:
+                logger.error(f"[{session_id}] Failed to parse LLM analysis: no JSON found in LLM response")
+                # Fallback to simple analysis
                 return self._fallback_analysis(query, session_id)
+            
+            analysis = self._to_six_stage_analysis(analysis)
+            logger.info(f"[{session_id}] ✅ 6-stage analysis completed")
+            return {
+                "success": True,
+                "analysis": analysis,
+                "execution_strategy": analysis.get('stage_3_execution_strategy', {}).get('strategy', 'sequential'),
+                "confidence": analysis.get('stage_6_orchestration_plan', {}).get('confidence', 0.8)
+            }
                 
         except Exception as e:
             logger.error(f"[{session_id}] Error in LLM analysis: {e}")
             return self._fallback_analysis(query, session_id)
     
+    @staticmethod
+    def _to_six_stage_analysis(analysis: Dict[str, Any]) -> Dict[str, Any]:
+        """Arrange the shared canonical query analysis into the 6-stage layout"""
+        strategy = analysis.get('orchestration_strategy', 'sequential')
+        if strategy == 'hybrid':
+            strategy = 'sequential'
+        expertise = analysis.get('required_expertise') or []
+        return {
+            "stage_1_query_analysis": {
+                "user_intent": analysis.get('user_intent', ''),
+                "domain": analysis.get('domain', 'general'),
+                "complexity": analysis.get('complexity_level', 'simple'),
+                "required_expertise": expertise
+            },
+            "stage_2_sequence_definition": {
+                "workflow_steps": analysis.get('workflow_steps') or [],
+                "execution_flow": analysis.get('task_nature', 'direct')
+            },
+            "stage_3_execution_strategy": {
+                "strategy": strategy,
+                "reasoning": analysis.get('reasoning', '')
+            },
+            "stage_4_agent_analysis": {
+                "agent_requirements": [
+                    {"capability": capability, "priority": "high" if index == 0 else "medium"}
+                    for index, capability in enumerate(expertise)
+                ]
+            },
+            "stage_5_agent_matching": {
+                "preferred_agent_types": expertise
+            },
+            "stage_6_orchestration_plan": {
+                "final_strategy": strategy,
+                "confidence": analysis.get('confidence', 0.8)
+            }
+        }
+    
     def _fallback_analysis(self, query: str, session_id: str) -> Dict[str, Any]:
         """Fallback analysis when LLM fails"""
         query_lower = query.lower()
@@ -12,6 +12,7 @@ import time
 import uuid
 from datetime import datetime
 from unified_system_orchestrator import unified_orchestrator
+from service_metrics import instrument_flask
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -20,6 +21,7 @@ logger = logging.getLogger(__name__)
 # Initialize Flask app
 app = Flask(__name__)
 CORS(app, origins="*")
+instrument_flask(app, "working-orchestration")
 
 def direct_agent_execution(query: str):
     """Direct agent execution - bypass slow LLM analysis"""
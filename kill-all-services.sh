@@ -88,6 +88,7 @@ kill_by_pattern "python.*strands_sdk_api" "Strands SDK API"
 kill_by_pattern "python.*chat_orchestrator_api" "Chat Orchestrator API"
 kill_by_pattern "python.*strands_api" "Strands API"
 kill_by_pattern "python.*ollama_api" "Ollama API"
+kill_by_pattern "python.*ollama_gateway" "Ollama Gateway"
 kill_by_pattern "python.*rag_api" "RAG API"
 kill_by_pattern "python.*real_rag_api" "Real RAG API"
 kill_by_pattern "python.*simple_api" "Simple API"
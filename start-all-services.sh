@@ -113,7 +113,7 @@ echo "🧹 Cleaning up any existing services..."
 
 # Additional cleanup for common ports
 echo "   Cleaning up common ports..."
-for port in 5002 5003 5004 5005 5006 5008 5009 5010 5011 5014 5018 5019 5020 5021 5173; do
+for port in 11435 5002 5003 5004 5005 5006 5008 5009 5010 5011 5014 5018 5019 5020 5021 5173; do
     if lsof -ti:$port >/dev/null 2>&1; then
         echo "   Killing process on port $port..."
         lsof -ti:$port | xargs kill -9 2>/dev/null || true
@@ -157,6 +157,26 @@ else
     wait_for_service 11434 "Ollama Core"
 fi
 
+# Start Ollama Gateway (per-model admission control in front of Ollama Core)
+echo -e "${BLUE}3b. Starting Ollama Gateway...${NC}"
+if ! check_port 11435; then
+    echo -e "${RED}   Port 11435 is still in use!${NC}"
+    exit 1
+fi
+
+echo "   Starting Ollama Gateway on port 11435..."
+cd backend
+source venv/bin/activate
+python ollama_gateway.py >ollama_gateway.log 2>&1 &
+GATEWAY_PID=$!
+cd ..
+
+wait_for_service 11435 "Ollama Gateway"
+if [ $? -eq 0 ]; then
+    # Services started below route their Ollama calls through the gateway
+    export OLLAMA_GATEWAY_URL="http://localhost:11435"
+fi
+
 # Start RAG API (Document Chat)
 echo -e "${BLUE}2. Starting RAG API (Document Chat)...${NC}"
 if ! check_port 5003; then
@@ -454,6 +474,7 @@ echo "=========================="
 # Check all services
 services=(
     "11434:Ollama Core"
+    "11435:Ollama Gateway"
     "5002:Ollama API"
     "5003:RAG API"
     "5004:Strands API"
@@ -500,6 +521,7 @@ if [ "$all_running" = true ]; then
     echo "   • RAG API:                     http://localhost:5003  (Document Chat)"
     echo "   • Ollama API:                  http://localhost:5002  (Terminal & Agents)"
     echo "   • Ollama Core:                 http://localhost:11434 (LLM Engine)"
+    echo "   • Ollama Gateway:              http://localhost:11435 (Admission Control)"
     echo ""
     echo "🔧 Enhanced Services:"
     echo "   • A2A Observability API:       http://localhost:5018  (Observability & Tracing)"